@@ -0,0 +1,74 @@
+"""
+Batch-Hilfsfunktionen für den CLIP NSFW Service
+Paralleles Dekodieren und speicherabhängige Batchgröße
+"""
+
+import os
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Geschätzter Speicherbedarf eines Bildes im Forward-Pass (ViT-B/32, fp32)
+MEMORY_PER_IMAGE = int(os.getenv("NSFW_MEMORY_PER_IMAGE_MB", 48)) * 1024 * 1024
+# Anteil des freien Speichers, den ein Batch belegen darf
+MEMORY_FRACTION = float(os.getenv("NSFW_MEMORY_FRACTION", 0.5))
+MAX_BATCH_SIZE = int(os.getenv("NSFW_MAX_BATCH_SIZE", 64))
+DECODE_WORKERS = int(os.getenv("NSFW_DECODE_WORKERS", min(8, os.cpu_count() or 1)))
+
+
+def adaptive_batch_size(
+    free_bytes: int,
+    bytes_per_image: int = MEMORY_PER_IMAGE,
+    memory_fraction: float = MEMORY_FRACTION,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> int:
+    """
+    Wählt die Batchgröße aus dem verfügbaren Speicher.
+
+    Args:
+        free_bytes: Freier GPU- bzw. Arbeitsspeicher in Bytes
+        bytes_per_image: Geschätzter Bedarf eines Bildes im Forward-Pass
+        memory_fraction: Nutzbarer Anteil des freien Speichers
+        max_batch_size: Obergrenze
+
+    Returns:
+        Batchgröße zwischen 1 und ``max_batch_size``
+    """
+    fitting = int(free_bytes * memory_fraction) // max(bytes_per_image, 1)
+    return max(1, min(max_batch_size, fitting))
+
+
+def decode_rgb(image_data: bytes) -> np.ndarray:
+    """Dekodiert ein Bild nach RGB (ValueError bei ungültigem Format)."""
+    image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Ungültiges Bildformat")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def decode_images(
+    images: Sequence[bytes], executor: Optional[Executor] = None
+) -> Tuple[List[Optional[np.ndarray]], List[Optional[str]]]:
+    """
+    Dekodiert Bilder, bei Angabe eines Executors parallel.
+
+    OpenCV gibt beim Dekodieren den GIL frei, Threads skalieren daher.
+
+    Returns:
+        Tuple aus RGB-Bildern und Fehlermeldungen (jeweils ``None`` für
+        erfolgreich bzw. fehlgeschlagen dekodierte Bilder)
+    """
+
+    def decode(image_data: bytes) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        try:
+            return decode_rgb(image_data), None
+        except Exception as e:
+            return None, str(e)
+
+    if executor is None or len(images) < 2:
+        decoded = [decode(image_data) for image_data in images]
+    else:
+        decoded = list(executor.map(decode, images))
+    return [image for image, _ in decoded], [error for _, error in decoded]
@@ -1,12 +1,14 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
-import clip
-import cv2
 import numpy as np
+import psutil
 import torch
+from batching import DECODE_WORKERS, adaptive_batch_size, decode_images
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from PIL import Image
 from pydantic import BaseModel
 from transformers import CLIPModel, CLIPProcessor
@@ -24,9 +26,7 @@ app = FastAPI(
     description="Service für NSFW-Erkennung in Bildern und Videos mit CLIP",
 )
 
-# CLIP Modell und Vorverarbeitung laden
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)
 
 # NSFW-Kategorien
 NSFW_CATEGORIES = [
@@ -47,6 +47,14 @@ class ImageAnalysisRequest(BaseModel):
     batch_size: int = 4
 
 
+class BatchAnalysisRequest(BaseModel):
+    images: List[bytes] = []
+    # Einzelbild im Format von ImageAnalysisRequest (abwärtskompatibel)
+    image_data: Optional[bytes] = None
+    threshold: float = 0.5
+    batch_size: Optional[int] = None
+
+
 class NSFWResult(BaseModel):
     is_nsfw: bool
     confidence: float
@@ -64,6 +72,10 @@ class CLIPNSFWService:
     def __init__(self):
         self.model = None
         self.processor = None
+        self.device = device
+        self.text_embeddings = None
+        self.logit_scale = None
+        self.last_batch_size = None
         self.categories = [
             "nude",
             "explicit",
@@ -74,6 +86,8 @@ class CLIPNSFWService:
             "adult content",
             "disturbing content",
         ]
+        # OpenCV gibt beim Dekodieren den GIL frei
+        self.decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS)
         self.initialize_model()
 
     def initialize_model(self):
@@ -87,68 +101,130 @@ class CLIPNSFWService:
             if torch.cuda.is_available():
                 self.model = self.model.cuda()
 
+            # Text-Prompts sind fest: Embeddings einmalig berechnen
+            self.text_embeddings = self._encode_prompts()
+            self.logit_scale = self.model.logit_scale.exp()
+
             logger.info("CLIP NSFW Modell erfolgreich initialisiert")
         except Exception as e:
             logger.error(f"Fehler beim Initialisieren des CLIP Modells: {str(e)}")
             raise
 
-    def analyze_image(self, image_data: bytes, threshold: float = 0.5) -> NSFWResult:
-        try:
-            # Bild in numpy array konvertieren
-            nparr = np.frombuffer(image_data, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-            # Bild für CLIP vorbereiten
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-
-            # Text-Prompts für NSFW-Kategorien
-            text_inputs = [f"a photo of {category}" for category in self.categories]
-
-            # Bild und Text verarbeiten
-            inputs = self.processor(
-                images=pil_image, text=text_inputs, return_tensors="pt", padding=True
+    def _encode_prompts(self) -> torch.Tensor:
+        """Normalisierte Text-Embeddings der NSFW-Kategorien."""
+        text_inputs = [f"a photo of {category}" for category in self.categories]
+        inputs = self.processor(text=text_inputs, return_tensors="pt", padding=True)
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            embeddings = self.model.get_text_features(**inputs)
+        return embeddings / embeddings.norm(dim=-1, keepdim=True)
+
+    def _free_memory(self) -> int:
+        """Freier Speicher des Inferenz-Geräts in Bytes."""
+        if self.device == "cuda":
+            free, _ = torch.cuda.mem_get_info()
+            return free
+        return psutil.virtual_memory().available
+
+    def _score(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Kategorie-Wahrscheinlichkeiten für einen Batch in einem Forward-Pass.
+
+        Entspricht ``logits_per_image.softmax`` von ``CLIPModel`` mit den
+        vorberechneten Text-Embeddings.
+        """
+        pixel_values = self.processor(
+            images=[Image.fromarray(image) for image in images], return_tensors="pt"
+        )["pixel_values"].to(self.device)
+
+        with torch.no_grad():
+            image_embeddings = self.model.get_image_features(pixel_values=pixel_values)
+            image_embeddings = image_embeddings / image_embeddings.norm(
+                dim=-1, keepdim=True
             )
+            logits = self.logit_scale * image_embeddings @ self.text_embeddings.T
+            probs = logits.softmax(dim=1)
+        return probs.cpu().numpy()
+
+    def _result(self, probs: np.ndarray, threshold: float) -> NSFWResult:
+        category_scores = {
+            category: float(score) for category, score in zip(self.categories, probs)
+        }
+
+        # NSFW-Entscheidung treffen
+        max_score = float(probs.max())
+        return NSFWResult(
+            is_nsfw=max_score > threshold,
+            confidence=max_score,
+            categories=category_scores,
+        )
 
-            # Auf GPU verschieben wenn verfügbar
-            if torch.cuda.is_available():
-                inputs = {k: v.cuda() for k, v in inputs.items()}
-
-            # Inferenz durchführen
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)
-
-            # Ergebnisse verarbeiten
-            probs = probs.cpu().numpy()[0]
-            category_scores = dict(zip(self.categories, probs))
-
-            # NSFW-Entscheidung treffen
-            max_score = max(probs)
-            is_nsfw = max_score > threshold
-
-            return NSFWResult(
-                is_nsfw=is_nsfw, confidence=float(max_score), categories=category_scores
-            )
-
-        except Exception as e:
-            logger.error(f"Fehler bei der NSFW-Analyse: {str(e)}")
-            return NSFWResult(
-                is_nsfw=False, confidence=0.0, categories={}, error=str(e)
-            )
+    def analyze_image(self, image_data: bytes, threshold: float = 0.5) -> NSFWResult:
+        return self.analyze_batch([image_data], threshold)[0]
 
     def analyze_batch(
-        self, images: List[bytes], threshold: float = 0.5
+        self,
+        images: List[bytes],
+        threshold: float = 0.5,
+        batch_size: Optional[int] = None,
     ) -> List[NSFWResult]:
-        try:
-            results = []
-            for image_data in images:
-                result = self.analyze_image(image_data, threshold)
-                results.append(result)
-            return results
-        except Exception as e:
-            logger.error(f"Fehler bei der Batch-Analyse: {str(e)}")
-            raise
+        """
+        Analysiert mehrere Bilder mit gebündelten Forward-Passes.
+
+        Bilder werden parallel dekodiert und in Batches gestapelt. Ohne
+        ``batch_size`` richtet sich die Batchgröße nach dem freien Speicher;
+        bei Speichermangel wird sie halbiert und der Batch wiederholt.
+
+        Args:
+            images: Kodierte Bilder (JPEG/PNG)
+            threshold: Schwellwert für ``is_nsfw``
+            batch_size: Feste Batchgröße (optional)
+
+        Returns:
+            Ein Ergebnis pro Bild in Eingabereihenfolge
+        """
+        decoded, errors = decode_images(images, self.decode_executor)
+        results: List[Optional[NSFWResult]] = [None] * len(images)
+        for index, error in enumerate(errors):
+            if error is not None:
+                logger.error(f"Fehler bei der NSFW-Analyse: {error}")
+                results[index] = NSFWResult(
+                    is_nsfw=False, confidence=0.0, categories={}, error=error
+                )
+
+        valid = [index for index, image in enumerate(decoded) if image is not None]
+        size = batch_size or adaptive_batch_size(self._free_memory())
+        position = 0
+        while position < len(valid):
+            group = valid[position : position + size]
+            try:
+                probs = self._score([decoded[index] for index in group])
+            except RuntimeError as e:
+                if "out of memory" in str(e).lower() and size > 1:
+                    size = max(1, size // 2)
+                    if self.device == "cuda":
+                        torch.cuda.empty_cache()
+                    logger.warning(f"Speichermangel, reduziere Batchgröße auf {size}")
+                    continue
+                logger.error(f"Fehler bei der Batch-Analyse: {str(e)}")
+                probs = None
+                error = str(e)
+            except Exception as e:
+                logger.error(f"Fehler bei der Batch-Analyse: {str(e)}")
+                probs = None
+                error = str(e)
+
+            for offset, index in enumerate(group):
+                if probs is None:
+                    results[index] = NSFWResult(
+                        is_nsfw=False, confidence=0.0, categories={}, error=error
+                    )
+                else:
+                    results[index] = self._result(probs[offset], threshold)
+            position += len(group)
+
+        self.last_batch_size = size
+        return results
 
 
 # Service-Instanz erstellen
@@ -162,6 +238,7 @@ async def health_check():
         "status": "healthy",
         "gpu_available": torch.cuda.is_available(),
         "device": device,
+        "batch_size": adaptive_batch_size(nsfw_service._free_memory()),
     }
 
 
@@ -171,18 +248,50 @@ async def analyze_image(request: ImageAnalysisRequest):
     Analysiert ein Bild auf NSFW-Inhalte
     """
     try:
-        return nsfw_service.analyze_image(request.image_data, request.threshold)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, nsfw_service.analyze_image, request.image_data, request.threshold
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/analyze/batch", response_model=List[NSFWResult])
-async def analyze_batch(request: ImageAnalysisRequest):
+async def analyze_batch(request: BatchAnalysisRequest):
     """
     Analysiert mehrere Bilder auf NSFW-Inhalte
     """
+    images = list(request.images)
+    if request.image_data is not None:
+        images.append(request.image_data)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            nsfw_service.analyze_batch,
+            images,
+            request.threshold,
+            request.batch_size,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/batch_analyze", response_model=List[NSFWResult])
+async def batch_analyze(
+    files: List[UploadFile] = File(...),
+    threshold: float = Form(0.5),
+    batch_size: Optional[int] = Form(None),
+):
+    """
+    Analysiert mehrere hochgeladene Bilder auf NSFW-Inhalte
+    """
+    images = [await file.read() for file in files]
     try:
-        return nsfw_service.analyze_batch([request.image_data], request.threshold)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, nsfw_service.analyze_batch, images, threshold, batch_size
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
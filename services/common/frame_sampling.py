@@ -0,0 +1,292 @@
+"""
+Frame-Sampling-Strategien für die Video-Analyse.
+
+Ein Sampler entscheidet pro Kandidaten-Frame, ob es an die teuren Analyzer
+weitergereicht wird. ``UniformSampler`` entspricht dem bisherigen
+"jedes n-te Frame"-Verhalten, ``SceneChangeSampler`` wählt Keyframes anhand
+von Szenenwechsel-Scores mit Mindest- und Maximalabstand sowie optionalem
+Frame-Budget pro Video.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameSampler(ABC):
+    """Basisklasse für zustandsbehaftete Frame-Sampler (eine Instanz pro Video)."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.fps = 30.0
+        self.total_frames = 0
+        self.candidates = 0
+        self.selected = 0
+
+    def reset(self, fps: float, total_frames: int = 0) -> None:
+        """
+        Setzt den Sampler für ein neues Video zurück.
+
+        Args:
+            fps: Bildrate des Videos
+            total_frames: Gesamtzahl der Frames (0 falls unbekannt)
+        """
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.total_frames = max(0, int(total_frames or 0))
+        self.candidates = 0
+        self.selected = 0
+
+    def select(self, frame_number: int, frame: np.ndarray) -> bool:
+        """
+        Entscheidet, ob ein Kandidaten-Frame analysiert werden soll.
+
+        Args:
+            frame_number: Position des Frames im Video
+            frame: Dekodiertes Frame (BGR)
+
+        Returns:
+            True, wenn das Frame an die Analyzer weitergereicht wird
+        """
+        self.candidates += 1
+        if self._select(frame_number, frame):
+            self.selected += 1
+            return True
+        return False
+
+    @abstractmethod
+    def _select(self, frame_number: int, frame: np.ndarray) -> bool:
+        pass
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Kennzahlen zum Sampling des aktuellen Videos zurück."""
+        reduction = 1.0 - self.selected / self.candidates if self.candidates else 0.0
+        return {
+            "strategy": self.name,
+            "candidates": self.candidates,
+            "selected": self.selected,
+            "reduction": reduction,
+        }
+
+
+class UniformSampler(FrameSampler):
+    """Wählt jedes n-te Kandidaten-Frame (bisheriges Verhalten)."""
+
+    name = "uniform"
+
+    def __init__(self, interval: int = 1) -> None:
+        super().__init__()
+        if interval < 1:
+            raise ValueError("interval muss mindestens 1 sein")
+        self.interval = interval
+
+    def _select(self, frame_number: int, frame: np.ndarray) -> bool:
+        return (self.candidates - 1) % self.interval == 0
+
+
+class SceneChangeSampler(FrameSampler):
+    """
+    Keyframe-Sampler auf Basis von Szenenwechsel-Scores.
+
+    Jedes Kandidaten-Frame wird mit dem zuletzt gewählten Keyframe
+    verglichen. Überschreitet der Score ``threshold``, wird es gewählt.
+    ``min_gap_seconds`` unterdrückt Keyframes in schneller Folge (der Score
+    wird dann gar nicht erst berechnet), ``max_gap_seconds`` erzwingt auch in
+    statischen Passagen regelmäßig ein Frame. Mit ``frame_budget`` wird die
+    Anzahl gewählter Frames pro Video begrenzt und gleichmäßig über die
+    Videolänge verteilt.
+
+    Methoden:
+        - ``histogram``: Bhattacharyya-Distanz der HSV-Histogramme
+        - ``diff``: mittlere absolute Differenz verkleinerter Graustufenbilder
+    """
+
+    name = "scene_change"
+    # Standard-Schwellenwerte je Score-Methode (unterschiedliche Skalen)
+    DEFAULT_THRESHOLDS = {"histogram": 0.3, "diff": 0.08}
+
+    def __init__(
+        self,
+        method: str = "histogram",
+        threshold: Optional[float] = None,
+        min_gap_seconds: float = 0.2,
+        max_gap_seconds: float = 10.0,
+        frame_budget: Optional[int] = None,
+        downscale_size: tuple = (64, 36),
+    ) -> None:
+        """
+        Initialisiert den Szenenwechsel-Sampler.
+
+        Args:
+            method: Score-Methode ("histogram" oder "diff")
+            threshold: Mindest-Score (0-1) für einen Szenenwechsel
+                (Standard: methodenabhängig, siehe DEFAULT_THRESHOLDS)
+            min_gap_seconds: Mindestabstand zwischen zwei Keyframes
+            max_gap_seconds: Maximalabstand, danach wird ein Frame erzwungen
+            frame_budget: Maximale Anzahl gewählter Frames pro Video
+            downscale_size: Auflösung für die Score-Berechnung
+        """
+        super().__init__()
+        if method not in self.DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unbekannte Score-Methode: {method}")
+        if min_gap_seconds > max_gap_seconds:
+            raise ValueError("min_gap_seconds darf max_gap_seconds nicht übersteigen")
+        if frame_budget is not None and frame_budget < 1:
+            raise ValueError("frame_budget muss mindestens 1 sein")
+
+        self.method = method
+        self.threshold = (
+            self.DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+        )
+        self.min_gap_seconds = min_gap_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self.frame_budget = frame_budget
+        self.downscale_size = downscale_size
+
+        self._last_signature: Optional[np.ndarray] = None
+        self._last_frame_number = 0
+        self._min_gap = 0
+        self._max_gap = 0
+        self.scene_changes = 0
+        self.forced = 0
+        self.budget_skips = 0
+
+    def reset(self, fps: float, total_frames: int = 0) -> None:
+        super().reset(fps, total_frames)
+        self._last_signature = None
+        self._last_frame_number = 0
+        self.scene_changes = 0
+        self.forced = 0
+        self.budget_skips = 0
+
+        self._min_gap = int(round(self.min_gap_seconds * self.fps))
+        self._max_gap = max(1, int(round(self.max_gap_seconds * self.fps)))
+        if self.frame_budget and self.total_frames:
+            # Erzwungene Frames allein dürfen das Budget nicht ausschöpfen
+            self._max_gap = max(self._max_gap, self.total_frames // self.frame_budget)
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        small = cv2.resize(frame, self.downscale_size, interpolation=cv2.INTER_AREA)
+        if self.method == "histogram":
+            hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+            hist = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+            return cv2.normalize(hist, hist).astype(np.float32)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.float32)
+
+    def score(self, signature: np.ndarray, reference: np.ndarray) -> float:
+        """Berechnet den Szenenwechsel-Score (0 = identisch, 1 = völlig anders)."""
+        if self.method == "histogram":
+            return float(
+                cv2.compareHist(reference, signature, cv2.HISTCMP_BHATTACHARYYA)
+            )
+        return float(np.mean(np.abs(signature - reference)) / 255.0)
+
+    def _within_budget(self, frame_number: int) -> bool:
+        if not self.frame_budget:
+            return True
+        if self.selected >= self.frame_budget:
+            return False
+        if not self.total_frames:
+            return True
+        # Budget anteilig zur bisherigen Videolänge freigeben, mit kleinem Puffer
+        progress = min(1.0, (frame_number + 1) / self.total_frames)
+        burst = max(1, self.frame_budget // 10)
+        return self.selected < self.frame_budget * progress + burst
+
+    def _accept(self, frame_number: int, signature: np.ndarray) -> bool:
+        self._last_signature = signature
+        self._last_frame_number = frame_number
+        return True
+
+    def _select(self, frame_number: int, frame: np.ndarray) -> bool:
+        if self._last_signature is None:
+            return self._accept(frame_number, self._signature(frame))
+
+        gap = frame_number - self._last_frame_number
+        if gap < self._min_gap:
+            return False
+
+        signature = self._signature(frame)
+        is_scene_change = self.score(signature, self._last_signature) >= self.threshold
+        is_forced = gap >= self._max_gap
+        if not (is_scene_change or is_forced):
+            return False
+
+        if not self._within_budget(frame_number):
+            self.budget_skips += 1
+            return False
+
+        if is_scene_change:
+            self.scene_changes += 1
+        else:
+            self.forced += 1
+        return self._accept(frame_number, signature)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = super().get_statistics()
+        stats.update(
+            {
+                "method": self.method,
+                "scene_changes": self.scene_changes,
+                "forced": self.forced,
+                "budget_skips": self.budget_skips,
+                "frame_budget": self.frame_budget,
+            }
+        )
+        return stats
+
+
+SAMPLING_STRATEGIES = {
+    UniformSampler.name: UniformSampler,
+    SceneChangeSampler.name: SceneChangeSampler,
+}
+
+
+def create_frame_sampler(strategy: str = "uniform", **options: Any) -> FrameSampler:
+    """
+    Erstellt einen Sampler für ein Video.
+
+    Args:
+        strategy: Name der Strategie ("uniform" oder "scene_change")
+        **options: Konstruktor-Argumente der Strategie
+
+    Returns:
+        Neue Sampler-Instanz
+    """
+    try:
+        sampler_cls = SAMPLING_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unbekannte Sampling-Strategie: {strategy}") from None
+    return sampler_cls(**options)
+
+
+def sampling_options_from_env() -> Dict[str, Any]:
+    """
+    Liest die Optionen des Szenenwechsel-Samplers aus Umgebungsvariablen.
+
+    Unterstützt ``SCENE_CHANGE_METHOD``, ``SCENE_CHANGE_THRESHOLD``,
+    ``MIN_KEYFRAME_GAP``, ``MAX_KEYFRAME_GAP`` (Sekunden) und
+    ``FRAME_BUDGET`` (Frames pro Video). Nicht gesetzte Variablen behalten
+    die Standardwerte des Samplers.
+    """
+    converters = {
+        "SCENE_CHANGE_METHOD": ("method", str),
+        "SCENE_CHANGE_THRESHOLD": ("threshold", float),
+        "MIN_KEYFRAME_GAP": ("min_gap_seconds", float),
+        "MAX_KEYFRAME_GAP": ("max_gap_seconds", float),
+        "FRAME_BUDGET": ("frame_budget", int),
+    }
+    options = {}
+    for env_name, (option, convert) in converters.items():
+        value = os.getenv(env_name)
+        if value:
+            options[option] = convert(value)
+    return options
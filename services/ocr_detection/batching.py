@@ -0,0 +1,149 @@
+"""
+Batch-Hilfsfunktionen für den OCR Detection Service
+Binärcontainer für Bildlisten, Verkleinerungsregel und Gruppierung für
+die gebündelte Texterkennung von EasyOCR
+"""
+
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Binärcontainer: Magic, Anzahl Bilder, danach je Bild Länge + Bytes
+CONTAINER_MAGIC = b"IMB1"
+CONTAINER_CONTENT_TYPE = "application/x-image-batch"
+_HEADER = struct.Struct(">4sI")
+_LENGTH = struct.Struct(">I")
+
+BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", 8))
+RECOGNIZER_BATCH_SIZE = int(os.getenv("OCR_RECOGNIZER_BATCH_SIZE", 16))
+MAX_BATCH_IMAGES = int(os.getenv("OCR_MAX_BATCH_IMAGES", 64))
+# Längste Bildkante vor der OCR in Pixeln (0 = nicht verkleinern)
+MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", 1600))
+
+
+def encode_container(images: Iterable[bytes]) -> bytes:
+    """Packt kodierte Bilder (JPEG/PNG) in einen Binärcontainer."""
+    images = list(images)
+    parts = [_HEADER.pack(CONTAINER_MAGIC, len(images))]
+    for image in images:
+        parts.append(_LENGTH.pack(len(image)))
+        parts.append(image)
+    return b"".join(parts)
+
+
+def decode_container(body: bytes, max_images: int = MAX_BATCH_IMAGES) -> List[bytes]:
+    """
+    Zerlegt einen Binärcontainer in die enthaltenen Bilder.
+
+    Args:
+        body: Request-Body im Format von ``encode_container``
+        max_images: Maximale Anzahl Bilder
+
+    Returns:
+        Liste der kodierten Bilder
+    """
+    if len(body) < _HEADER.size:
+        raise ValueError("Binärcontainer zu kurz")
+    magic, count = _HEADER.unpack_from(body)
+    if magic != CONTAINER_MAGIC:
+        raise ValueError("Unbekanntes Containerformat")
+    if count > max_images:
+        raise ValueError(f"Zu viele Bilder: {count} (maximal {max_images})")
+
+    images = []
+    offset = _HEADER.size
+    for index in range(count):
+        if offset + _LENGTH.size > len(body):
+            raise ValueError(f"Bild {index} fehlt im Container")
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        if offset + length > len(body):
+            raise ValueError(f"Bild {index} ist unvollständig")
+        images.append(body[offset : offset + length])
+        offset += length
+    if offset != len(body):
+        raise ValueError("Unerwartete Daten nach dem letzten Bild")
+    return images
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Dekodiert ein Bild (ValueError bei ungültigem Format)."""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Ungültiges Bildformat")
+    return image
+
+
+def downscale(image: np.ndarray, max_side: int = MAX_SIDE) -> Tuple[np.ndarray, float]:
+    """
+    Verkleinert ein Bild, dessen längste Kante ``max_side`` überschreitet.
+
+    Returns:
+        Tuple aus (ggf. verkleinertem) Bild und Skalierungsfaktor
+    """
+    longest = max(image.shape[:2])
+    if not max_side or longest <= max_side:
+        return image, 1.0
+    scale = max_side / longest
+    size = (
+        max(1, round(image.shape[1] * scale)),
+        max(1, round(image.shape[0] * scale)),
+    )
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+
+
+def group_by_shape(images: Sequence[np.ndarray]) -> List[List[int]]:
+    """
+    Gruppiert Bildindizes nach Bildgröße.
+
+    ``readtext_batched`` verarbeitet nur gleich große Bilder ohne sie zu
+    verzerren; Frames eines Videos landen so in derselben Gruppe.
+    """
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    for index, image in enumerate(images):
+        groups.setdefault(image.shape, []).append(index)
+    return list(groups.values())
+
+
+def format_results(
+    raw: Iterable[Tuple[Sequence[Sequence[float]], str, float]],
+    scale: float = 1.0,
+) -> List[Dict]:
+    """
+    Wandelt EasyOCR-Ergebnisse in das Antwortformat um.
+
+    Bounding Boxes werden auf die Koordinaten des Originalbildes
+    zurückgerechnet, falls es für die OCR verkleinert wurde.
+    """
+    results = []
+    for bbox, text, confidence in raw:
+        results.append(
+            {
+                "text": text,
+                "confidence": float(confidence),
+                "bbox": [[float(x) / scale, float(y) / scale] for x, y in bbox],
+                "language": "de" if any(c.isalpha() for c in text) else "unknown",
+            }
+        )
+    return results
+
+
+def batch_plan(
+    images: Sequence[Optional[np.ndarray]], batch_size: int = BATCH_SIZE
+) -> List[List[int]]:
+    """
+    Teilt dekodierbare Bilder in OCR-Aufrufe auf.
+
+    Jeder Aufruf enthält höchstens ``batch_size`` gleich große Bilder;
+    nicht dekodierbare Bilder (``None``) werden übersprungen.
+    """
+    valid = [index for index, image in enumerate(images) if image is not None]
+    plan = []
+    for group in group_by_shape([images[index] for index in valid]):
+        indices = [valid[position] for position in group]
+        for start in range(0, len(indices), batch_size):
+            plan.append(indices[start : start + batch_size])
+    return plan
@@ -1,12 +1,24 @@
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional
 
-import cv2
 import easyocr
-import numpy as np
 import torch
 import uvicorn
-from fastapi import FastAPI, File, UploadFile
+from batching import (
+    BATCH_SIZE,
+    CONTAINER_CONTENT_TYPE,
+    MAX_BATCH_IMAGES,
+    MAX_SIDE,
+    RECOGNIZER_BATCH_SIZE,
+    batch_plan,
+    decode_container,
+    decode_image,
+    downscale,
+    format_results,
+)
+from fastapi import FastAPI, File, Query, Request, UploadFile
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
@@ -32,40 +44,55 @@ class OCRResponse(BaseModel):
     results: List[OCRResult]
     processing_time: float
     image_size: Dict[str, int]
+    timing: Dict[str, float] = {}
+
+
+class BatchImageResult(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    results: List[OCRResult] = []
+    image_size: Optional[Dict[str, int]] = None
+    scale: float = 1.0
+    timing: Dict[str, float] = {}
+    error: Optional[str] = None
+
+
+class BatchOCRResponse(BaseModel):
+    images: List[BatchImageResult]
+    processing_time: float
+    timing: Dict[str, float]
+    ocr_calls: int
 
 
 @app.post("/analyze")
 async def analyze_image(file: UploadFile = File(...)):
     try:
+        start = time.perf_counter()
         # Bild einlesen
         contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if img is None:
+        read_done = time.perf_counter()
+        try:
+            img = decode_image(contents)
+        except ValueError:
             return JSONResponse(
                 status_code=400, content={"error": "Ungültiges Bildformat"}
             )
+        decode_done = time.perf_counter()
 
         # OCR durchführen
         results = reader.readtext(img)
-
-        # Ergebnisse formatieren
-        ocr_results = []
-        for bbox, text, confidence in results:
-            ocr_result = OCRResult(
-                text=text,
-                confidence=float(confidence),
-                bbox=bbox,
-                language="de" if any(c.isalpha() for c in text) else "unknown",
-            )
-            ocr_results.append(ocr_result)
+        ocr_done = time.perf_counter()
 
         # Response erstellen
         response = OCRResponse(
-            results=ocr_results,
-            processing_time=0.0,  # TODO: Implementieren
+            results=[OCRResult(**result) for result in format_results(results)],
+            processing_time=ocr_done - start,
             image_size={"width": img.shape[1], "height": img.shape[0]},
+            timing={
+                "read": read_done - start,
+                "decode": decode_done - read_done,
+                "ocr": ocr_done - decode_done,
+            },
         )
 
         return response
@@ -75,9 +102,118 @@ async def analyze_image(file: UploadFile = File(...)):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+async def _read_batch(request: Request) -> List[tuple]:
+    """Liest Bilder als Multipart (Feld ``files``) oder Binärcontainer."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        uploads = form.getlist("files")
+        if len(uploads) > MAX_BATCH_IMAGES:
+            raise ValueError(
+                f"Zu viele Bilder: {len(uploads)} (maximal {MAX_BATCH_IMAGES})"
+            )
+        return [(upload.filename, await upload.read()) for upload in uploads]
+    if content_type.startswith((CONTAINER_CONTENT_TYPE, "application/octet-stream")):
+        return [(None, data) for data in decode_container(await request.body())]
+    raise ValueError(
+        f"Erwartet multipart/form-data oder {CONTAINER_CONTENT_TYPE}, "
+        f"erhalten: {content_type or 'kein Content-Type'}"
+    )
+
+
+@app.post("/analyze/batch", response_model=BatchOCRResponse)
+async def analyze_batch(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1),
+    max_side: Optional[int] = Query(None, ge=0),
+):
+    """
+    Analysiert mehrere Bilder in gebündelten EasyOCR-Aufrufen.
+
+    Bilder kommen als Multipart-Upload (Feld ``files``) oder als
+    Binärcontainer (``application/x-image-batch``, siehe
+    ``batching.encode_container``). Gleich große Bilder werden in Gruppen
+    von ``batch_size`` an ``readtext_batched`` übergeben; Bilder mit einer
+    Kante über ``max_side`` werden vorher verkleinert und ihre Bounding
+    Boxes auf das Original zurückgerechnet.
+    """
+    start = time.perf_counter()
+    batch_size = batch_size or BATCH_SIZE
+    max_side = MAX_SIDE if max_side is None else max_side
+
+    try:
+        uploads = await _read_batch(request)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    received = time.perf_counter()
+
+    items = []
+    images = []
+    for index, (filename, data) in enumerate(uploads):
+        item = BatchImageResult(index=index, filename=filename)
+        decode_start = time.perf_counter()
+        try:
+            image = decode_image(data)
+        except ValueError as e:
+            item.error = str(e)
+            images.append(None)
+        else:
+            item.image_size = {"width": image.shape[1], "height": image.shape[0]}
+            decoded = time.perf_counter()
+            image, item.scale = downscale(image, max_side)
+            item.timing = {
+                "decode": decoded - decode_start,
+                "downscale": time.perf_counter() - decoded,
+            }
+            images.append(image)
+        items.append(item)
+    prepared = time.perf_counter()
+
+    loop = asyncio.get_running_loop()
+    plan = batch_plan(images, batch_size)
+    try:
+        for indices in plan:
+            ocr_start = time.perf_counter()
+            batch_results = await loop.run_in_executor(
+                None,
+                lambda group=indices: reader.readtext_batched(
+                    [images[index] for index in group],
+                    batch_size=RECOGNIZER_BATCH_SIZE,
+                ),
+            )
+            # Aufteilung der gemeinsamen OCR-Zeit auf die Bilder des Aufrufs
+            share = (time.perf_counter() - ocr_start) / len(indices)
+            for index, raw in zip(indices, batch_results):
+                item = items[index]
+                item.results = [
+                    OCRResult(**result) for result in format_results(raw, item.scale)
+                ]
+                item.timing["ocr"] = share
+    except Exception as e:
+        logger.error(f"Fehler bei der Batch-OCR: {str(e)}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    finished = time.perf_counter()
+
+    return BatchOCRResponse(
+        images=items,
+        processing_time=finished - start,
+        timing={
+            "receive": received - start,
+            "decode": prepared - received,
+            "ocr": finished - prepared,
+        },
+        ocr_calls=len(plan),
+    )
+
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "device": device}
+    return {
+        "status": "healthy",
+        "device": device,
+        "batch_size": BATCH_SIZE,
+        "max_side": MAX_SIDE,
+    }
 
 
 if __name__ == "__main__":
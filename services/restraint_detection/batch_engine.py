@@ -0,0 +1,195 @@
+"""
+Batch-Engine für die CLIP-Bewertung im Restraint Detection Service
+Sammelt Frames einer Anfrage und gleichzeitiger Anfragen in einem kurzen
+Zeitfenster, bereitet sie parallel vor und bewertet sie in einem
+gemeinsamen Forward-Pass.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Maximale Wartezeit auf weitere Frames, bevor ein Batch startet
+BATCH_WINDOW = float(os.getenv("RESTRAINT_BATCH_WINDOW_MS", 5)) / 1000.0
+MAX_BATCH_SIZE = int(os.getenv("RESTRAINT_MAX_BATCH_SIZE", 32))
+PREPROCESS_WORKERS = int(
+    os.getenv("RESTRAINT_PREPROCESS_WORKERS", min(8, os.cpu_count() or 1))
+)
+
+
+class BatchedScoringEngine:
+    """
+    Bündelt Einzelbewertungen zu gestapelten Forward-Passes.
+
+    ``preprocess`` wird pro Frame im Thread-Pool ausgeführt (z.B. der
+    CLIP-Processor), ``score_batch`` erhält die vorbereiteten Eingaben
+    eines Batches und liefert eine Zeile pro Frame (z.B. die
+    Kategorie-Wahrscheinlichkeiten). Forward-Passes laufen nacheinander in
+    einem eigenen Thread, die Vorbereitung des nächsten Batches überlappt
+    mit der Inferenz des vorherigen.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[List[Any]], np.ndarray],
+        preprocess: Optional[Callable[[Any], Any]] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        batch_window: float = BATCH_WINDOW,
+        preprocess_executor: Optional[Executor] = None,
+    ) -> None:
+        """
+        Initialisiert die Engine.
+
+        Args:
+            score_batch: Bewertet eine Liste vorbereiteter Eingaben
+            preprocess: Vorbereitung eines einzelnen Frames (optional)
+            max_batch_size: Maximale Frames pro Forward-Pass
+            batch_window: Sekunden, die auf weitere Frames gewartet wird
+                (0 startet sofort mit den bereits wartenden Frames)
+            preprocess_executor: Thread-Pool für die Vorbereitung
+        """
+        self.score_batch = score_batch
+        self.preprocess = preprocess
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.preprocess_executor = preprocess_executor or ThreadPoolExecutor(
+            max_workers=PREPROCESS_WORKERS
+        )
+        # Ein Thread: Forward-Passes konkurrieren nicht um GPU/CPU
+        self.inference_executor = ThreadPoolExecutor(max_workers=1)
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {
+            "frames": 0,
+            "batches": 0,
+            "max_batch_size_seen": 0,
+            "preprocess_time": 0.0,
+            "inference_time": 0.0,
+        }
+
+    async def score(self, frame: Any) -> np.ndarray:
+        """
+        Bewertet ein Frame zusammen mit gleichzeitig wartenden Frames.
+
+        Returns:
+            Zeile von ``score_batch`` für dieses Frame
+        """
+        future = self._enqueue(frame)
+        if len(self._pending) >= self.max_batch_size or self.batch_window <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.batch_window, self._flush
+            )
+        return await future
+
+    async def score_many(self, frames: Sequence[Any]) -> List[np.ndarray]:
+        """
+        Bewertet alle Frames einer Anfrage ohne Wartefenster.
+
+        Bereits wartende Frames anderer Anfragen werden mitgenommen.
+
+        Returns:
+            Eine Zeile pro Frame in Eingabereihenfolge
+        """
+        futures = [self._enqueue(frame) for frame in frames]
+        self._flush()
+        return list(await asyncio.gather(*futures))
+
+    def _enqueue(self, frame: Any) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((frame, future))
+        return future
+
+    def _flush(self) -> None:
+        """Startet Batches für alle wartenden Frames."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        if self.preprocess is None:
+            ready = [(future, frame) for frame, future in batch]
+        else:
+            # Ein ungültiges Frame lässt nur die eigene Anfrage fehlschlagen
+            inputs = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        self.preprocess_executor, self.preprocess, frame
+                    )
+                    for frame, _ in batch
+                ),
+                return_exceptions=True,
+            )
+            ready = []
+            for (_, future), result in zip(batch, inputs):
+                if isinstance(result, BaseException):
+                    _set_exception(future, result)
+                else:
+                    ready.append((future, result))
+            if not ready:
+                return
+
+        prepared = time.perf_counter()
+        try:
+            scores = await loop.run_in_executor(
+                self.inference_executor,
+                self.score_batch,
+                [value for _, value in ready],
+            )
+        except Exception as e:
+            for future, _ in ready:
+                _set_exception(future, e)
+            return
+        finished = time.perf_counter()
+
+        self.stats["frames"] += len(ready)
+        self.stats["batches"] += 1
+        self.stats["max_batch_size_seen"] = max(
+            self.stats["max_batch_size_seen"], len(ready)
+        )
+        self.stats["preprocess_time"] += prepared - start
+        self.stats["inference_time"] += finished - prepared
+        for (future, _), row in zip(ready, scores):
+            if not future.done():
+                future.set_result(row)
+        # Zu wenige Zeilen: übrige Frames nicht ewig warten lassen
+        for future, _ in ready[len(scores) :]:
+            _set_exception(
+                future,
+                RuntimeError(
+                    f"score_batch lieferte {len(scores)} Zeilen für "
+                    f"{len(ready)} Frames"
+                ),
+            )
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Batch-Anzahl, mittlere Batchgröße und Zeitanteile zurück."""
+        batches = self.stats["batches"]
+        return dict(
+            self.stats,
+            mean_batch_size=self.stats["frames"] / batches if batches else 0.0,
+            max_batch_size=self.max_batch_size,
+            batch_window=self.batch_window,
+        )
+
+    def close(self) -> None:
+        """Beendet die Thread-Pools der Engine."""
+        self.inference_executor.shutdown(wait=False)
+        self.preprocess_executor.shutdown(wait=False)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException) -> None:
+    if not future.done():
+        future.set_exception(error)
@@ -0,0 +1,186 @@
+"""
+Binäre Frame-Annahme für den Restraint Detection Service
+Rohe Bildbytes, Multipart-Uploads und ein längenpräfixierter Container für
+Batches werden ohne Umweg über JSON-Zahlenlisten direkt in NumPy-Puffer
+dekodiert; Parse- und Dekodierzeit werden je Transport erfasst.
+"""
+
+import asyncio
+import os
+import struct
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+# Container im Format des OCR Detection Service (ocr_detection/batching.py):
+# Magic, Anzahl Frames, dann je Frame Länge + Bildbytes
+CONTAINER_MAGIC = b"IMB1"
+CONTAINER_CONTENT_TYPE = "application/x-image-batch"
+_HEADER = struct.Struct(">4sI")
+_LENGTH = struct.Struct(">I")
+
+MAX_BATCH_FRAMES = int(os.getenv("RESTRAINT_MAX_BATCH_FRAMES", 64))
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def encode_frames(frames: Sequence[Buffer]) -> bytes:
+    """Packt kodierte Bilder in einen längenpräfixierten Container."""
+    parts = [_HEADER.pack(CONTAINER_MAGIC, len(frames))]
+    for frame in frames:
+        parts.append(_LENGTH.pack(len(frame)))
+        parts.append(bytes(frame))
+    return b"".join(parts)
+
+
+def split_frames(body: Buffer, max_frames: int = MAX_BATCH_FRAMES) -> List[memoryview]:
+    """
+    Zerlegt einen Container in die enthaltenen Bilder.
+
+    Die Bilder werden nicht kopiert, sondern als Ausschnitte des
+    Request-Bodys zurückgegeben.
+
+    Args:
+        body: Request-Body im Format von ``encode_frames``
+        max_frames: Maximale Anzahl Frames
+
+    Raises:
+        ValueError: Bei fehlerhaftem Header, zu vielen oder abgeschnittenen
+            Frames oder überzähligen Bytes
+    """
+    view = memoryview(body)
+    if len(view) < _HEADER.size:
+        raise ValueError("Frame-Container zu kurz")
+    magic, count = _HEADER.unpack_from(view)
+    if magic != CONTAINER_MAGIC:
+        raise ValueError("Ungültiger Frame-Container")
+    if count > max_frames:
+        raise ValueError(f"Zu viele Frames: {count} (maximal {max_frames})")
+
+    frames = []
+    offset = _HEADER.size
+    for index in range(count):
+        if offset + _LENGTH.size > len(view):
+            raise ValueError(f"Frame {index}: Längenangabe fehlt")
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > len(view):
+            raise ValueError(f"Frame {index}: abgeschnitten")
+        frames.append(view[offset : offset + length])
+        offset += length
+    if offset != len(view):
+        raise ValueError("Überzählige Bytes nach dem letzten Frame")
+    return frames
+
+
+def decode_frame(data: Buffer) -> np.ndarray:
+    """Dekodiert ein Bild nach BGR (ValueError bei ungültigem Format)."""
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR) if buffer.size else None
+    if image is None:
+        raise ValueError("Ungültiges Bildformat")
+    return image
+
+
+async def decode_frames(
+    payloads: Sequence[Buffer], executor: Optional[Executor] = None
+) -> List[np.ndarray]:
+    """
+    Dekodiert Bilder parallel im Executor, ohne die Event-Loop zu blockieren.
+
+    OpenCV gibt beim Dekodieren den GIL frei, Threads skalieren daher.
+
+    Raises:
+        ValueError: Mit Index des ersten ungültigen Bildes
+    """
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(loop.run_in_executor(executor, decode_frame, data) for data in payloads),
+        return_exceptions=True,
+    )
+    for index, result in enumerate(results):
+        if isinstance(result, Exception):
+            raise ValueError(f"Frame {index}: {result}")
+    return list(results)
+
+
+def server_timing(parse_time: float, decode_time: float) -> str:
+    """Server-Timing-Header mit Parse- und Dekodierzeit in Millisekunden."""
+    return f"parse;dur={parse_time * 1000:.3f}, decode;dur={decode_time * 1000:.3f}"
+
+
+class IngestStats:
+    """
+    Zähler für Anfragen, Frames, Bytes und Zeiten je Transport.
+
+    Die Parse-Zeit umfasst Lesen und Zerlegen des Bodys bis zu den
+    Bildbytes, die Dekodierzeit das Dekodieren in NumPy-Arrays.
+    """
+
+    def __init__(self) -> None:
+        self.transports: Dict[str, Dict[str, float]] = {}
+
+    def record(
+        self,
+        transport: str,
+        frames: int,
+        payload_bytes: int,
+        parse_time: float,
+        decode_time: float,
+    ) -> Dict[str, Any]:
+        """
+        Erfasst eine Anfrage.
+
+        Returns:
+            Zeiten dieser Anfrage in Millisekunden
+        """
+        stats = self.transports.setdefault(
+            transport,
+            {
+                "requests": 0,
+                "frames": 0,
+                "bytes": 0,
+                "parse_time": 0.0,
+                "decode_time": 0.0,
+            },
+        )
+        stats["requests"] += 1
+        stats["frames"] += frames
+        stats["bytes"] += payload_bytes
+        stats["parse_time"] += parse_time
+        stats["decode_time"] += decode_time
+        return {
+            "transport": transport,
+            "frames": frames,
+            "bytes": payload_bytes,
+            "parse_ms": round(parse_time * 1000, 3),
+            "decode_ms": round(decode_time * 1000, 3),
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Summen und mittlere Zeiten pro Anfrage je Transport zurück."""
+        result = {}
+        for transport, stats in self.transports.items():
+            requests = stats["requests"]
+            result[transport] = dict(
+                stats,
+                mean_parse_ms=stats["parse_time"] * 1000 / requests,
+                mean_decode_ms=stats["decode_time"] * 1000 / requests,
+            )
+        return result
+
+
+class Stopwatch:
+    """Misst aufeinanderfolgende Abschnitte mit ``time.perf_counter``."""
+
+    def __init__(self) -> None:
+        self._last = time.perf_counter()
+
+    def lap(self) -> float:
+        """Sekunden seit dem Start bzw. der letzten Runde."""
+        now = time.perf_counter()
+        elapsed, self._last = now - self._last, now
+        return elapsed
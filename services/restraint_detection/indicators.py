@@ -0,0 +1,490 @@
+"""
+Kategorie- und Indikator-Vokabular des Restraint Detection Services
+Das Indikator-Vokabular wird einmalig in einen Aho-Corasick-Automaten
+übersetzt; ein Durchlauf über einen Text liefert alle enthaltenen
+Indikatoren und ihre Gruppen.
+"""
+
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Sequence, Tuple
+
+# Kategorien für Fesselungen und Materialien
+CATEGORIES = [
+    # Grundlegende Fesselungsarten
+    "rope restraint",
+    "handcuffs",
+    "leather restraints",
+    "tape restraint",
+    "rope",
+    "leather",
+    "metal chains",
+    "plastic wrap",
+    "tape",
+    "restraints",
+    "cuffs",
+    "gags",
+    "blindfolds",
+    "collars",
+    # BDSM-spezifische Materialien
+    "shibari rope",
+    "jute rope",
+    "hemp rope",
+    "nylon rope",
+    "cotton rope",
+    "leather cuffs",
+    "leather collar",
+    "leather harness",
+    "leather straps",
+    "metal cuffs",
+    "metal collar",
+    "metal chains",
+    "metal rings",
+    "rope bondage",
+    "rope harness",
+    "rope suspension",
+    # Shibari-Techniken und Knoten
+    "shibari pattern",
+    "kinbaku",
+    "rope knot",
+    "rope tie",
+    "diamond pattern",
+    "karada",
+    "takate kote",
+    "ebi",
+    "tsuri",
+    "suspension",
+    "partial suspension",
+    # BDSM-Ausrüstung
+    "spreader bar",
+    "restraint system",
+    "bondage furniture",
+    "suspension frame",
+    "bondage bed",
+    "bondage chair",
+    "wrist cuffs",
+    "ankle cuffs",
+    "thigh cuffs",
+    "nipple clamps",
+    "clamps",
+    "restraint straps",
+    # Materialien und Texturen
+    "rough rope",
+    "smooth rope",
+    "waxed rope",
+    "treated rope",
+    "soft leather",
+    "hard leather",
+    "studded leather",
+    "metal chain",
+    "metal ring",
+    "metal hook",
+    "synthetic rope",
+    "natural fiber rope",
+    # Sicherheitsausrüstung
+    "safety scissors",
+    "rope cutter",
+    "safety release",
+    "emergency release",
+    "quick release",
+    "safety equipment",
+    # Fesselungsart und Kontext
+    "self bondage",
+    "partner bondage",
+    "solo bondage",
+    "suspension bondage",
+    "partial suspension",
+    "ground bondage",
+    "escape proof",
+    "escape possible",
+    "safety risk",
+    # Anatomische und physische Faktoren
+    "wrist position",
+    "ankle position",
+    "neck position",
+    "body tension",
+    "muscle strain",
+    "circulation risk",
+    "breathing restriction",
+    "pressure points",
+    # Verfügbare Hilfsmittel
+    "safety tools nearby",
+    "no safety tools",
+    "emergency phone",
+    "ice release",
+    "timer release",
+    "magnetic release",
+    # Emotionale und mentale Faktoren
+    "distressed person",
+    "calm person",
+    "panicked person",
+    "experienced person",
+    "inexperienced person",
+    "safeword available",
+    "no safeword",
+    "communication possible",
+    # Sicherheitsrisiken
+    "high risk",
+    "medium risk",
+    "low risk",
+    "unsafe position",
+    "safe position",
+    "circulation check",
+    "breathing check",
+    "pressure check",
+    "temperature check",
+    # Befreiungsmöglichkeiten
+    "self release possible",
+    "self release impossible",
+    "partner release needed",
+    "emergency release needed",
+    "time based release",
+    "condition based release",
+    # Fesselungskontext und Zustimmung
+    "consensual bondage",
+    "non-consensual bondage",
+    "forced restraint",
+    "voluntary submission",
+    "involuntary submission",
+    "coerced submission",
+    "resistance",
+    "struggle",
+    "compliance",
+    "cooperation",
+    "active participation",
+    "passive submission",
+    "forced position",
+    # Körperliche und emotionale Anzeichen
+    "physical resistance",
+    "verbal resistance",
+    "emotional distress",
+    "fear",
+    "anxiety",
+    "panic",
+    "calm acceptance",
+    "muscle tension",
+    "body language",
+    "facial expression",
+    "tears",
+    "sweating",
+    "rapid breathing",
+    "hyperventilation",
+    # Zwangsmittel und Überwältigung
+    "weapon present",
+    "threat",
+    "intimidation",
+    "physical force",
+    "overpowering",
+    "restraint marks",
+    "struggle marks",
+    "defensive wounds",
+    "escape attempts",
+    # Einvernehmliche Zeichen
+    "safeword established",
+    "aftercare available",
+    "trust present",
+    "communication",
+    "negotiation",
+    "consent check",
+    "comfort check",
+    "boundary respect",
+    "scene negotiation",
+    # Notfallindikatoren
+    "immediate danger",
+    "medical emergency",
+    "psychological crisis",
+    "trauma response",
+    "dissociation",
+    "freeze response",
+    "fight response",
+    "flight response",
+    "fawn response",
+    # Alleinlassensituationen
+    "abandoned person",
+    "left alone",
+    "unattended person",
+    "no supervision",
+    "no assistance nearby",
+    "isolated location",
+    "remote area",
+    "locked room",
+    "soundproof room",
+    "no escape route",
+    "trapped situation",
+    "time limit exceeded",
+    # Überwachungs- und Sicherheitsaspekte
+    "supervision present",
+    "spotter available",
+    "assistant nearby",
+    "monitoring system",
+    "camera present",
+    "baby monitor",
+    "intercom system",
+    "emergency button",
+    "panic button",
+    # Zeitliche Faktoren
+    "extended duration",
+    "time limit",
+    "timer present",
+    "delayed release",
+    "scheduled check",
+    "regular monitoring",
+    "check-in system",
+    # Umgebungsfaktoren
+    "safe environment",
+    "unsafe environment",
+    "hazardous conditions",
+    "temperature risk",
+    "ventilation risk",
+    "fire hazard",
+    "flood risk",
+    "structural risk",
+    "environmental danger",
+    # Kommunikationsmöglichkeiten
+    "communication device",
+    "phone nearby",
+    "walkie talkie",
+    "signal system",
+    "visual signal",
+    "audible signal",
+    "emergency contact",
+    "neighbor alert",
+    "community watch",
+]
+
+# Sicherheitsregeln und Risikobewertung
+SAFETY_RULES = {
+    "high_risk_factors": [
+        "suspension without spotter",
+        "no safety tools",
+        "breathing restriction",
+        "neck pressure",
+        "circulation risk",
+        "distressed person",
+        "inexperienced person",
+        "no safeword",
+        "no communication",
+        "non-consensual bondage",
+        "forced restraint",
+        "physical resistance",
+        "weapon present",
+        "threat",
+        "intimidation",
+        "immediate danger",
+        "medical emergency",
+        "psychological crisis",
+        "trauma response",
+        "abandoned person",
+        "left alone",
+        "unattended person",
+        "no supervision",
+        "no assistance nearby",
+        "isolated location",
+        "locked room",
+        "soundproof room",
+        "no escape route",
+        "trapped situation",
+        "time limit exceeded",
+        "unsafe environment",
+        "hazardous conditions",
+        "temperature risk",
+        "ventilation risk",
+        "fire hazard",
+    ],
+    "medium_risk_factors": [
+        "partial suspension",
+        "limited safety tools",
+        "some pressure points",
+        "moderate tension",
+        "limited communication",
+        "emotional distress",
+        "anxiety",
+        "panic",
+        "struggle marks",
+        "escape attempts",
+        "dissociation",
+        "remote area",
+        "extended duration",
+        "delayed release",
+        "limited supervision",
+        "partial monitoring",
+        "intermittent checks",
+    ],
+    "low_risk_factors": [
+        "ground bondage",
+        "safety tools available",
+        "good circulation",
+        "clear communication",
+        "experienced person",
+        "safeword established",
+        "aftercare available",
+        "trust present",
+        "communication",
+        "negotiation",
+        "supervision present",
+        "spotter available",
+        "assistant nearby",
+        "monitoring system",
+        "camera present",
+        "regular monitoring",
+        "check-in system",
+        "safe environment",
+        "communication device",
+        "emergency contact",
+    ],
+}
+
+# Teilzeichenketten, an denen Kategorien als Indikatoren erkannt werden.
+# Innerhalb eines Paares hat die erste Gruppe Vorrang (consent vor
+# non_consent, supervision vor abandonment).
+INDICATOR_GROUPS = {
+    "consent": [
+        "consensual",
+        "voluntary",
+        "safeword",
+        "aftercare",
+        "trust",
+        "communication",
+        "negotiation",
+        "cooperation",
+    ],
+    "non_consent": [
+        "non-consensual",
+        "forced",
+        "resistance",
+        "struggle",
+        "threat",
+        "intimidation",
+        "weapon",
+        "coerced",
+    ],
+    "supervision": [
+        "supervision",
+        "spotter",
+        "assistant",
+        "monitoring",
+        "camera",
+        "regular",
+        "check-in",
+        "safe environment",
+    ],
+    "abandonment": [
+        "abandoned",
+        "alone",
+        "unattended",
+        "no supervision",
+        "isolated",
+        "remote",
+        "locked",
+        "soundproof",
+    ],
+}
+
+
+def risk_levels(safety_rules: Mapping[str, Sequence[str]]) -> Dict[str, str]:
+    """
+    Ordnet Kategorien ihrer Risikostufe zu ("high", "medium" oder "low").
+
+    Steht eine Kategorie in mehreren Listen, gilt die höchste Stufe.
+    """
+    levels = {}
+    for level in ("low", "medium", "high"):
+        for category in safety_rules.get(f"{level}_risk_factors", ()):
+            levels[category] = level
+    return levels
+
+
+class IndicatorMatcher:
+    """
+    Mehrfach-Mustersuche über das Indikator-Vokabular (Aho-Corasick).
+
+    Der Automat wird einmal aufgebaut; ``find`` und ``groups`` laufen in
+    einem Durchlauf über den Text, unabhängig von der Anzahl der Muster.
+    Ergebnisse für ein bekanntes Vokabular (z.B. die Kategorien) werden
+    beim Aufbau vorberechnet.
+    """
+
+    def __init__(
+        self,
+        groups: Mapping[str, Iterable[str]],
+        vocabulary: Iterable[str] = (),
+    ) -> None:
+        """
+        Baut den Automaten auf.
+
+        Args:
+            groups: Gruppenname -> Muster (Teilzeichenketten)
+            vocabulary: Texte, deren Gruppen vorab berechnet werden
+        """
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, str]]] = [[]]
+        for name, patterns in groups.items():
+            for pattern in patterns:
+                node = 0
+                for char in pattern:
+                    if char not in goto[node]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[node][char] = len(goto) - 1
+                    node = goto[node][char]
+                outputs[node].append((name, pattern))
+
+        # Fehlerverweise in Breitensuche; Ausgaben der Suffixe übernehmen
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        order = []
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+                queue.append(child)
+
+        # Vollständige Übergangstabelle: ein Dict-Zugriff pro Zeichen
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        for node in order:
+            delta[node] = dict(delta[fail[node]])
+            delta[node].update(goto[node])
+
+        self._delta = delta
+        self._outputs = [tuple(output) for output in outputs]
+        self._group_outputs = [
+            frozenset(name for name, _ in output) for output in outputs
+        ]
+        self._vocabulary: Dict[str, FrozenSet[str]] = {}
+        for text in vocabulary:
+            self._vocabulary[text] = self._scan_groups(text)
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Findet alle Indikatoren in einem Text.
+
+        Returns:
+            (Gruppe, Muster) je Vorkommen, nach Endposition geordnet
+        """
+        delta, outputs = self._delta, self._outputs
+        state, found = 0, []
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found.extend(outputs[state])
+        return found
+
+    def groups(self, text: str) -> FrozenSet[str]:
+        """Gibt die Gruppen aller im Text enthaltenen Indikatoren zurück."""
+        cached = self._vocabulary.get(text)
+        if cached is not None:
+            return cached
+        return self._scan_groups(text)
+
+    def _scan_groups(self, text: str) -> FrozenSet[str]:
+        delta, outputs = self._delta, self._group_outputs
+        state, found = 0, frozenset()
+        for char in text:
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
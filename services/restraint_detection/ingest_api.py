@@ -0,0 +1,167 @@
+"""
+HTTP-Endpunkte der binären Frame-Annahme des Restraint Detection Service
+Rohe Bildbytes, Multipart-Uploads und Frame-Container werden dekodiert und
+an die übergebenen Analysefunktionen des Detectors weitergereicht.
+"""
+
+import logging
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, File, HTTPException, Request, Response, UploadFile
+from frame_ingest import (
+    MAX_BATCH_FRAMES,
+    IngestStats,
+    Stopwatch,
+    decode_frames,
+    server_timing,
+    split_frames,
+)
+
+logger = logging.getLogger(__name__)
+
+AnalyzeFrame = Callable[[np.ndarray], Awaitable[Dict[str, Any]]]
+AnalyzeBatch = Callable[[List[np.ndarray]], Awaitable[List[Dict[str, Any]]]]
+
+
+class FrameIngest:
+    """Dekodiert die Bildbytes einer Anfrage und erfasst die Zeiten je Transport."""
+
+    def __init__(self, executor: Optional[Executor] = None) -> None:
+        """
+        Args:
+            executor: Thread-Pool für das Dekodieren (Standard-Executor bei None)
+        """
+        self.executor = executor
+        self.stats = IngestStats()
+
+    async def __call__(
+        self,
+        transport: str,
+        payloads: List[Any],
+        response: Response,
+        stopwatch: Stopwatch,
+    ) -> Tuple[List[np.ndarray], Dict[str, Any]]:
+        """
+        Dekodiert die Bildbytes und setzt den ``Server-Timing``-Header.
+
+        Die Parse-Zeit reicht vom Start der Stoppuhr bis zum Aufruf.
+
+        Raises:
+            HTTPException: 400 mit Frame-Index bei ungültigen Bildern
+        """
+        parse_time = stopwatch.lap()
+        try:
+            frames = await decode_frames(payloads, self.executor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        decode_time = stopwatch.lap()
+
+        timing = self.stats.record(
+            transport,
+            len(frames),
+            sum(len(payload) for payload in payloads),
+            parse_time,
+            decode_time,
+        )
+        response.headers["Server-Timing"] = server_timing(parse_time, decode_time)
+        return frames, timing
+
+
+def create_ingest_router(
+    analyze_frame: AnalyzeFrame,
+    analyze_batch: AnalyzeBatch,
+    ingest: FrameIngest,
+) -> APIRouter:
+    """
+    Erstellt die Endpunkte für binär übertragene Frames.
+
+    Args:
+        analyze_frame: Analyse eines dekodierten Frames
+        analyze_batch: Analyse mehrerer dekodierter Frames
+        ingest: Dekodierung und Zeiterfassung
+    """
+    router = APIRouter()
+
+    async def analyze_single(
+        transport: str, payload: Any, response: Response, stopwatch: Stopwatch
+    ) -> Dict[str, Any]:
+        (frame,), timing = await ingest(transport, [payload], response, stopwatch)
+        try:
+            result = await analyze_frame(frame)
+        except Exception as e:
+            logger.error("Fehler bei der Frame-Analyse: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+        result["ingest"] = timing
+        return result
+
+    async def analyze_many(
+        transport: str, payloads: List[Any], response: Response, stopwatch: Stopwatch
+    ) -> List[Dict[str, Any]]:
+        frames, _ = await ingest(transport, payloads, response, stopwatch)
+        try:
+            return await analyze_batch(frames)
+        except Exception as e:
+            logger.error("Fehler bei der Batch-Analyse: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @router.post("/analyze/frame/raw")
+    async def analyze_frame_raw(request: Request, response: Response) -> Dict[str, Any]:
+        """
+        Analysiert ein Frame aus dem rohen Request-Body.
+
+        Der Body enthält die kodierten Bildbytes (z.B. ``image/jpeg``).
+        """
+        stopwatch = Stopwatch()
+        body = await request.body()
+        return await analyze_single("raw", body, response, stopwatch)
+
+    @router.post("/analyze/frame/multipart")
+    async def analyze_frame_multipart(
+        response: Response, file: UploadFile = File(...)
+    ) -> Dict[str, Any]:
+        """
+        Analysiert ein per Multipart hochgeladenes Frame.
+
+        Das Multipart-Parsing erfolgt vor dem Handler; die Parse-Zeit umfasst
+        das Lesen der Datei.
+        """
+        stopwatch = Stopwatch()
+        data = await file.read()
+        return await analyze_single("multipart", data, response, stopwatch)
+
+    @router.post("/analyze/batch/multipart")
+    async def analyze_batch_multipart(
+        response: Response, files: List[UploadFile] = File(...)
+    ) -> List[Dict[str, Any]]:
+        """Analysiert mehrere per Multipart hochgeladene Frames als Batch."""
+        stopwatch = Stopwatch()
+        if len(files) > MAX_BATCH_FRAMES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Zu viele Frames: {len(files)} (maximal {MAX_BATCH_FRAMES})",
+            )
+        payloads = [await file.read() for file in files]
+        return await analyze_many("multipart", payloads, response, stopwatch)
+
+    @router.post("/analyze/batch/container")
+    async def analyze_batch_container(
+        request: Request, response: Response
+    ) -> List[Dict[str, Any]]:
+        """
+        Analysiert Frames aus einem längenpräfixierten Container.
+
+        Format wie beim OCR Detection Service (``application/x-image-batch``):
+        ``IMB1``, Anzahl Frames (uint32, Big Endian, höchstens
+        ``MAX_BATCH_FRAMES``), dann je Frame Länge (uint32) und Bildbytes.
+        """
+        stopwatch = Stopwatch()
+        body = await request.body()
+        try:
+            payloads = split_frames(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await analyze_many("container", payloads, response, stopwatch)
+
+    return router
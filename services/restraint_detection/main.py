@@ -8,7 +8,7 @@ import sys
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 import cv2
@@ -16,7 +16,7 @@ import librosa
 import numpy as np
 import redis
 import torch
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from PIL import Image
 from pydantic import BaseModel
 from transformers import (
@@ -28,11 +28,27 @@ from transformers import (
 
 # Lokale Imports - diese müssen nach den sys.path Änderungen stehen
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_engine import MAX_BATCH_SIZE, BatchedScoringEngine
+from frame_ingest import Stopwatch
+from indicators import (
+    CATEGORIES,
+    INDICATOR_GROUPS,
+    SAFETY_RULES,
+    IndicatorMatcher,
+    risk_levels,
+)
+from ingest_api import FrameIngest, create_ingest_router
+from pricing_cache import PricingCache
+from spatial_index import SpatialIndex, find_neighbors
+
 from common.logging_config import ServiceLogger
 
 # Logger initialisieren
 logger = ServiceLogger("restraint_detection")
 
+# Maximaler Zentrumsabstand benachbarter Erkennungen in Pixeln
+NEIGHBOR_RADIUS = 100.0
+
 app = FastAPI(
     title="Restraint Detection Service",
     description="Service zur Erkennung von Fesselungen und verwandten Materialien in Bildern und Videos",
@@ -594,6 +610,8 @@ class InstanceManager:
     def __init__(self):
         self.active_instances = {}  # Dict[str, Dict] - Aktive Instanzen
         self.instance_provider = InstanceProvider()
+        # Preise werden im Hintergrund aktualisiert, nie im Frame-Pfad
+        self.pricing_cache = PricingCache(self.instance_provider.fetch_prices)
         self.max_instances = 5  # Maximale Anzahl paralleler Instanzen
         self.min_utilization = 0.7  # Minimale Auslastung für neue Instanz
         self.max_utilization = 0.9  # Maximale Auslastung vor Skalierung
@@ -637,7 +655,49 @@ class InstanceManager:
         try:
             # Hole aktuelle Preise
             prices = await self.instance_provider.fetch_prices()
+            config = self._instance_config_from_prices(
+                prices, processing_time, required_models, current_load
+            )
+            if config is None:
+                raise ValueError("Keine passende Instanzkonfiguration gefunden")
+            return config
+
+        except Exception as e:
+            logger.log_error(
+                "Fehler bei der Berechnung der optimalen Instanzkonfiguration", error=e
+            )
+            raise
+
+    def get_cached_instance_config(
+        self, processing_time: float, required_models: List[str], current_load: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Bestimmt die optimale Instanzkonfiguration aus dem Preis-Snapshot.
+
+        Führt keine Netzwerkanfragen aus; ohne Snapshot oder passende
+        Instanz wird None zurückgegeben.
+        """
+        if not self.pricing_cache.prices:
+            return None
+        return self.pricing_cache.memoize(
+            ("instance_config", processing_time, tuple(required_models), current_load),
+            lambda: self._instance_config_from_prices(
+                self.pricing_cache.prices,
+                processing_time,
+                required_models,
+                current_load,
+            ),
+        )
 
+    def _instance_config_from_prices(
+        self,
+        prices: Dict[str, Dict[str, Any]],
+        processing_time: float,
+        required_models: List[str],
+        current_load: float,
+    ) -> Optional[Dict[str, Any]]:
+        """Berechnet die Instanzkonfiguration für gegebene Preise."""
+        try:
             # Berechne benötigte Kapazität
             required_capacity = self._calculate_required_capacity(
                 processing_time, required_models, current_load
@@ -652,6 +712,8 @@ class InstanceManager:
             instance_config = self._find_best_instance_config(
                 prices, instance_count, required_models
             )
+            if instance_config is None:
+                return None
 
             return {
                 "instance_count": instance_count,
@@ -1085,7 +1147,7 @@ class RestraintDetector:
             ).to(self.device)
 
             # Performance-Optimierungen
-            self.batch_size = 32  # Optimale Batch-Größe für GPU
+            self.batch_size = MAX_BATCH_SIZE  # Optimale Batch-Größe für GPU
             self.gpu_memory_threshold = 0.8  # GPU-Speicher-Schwellenwert
             self.cache_ttl = 3600  # Cache-TTL in Sekunden
             self.frame_sampling_rate = 2  # Jedes n-te Frame wird analysiert
@@ -1117,333 +1179,27 @@ class RestraintDetector:
             self.min_silence_duration = 2.0  # Minimale Stille-Dauer in Sekunden
 
             # Kategorien für Fesselungen und Materialien
-            self.categories = [
-                # Grundlegende Fesselungsarten
-                "rope restraint",
-                "handcuffs",
-                "leather restraints",
-                "tape restraint",
-                "rope",
-                "leather",
-                "metal chains",
-                "plastic wrap",
-                "tape",
-                "restraints",
-                "cuffs",
-                "gags",
-                "blindfolds",
-                "collars",
-                # BDSM-spezifische Materialien
-                "shibari rope",
-                "jute rope",
-                "hemp rope",
-                "nylon rope",
-                "cotton rope",
-                "leather cuffs",
-                "leather collar",
-                "leather harness",
-                "leather straps",
-                "metal cuffs",
-                "metal collar",
-                "metal chains",
-                "metal rings",
-                "rope bondage",
-                "rope harness",
-                "rope suspension",
-                # Shibari-Techniken und Knoten
-                "shibari pattern",
-                "kinbaku",
-                "rope knot",
-                "rope tie",
-                "diamond pattern",
-                "karada",
-                "takate kote",
-                "ebi",
-                "tsuri",
-                "suspension",
-                "partial suspension",
-                # BDSM-Ausrüstung
-                "spreader bar",
-                "restraint system",
-                "bondage furniture",
-                "suspension frame",
-                "bondage bed",
-                "bondage chair",
-                "wrist cuffs",
-                "ankle cuffs",
-                "thigh cuffs",
-                "nipple clamps",
-                "clamps",
-                "restraint straps",
-                # Materialien und Texturen
-                "rough rope",
-                "smooth rope",
-                "waxed rope",
-                "treated rope",
-                "soft leather",
-                "hard leather",
-                "studded leather",
-                "metal chain",
-                "metal ring",
-                "metal hook",
-                "synthetic rope",
-                "natural fiber rope",
-                # Sicherheitsausrüstung
-                "safety scissors",
-                "rope cutter",
-                "safety release",
-                "emergency release",
-                "quick release",
-                "safety equipment",
-                # Fesselungsart und Kontext
-                "self bondage",
-                "partner bondage",
-                "solo bondage",
-                "suspension bondage",
-                "partial suspension",
-                "ground bondage",
-                "escape proof",
-                "escape possible",
-                "safety risk",
-                # Anatomische und physische Faktoren
-                "wrist position",
-                "ankle position",
-                "neck position",
-                "body tension",
-                "muscle strain",
-                "circulation risk",
-                "breathing restriction",
-                "pressure points",
-                # Verfügbare Hilfsmittel
-                "safety tools nearby",
-                "no safety tools",
-                "emergency phone",
-                "ice release",
-                "timer release",
-                "magnetic release",
-                # Emotionale und mentale Faktoren
-                "distressed person",
-                "calm person",
-                "panicked person",
-                "experienced person",
-                "inexperienced person",
-                "safeword available",
-                "no safeword",
-                "communication possible",
-                # Sicherheitsrisiken
-                "high risk",
-                "medium risk",
-                "low risk",
-                "unsafe position",
-                "safe position",
-                "circulation check",
-                "breathing check",
-                "pressure check",
-                "temperature check",
-                # Befreiungsmöglichkeiten
-                "self release possible",
-                "self release impossible",
-                "partner release needed",
-                "emergency release needed",
-                "time based release",
-                "condition based release",
-                # Fesselungskontext und Zustimmung
-                "consensual bondage",
-                "non-consensual bondage",
-                "forced restraint",
-                "voluntary submission",
-                "involuntary submission",
-                "coerced submission",
-                "resistance",
-                "struggle",
-                "compliance",
-                "cooperation",
-                "active participation",
-                "passive submission",
-                "forced position",
-                # Körperliche und emotionale Anzeichen
-                "physical resistance",
-                "verbal resistance",
-                "emotional distress",
-                "fear",
-                "anxiety",
-                "panic",
-                "calm acceptance",
-                "muscle tension",
-                "body language",
-                "facial expression",
-                "tears",
-                "sweating",
-                "rapid breathing",
-                "hyperventilation",
-                # Zwangsmittel und Überwältigung
-                "weapon present",
-                "threat",
-                "intimidation",
-                "physical force",
-                "overpowering",
-                "restraint marks",
-                "struggle marks",
-                "defensive wounds",
-                "escape attempts",
-                # Einvernehmliche Zeichen
-                "safeword established",
-                "aftercare available",
-                "trust present",
-                "communication",
-                "negotiation",
-                "consent check",
-                "comfort check",
-                "boundary respect",
-                "scene negotiation",
-                # Notfallindikatoren
-                "immediate danger",
-                "medical emergency",
-                "psychological crisis",
-                "trauma response",
-                "dissociation",
-                "freeze response",
-                "fight response",
-                "flight response",
-                "fawn response",
-                # Alleinlassensituationen
-                "abandoned person",
-                "left alone",
-                "unattended person",
-                "no supervision",
-                "no assistance nearby",
-                "isolated location",
-                "remote area",
-                "locked room",
-                "soundproof room",
-                "no escape route",
-                "trapped situation",
-                "time limit exceeded",
-                # Überwachungs- und Sicherheitsaspekte
-                "supervision present",
-                "spotter available",
-                "assistant nearby",
-                "monitoring system",
-                "camera present",
-                "baby monitor",
-                "intercom system",
-                "emergency button",
-                "panic button",
-                # Zeitliche Faktoren
-                "extended duration",
-                "time limit",
-                "timer present",
-                "delayed release",
-                "scheduled check",
-                "regular monitoring",
-                "check-in system",
-                # Umgebungsfaktoren
-                "safe environment",
-                "unsafe environment",
-                "hazardous conditions",
-                "temperature risk",
-                "ventilation risk",
-                "fire hazard",
-                "flood risk",
-                "structural risk",
-                "environmental danger",
-                # Kommunikationsmöglichkeiten
-                "communication device",
-                "phone nearby",
-                "walkie talkie",
-                "signal system",
-                "visual signal",
-                "audible signal",
-                "emergency contact",
-                "neighbor alert",
-                "community watch",
-            ]
+            self.categories = list(CATEGORIES)
 
             # Sicherheitsregeln und Risikobewertung
-            self.safety_rules = {
-                "high_risk_factors": [
-                    "suspension without spotter",
-                    "no safety tools",
-                    "breathing restriction",
-                    "neck pressure",
-                    "circulation risk",
-                    "distressed person",
-                    "inexperienced person",
-                    "no safeword",
-                    "no communication",
-                    "non-consensual bondage",
-                    "forced restraint",
-                    "physical resistance",
-                    "weapon present",
-                    "threat",
-                    "intimidation",
-                    "immediate danger",
-                    "medical emergency",
-                    "psychological crisis",
-                    "trauma response",
-                    "abandoned person",
-                    "left alone",
-                    "unattended person",
-                    "no supervision",
-                    "no assistance nearby",
-                    "isolated location",
-                    "locked room",
-                    "soundproof room",
-                    "no escape route",
-                    "trapped situation",
-                    "time limit exceeded",
-                    "unsafe environment",
-                    "hazardous conditions",
-                    "temperature risk",
-                    "ventilation risk",
-                    "fire hazard",
-                ],
-                "medium_risk_factors": [
-                    "partial suspension",
-                    "limited safety tools",
-                    "some pressure points",
-                    "moderate tension",
-                    "limited communication",
-                    "emotional distress",
-                    "anxiety",
-                    "panic",
-                    "struggle marks",
-                    "escape attempts",
-                    "dissociation",
-                    "remote area",
-                    "extended duration",
-                    "delayed release",
-                    "limited supervision",
-                    "partial monitoring",
-                    "intermittent checks",
-                ],
-                "low_risk_factors": [
-                    "ground bondage",
-                    "safety tools available",
-                    "good circulation",
-                    "clear communication",
-                    "experienced person",
-                    "safeword established",
-                    "aftercare available",
-                    "trust present",
-                    "communication",
-                    "negotiation",
-                    "supervision present",
-                    "spotter available",
-                    "assistant nearby",
-                    "monitoring system",
-                    "camera present",
-                    "regular monitoring",
-                    "check-in system",
-                    "safe environment",
-                    "communication device",
-                    "emergency contact",
-                ],
-            }
+            self.safety_rules = SAFETY_RULES
+            self.risk_levels = risk_levels(SAFETY_RULES)
+
+            # Indikator-Vokabular einmalig in einen Automaten übersetzen
+            self.indicator_matcher = IndicatorMatcher(
+                INDICATOR_GROUPS, vocabulary=self.categories
+            )
 
             # Text-Embeddings für die Kategorien vorberechnen
             self.category_embeddings = self._prepare_category_embeddings()
 
+            # Gestapelte CLIP-Bewertung für Frames einer und gleichzeitiger Anfragen
+            self.clip_engine = BatchedScoringEngine(
+                self._score_images,
+                preprocess=self._preprocess_for_clip,
+                max_batch_size=self.batch_size,
+            )
+
             # Audio-bezogene Kategorien
             self.audio_categories = [
                 # Notfallgeräusche
@@ -1540,6 +1296,28 @@ class RestraintDetector:
             )
             raise
 
+    def _preprocess_for_clip(self, frame: np.ndarray) -> torch.Tensor:
+        """Bereitet ein Frame für CLIP vor (läuft im Thread-Pool der Engine)."""
+        return self.processor(images=frame, return_tensors="pt")["pixel_values"]
+
+    def _score_images(self, pixel_values: List[torch.Tensor]) -> np.ndarray:
+        """
+        Bewertet vorbereitete Frames in einem Forward-Pass.
+
+        Returns:
+            Kategorie-Wahrscheinlichkeiten, eine Zeile pro Frame
+        """
+        with torch.no_grad():
+            image_features = self.model.get_image_features(
+                pixel_values=torch.cat(pixel_values).to(self.device)
+            )
+            image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+
+            similarity = (100.0 * image_features @ self.category_embeddings.T).softmax(
+                dim=-1
+            )
+        return similarity.cpu().numpy()
+
     def _adjust_batch_size(self):
         """Passt die Batch-Größe basierend auf GPU-Speicher an."""
         if torch.cuda.is_available():
@@ -1559,7 +1337,7 @@ class RestraintDetector:
                     },
                 )
             elif memory_usage < self.gpu_memory_threshold * 0.5:
-                self.batch_size = min(32, self.batch_size * 2)
+                self.batch_size = min(MAX_BATCH_SIZE, self.batch_size * 2)
                 logger.log_info(
                     "Batch-Größe erhöht",
                     extra={
@@ -1567,6 +1345,7 @@ class RestraintDetector:
                         "memory_usage": memory_usage,
                     },
                 )
+            self.clip_engine.max_batch_size = self.batch_size
 
     def _cleanup_gpu_memory(self):
         """Bereinigt GPU-Speicher."""
@@ -1728,15 +1507,24 @@ class RestraintDetector:
             logger.log_error("Fehler bei der GPU-Kostenberechnung", error=e)
             raise
 
-    async def _get_instance_costs(self, processing_time: float) -> Dict[str, Any]:
-        """Holt aktuelle Instanzkosten und berechnet Preis/Leistungsverhältnis."""
+    def _get_instance_costs(self, processing_time: float) -> Dict[str, Any]:
+        """
+        Berechnet das Preis/Leistungsverhältnis aus dem Preis-Snapshot.
+
+        Führt keine Netzwerkanfragen aus; das Alter des Snapshots wird im
+        Ergebnis ausgewiesen.
+        """
         try:
-            prices = await self.instance_manager.instance_provider.fetch_prices()
-            price_performance = (
-                self.instance_manager.instance_provider.calculate_price_performance(
-                    prices, processing_time
-                )
+            pricing_cache = self.instance_manager.pricing_cache
+            price_performance = pricing_cache.memoize(
+                ("price_performance", processing_time),
+                lambda: (
+                    self.instance_manager.instance_provider.calculate_price_performance(
+                        pricing_cache.prices, processing_time
+                    )
+                ),
             )
+            age = pricing_cache.age()
 
             return {
                 "available_instances": price_performance,
@@ -1744,6 +1532,8 @@ class RestraintDetector:
                     price_performance[0] if price_performance else None
                 ),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
+                "prices_age_seconds": round(age, 1) if age is not None else None,
+                "prices_stale": pricing_cache.is_stale(),
             }
         except Exception as e:
             logger.log_error("Fehler beim Abrufen der Instanzkosten", error=e)
@@ -1902,6 +1692,11 @@ class RestraintDetector:
         """Pipeline-Phase 3: Validierung und Verbesserung der Erkennungen."""
         validated = {}
 
+        # Räumlicher Index über alle Erkennungen, einmal pro Frame
+        spatial_index = SpatialIndex.from_detections(
+            detections, cell_size=NEIGHBOR_RADIUS
+        )
+
         for category, items in detections.items():
             validated[category] = []
 
@@ -1912,7 +1707,7 @@ class RestraintDetector:
                     if self._validate_spatial_consistency(item, image):
                         # Kontext-Validierung
                         enhanced_item = await self._enhance_detection_context(
-                            item, detections
+                            item, detections, spatial_index
                         )
                         validated[category].append(enhanced_item)
 
@@ -1958,19 +1753,22 @@ class RestraintDetector:
         return 0.001 <= area_ratio <= 0.8  # Zwischen 0.1% und 80% des Bildes
 
     async def _enhance_detection_context(
-        self, detection: Dict[str, Any], all_detections: Dict[str, List[Dict[str, Any]]]
+        self,
+        detection: Dict[str, Any],
+        all_detections: Dict[str, List[Dict[str, Any]]],
+        spatial_index: Optional[SpatialIndex] = None,
     ) -> Dict[str, Any]:
         """Erweitert Erkennung um Kontext-Informationen."""
         enhanced = detection.copy()
 
         # Nachbar-Analysen
         enhanced["neighbors"] = self._find_neighboring_detections(
-            detection, all_detections
+            detection, all_detections, spatial_index
         )
 
-        # Interaktions-Score
+        # Interaktions-Score (wiederverwendet die gefundenen Nachbarn)
         enhanced["interaction_score"] = self._calculate_interaction_score(
-            detection, all_detections
+            detection, all_detections, enhanced["neighbors"]
         )
 
         # Relevanz-Score basierend auf Kontext
@@ -1979,35 +1777,22 @@ class RestraintDetector:
         return enhanced
 
     def _find_neighboring_detections(
-        self, target: Dict[str, Any], all_detections: Dict[str, List[Dict[str, Any]]]
+        self,
+        target: Dict[str, Any],
+        all_detections: Dict[str, List[Dict[str, Any]]],
+        spatial_index: Optional[SpatialIndex] = None,
     ) -> List[Dict[str, Any]]:
-        """Findet benachbarte Erkennungen."""
-        neighbors = []
-        target_bbox = target.get("bbox", [])
-
-        if len(target_bbox) != 4:
-            return neighbors
-
-        for category, detections in all_detections.items():
-            for detection in detections:
-                if detection == target:
-                    continue
-
-                if (
-                    self._calculate_proximity(target_bbox, detection.get("bbox", []))
-                    < 100
-                ):
-                    neighbors.append(
-                        {
-                            "type": detection.get("type"),
-                            "confidence": detection.get("confidence"),
-                            "distance": self._calculate_proximity(
-                                target_bbox, detection.get("bbox", [])
-                            ),
-                        }
-                    )
+        """
+        Findet benachbarte Erkennungen (Zentren näher als NEIGHBOR_RADIUS).
 
-        return sorted(neighbors, key=lambda x: x["distance"])[:5]  # Top 5
+        Mit ``spatial_index`` (über ``all_detections``) werden nur
+        umliegende Rasterzellen geprüft statt aller Erkennungen.
+        """
+        if spatial_index is None:
+            spatial_index = SpatialIndex.from_detections(
+                all_detections, cell_size=NEIGHBOR_RADIUS
+            )
+        return find_neighbors(spatial_index, target, NEIGHBOR_RADIUS)  # Top 5
 
     def _calculate_proximity(self, bbox1: List[float], bbox2: List[float]) -> float:
         """Berechnet Entfernung zwischen zwei Bounding Boxes."""
@@ -2024,7 +1809,10 @@ class RestraintDetector:
         return math.sqrt((x1_center - x2_center) ** 2 + (y1_center - y2_center) ** 2)
 
     def _calculate_interaction_score(
-        self, detection: Dict[str, Any], all_detections: Dict[str, List[Dict[str, Any]]]
+        self,
+        detection: Dict[str, Any],
+        all_detections: Dict[str, List[Dict[str, Any]]],
+        neighbors: Optional[List[Dict[str, Any]]] = None,
     ) -> float:
         """Berechnet Interaktions-Score basierend auf Kontext."""
         score = 0.0
@@ -2033,7 +1821,8 @@ class RestraintDetector:
         score += detection.get("confidence", 0) * 0.4
 
         # Nachbar-Bonus
-        neighbors = self._find_neighboring_detections(detection, all_detections)
+        if neighbors is None:
+            neighbors = self._find_neighboring_detections(detection, all_detections)
         neighbor_bonus = min(len(neighbors) * 0.1, 0.3)
         score += neighbor_bonus
 
@@ -2129,6 +1918,14 @@ class RestraintDetector:
         """Berechnet Hash für Frame-Caching."""
         return hashlib.md5(frame.tobytes()).hexdigest()
 
+    def _get_cached_result(
+        self, frame: np.ndarray
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Gibt Cache-Schlüssel und ggf. gecachtes Ergebnis eines Frames zurück."""
+        cache_key = f"frame:{self._compute_frame_hash(frame)}"
+        cached_result = self.redis_client.get(cache_key)
+        return cache_key, pickle.loads(cached_result) if cached_result else None
+
     async def _analyze_frame_with_cache(
         self,
         frame: np.ndarray,
@@ -2137,33 +1934,46 @@ class RestraintDetector:
     ) -> Dict[str, Any]:
         """Analysiert Frame mit Caching-Unterstützung."""
         try:
-            # Frame-Hashing für Caching
-            frame_hash = self._compute_frame_hash(frame)
-
             # Cache prüfen
-            cache_key = f"frame:{frame_hash}"
-            cached_result = self.redis_client.get(cache_key)
-            if cached_result:
-                return pickle.loads(cached_result)
-
-            # Frame vorbereiten
-            image = self.processor(images=frame, return_tensors="pt").to(self.device)
+            cache_key, cached_result = self._get_cached_result(frame)
+            if cached_result is not None:
+                return cached_result
 
             # Batch-Größe anpassen
             self._adjust_batch_size()
 
-            # Bild-Embedding berechnen
-            with torch.no_grad():
-                image_features = self.model.get_image_features(**image)
-                image_features = image_features / image_features.norm(
-                    dim=-1, keepdim=True
-                )
+            # Ähnlichkeiten berechnen (gemeinsam mit gleichzeitig wartenden Frames)
+            similarity = await self.clip_engine.score(frame)
 
-            # Ähnlichkeiten berechnen
-            similarity = (100.0 * image_features @ self.category_embeddings.T).softmax(
-                dim=-1
+            result = await self._build_frame_result(
+                similarity, audio_data, sample_rate
             )
+            self.redis_client.setex(cache_key, self.cache_ttl, pickle.dumps(result))
+
+            # GPU-Speicher bereinigen
+            self._cleanup_gpu_memory()
+
+            return result
 
+        except Exception as e:
+            logger.error(f"Fehler bei Frame-Analyse: {str(e)}")
+            raise
+
+    async def _build_frame_result(
+        self,
+        similarity: np.ndarray,
+        audio_data: Optional[np.ndarray] = None,
+        sample_rate: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Erzeugt das Analyseergebnis eines Frames aus den Kategorie-Scores.
+
+        Args:
+            similarity: Kategorie-Wahrscheinlichkeiten des Frames
+            audio_data: Optionale Audiodaten zum Frame
+            sample_rate: Abtastrate der Audiodaten
+        """
+        try:
             # Ergebnisse formatieren
             results = []
             risk_factors = []
@@ -2194,85 +2004,31 @@ class RestraintDetector:
             if audio_data is not None and sample_rate is not None:
                 audio_analysis = await self.analyze_audio(audio_data, sample_rate)
 
-            # Ergebnisse verarbeiten
-            for idx, (category, score) in enumerate(
-                zip(self.categories, similarity[0])
-            ):
-                if score > 0.1:  # Nur relevante Ergebnisse
-                    results.append({"category": category, "confidence": float(score)})
-
-                    # Risikofaktoren sammeln
-                    if category in self.safety_rules["high_risk_factors"]:
-                        risk_factors.append(("high", category))
-                    elif category in self.safety_rules["medium_risk_factors"]:
-                        risk_factors.append(("medium", category))
-                    elif category in self.safety_rules["low_risk_factors"]:
-                        risk_factors.append(("low", category))
-
-                    # Zustimmungsindikatoren sammeln
-                    if any(
-                        indicator in category
-                        for indicator in [
-                            "consensual",
-                            "voluntary",
-                            "safeword",
-                            "aftercare",
-                            "trust",
-                            "communication",
-                            "negotiation",
-                            "cooperation",
-                        ]
-                    ):
-                        consent_assessment["consent_indicators"].append(category)
-                    elif any(
-                        indicator in category
-                        for indicator in [
-                            "non-consensual",
-                            "forced",
-                            "resistance",
-                            "struggle",
-                            "threat",
-                            "intimidation",
-                            "weapon",
-                            "coerced",
-                        ]
-                    ):
-                        consent_assessment["non_consent_indicators"].append(category)
-
-                    # Überwachungsindikatoren sammeln
-                    if any(
-                        indicator in category
-                        for indicator in [
-                            "supervision",
-                            "spotter",
-                            "assistant",
-                            "monitoring",
-                            "camera",
-                            "regular",
-                            "check-in",
-                            "safe environment",
-                        ]
-                    ):
-                        supervision_assessment["supervision_indicators"].append(
-                            category
-                        )
-                    elif any(
-                        indicator in category
-                        for indicator in [
-                            "abandoned",
-                            "alone",
-                            "unattended",
-                            "no supervision",
-                            "isolated",
-                            "remote",
-                            "locked",
-                            "soundproof",
-                        ]
-                    ):
-                        supervision_assessment["abandonment_indicators"].append(
-                            category
-                        )
-                        supervision_assessment["emergency_intervention_needed"] = True
+            # Ergebnisse verarbeiten (nur relevante Kategorien)
+            for idx in np.flatnonzero(similarity > 0.1):
+                category, score = self.categories[idx], similarity[idx]
+                results.append({"category": category, "confidence": float(score)})
+
+                # Risikofaktoren sammeln
+                risk_level = self.risk_levels.get(category)
+                if risk_level is not None:
+                    risk_factors.append((risk_level, category))
+
+                # Alle Indikatoren der Kategorie in einem Durchlauf
+                groups = self.indicator_matcher.groups(category)
+
+                # Zustimmungsindikatoren sammeln
+                if "consent" in groups:
+                    consent_assessment["consent_indicators"].append(category)
+                elif "non_consent" in groups:
+                    consent_assessment["non_consent_indicators"].append(category)
+
+                # Überwachungsindikatoren sammeln
+                if "supervision" in groups:
+                    supervision_assessment["supervision_indicators"].append(category)
+                elif "abandonment" in groups:
+                    supervision_assessment["abandonment_indicators"].append(category)
+                    supervision_assessment["emergency_intervention_needed"] = True
 
             # Audio-Ergebnisse einbeziehen
             if audio_analysis:
@@ -2320,11 +2076,11 @@ class RestraintDetector:
                 len(audio_data) / sample_rate if audio_data is not None else None
             )
             processing_time = self._estimate_processing_time(1, audio_duration)
-            instance_costs = await self._get_instance_costs(processing_time)
+            instance_costs = self._get_instance_costs(processing_time)
 
             # Berechne optimale Instanzkonfiguration
             current_load = self._calculate_current_load()
-            instance_config = await self.instance_manager.get_optimal_instance_config(
+            instance_config = self.instance_manager.get_cached_instance_config(
                 processing_time,
                 ["clip", "whisper"] if audio_data is not None else ["clip"],
                 current_load,
@@ -2345,11 +2101,6 @@ class RestraintDetector:
                 }
             }
 
-            self.redis_client.setex(cache_key, self.cache_ttl, pickle.dumps(result))
-
-            # GPU-Speicher bereinigen
-            self._cleanup_gpu_memory()
-
             return result
 
         except Exception as e:
@@ -2381,36 +2132,40 @@ class RestraintDetector:
     ) -> List[Dict[str, Any]]:
         """
         Verarbeitet einen Batch von Frames und optional Audiodaten.
+
+        Nicht gecachte Frames werden gemeinsam vorbereitet und in gestapelten
+        Forward-Passes bewertet (höchstens ``batch_size`` Frames pro Pass).
         """
         try:
-            # Frames in optimale Batch-Größe aufteilen
-            batches = []
-            current_batch = []
-
-            for i, frame in enumerate(frames):
-                current_batch.append(
-                    (
-                        frame,
+            # Cache prüfen
+            self._adjust_batch_size()
+            lookups = [self._get_cached_result(frame) for frame in frames]
+            missing = [i for i, (_, cached) in enumerate(lookups) if cached is None]
+
+            # Fehlende Frames gemeinsam bewerten
+            similarities = await self.clip_engine.score_many(
+                [frames[i] for i in missing]
+            )
+            built = await asyncio.gather(
+                *(
+                    self._build_frame_result(
+                        similarity,
                         audio_data[i] if audio_data else None,
                         sample_rates[i] if sample_rates else None,
                     )
+                    for i, similarity in zip(missing, similarities)
                 )
+            )
 
-                if len(current_batch) >= self.batch_size:
-                    batches.append(current_batch)
-                    current_batch = []
-
-            if current_batch:
-                batches.append(current_batch)
-
-            # Asynchrone Batch-Verarbeitung
-            async with aiohttp.ClientSession():
-                tasks = []
-                for batch in batches:
-                    for frame, audio, sample_rate in batch:
-                        tasks.append(self.analyze_frame(frame, audio, sample_rate))
+            results = [cached for _, cached in lookups]
+            for i, result in zip(missing, built):
+                self.redis_client.setex(
+                    lookups[i][0], self.cache_ttl, pickle.dumps(result)
+                )
+                results[i] = result
 
-                results = await asyncio.gather(*tasks)
+            # GPU-Speicher einmal pro Batch bereinigen
+            self._cleanup_gpu_memory()
 
             # Kostenberechnung für den gesamten Batch
             total_audio_duration = (
@@ -2421,7 +2176,7 @@ class RestraintDetector:
             processing_time = self._estimate_processing_time(
                 len(frames), total_audio_duration
             )
-            instance_costs = await self._get_instance_costs(processing_time)
+            instance_costs = self._get_instance_costs(processing_time)
 
             # Batch-Ergebnisse erweitern
             batch_info = {
@@ -2446,6 +2201,9 @@ class RestraintDetector:
 # Detector-Instanz erstellen
 detector = RestraintDetector()
 
+# Dekodierung und Parse-/Dekodierzeiten je Transport
+frame_ingest = FrameIngest(detector.executor)
+
 
 class FrameRequest(BaseModel):
     """Request-Modell für die Frame-Analyse."""
@@ -2461,25 +2219,36 @@ class BatchRequest(BaseModel):
     frames: List[List[int]]  # Liste von Base64-kodierten Bildern
 
 
+def _payload(values: List[int], index: int = 0) -> bytes:
+    """Wandelt eine JSON-Zahlenliste in Bytes um (400 bei Werten außerhalb 0-255)."""
+    try:
+        return bytes(values)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Frame {index}: {e}")
+
+
 @app.post("/analyze/frame")
-async def analyze_frame(request: FrameRequest) -> Dict[str, Any]:
+async def analyze_frame(request: FrameRequest, response: Response) -> Dict[str, Any]:
     """
     Analysiert ein Frame und optional Audiodaten.
+
+    Die Parse-Zeit umfasst nur die Umwandlung der Zahlenliste in Bytes;
+    das JSON-Parsing vor dem Handler ist nicht enthalten.
     """
+    stopwatch = Stopwatch()
+    (frame,), timing = await frame_ingest(
+        "json", [_payload(request.frame)], response, stopwatch
+    )
     try:
-        # Base64-Dekodierung
-        frame = np.frombuffer(bytes(request.frame), dtype=np.uint8)
-        frame = cv2.imdecode(frame, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            raise HTTPException(status_code=400, detail="Ungültiges Bildformat")
-
         # Audio-Daten verarbeiten wenn vorhanden
         audio_data = None
         if request.audio_data is not None and request.sample_rate is not None:
             audio_data = np.array(request.audio_data)
 
-        result = await detector.analyze_frame(frame, audio_data, request.sample_rate)
+        result = await detector._analyze_frame_with_cache(
+            frame, audio_data, request.sample_rate
+        )
+        result["ingest"] = timing
         return result
     except Exception as e:
         logger.log_error("Fehler bei der Frame-Analyse", error=e)
@@ -2487,7 +2256,9 @@ async def analyze_frame(request: FrameRequest) -> Dict[str, Any]:
 
 
 @app.post("/analyze/batch")
-async def analyze_batch(request: BatchRequest) -> List[Dict[str, Any]]:
+async def analyze_batch(
+    request: BatchRequest, response: Response
+) -> List[Dict[str, Any]]:
     """
     Analysiert einen Batch von Frames.
 
@@ -2497,16 +2268,14 @@ async def analyze_batch(request: BatchRequest) -> List[Dict[str, Any]]:
     Returns:
         Liste von Analyseergebnissen
     """
+    stopwatch = Stopwatch()
+    frames, _ = await frame_ingest(
+        "json",
+        [_payload(frame_data, i) for i, frame_data in enumerate(request.frames)],
+        response,
+        stopwatch,
+    )
     try:
-        # Base64-Dekodierung
-        frames = []
-        for frame_data in request.frames:
-            frame = np.frombuffer(bytes(frame_data), dtype=np.uint8)
-            frame = cv2.imdecode(frame, cv2.IMREAD_COLOR)
-            if frame is None:
-                raise HTTPException(status_code=400, detail="Ungültiges Bildformat")
-            frames.append(frame)
-
         results = await detector.process_batch(frames)
         return results
     except Exception as e:
@@ -2514,7 +2283,32 @@ async def analyze_batch(request: BatchRequest) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Binäre Frame-Annahme (roh, Multipart, Container)
+app.include_router(
+    create_ingest_router(
+        detector._analyze_frame_with_cache, detector.process_batch, frame_ingest
+    )
+)
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    """Startet die Hintergrund-Aktualisierung der Instanzpreise."""
+    detector.instance_manager.pricing_cache.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Beendet die Hintergrund-Aktualisierung der Instanzpreise."""
+    await detector.instance_manager.pricing_cache.stop()
+
+
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """Health Check Endpoint."""
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "clip_batching": detector.clip_engine.get_statistics(),
+        "pricing": detector.instance_manager.pricing_cache.get_statistics(),
+        "ingest": frame_ingest.stats.get_statistics(),
+    }
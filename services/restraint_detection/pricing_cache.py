@@ -0,0 +1,193 @@
+"""
+Preis-Cache für den Restraint Detection Service
+Ein Hintergrund-Task aktualisiert Instanzpreise nach eigenem Zeitplan; die
+Frame-Analyse liest nur den zuletzt gültigen Snapshot im Speicher.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Abstand zwischen zwei Aktualisierungen in Sekunden
+REFRESH_INTERVAL = float(os.getenv("PRICING_REFRESH_INTERVAL", 300))
+# Wartezeit nach einer fehlgeschlagenen Aktualisierung
+RETRY_INTERVAL = float(os.getenv("PRICING_RETRY_INTERVAL", 30))
+# Alter, ab dem ein Snapshot als veraltet gilt (wird weiter ausgeliefert)
+MAX_STALENESS = float(os.getenv("PRICING_MAX_STALENESS", 3600))
+
+PriceFetcher = Callable[[], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+class PricingCache:
+    """
+    Zuletzt gültige Instanzpreise mit Hintergrund-Aktualisierung.
+
+    Leere oder fehlgeschlagene Abrufe ersetzen den Snapshot nicht
+    (Last-Known-Good). Ist der Snapshot älter als ``max_staleness``, wird
+    er weiter ausgeliefert, aber als veraltet markiert. Aus den Preisen
+    abgeleitete Werte lassen sich mit ``memoize`` bis zur nächsten
+    Aktualisierung zwischenspeichern.
+    """
+
+    def __init__(
+        self,
+        fetch_prices: PriceFetcher,
+        refresh_interval: float = REFRESH_INTERVAL,
+        retry_interval: float = RETRY_INTERVAL,
+        max_staleness: float = MAX_STALENESS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialisiert den Cache.
+
+        Args:
+            fetch_prices: Asynchroner Abruf der Preise aller Provider
+            refresh_interval: Sekunden zwischen zwei Aktualisierungen
+            retry_interval: Sekunden bis zum nächsten Versuch nach einem Fehler
+            max_staleness: Alter in Sekunden, ab dem der Snapshot veraltet ist
+            clock: Zeitquelle (monoton, in Sekunden)
+        """
+        self.fetch_prices = fetch_prices
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.max_staleness = max_staleness
+        self.clock = clock
+
+        self._prices: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._derived: Dict[Hashable, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.version = 0
+        self.stats = {
+            "refreshes": 0,
+            "failed_refreshes": 0,
+            "last_error": None,
+            "last_refresh_duration": None,
+        }
+
+    @property
+    def prices(self) -> Dict[str, Dict[str, Any]]:
+        """Aktueller Snapshot (leer, solange kein Abruf erfolgreich war)."""
+        return self._prices
+
+    def age(self) -> Optional[float]:
+        """Alter des Snapshots in Sekunden (None ohne Snapshot)."""
+        if self._fetched_at is None:
+            return None
+        return self.clock() - self._fetched_at
+
+    def is_stale(self) -> bool:
+        """True ohne Snapshot oder wenn dieser älter als ``max_staleness`` ist."""
+        age = self.age()
+        return age is None or age > self.max_staleness
+
+    def memoize(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Gibt einen aus dem Snapshot abgeleiteten Wert zurück.
+
+        ``compute`` wird pro Snapshot und Schlüssel höchstens einmal
+        ausgeführt; eine Aktualisierung verwirft alle abgeleiteten Werte.
+        """
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+
+    async def refresh(self) -> bool:
+        """
+        Ruft die Preise ab und ersetzt den Snapshot bei Erfolg.
+
+        Returns:
+            True, wenn ein neuer Snapshot übernommen wurde
+        """
+        start = self.clock()
+        try:
+            prices = await self.fetch_prices()
+            if not prices:
+                raise ValueError("Keine Preise erhalten")
+        except Exception as e:
+            self.stats["failed_refreshes"] += 1
+            self.stats["last_error"] = str(e)
+            logger.warning(
+                "Preisaktualisierung fehlgeschlagen, nutze letzten Snapshot: %s", e
+            )
+            return False
+
+        self._prices = prices
+        self._fetched_at = self.clock()
+        self._derived = {}
+        self.version += 1
+        self.stats["refreshes"] += 1
+        self.stats["last_error"] = None
+        self.stats["last_refresh_duration"] = self._fetched_at - start
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            refreshed = await self.refresh()
+            if not refreshed and self.is_stale():
+                logger.warning("Preis-Snapshot veraltet (Alter: %s s)", self.age())
+            await asyncio.sleep(
+                self.refresh_interval if refreshed else self.retry_interval
+            )
+
+    def start(self) -> asyncio.Task:
+        """Startet die Hintergrund-Aktualisierung (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+        return self._task
+
+    async def stop(self) -> None:
+        """Beendet die Hintergrund-Aktualisierung."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Alter, Veraltung und Zähler der Aktualisierungen zurück."""
+        age = self.age()
+        return dict(
+            self.stats,
+            age_seconds=round(age, 3) if age is not None else None,
+            stale=self.is_stale(),
+            max_staleness=self.max_staleness,
+            providers=sorted(self._prices),
+            version=self.version,
+            running=self._task is not None and not self._task.done(),
+        )
+
+
+class FakePriceProvider:
+    """
+    Preisquelle ohne Netzwerkzugriff für Tests und lokale Entwicklung.
+
+    Liefert feste Preise im Format von ``InstanceProvider.fetch_prices``,
+    optional mit Verzögerung oder Fehlern, und zählt die Abrufe.
+    """
+
+    def __init__(
+        self,
+        prices: Dict[str, Dict[str, Any]],
+        latency: float = 0.0,
+        fail: bool = False,
+    ) -> None:
+        self.prices = prices
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    async def fetch_prices(self) -> Dict[str, Dict[str, Any]]:
+        """Gibt die festen Preise zurück (RuntimeError bei ``fail``)."""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("Preis-API nicht erreichbar")
+        return self.prices
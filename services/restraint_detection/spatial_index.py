@@ -0,0 +1,195 @@
+"""
+Räumlicher Index für Erkennungen im Restraint Detection Service
+Gleichmäßiges Raster über Box-Zentren und -Ausdehnungen; Radius- und
+Überlappungsabfragen prüfen nur benachbarte Zellen statt aller Erkennungen.
+"""
+
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Cell = Tuple[int, int]
+
+
+def box_center(bbox: Sequence[float]) -> Optional[Tuple[float, float]]:
+    """Zentrum einer Box (x, y, w, h); None für ungültige Boxen."""
+    if bbox is None or len(bbox) != 4:
+        return None
+    x = bbox[0] + bbox[2] / 2
+    y = bbox[1] + bbox[3] / 2
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return None
+    return x, y
+
+
+class SpatialIndex:
+    """
+    Raster-Index über Bounding Boxes im Format (x, y, w, h).
+
+    Radiusabfragen beziehen sich auf die Box-Zentren, Überlappungsabfragen
+    auf die Ausdehnung. Bei einer Zellgröße in der Größenordnung des
+    Abfrageradius prüft eine Abfrage nur die umliegenden Zellen; der
+    Aufwand für alle Erkennungen eines Frames wächst damit annähernd linear.
+    Ungültige Boxen werden mitgezählt, aber nie gefunden.
+    """
+
+    def __init__(
+        self,
+        boxes: Iterable[Sequence[float]],
+        cell_size: float = 100.0,
+        items: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """
+        Baut den Index auf.
+
+        Args:
+            boxes: Bounding Boxes (x, y, w, h)
+            cell_size: Kantenlänge einer Rasterzelle in Pixeln
+            items: Zu den Boxen gehörende Objekte (optional)
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size muss positiv sein")
+        self.cell_size = cell_size
+        self.boxes = [
+            tuple(box) if box_center(box) is not None else None for box in boxes
+        ]
+        self.items = list(items) if items is not None else None
+        self.centers = [box_center(box) if box else None for box in self.boxes]
+
+        self._center_cells: Dict[Cell, List[int]] = defaultdict(list)
+        for index, center in enumerate(self.centers):
+            if center is not None:
+                self._center_cells[self._cell(*center)].append(index)
+        self._extent_cells: Optional[Dict[Cell, List[int]]] = None
+
+    @classmethod
+    def from_detections(
+        cls, detections: Dict[str, List[Dict[str, Any]]], cell_size: float = 100.0
+    ) -> "SpatialIndex":
+        """Index über alle Erkennungen eines Frames (Kategorie-Reihenfolge)."""
+        items = [item for group in detections.values() for item in group]
+        return cls(
+            (item.get("bbox", []) for item in items), cell_size=cell_size, items=items
+        )
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cells_around(
+        self, cells: Dict[Cell, List[int]], low: Cell, high: Cell
+    ) -> Iterable[List[int]]:
+        """Belegte Zellen im Bereich [low, high] (beide inklusive)."""
+        span = (high[0] - low[0] + 1) * (high[1] - low[1] + 1)
+        if span > len(cells):
+            # Großer Bereich: belegte Zellen filtern statt alle aufzuzählen
+            return [
+                indices
+                for (gx, gy), indices in cells.items()
+                if low[0] <= gx <= high[0] and low[1] <= gy <= high[1]
+            ]
+        return [
+            cells[(gx, gy)]
+            for gx in range(low[0], high[0] + 1)
+            for gy in range(low[1], high[1] + 1)
+            if (gx, gy) in cells
+        ]
+
+    def query_radius(
+        self, x: float, y: float, radius: float
+    ) -> List[Tuple[float, int]]:
+        """
+        Findet Boxen, deren Zentrum näher als ``radius`` am Punkt liegt.
+
+        Returns:
+            (Distanz, Index) aufsteigend nach Distanz, bei Gleichstand nach Index
+        """
+        if not (math.isfinite(x) and math.isfinite(y)) or radius <= 0:
+            return []
+        if math.isinf(radius):
+            candidates = self._center_cells.values()
+        else:
+            low = self._cell(x - radius, y - radius)
+            high = self._cell(x + radius, y + radius)
+            candidates = self._cells_around(self._center_cells, low, high)
+
+        found = []
+        centers = self.centers
+        for indices in candidates:
+            for index in indices:
+                cx, cy = centers[index]
+                distance = math.sqrt((x - cx) ** 2 + (y - cy) ** 2)
+                if distance < radius:
+                    found.append((distance, index))
+        found.sort()
+        return found
+
+    def query_overlap(self, bbox: Sequence[float]) -> List[int]:
+        """
+        Findet Boxen, die sich mit ``bbox`` (x, y, w, h) überschneiden.
+
+        Returns:
+            Aufsteigende Indizes der Boxen mit positiver Schnittfläche
+        """
+        if box_center(bbox) is None:
+            return []
+        if self._extent_cells is None:
+            self._extent_cells = defaultdict(list)
+            for index, box in enumerate(self.boxes):
+                if box is not None:
+                    for cell in self._extent_range(box):
+                        self._extent_cells[cell].append(index)
+
+        x, y, w, h = bbox
+        low = self._cell(x, y)
+        high = self._cell(x + w, y + h)
+        found = set()
+        for indices in self._cells_around(self._extent_cells, low, high):
+            for index in indices:
+                bx, by, bw, bh = self.boxes[index]
+                if x < bx + bw and bx < x + w and y < by + bh and by < y + h:
+                    found.add(index)
+        return sorted(found)
+
+    def _extent_range(self, box: Sequence[float]) -> Iterable[Cell]:
+        low = self._cell(box[0], box[1])
+        high = self._cell(box[0] + box[2], box[1] + box[3])
+        for gx in range(low[0], high[0] + 1):
+            for gy in range(low[1], high[1] + 1):
+                yield gx, gy
+
+
+def find_neighbors(
+    index: SpatialIndex,
+    target: Dict[str, Any],
+    radius: float = 100.0,
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Nächste Erkennungen um ``target`` aus einem Index über Erkennungen.
+
+    Erkennungen gleich ``target`` werden übersprungen; das Ergebnis
+    entspricht dem paarweisen Vergleich aller Erkennungen, sortiert nach
+    Distanz (stabil in Index-Reihenfolge) und auf ``limit`` begrenzt.
+    """
+    center = box_center(target.get("bbox", []))
+    if center is None:
+        return []
+
+    neighbors = []
+    for distance, position in index.query_radius(*center, radius):
+        detection = index.items[position]
+        if detection == target:
+            continue
+        neighbors.append(
+            {
+                "type": detection.get("type"),
+                "confidence": detection.get("confidence"),
+                "distance": distance,
+            }
+        )
+        if len(neighbors) == limit:
+            break
+    return neighbors
@@ -8,6 +8,7 @@ import asyncio
 import json
 import logging
 import os
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Union
@@ -23,6 +24,9 @@ from loguru import logger
 import psutil
 import uvicorn
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.frame_sampling import create_frame_sampler, sampling_options_from_env
+
 # UC-001 Data Schema Integration
 try:
     from data_schema.person_dossier import PersonDossier, MediaAppearance
@@ -98,6 +102,10 @@ class VideoContextAnalyzer:
         self.cpu_threads = int(os.getenv("VIDEO_CPU_THREADS", "4"))
         self.frame_batch_size = int(os.getenv("FRAME_BATCH_SIZE", "16"))
 
+        # Frame sampling: "uniform" or "scene_change" (keyframes on scene cuts)
+        self.frame_sampling_strategy = os.getenv("FRAME_SAMPLING_STRATEGY", "uniform")
+        self.frame_sampling_options = sampling_options_from_env()
+
         logger.info(f"🎬 UC-001 Video Context Analyzer initialized")
         logger.info(f"💻 CPU Cores: {self.cpu_cores}, Memory: {self.memory_limit}GB")
         logger.info(f"⚙️ Option A Primary: CPU-first with cloud enhancement available")
@@ -142,6 +150,15 @@ class VideoContextAnalyzer:
             # Calculate frame sampling interval
             interval = max(1, total_frames // max_frames)
 
+            # Scene-change sampling treats max_frames as per-video frame budget
+            sampler = None
+            if self.frame_sampling_strategy != "uniform":
+                sampler = create_frame_sampler(
+                    self.frame_sampling_strategy,
+                    **{**self.frame_sampling_options, "frame_budget": max_frames},
+                )
+                sampler.reset(fps, total_frames)
+
             frame_count = 0
             extracted_count = 0
 
@@ -150,7 +167,12 @@ class VideoContextAnalyzer:
                 if not ret:
                     break
 
-                if frame_count % interval == 0:
+                if sampler is not None:
+                    selected = sampler.select(frame_count, frame)
+                else:
+                    selected = frame_count % interval == 0
+
+                if selected:
                     # Resize for CPU efficiency
                     frame_resized = cv2.resize(frame, (640, 480))
                     frames.append(frame_resized)
@@ -161,6 +183,8 @@ class VideoContextAnalyzer:
             cap.release()
 
             logger.info(f"📽️ Extracted {len(frames)} frames from {duration:.1f}s video")
+            if sampler is not None:
+                logger.info(f"🎯 Keyframe sampling: {sampler.get_statistics()}")
             return frames
 
         except Exception as e:
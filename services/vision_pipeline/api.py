@@ -1,18 +1,35 @@
 import os
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import aiohttp
 import redis
-from fastapi import BackgroundTasks, FastAPI, HTTPException, status
+from fastapi import (
+    BackgroundTasks,
+    FastAPI,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    new_job_id,
+    request_fingerprint,
+)
 from main import VisionPipeline
 from pydantic import BaseModel, Field, validator
-from rq import Queue
+from rq import Callback, Queue
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
+from upload_store import StoredMedia, UploadOffsetMismatch, UploadStore
 
+from common.frame_sampling import sampling_options_from_env
 from common.logging_config import ServiceLogger
 
 # Logger initialisieren
@@ -76,9 +93,42 @@ pipeline = VisionPipeline(
     batch_size=int(os.getenv("BATCH_SIZE", 4)),
     frame_sampling_rate=int(os.getenv("FRAME_SAMPLING_RATE", 2)),
     max_workers=int(os.getenv("MAX_WORKERS", 4)),
+    frame_prefetch=int(os.getenv("FRAME_PREFETCH", 16)),
+    http_pool_limit=int(os.getenv("HTTP_POOL_LIMIT", 100)),
+    http_pool_limit_per_host=int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 16)),
+    http_timeout=float(os.getenv("HTTP_TIMEOUT", 60)),
+    sampling_strategy=os.getenv("FRAME_SAMPLING_STRATEGY", "uniform"),
+    sampling_options=sampling_options_from_env(),
+    near_duplicate_threshold=int(os.getenv("NEAR_DUPLICATE_THRESHOLD", 5)),
+    perceptual_hash_method=os.getenv("PERCEPTUAL_HASH_METHOD", "dhash"),
+    preprocess_workers=int(os.getenv("PREPROCESS_WORKERS", 2)),
+    inference_workers=int(os.getenv("INFERENCE_WORKERS", 8)),
+    stage_queue_size=int(os.getenv("STAGE_QUEUE_SIZE", 8)),
+    result_index_interval=float(os.getenv("RESULT_INDEX_INTERVAL", 1.0)),
+    scheduler_frame_budget=int(os.getenv("SCHEDULER_FRAME_BUDGET", 32)),
+    max_concurrent_jobs=int(os.getenv("MAX_CONCURRENT_JOBS", 4)),
+    scheduling_policy=os.getenv("SCHEDULING_POLICY", "sjf"),
+    checkpoint_interval=int(os.getenv("CHECKPOINT_INTERVAL", 100)),
+    checkpoint_dir=os.getenv("CHECKPOINT_DIR"),
+)
+
+
+# Idempotency-Keys für wiederholte Job-Anfragen
+idempotency_store = IdempotencyStore(ttl=float(os.getenv("IDEMPOTENCY_TTL", 86400)))
+
+# Ablage für Chunk-Uploads
+upload_store = UploadStore(
+    os.getenv("UPLOAD_DIR", "data/uploads"),
+    max_size=int(os.getenv("UPLOAD_MAX_SIZE", 0)) or None,
 )
 
 
+@app.on_event("shutdown")
+async def shutdown_pipeline():
+    """Schließt den HTTP-Pool der Pipeline beim Herunterfahren."""
+    await pipeline.close()
+
+
 # Pydantic-Modelle
 class VideoAnalysisRequest(BaseModel):
     video_paths: List[str] = Field(
@@ -154,34 +204,60 @@ class JobStatus(BaseModel):
     priority: int = Field(..., description="Job-Priorität")
 
 
+class UploadCreateRequest(BaseModel):
+    filename: str = Field(
+        ..., description="Dateiname inkl. Endung", example="video1.mp4"
+    )
+    size: int = Field(..., description="Gesamtgröße in Bytes", gt=0)
+    sha256: Optional[str] = Field(
+        None,
+        description="SHA-256 des Inhalts (bekannte Inhalte ohne erneuten Upload)",
+    )
+    priority: Optional[int] = Field(1, description="Job-Priorität (1-5)", ge=1, le=5)
+
+
+class UploadCompleteRequest(BaseModel):
+    priority: Optional[int] = Field(1, description="Job-Priorität (1-5)", ge=1, le=5)
+
+
+class UploadResponse(BaseModel):
+    upload_id: Optional[str] = Field(None, description="ID des Uploads")
+    offset: int = Field(..., description="Bereits empfangene Bytes")
+    size: int = Field(..., description="Gesamtgröße in Bytes")
+    status: str = Field(..., description="uploading, completed oder deduplicated")
+    sha256: Optional[str] = Field(None, description="SHA-256 des Inhalts")
+    job_id: Optional[str] = Field(None, description="Job-ID (nach Abschluss)")
+    result: Optional[dict] = Field(None, description="Vorhandene Analyseergebnisse")
+
+
 async def register_job_with_manager(job_id: str, job_type: str, priority: int):
     """Registriert einen Job beim Job-Manager."""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{job_manager_url}/jobs/register",
-                json={
-                    "job_id": job_id,
-                    "job_type": job_type,
-                    "priority": priority,
-                    "service": "vision_pipeline",
-                },
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.log_error(
-                        "Fehler bei der Job-Registrierung",
-                        extra={
-                            "job_id": job_id,
-                            "job_type": job_type,
-                            "status_code": response.status,
-                            "error": error_text,
-                        },
-                    )
-                    raise HTTPException(
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                        detail=f"Job-Manager nicht erreichbar: {error_text}",
-                    )
+        session = await pipeline.http_pool.get_session()
+        async with session.post(
+            f"{job_manager_url}/jobs/register",
+            json={
+                "job_id": job_id,
+                "job_type": job_type,
+                "priority": priority,
+                "service": "vision_pipeline",
+            },
+        ) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.log_error(
+                    "Fehler bei der Job-Registrierung",
+                    extra={
+                        "job_id": job_id,
+                        "job_type": job_type,
+                        "status_code": response.status,
+                        "error": error_text,
+                    },
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Job-Manager nicht erreichbar: {error_text}",
+                )
     except aiohttp.ClientError as e:
         logger.log_error("Netzwerkfehler bei der Job-Manager-Kommunikation", error=e)
         raise HTTPException(
@@ -198,6 +274,53 @@ async def register_job_with_manager(job_id: str, job_type: str, priority: int):
         )
 
 
+def submit_batch_job(
+    job_type: str,
+    paths: List[str],
+    priority: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = None,
+) -> JobResponse:
+    """
+    Reiht einen Batch-Job ein, bei gesetztem Idempotency-Key höchstens einmal.
+
+    Wiederholte Anfragen mit demselben Key (z.B. Retry nach Timeout) liefern
+    innerhalb der TTL den ursprünglichen Job, ohne neue Arbeit einzureihen.
+    """
+
+    def create() -> JobResponse:
+        job_id = new_job_id(job_type)
+        queue.enqueue(
+            "job_processor.process_batch_job",
+            args=(job_id, paths, job_type),
+            job_id=job_id,
+        )
+        background_tasks.add_task(
+            register_job_with_manager, job_id, job_type, priority
+        )
+        return JobResponse(
+            job_id=job_id,
+            status="queued",
+            created_at=datetime.now().isoformat(),
+            priority=priority,
+        )
+
+    if not idempotency_key:
+        return create()
+
+    job, created = idempotency_store.get_or_create(
+        idempotency_key, request_fingerprint(job_type, paths, priority), create
+    )
+    if not created:
+        logger.log_info(
+            "Wiederholte Anfrage, vorhandener Job",
+            extra={"idempotency_key": idempotency_key, "job_id": job.job_id},
+        )
+        response.headers["Idempotency-Replayed"] = "true"
+    return job
+
+
 # API-Endpunkte
 @app.post(
     "/analyze/videos",
@@ -213,7 +336,12 @@ async def register_job_with_manager(job_id: str, job_type: str, priority: int):
 )
 @limiter.limit("10/minute")
 async def analyze_videos(
-    request: VideoAnalysisRequest, background_tasks: BackgroundTasks
+    request: VideoAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, description="Schlüssel für idempotente Wiederholungen"
+    ),
 ):
     """
     Analysiert mehrere Videos parallel.
@@ -222,6 +350,7 @@ async def analyze_videos(
     - **batch_size**: Anzahl der Frames pro Batch (1-32)
     - **frame_sampling_rate**: Jedes n-te Frame wird analysiert (1-10)
     - **priority**: Job-Priorität (1-5)
+    - **Idempotency-Key** (Header): Wiederholungen liefern den ursprünglichen Job
 
     Returns:
         JobResponse mit Job-ID und Status
@@ -237,28 +366,20 @@ async def analyze_videos(
             },
         )
 
-        # Job erstellen
-        job_id = f"video_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-        # Job in Queue einreihen
-        queue.enqueue(
-            "job_processor.process_batch_job",
-            args=(job_id, request.video_paths, "video"),
-            job_id=job_id,
-        )
-
-        # Job beim Manager registrieren
-        background_tasks.add_task(
-            register_job_with_manager, job_id, "video", request.priority
+        # Job einreihen (eindeutige ID, Wiederholungen per Idempotency-Key)
+        return submit_batch_job(
+            "video",
+            request.video_paths,
+            request.priority,
+            background_tasks,
+            response,
+            idempotency_key,
         )
 
-        return JobResponse(
-            job_id=job_id,
-            status="queued",
-            created_at=datetime.now().isoformat(),
-            priority=request.priority,
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
         )
-
     except ValueError as e:
         logger.log_error("Validierungsfehler bei der Video-Analyse", error=e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -283,7 +404,12 @@ async def analyze_videos(
 )
 @limiter.limit("20/minute")
 async def analyze_images(
-    request: ImageAnalysisRequest, background_tasks: BackgroundTasks
+    request: ImageAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    idempotency_key: Optional[str] = Header(
+        None, description="Schlüssel für idempotente Wiederholungen"
+    ),
 ):
     """
     Analysiert mehrere Bilder parallel.
@@ -291,6 +417,7 @@ async def analyze_images(
     - **image_paths**: Liste der Bild-Pfade
     - **batch_size**: Anzahl der Bilder pro Batch (1-32)
     - **priority**: Job-Priorität (1-5)
+    - **Idempotency-Key** (Header): Wiederholungen liefern den ursprünglichen Job
 
     Returns:
         JobResponse mit Job-ID und Status
@@ -305,28 +432,20 @@ async def analyze_images(
             },
         )
 
-        # Job erstellen
-        job_id = f"image_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-        # Job in Queue einreihen
-        queue.enqueue(
-            "job_processor.process_batch_job",
-            args=(job_id, request.image_paths, "image"),
-            job_id=job_id,
+        # Job einreihen (eindeutige ID, Wiederholungen per Idempotency-Key)
+        return submit_batch_job(
+            "image",
+            request.image_paths,
+            request.priority,
+            background_tasks,
+            response,
+            idempotency_key,
         )
 
-        # Job beim Manager registrieren
-        background_tasks.add_task(
-            register_job_with_manager, job_id, "image", request.priority
-        )
-
-        return JobResponse(
-            job_id=job_id,
-            status="queued",
-            created_at=datetime.now().isoformat(),
-            priority=request.priority,
+    except IdempotencyConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
         )
-
     except ValueError as e:
         logger.log_error("Validierungsfehler bei der Bild-Analyse", error=e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -380,13 +499,13 @@ async def get_job_status(job_id: str):
 
         # Job-Status beim Manager abrufen
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{job_manager_url}/jobs/{job_id}") as response:
-                    if response.status == 200:
-                        manager_status = await response.json()
-                        priority = manager_status.get("priority", 1)
-                    else:
-                        priority = 1
+            session = await pipeline.http_pool.get_session()
+            async with session.get(f"{job_manager_url}/jobs/{job_id}") as response:
+                if response.status == 200:
+                    manager_status = await response.json()
+                    priority = manager_status.get("priority", 1)
+                else:
+                    priority = 1
         except Exception as e:
             logger.log_warning("Konnte Job-Manager-Status nicht abrufen", error=e)
             priority = 1
@@ -410,6 +529,201 @@ async def get_job_status(job_id: str):
         )
 
 
+def _existing_job(sha256: str) -> Optional[Dict[str, Any]]:
+    """Gibt den Job zurück, der einen Inhalt verarbeitet hat (None falls keiner)."""
+    return upload_store.find_job(sha256, queue.fetch_job)
+
+
+def _deduplicated_response(
+    sha256: str, size: int, job: Dict[str, Any]
+) -> UploadResponse:
+    return UploadResponse(
+        offset=size,
+        size=size,
+        status="deduplicated",
+        sha256=sha256,
+        job_id=job["job_id"],
+        result=job["result"],
+    )
+
+
+@app.post(
+    "/uploads",
+    response_model=UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={
+        200: {"description": "Inhalt bereits verarbeitet, kein Upload nötig"},
+        201: {"description": "Upload angelegt"},
+        400: {"description": "Ungültige Anfrage"},
+    },
+)
+async def create_upload(request: UploadCreateRequest):
+    """
+    Legt einen Chunk-Upload an.
+
+    Ist ``sha256`` angegeben und der Inhalt bereits verarbeitet (oder in
+    Verarbeitung), wird direkt auf den vorhandenen Job verwiesen.
+
+    Returns:
+        UploadResponse mit Upload-ID und Offset 0
+    """
+    if request.sha256:
+        sha256 = request.sha256.lower()
+        job = _existing_job(sha256)
+        if job is not None:
+            logger.log_info(
+                "Upload übersprungen, Inhalt bekannt",
+                extra={"sha256": sha256, "job_id": job["job_id"]},
+            )
+            return JSONResponse(
+                _deduplicated_response(sha256, request.size, job).dict()
+            )
+
+    try:
+        session = upload_store.create(request.filename, request.size, request.sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return UploadResponse(
+        upload_id=session.upload_id,
+        offset=0,
+        size=session.size,
+        status="uploading",
+    )
+
+
+@app.put(
+    "/uploads/{upload_id}",
+    response_model=UploadResponse,
+    responses={
+        200: {"description": "Chunk gespeichert"},
+        400: {"description": "Chunk überschreitet die angekündigte Größe"},
+        404: {"description": "Upload nicht gefunden"},
+        409: {"description": "Offset passt nicht, aktueller Offset im Detail"},
+    },
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., description="Offset des Chunks in Bytes"),
+):
+    """
+    Hängt einen Chunk an einen Upload an.
+
+    Der Request-Body wird direkt in die Teildatei gestreamt. Nach einem
+    Abbruch liefert ``GET /uploads/{upload_id}`` den Offset, ab dem der
+    Upload fortgesetzt wird.
+
+    Returns:
+        UploadResponse mit neuem Offset
+    """
+    try:
+        session = upload_store.get(upload_id)
+        offset = await upload_store.append(upload_id, upload_offset, request.stream())
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload nicht gefunden"
+        )
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "offset": e.expected},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return UploadResponse(
+        upload_id=upload_id, offset=offset, size=session.size, status="uploading"
+    )
+
+
+@app.get(
+    "/uploads/{upload_id}",
+    response_model=UploadResponse,
+    responses={404: {"description": "Upload nicht gefunden"}},
+)
+async def get_upload(upload_id: str):
+    """Gibt den aktuellen Offset eines Uploads zurück (zum Fortsetzen)."""
+    try:
+        session = upload_store.get(upload_id)
+        offset = upload_store.offset(upload_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload nicht gefunden"
+        )
+    return UploadResponse(
+        upload_id=upload_id, offset=offset, size=session.size, status="uploading"
+    )
+
+
+@app.post(
+    "/uploads/{upload_id}/complete",
+    response_model=UploadResponse,
+    responses={
+        200: {"description": "Upload abgeschlossen, Job erstellt oder vorhanden"},
+        400: {"description": "Upload unvollständig oder Prüfsumme falsch"},
+        404: {"description": "Upload nicht gefunden"},
+    },
+)
+async def complete_upload(
+    upload_id: str,
+    request: UploadCompleteRequest,
+    background_tasks: BackgroundTasks,
+):
+    """
+    Schließt einen Upload ab und startet die Analyse.
+
+    Wurde derselbe Inhalt bereits verarbeitet (oder ist in Verarbeitung),
+    wird kein neuer Job erstellt, sondern auf den vorhandenen verwiesen.
+
+    Returns:
+        UploadResponse mit Job-ID und ggf. vorhandenen Ergebnissen
+    """
+    try:
+        media: StoredMedia = upload_store.complete(upload_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Upload nicht gefunden"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    job = _existing_job(media.sha256)
+    if job is not None:
+        logger.log_info(
+            "Identischer Inhalt bereits verarbeitet",
+            extra={"sha256": media.sha256, "job_id": job["job_id"]},
+        )
+        return _deduplicated_response(media.sha256, media.size, job)
+
+    # Zuordnung vor dem Einreihen, damit die Callbacks den Job im Index finden;
+    # sie übernehmen Endstatus und Ergebnis, bevor der RQ-Job verfällt
+    job_id = new_job_id(media.kind)
+    upload_store.record_job(media.sha256, job_id)
+    queue.enqueue(
+        "job_processor.process_batch_job",
+        args=(job_id, [media.path], media.kind),
+        job_id=job_id,
+        meta={
+            "upload_dir": os.path.abspath(upload_store.directory),
+            "sha256": media.sha256,
+        },
+        on_success=Callback("upload_store.record_job_success"),
+        on_failure=Callback("upload_store.record_job_failure"),
+    )
+    background_tasks.add_task(
+        register_job_with_manager, job_id, media.kind, request.priority
+    )
+
+    return UploadResponse(
+        offset=media.size,
+        size=media.size,
+        status="completed",
+        sha256=media.sha256,
+        job_id=job_id,
+    )
+
+
 @app.get(
     "/health",
     responses={
@@ -436,9 +750,9 @@ async def health_check():
 
         # Job-Manager-Status prüfen
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{job_manager_url}/health") as response:
-                    job_manager_health = response.status == 200
+            session = await pipeline.http_pool.get_session()
+            async with session.get(f"{job_manager_url}/health") as response:
+                job_manager_health = response.status == 200
         except Exception as e:
             logger.log_warning("Job-Manager nicht erreichbar", error=e)
             job_manager_health = False
@@ -474,6 +788,25 @@ async def health_check():
         )
 
 
+@app.get(
+    "/stats",
+    responses={
+        200: {"description": "Pipeline-Statistiken erfolgreich abgerufen"},
+    },
+)
+async def get_pipeline_statistics():
+    """
+    Gibt Laufzeit-Statistiken der Pipeline zurück.
+
+    Enthält u.a. eingesparte Frame-Kodierungen und den Zustand des
+    HTTP-Verbindungspools (offene, freie und wartende Verbindungen).
+
+    Returns:
+        Dict mit Pipeline-Statistiken
+    """
+    return pipeline.get_statistics()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,225 @@
+"""
+Checkpoints für die Video-Verarbeitung der Vision Pipeline
+Fortsetzen abgebrochener Videos ab dem letzten gesicherten Frame
+"""
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from result_store import FrameResultWriter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VideoCheckpoint:
+    """Gesicherter Fortschritt eines Video-Jobs."""
+
+    job_id: str
+    video_path: str
+    output_path: str
+    next_frame: int
+    writer_state: Dict[str, Any]
+    video_size: int
+    video_mtime: float
+    updated_at: str
+
+
+def _video_fingerprint(video_path: str) -> Dict[str, Any]:
+    stat = os.stat(video_path)
+    return {"video_size": stat.st_size, "video_mtime": stat.st_mtime}
+
+
+class CheckpointStore:
+    """
+    Ablage der Checkpoints als JSON-Datei pro Job.
+
+    Checkpoints werden atomar (temporäre Datei + ``os.replace``) geschrieben,
+    sodass ein Absturz während des Schreibens den letzten gültigen
+    Checkpoint nicht beschädigt.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Initialisiert die Ablage.
+
+        Args:
+            directory: Verzeichnis für Checkpoint-Dateien
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, job_id: str) -> str:
+        """Pfad der Checkpoint-Datei eines Jobs."""
+        return os.path.join(self.directory, f"{job_id}.checkpoint.json")
+
+    def load(self, job_id: str) -> Optional[VideoCheckpoint]:
+        """Lädt den Checkpoint eines Jobs (None falls keiner oder ungültig)."""
+        path = self.path_for(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return VideoCheckpoint(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ungültiger Checkpoint für Job {job_id} ignoriert: {e}")
+            return None
+
+    def save(self, checkpoint: VideoCheckpoint) -> None:
+        """Speichert einen Checkpoint atomar."""
+        path = self.path_for(checkpoint.job_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(checkpoint), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def delete(self, job_id: str) -> None:
+        """Entfernt den Checkpoint eines abgeschlossenen Jobs."""
+        try:
+            os.remove(self.path_for(job_id))
+        except FileNotFoundError:
+            pass
+
+
+class VideoCheckpointer:
+    """
+    Sichert den Fortschritt eines Video-Jobs in regelmäßigen Abständen.
+
+    Alle ``interval`` geschriebenen Frames wird die Ergebnisdatei auf die
+    Platte geschrieben und ihr Zustand zusammen mit dem nächsten zu
+    verarbeitenden Frame im ``CheckpointStore`` abgelegt. Beim nächsten
+    Start desselben Jobs setzt ``open_writer`` die Ergebnisdatei an dieser
+    Stelle fort (später geschriebene Zeilen werden verworfen) und
+    ``start_frame`` gibt an, ab welchem Frame weiter dekodiert wird.
+
+    Ohne ``store`` (Checkpoints deaktiviert) verhält sich der Checkpointer
+    neutral.
+    """
+
+    def __init__(
+        self,
+        store: Optional[CheckpointStore],
+        job_id: str,
+        video_path: str,
+        interval: int = 100,
+    ) -> None:
+        """
+        Initialisiert den Checkpointer.
+
+        Args:
+            store: Ablage der Checkpoints (None deaktiviert Checkpoints)
+            job_id: Job-ID, unter der der Fortschritt gesichert wird
+            video_path: Pfad zum Video
+            interval: Anzahl Frames zwischen zwei Checkpoints
+        """
+        self.store = store
+        self.job_id = job_id
+        self.video_path = video_path
+        self.interval = interval
+
+        self.writer: Optional[FrameResultWriter] = None
+        self.start_frame = 0
+        self.resumed = False
+        self.checkpoints_written = 0
+        self._next_frame = 0
+        self._since_checkpoint = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None and self.interval > 0
+
+    def _load_valid_checkpoint(self) -> Optional[VideoCheckpoint]:
+        checkpoint = self.store.load(self.job_id)
+        if checkpoint is None:
+            return None
+
+        fingerprint = _video_fingerprint(self.video_path)
+        if (
+            checkpoint.video_path != self.video_path
+            or checkpoint.video_size != fingerprint["video_size"]
+            or checkpoint.video_mtime != fingerprint["video_mtime"]
+            or not os.path.exists(checkpoint.output_path)
+        ):
+            logger.warning(
+                f"Checkpoint für Job {self.job_id} passt nicht zum Video, "
+                "starte von vorne"
+            )
+            self.store.delete(self.job_id)
+            return None
+        return checkpoint
+
+    def open_writer(
+        self,
+        output_path_factory: Callable[[], str],
+        metadata: Dict[str, Any],
+        index_interval: float = 1.0,
+    ) -> FrameResultWriter:
+        """
+        Öffnet die Ergebnisdatei, bei vorhandenem Checkpoint fortgesetzt.
+
+        Args:
+            output_path_factory: Liefert den Pfad für eine neue Ergebnisdatei
+            metadata: Header-Metadaten für eine neue Ergebnisdatei
+            index_interval: Abstand der Zeitindex-Einträge in Sekunden
+
+        Returns:
+            Writer für die Frame-Ergebnisse
+        """
+        checkpoint = self._load_valid_checkpoint() if self.enabled else None
+        if checkpoint is not None:
+            self.writer = FrameResultWriter(
+                checkpoint.output_path,
+                index_interval=index_interval,
+                resume_state=checkpoint.writer_state,
+            )
+            self.start_frame = checkpoint.next_frame
+            self.resumed = True
+            logger.info(
+                f"Setze Job {self.job_id} ab Frame {self.start_frame} fort "
+                f"({self.writer.frames_written} Frames bereits verarbeitet)"
+            )
+        else:
+            self.writer = FrameResultWriter(
+                output_path_factory(), metadata=metadata, index_interval=index_interval
+            )
+            self.start_frame = 0
+
+        self._next_frame = self.start_frame
+        return self.writer
+
+    def frame_written(self, frame_number: int) -> None:
+        """Vermerkt ein geschriebenes Frame und sichert ggf. einen Checkpoint."""
+        self._next_frame = frame_number + 1
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        """Sichert den aktuellen Fortschritt (nur bei offenem Writer)."""
+        if not self.enabled or self.writer is None or self.writer.closed:
+            return
+
+        self.store.save(
+            VideoCheckpoint(
+                job_id=self.job_id,
+                video_path=self.video_path,
+                output_path=self.writer.path,
+                next_frame=self._next_frame,
+                writer_state=self.writer.checkpoint(),
+                updated_at=datetime.now().isoformat(),
+                **_video_fingerprint(self.video_path),
+            )
+        )
+        self._since_checkpoint = 0
+        self.checkpoints_written += 1
+
+    def complete(self) -> None:
+        """Entfernt den Checkpoint nach erfolgreichem Abschluss."""
+        if self.store is not None:
+            self.store.delete(self.job_id)
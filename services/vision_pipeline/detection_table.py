@@ -0,0 +1,438 @@
+"""
+Spaltenorientierte Detektionsergebnisse für die Vision Pipeline
+Scores, Labels, Zeitstempel und Boxen als NumPy-Arrays mit vektorisierten
+Filtern und verlustfreier Umwandlung vom/zum Dict-Format der Detektoren
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+_INT_TYPES = (int, np.integer)
+
+
+def _exact_float(value: Any) -> bool:
+    return type(value) is float and not np.isnan(value)
+
+
+def _exact_box(value: Any) -> bool:
+    return type(value) is list and all(type(v) is float for v in value)
+
+
+def _numeric_box(value: Any) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) == 4
+        and all(
+            isinstance(v, (float, int, np.number)) and not isinstance(v, bool)
+            for v in value
+        )
+    )
+
+
+class DetectionTable:
+    """
+    Detektionen vieler Frames in Spalten statt als Liste von Dicts.
+
+    Eingabe ist das Ergebnisformat von ``NSFWDetector`` bzw.
+    ``RestraintDetector``: pro Frame ein Dict mit ``frame_number``,
+    ``timestamp`` und unter ``data_key`` (z.B. ``"nsfw_data"``) einer Liste
+    ``results`` einzelner Detektionen.
+
+    Jede Detektion ist eine Zeile. ``confidence``, das Label (``label_key``),
+    ein optionales Flag (``flag_key``, z.B. ``is_nsfw``) und die Box liegen
+    als Arrays vor; alle übrigen Felder sowie Werte, die sich nicht exakt
+    als Spalte darstellen lassen, bleiben pro Zeile in ``extras``.
+    Frame-Metadaten (Fehler, übersprungene Frames usw.) werden pro Frame
+    aufbewahrt, sodass ``to_results`` das Eingabeformat exakt wiederherstellt.
+
+    Filter, Top-k und Zeitfenster liefern neue Tabellen, die auf dieselben
+    Frame-Metadaten verweisen.
+    """
+
+    def __init__(
+        self,
+        data_key: str,
+        label_key: str,
+        flag_key: Optional[str],
+        frames: List[Dict[str, Any]],
+        frame_index: np.ndarray,
+        scores: np.ndarray,
+        label_codes: np.ndarray,
+        label_names: List[str],
+        flags: np.ndarray,
+        boxes: np.ndarray,
+        has_box: np.ndarray,
+        extras: List[Optional[Dict[str, Any]]],
+        frame_numbers: np.ndarray,
+        frame_timestamps: np.ndarray,
+    ) -> None:
+        self.data_key = data_key
+        self.label_key = label_key
+        self.flag_key = flag_key
+        self.frames = frames
+        self.frame_index = frame_index
+        self.scores = scores
+        self.label_codes = label_codes
+        self.label_names = label_names
+        self.flags = flags
+        self.boxes = boxes
+        self.has_box = has_box
+        self.extras = extras
+        self._frame_numbers = frame_numbers
+        self._frame_timestamps = frame_timestamps
+
+    # ------------------------------------------------------------------
+    # Umwandlung
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Sequence[Dict[str, Any]],
+        data_key: str,
+        label_key: str = "category",
+        flag_key: Optional[str] = None,
+    ) -> "DetectionTable":
+        """
+        Erzeugt eine Tabelle aus Frame-Ergebnissen im Dict-Format.
+
+        Args:
+            results: Frame-Ergebnisse (z.B. von ``process_video_sequence``)
+            data_key: Schlüssel der Detektionsdaten, z.B. ``"nsfw_data"``
+            label_key: Feld einer Detektion, das als Label dient
+            flag_key: Boolesches Feld einer Detektion, z.B. ``"is_nsfw"``
+
+        Returns:
+            Spaltenorientierte Tabelle aller Detektionen
+        """
+        frames: List[Dict[str, Any]] = []
+        frame_numbers = np.full(len(results), -1, dtype=np.int64)
+        frame_timestamps = np.full(len(results), np.nan)
+        frame_index: List[int] = []
+        scores: List[float] = []
+        codes: List[int] = []
+        label_names: List[str] = []
+        label_lookup: Dict[str, int] = {}
+        flags: List[int] = []
+        boxes: List[Sequence[float]] = []
+        has_box: List[bool] = []
+        extras: List[Optional[Dict[str, Any]]] = []
+        nan_box = (np.nan, np.nan, np.nan, np.nan)
+        column_keys = {"confidence", "bbox", label_key, flag_key}
+
+        for position, result in enumerate(results):
+            frame = {key: value for key, value in result.items() if key != data_key}
+            number = result.get("frame_number")
+            if isinstance(number, _INT_TYPES):
+                frame_numbers[position] = number
+            timestamp = result.get("timestamp")
+            if isinstance(timestamp, (float, int)) and not isinstance(timestamp, bool):
+                frame_timestamps[position] = timestamp
+
+            data = result.get(data_key)
+            detections = None
+            if isinstance(data, dict) and isinstance(data.get("results"), list):
+                detections = data["results"]
+                frame["__data__"] = {k: v for k, v in data.items() if k != "results"}
+            elif data_key in result:
+                frame["__raw__"] = data
+            frames.append(frame)
+            if detections is None:
+                continue
+
+            for item in detections:
+                extra = {k: v for k, v in item.items() if k not in column_keys}
+
+                confidence = item.get("confidence")
+                if _exact_float(confidence):
+                    scores.append(confidence)
+                else:
+                    number_like = isinstance(confidence, (float, int, np.number))
+                    scores.append(float(confidence) if number_like else np.nan)
+                    if "confidence" in item:
+                        extra["confidence"] = confidence
+
+                label = item.get(label_key)
+                if type(label) is str:
+                    code = label_lookup.get(label)
+                    if code is None:
+                        code = label_lookup[label] = len(label_names)
+                        label_names.append(label)
+                    codes.append(code)
+                else:
+                    codes.append(-1)
+                    if label_key in item:
+                        extra[label_key] = label
+
+                flag = item.get(flag_key) if flag_key else None
+                if type(flag) is bool:
+                    flags.append(int(flag))
+                else:
+                    flags.append(-1)
+                    if flag_key and flag_key in item:
+                        extra[flag_key] = flag
+
+                bbox = item.get("bbox")
+                if _numeric_box(bbox):
+                    boxes.append(bbox)
+                    has_box.append(True)
+                    if not _exact_box(bbox):
+                        extra["bbox"] = bbox
+                else:
+                    boxes.append(nan_box)
+                    has_box.append(False)
+                    if "bbox" in item:
+                        extra["bbox"] = bbox
+
+                frame_index.append(position)
+                extras.append(extra or None)
+
+        return cls(
+            data_key=data_key,
+            label_key=label_key,
+            flag_key=flag_key,
+            frames=frames,
+            frame_index=np.asarray(frame_index, dtype=np.int64),
+            scores=np.asarray(scores, dtype=np.float64),
+            label_codes=np.asarray(codes, dtype=np.int32),
+            label_names=label_names,
+            flags=np.asarray(flags, dtype=np.int8),
+            boxes=np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+            has_box=np.asarray(has_box, dtype=bool),
+            extras=extras,
+            frame_numbers=frame_numbers,
+            frame_timestamps=frame_timestamps,
+        )
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        item: Dict[str, Any] = {}
+        if not np.isnan(self.scores[row]):
+            item["confidence"] = float(self.scores[row])
+        if self.label_codes[row] >= 0:
+            item[self.label_key] = self.label_names[self.label_codes[row]]
+        if self.flags[row] >= 0:
+            item[self.flag_key] = bool(self.flags[row])
+        if self.has_box[row]:
+            item["bbox"] = self.boxes[row].tolist()
+        if self.extras[row]:
+            item.update(self.extras[row])
+        return item
+
+    def to_results(self, include_empty: bool = True) -> List[Dict[str, Any]]:
+        """
+        Wandelt die Tabelle zurück in Frame-Ergebnisse im Dict-Format.
+
+        Args:
+            include_empty: Auch Frames ohne (verbleibende) Detektionen
+                ausgeben; für eine ungefilterte Tabelle ergibt das exakt
+                die Eingabe von ``from_results``
+
+        Returns:
+            Liste von Frame-Ergebnissen in Frame-Reihenfolge
+        """
+        rows_by_frame: Dict[int, List[int]] = {}
+        for row in np.argsort(self.frame_index, kind="stable").tolist():
+            rows_by_frame.setdefault(int(self.frame_index[row]), []).append(row)
+
+        if include_empty:
+            positions: Iterable[int] = range(len(self.frames))
+        else:
+            positions = sorted(rows_by_frame)
+        output = []
+        for position in positions:
+            frame = dict(self.frames[position])
+            if "__data__" in frame:
+                data = dict(frame.pop("__data__"))
+                rows = rows_by_frame.get(position, [])
+                data["results"] = [self._row(row) for row in rows]
+                frame[self.data_key] = data
+            elif "__raw__" in frame:
+                frame[self.data_key] = frame.pop("__raw__")
+            output.append(frame)
+        return output
+
+    # ------------------------------------------------------------------
+    # Spalten und Abfragen
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @property
+    def frame_numbers(self) -> np.ndarray:
+        """Frame-Nummer jeder Zeile (-1 falls unbekannt)."""
+        return self._frame_numbers[self.frame_index]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Zeitstempel jeder Zeile in Sekunden (NaN falls unbekannt)."""
+        return self._frame_timestamps[self.frame_index]
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Label jeder Zeile als Objekt-Array (None falls ohne Label)."""
+        names = np.asarray(self.label_names + [None], dtype=object)
+        return names[self.label_codes]
+
+    def take(self, rows: np.ndarray) -> "DetectionTable":
+        """Neue Tabelle aus den angegebenen Zeilen (Indizes oder Maske)."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return DetectionTable(
+            data_key=self.data_key,
+            label_key=self.label_key,
+            flag_key=self.flag_key,
+            frames=self.frames,
+            frame_index=self.frame_index[rows],
+            scores=self.scores[rows],
+            label_codes=self.label_codes[rows],
+            label_names=self.label_names,
+            flags=self.flags[rows],
+            boxes=self.boxes[rows],
+            has_box=self.has_box[rows],
+            extras=[self.extras[row] for row in rows.tolist()],
+            frame_numbers=self._frame_numbers,
+            frame_timestamps=self._frame_timestamps,
+        )
+
+    def mask(
+        self,
+        min_confidence: Optional[float] = None,
+        labels: Optional[Iterable[str]] = None,
+        flag: Optional[bool] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Boolesche Maske der Zeilen, die alle angegebenen Bedingungen erfüllen.
+
+        Args:
+            min_confidence: Mindestkonfidenz (Zeilen ohne Konfidenz fallen weg)
+            labels: Erlaubte Labels
+            flag: Erforderlicher Wert des Flags (z.B. ``is_nsfw``)
+            start: Frühester Zeitstempel (inklusive)
+            end: Spätester Zeitstempel (exklusive)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if min_confidence is not None:
+            mask &= self.scores >= min_confidence
+        if labels is not None:
+            wanted = [
+                self.label_names.index(label)
+                for label in labels
+                if label in self.label_names
+            ]
+            mask &= np.isin(self.label_codes, wanted)
+        if flag is not None:
+            mask &= self.flags == int(flag)
+        if start is not None or end is not None:
+            timestamps = self.timestamps
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+        return mask
+
+    def filter(self, **conditions: Any) -> "DetectionTable":
+        """Gefilterte Tabelle; Bedingungen wie bei ``mask``."""
+        return self.take(self.mask(**conditions))
+
+    def in_window(self, start: float, end: float) -> "DetectionTable":
+        """Detektionen mit Zeitstempel in ``[start, end)``."""
+        return self.filter(start=start, end=end)
+
+    def top_k(self, k: int) -> "DetectionTable":
+        """Die ``k`` Detektionen mit der höchsten Konfidenz, absteigend sortiert."""
+        scores = np.nan_to_num(self.scores, nan=-np.inf)
+        if k <= 0:
+            return self.take(np.zeros(0, dtype=np.int64))
+        if k < len(self):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(self))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return self.take(order)
+
+    def aggregate_by_label(self) -> Dict[Optional[str], Dict[str, Any]]:
+        """
+        Kennzahlen pro Label.
+
+        Returns:
+            Pro Label ``count``, ``frames`` (Anzahl Frames), ``max_confidence``,
+            ``mean_confidence``, ``first_seen`` und ``last_seen``
+        """
+        if not len(self):
+            return {}
+        slots = len(self.label_names) + 1
+        # Code -1 (ohne Label) landet im letzten Slot
+        codes = np.where(self.label_codes < 0, slots - 1, self.label_codes)
+        valid = ~np.isnan(self.scores)
+        scores = np.where(valid, self.scores, 0.0)
+
+        counts = np.bincount(codes, minlength=slots)
+        scored = np.bincount(codes, weights=valid, minlength=slots)
+        sums = np.bincount(codes, weights=scores, minlength=slots)
+        maxima = np.full(slots, -np.inf)
+        np.maximum.at(maxima, codes[valid], self.scores[valid])
+
+        timestamps = self.timestamps
+        known = ~np.isnan(timestamps)
+        first = np.full(slots, np.inf)
+        last = np.full(slots, -np.inf)
+        np.minimum.at(first, codes[known], timestamps[known])
+        np.maximum.at(last, codes[known], timestamps[known])
+
+        # Frames pro Label: eindeutige (Label, Frame)-Paare zählen
+        pairs = np.unique(codes.astype(np.int64) * len(self.frames) + self.frame_index)
+        frame_counts = np.bincount(pairs // len(self.frames), minlength=slots)
+
+        names: List[Optional[str]] = self.label_names + [None]
+        summary: Dict[Optional[str], Dict[str, Any]] = {}
+        for code in np.flatnonzero(counts).tolist():
+            summary[names[code]] = {
+                "count": int(counts[code]),
+                "frames": int(frame_counts[code]),
+                "max_confidence": float(maxima[code]) if scored[code] else None,
+                "mean_confidence": float(sums[code] / scored[code])
+                if scored[code]
+                else None,
+                "first_seen": float(first[code])
+                if np.isfinite(first[code])
+                else None,
+                "last_seen": float(last[code]) if np.isfinite(last[code]) else None,
+            }
+        return summary
+
+    def window_summary(self, window: float) -> List[Dict[str, Any]]:
+        """
+        Anzahl und höchste Konfidenz der Detektionen pro Zeitfenster.
+
+        Args:
+            window: Fensterlänge in Sekunden
+
+        Returns:
+            Nicht leere Fenster aufsteigend mit ``start``, ``end``, ``count``
+            und ``max_confidence``
+        """
+        timestamps = self.timestamps
+        known = ~np.isnan(timestamps)
+        if not known.any():
+            return []
+        buckets = np.floor(timestamps[known] / window).astype(np.int64)
+        scores = np.nan_to_num(self.scores[known], nan=-np.inf)
+        unique, inverse, counts = np.unique(
+            buckets, return_inverse=True, return_counts=True
+        )
+        maxima = np.full(len(unique), -np.inf)
+        np.maximum.at(maxima, inverse, scores)
+        return [
+            {
+                "start": float(bucket * window),
+                "end": float((bucket + 1) * window),
+                "count": int(count),
+                "max_confidence": float(maximum) if np.isfinite(maximum) else None,
+            }
+            for bucket, count, maximum in zip(unique.tolist(), counts, maxima)
+        ]
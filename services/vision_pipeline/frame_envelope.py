@@ -0,0 +1,125 @@
+"""
+Frame-Envelope für die Vision Pipeline
+Kodiert ein Frame höchstens einmal pro Wire-Format und teilt es zwischen Analyzern
+"""
+
+import base64
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Standard-Qualität von cv2.imencode für JPEG
+DEFAULT_JPEG_QUALITY = 95
+
+
+class FrameEnvelope:
+    """
+    Hülle um ein Frame, die Wire-Repräsentationen lazy erzeugt.
+
+    JPEG-Bytes (pro Qualitätsstufe) und deren Base64-Kodierung werden beim
+    ersten Zugriff berechnet und danach für alle weiteren Analyzer
+    wiederverwendet. Die Zähler erlauben es, die eingesparten Kodierungen
+    in den Pipeline-Statistiken auszuweisen.
+    """
+
+    def __init__(
+        self, frame: np.ndarray, jpeg_quality: int = DEFAULT_JPEG_QUALITY
+    ) -> None:
+        """
+        Initialisiert die Envelope.
+
+        Args:
+            frame: NumPy Array des Bildes (BGR Format)
+            jpeg_quality: Standard-JPEG-Qualität für Wire-Formate
+        """
+        self._frame = frame
+        self.jpeg_quality = jpeg_quality
+        self._jpeg: Dict[int, bytes] = {}
+        self._base64: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+        self.encode_requests = 0
+        self.encodes_performed = 0
+
+    @property
+    def array(self) -> np.ndarray:
+        """Rohes Frame ohne Kodierung."""
+        return self._frame
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._frame.shape
+
+    def jpeg(self, quality: Optional[int] = None) -> bytes:
+        """
+        Gibt die JPEG-Bytes des Frames zurück (höchstens eine Kodierung pro Qualität).
+
+        Args:
+            quality: JPEG-Qualität (Standard: jpeg_quality der Envelope)
+
+        Returns:
+            JPEG-kodierte Bytes
+        """
+        quality = self.jpeg_quality if quality is None else quality
+        with self._lock:
+            self.encode_requests += 1
+            return self._encode(quality)
+
+    def base64(self, quality: Optional[int] = None) -> str:
+        """
+        Gibt das JPEG des Frames als Base64-String zurück.
+
+        Args:
+            quality: JPEG-Qualität (Standard: jpeg_quality der Envelope)
+
+        Returns:
+            Base64-kodierter JPEG-String
+        """
+        quality = self.jpeg_quality if quality is None else quality
+        data = self.jpeg(quality)
+        return self._base64_of(quality, data)
+
+    def prepare(self, quality: Optional[int] = None) -> None:
+        """
+        Kodiert das Frame vorab, ohne eine Anfrage zu zählen.
+
+        So kann die Kodierung im Thread-Pool erfolgen, während
+        ``encodes_saved`` nur tatsächlich wiederverwendete Kodierungen
+        der Analyzer ausweist.
+        """
+        quality = self.jpeg_quality if quality is None else quality
+        with self._lock:
+            data = self._encode(quality)
+        self._base64_of(quality, data)
+
+    def _encode(self, quality: int) -> bytes:
+        """JPEG-Kodierung mit Cache (Aufruf nur mit gehaltenem Lock)."""
+        cached = self._jpeg.get(quality)
+        if cached is not None:
+            return cached
+
+        ok, buffer = cv2.imencode(
+            ".jpg", self._frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        )
+        if not ok:
+            raise ValueError("Frame konnte nicht als JPEG kodiert werden")
+
+        self.encodes_performed += 1
+        data = buffer.tobytes()
+        self._jpeg[quality] = data
+        return data
+
+    def _base64_of(self, quality: int, data: bytes) -> str:
+        with self._lock:
+            cached = self._base64.get(quality)
+            if cached is None:
+                cached = base64.b64encode(data).decode("utf-8")
+                self._base64[quality] = cached
+            return cached
+
+    @property
+    def encodes_saved(self) -> int:
+        """Anzahl der JPEG-Kodierungen, die durch Wiederverwendung entfallen sind."""
+        return max(0, self.encode_requests - self.encodes_performed)
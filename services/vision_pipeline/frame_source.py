@@ -0,0 +1,245 @@
+"""
+Streaming Frame-Quelle für die Vision Pipeline
+Dekodiert Videos in einem Hintergrund-Thread mit begrenztem Prefetch-Puffer
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+if TYPE_CHECKING:
+    from common.frame_sampling import FrameSampler
+
+logger = logging.getLogger(__name__)
+
+# Markiert das Ende des Frame-Streams in der Queue
+_END_OF_STREAM = object()
+
+
+@dataclass
+class SampledFrame:
+    """Ein dekodiertes, gesampeltes Frame mit Position im Video."""
+
+    frame: np.ndarray
+    frame_number: int
+    timestamp: float
+
+
+def resolve_timestamps(
+    frames: Sequence[Any],
+    timestamps: Optional[Sequence[float]] = None,
+    fps: Optional[float] = None,
+) -> List[Optional[float]]:
+    """
+    Ermittelt den Zeitstempel jedes Frames.
+
+    Vorrang haben Zeitstempel des Decoders (``SampledFrame.timestamp``),
+    danach explizit übergebene Zeitstempel, danach die Frame-Position
+    geteilt durch ``fps``. Ohne jede Angabe bleibt der Zeitstempel leer,
+    statt eine Bildrate anzunehmen.
+    """
+    if timestamps is not None and len(timestamps) != len(frames):
+        raise ValueError("timestamps muss dieselbe Länge wie frames haben")
+
+    result: List[Optional[float]] = []
+    for index, frame in enumerate(frames):
+        if getattr(frame, "timestamp", None) is not None:
+            result.append(frame.timestamp)
+        elif timestamps is not None:
+            result.append(timestamps[index])
+        elif fps:
+            result.append(getattr(frame, "frame_number", index) / fps)
+        else:
+            result.append(None)
+    return result
+
+
+class VideoFrameSource:
+    """
+    Asynchroner Iterator über gesampelte Video-Frames.
+
+    Ein Decoder-Thread liest das Video und legt nur gesampelte Frames in eine
+    Queue. Ein Semaphore begrenzt die Anzahl gepufferter Frames auf
+    ``prefetch``, sodass der Speicherbedarf unabhängig von der Videolänge
+    konstant bleibt. Nicht gesampelte Frames werden nur per ``grab()``
+    übersprungen und nie in ein NumPy-Array dekodiert.
+
+    Mit einem ``sampler`` ist jedes n-te Frame nur noch Kandidat; der Sampler
+    (z.B. Szenenwechsel-Erkennung) entscheidet, welche Kandidaten ausgegeben
+    werden.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        frame_sampling_rate: int = 1,
+        prefetch: int = 8,
+        cap: Optional[cv2.VideoCapture] = None,
+        start_frame: int = 0,
+        sampler: Optional["FrameSampler"] = None,
+    ) -> None:
+        """
+        Initialisiert die Frame-Quelle.
+
+        Args:
+            video_path: Pfad zum Video
+            frame_sampling_rate: Jedes n-te Frame wird ausgegeben
+            prefetch: Maximale Anzahl dekodierter Frames im Puffer
+            cap: Bereits geöffnetes VideoCapture (optional)
+            start_frame: Erstes zu lesendes Frame
+            sampler: Sampling-Strategie für Kandidaten-Frames (optional)
+        """
+        if frame_sampling_rate < 1:
+            raise ValueError("frame_sampling_rate muss mindestens 1 sein")
+        if prefetch < 1:
+            raise ValueError("prefetch muss mindestens 1 sein")
+
+        self.video_path = video_path
+        self.frame_sampling_rate = frame_sampling_rate
+        self.prefetch = prefetch
+        self.start_frame = start_frame
+        self.sampler = sampler
+        self._cap = cap
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots = threading.Semaphore(prefetch)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+        self.fps = 0.0
+        self.frames_decoded = 0
+        self.frames_yielded = 0
+        self.max_buffered = 0
+        self._buffered = 0
+        self._buffered_lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self.first_frame_latency: Optional[float] = None
+
+    def _open_capture(self) -> cv2.VideoCapture:
+        cap = self._cap if self._cap is not None else cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Konnte Video nicht öffnen: {self.video_path}")
+        if self.start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        return cap
+
+    def _decode_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Decoder-Thread: liest Frames und reicht gesampelte weiter."""
+        cap = None
+        try:
+            cap = self._open_capture()
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            if self.sampler is not None:
+                self.sampler.reset(self.fps, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+            frame_idx = self.start_frame
+
+            while not self._stop_event.is_set():
+                if frame_idx % self.frame_sampling_rate != 0:
+                    # Frame nur überspringen, nicht dekodieren
+                    if not cap.grab():
+                        break
+                    frame_idx += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames_decoded += 1
+
+                if self.sampler is not None and not self.sampler.select(
+                    frame_idx, frame
+                ):
+                    frame_idx += 1
+                    continue
+
+                # Auf einen freien Puffer-Slot warten (Backpressure)
+                while not self._slots.acquire(timeout=0.1):
+                    if self._stop_event.is_set():
+                        return
+
+                with self._buffered_lock:
+                    self._buffered += 1
+                    self.max_buffered = max(self.max_buffered, self._buffered)
+
+                item = SampledFrame(
+                    frame=frame,
+                    frame_number=frame_idx,
+                    timestamp=frame_idx / self.fps,
+                )
+                loop.call_soon_threadsafe(self._queue.put_nowait, item)
+                frame_idx += 1
+
+        except BaseException as e:
+            self._error = e
+        finally:
+            if cap is not None:
+                cap.release()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._queue.put_nowait, _END_OF_STREAM)
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._decode_loop,
+            args=(loop,),
+            name=f"frame-decoder-{id(self):x}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def __aiter__(self) -> AsyncIterator[SampledFrame]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[SampledFrame]:
+        if self._thread is not None:
+            raise RuntimeError("VideoFrameSource kann nur einmal iteriert werden")
+
+        self._start()
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is _END_OF_STREAM:
+                    break
+
+                with self._buffered_lock:
+                    self._buffered -= 1
+                self._slots.release()
+
+                self.frames_yielded += 1
+                if self.first_frame_latency is None:
+                    self.first_frame_latency = time.perf_counter() - self._started_at
+                yield item
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stoppt den Decoder-Thread und gibt das Video frei."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Kennzahlen der Frame-Quelle zurück."""
+        stats = {
+            "frames_decoded": self.frames_decoded,
+            "frames_yielded": self.frames_yielded,
+            "prefetch": self.prefetch,
+            "max_buffered": self.max_buffered,
+            "first_frame_latency": self.first_frame_latency,
+        }
+        if self.sampler is not None:
+            stats["sampling"] = self.sampler.get_statistics()
+        return stats
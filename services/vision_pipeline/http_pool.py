@@ -0,0 +1,197 @@
+"""
+Gepoolter HTTP-Client für die Vision Pipeline
+Langlebige aiohttp-Session mit Keep-Alive, DNS-Cache und Verbindungslimits
+"""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceClientPool:
+    """
+    Prozessweiter Pool für HTTP-Aufrufe an die Analyse-Services.
+
+    Die Session wird beim ersten Zugriff innerhalb des laufenden Event-Loops
+    erzeugt und danach wiederverwendet. Wechselt der Event-Loop (z.B. bei
+    ``asyncio.run`` pro Job), wird transparent eine neue Session angelegt,
+    da aiohttp-Sessions an ihren Loop gebunden sind. Ein Wächter-Task
+    schließt die Session, wenn ``asyncio.run`` die verbleibenden Tasks
+    beim Beenden des Loops abbricht.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 16,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        total_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+    ) -> None:
+        """
+        Initialisiert den Client-Pool.
+
+        Args:
+            limit: Maximale Anzahl gleichzeitiger Verbindungen insgesamt
+            limit_per_host: Maximale Anzahl gleichzeitiger Verbindungen pro Host
+            keepalive_timeout: Sekunden, die eine ungenutzte Verbindung offen bleibt
+            dns_cache_ttl: Gültigkeit des DNS-Caches in Sekunden
+            total_timeout: Gesamt-Timeout pro Anfrage in Sekunden
+            connect_timeout: Timeout für den Verbindungsaufbau in Sekunden
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = aiohttp.ClientTimeout(
+            total=total_timeout, sock_connect=connect_timeout
+        )
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._guard: Optional[asyncio.Task] = None
+
+        self._counters = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "waiting": 0,
+            "waited_total": 0,
+            "dns_cache_hits": 0,
+            "sessions_created": 0,
+        }
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._counters["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self._counters["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._counters["connections_reused"] += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            self._counters["waiting"] += 1
+            self._counters["waited_total"] += 1
+
+        async def on_connection_queued_end(session, ctx, params):
+            self._counters["waiting"] -= 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self._counters["dns_cache_hits"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(on_connection_queued_end)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        return trace_config
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+        )
+        self._counters["sessions_created"] += 1
+        self._counters["waiting"] = 0
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            trace_configs=[self._build_trace_config()],
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Gibt die gepoolte Session für den aktuellen Event-Loop zurück."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._discard_session()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+
+        if self._session is None or self._session.closed:
+            async with self._lock:
+                if self._session is None or self._session.closed:
+                    self._session = self._create_session()
+                    self._guard = loop.create_task(self._close_on_exit(self._session))
+        return self._session
+
+    async def _close_on_exit(self, session: aiohttp.ClientSession) -> None:
+        """Schließt die Session, sobald der Task beim Loop-Ende abgebrochen wird."""
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await session.close()
+
+    def _discard_session(self) -> None:
+        """Gibt die Session eines anderen, noch laufenden Event-Loops frei."""
+        session, guard, loop = self._session, self._guard, self._loop
+        self._session = None
+        self._guard = None
+        if session is None or session.closed or guard is None:
+            return
+        logger.info("Event-Loop gewechselt, HTTP-Session wird neu erstellt")
+        if loop.is_running() and not loop.is_closed():
+            # Der Wächter schließt die Session auf ihrem eigenen Loop
+            loop.call_soon_threadsafe(guard.cancel)
+
+    async def close(self) -> None:
+        """Schließt die Session und alle offenen Verbindungen."""
+        session, self._session = self._session, None
+        guard, self._guard = self._guard, None
+        if guard is not None and guard.get_loop() is asyncio.get_running_loop():
+            guard.cancel()
+        if session is not None and not session.closed:
+            try:
+                await session.close()
+            except RuntimeError:
+                # Session gehört zu einem bereits geschlossenen Event-Loop
+                pass
+
+    def reset_after_fork(self) -> None:
+        """
+        Verwirft die vom Elternprozess geerbte Session ohne sie zu schließen.
+
+        Die Sockets gehören weiterhin dem Elternprozess; der Kindprozess
+        baut beim nächsten Zugriff eine eigene Session auf.
+        """
+        self._session = None
+        self._loop = None
+        self._lock = None
+        self._guard = None
+        self._counters["waiting"] = 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Gibt Pool-Kennzahlen zurück.
+
+        Returns:
+            Dict mit offenen, belegten, freien und wartenden Verbindungen
+        """
+        connector = self._session.connector if self._session else None
+        # aiohttp stellt den Pool-Zustand nur über interne Attribute bereit
+        state = connector if connector is not None else SimpleNamespace()
+        in_use = len(getattr(state, "_acquired", ()))
+        idle = sum(len(conns) for conns in getattr(state, "_conns", {}).values())
+
+        return {
+            "open": in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            **self._counters,
+        }
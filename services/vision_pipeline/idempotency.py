@@ -0,0 +1,195 @@
+"""
+Idempotente Job-Erstellung für die Vision-Pipeline-API
+Monotone, kollisionsfreie Job-IDs (ULID) und Idempotency-Keys mit TTL
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Crockford-Base32 (ohne I, L, O, U), lexikografisch sortierbar
+_ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+def _encode_base32(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(_ULID_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class UlidGenerator:
+    """
+    Erzeugt monotone ULIDs (48 Bit Millisekunden + 80 Bit Zufall).
+
+    Innerhalb derselben Millisekunde (oder wenn die Uhr zurückspringt) wird
+    der Zufallsanteil der vorherigen ID um eins erhöht, sodass IDs eines
+    Prozesses streng aufsteigend und eindeutig bleiben. Zwischen Prozessen
+    sorgen die 80 Zufallsbits für Kollisionsfreiheit.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> str:
+        """Gibt eine neue ULID (26 Zeichen) zurück."""
+        with self._lock:
+            now_ms = int(self._clock() * 1000)
+            if now_ms <= self._last_ms:
+                now_ms = self._last_ms
+                if self._last_random == _RANDOM_MAX:
+                    # Zufallsanteil erschöpft: auf die nächste Millisekunde
+                    now_ms += 1
+                    random_part = int.from_bytes(os.urandom(10), "big")
+                else:
+                    random_part = self._last_random + 1
+            else:
+                random_part = int.from_bytes(os.urandom(10), "big")
+            self._last_ms = now_ms
+            self._last_random = random_part
+        return _encode_base32(now_ms, 10) + _encode_base32(random_part, 16)
+
+
+_ulid = UlidGenerator()
+
+
+def new_job_id(prefix: str) -> str:
+    """Erzeugt eine eindeutige, zeitlich sortierbare Job-ID, z.B. ``video_01H...``."""
+    return f"{prefix}_{_ulid.new()}"
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Stabiler Hash der Anfrage-Parameter (zum Erkennen geänderter Retries)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IdempotencyConflict(ValueError):
+    """Idempotency-Key wurde mit abweichenden Anfrage-Parametern wiederverwendet."""
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    expires_at: float
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    value: Any = None
+    done: bool = False
+
+
+class IdempotencyStore:
+    """
+    Lokale Ablage für Idempotency-Keys mit Ablaufzeit.
+
+    ``get_or_create`` führt ``create`` pro Key höchstens einmal erfolgreich
+    aus und liefert für alle Wiederholungen innerhalb der TTL dasselbe
+    Ergebnis. Gleichzeitige Anfragen mit demselben Key warten auf die erste,
+    statt selbst einen Job anzulegen. Schlägt ``create`` fehl, wird nichts
+    gespeichert und ein späterer Retry darf es erneut versuchen.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        max_entries: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialisiert die Ablage.
+
+        Args:
+            ttl: Gültigkeit eines Keys in Sekunden
+            max_entries: Maximale Anzahl gespeicherter Keys
+            clock: Zeitquelle (für Tests austauschbar)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+        self.created = 0
+        self.replayed = 0
+        self.conflicts = 0
+
+    def _prune(self, now: float) -> None:
+        expired = [
+            key for key, entry in self._entries.items() if entry.expires_at <= now
+        ]
+        for key in expired:
+            del self._entries[key]
+        # Älteste Einträge verwerfen (Dict behält die Einfügereihenfolge)
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def get_or_create(
+        self, key: str, fingerprint: str, create: Callable[[], Any]
+    ) -> Tuple[Any, bool]:
+        """
+        Gibt das gespeicherte Ergebnis zu ``key`` zurück oder erzeugt es.
+
+        Args:
+            key: Idempotency-Key des Clients
+            fingerprint: Fingerprint der Anfrage (siehe ``request_fingerprint``)
+            create: Erzeugt das Ergebnis (z.B. Job einreihen)
+
+        Returns:
+            Tuple aus Ergebnis und ``True``, falls es neu erzeugt wurde
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                self._prune(now)
+                entry = _Entry(fingerprint=fingerprint, expires_at=now + self.ttl)
+                self._entries[key] = entry
+
+        if entry.fingerprint != fingerprint:
+            with self._lock:
+                self.conflicts += 1
+            raise IdempotencyConflict(
+                "Idempotency-Key wurde bereits für eine andere Anfrage verwendet"
+            )
+
+        with entry.lock:
+            if entry.done:
+                with self._lock:
+                    self.replayed += 1
+                return entry.value, False
+            try:
+                entry.value = create()
+            except Exception:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                raise
+            entry.done = True
+            with self._lock:
+                # Nach einem fehlgeschlagenen Erstversuch wieder eintragen
+                self._entries.setdefault(key, entry)
+                self.created += 1
+            return entry.value, True
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Gibt Anzahl gespeicherter Keys, neuer und wiederholter Anfragen zurück."""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "keys": size,
+            "created": self.created,
+            "replayed": self.replayed,
+            "conflicts": self.conflicts,
+        }
@@ -3,22 +3,26 @@ AI Media Analysis - Vision Pipeline Job Processor
 Verarbeitung von Jobs aus der Redis-Queue
 """
 
-import asyncio
 import gc
 import json
 import logging
 import os
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
-import aiohttp
 import redis
 import torch
 from rq import Queue
-from rq.worker import HerokuWorker
+from rq.worker import HerokuWorker, SimpleWorker
 
+from common.frame_sampling import sampling_options_from_env
 from common.logging_config import ServiceLogger
+from nsfw_cascade import cascade_from_env
+from scheduler import batch_summary
+from status_reporter import StatusReporter
 from vision_pipeline import VisionPipeline
+from worker_runtime import get_runtime, resolve_worker_mode
 
 # Logger konfigurieren
 logging.basicConfig(level=logging.INFO)
@@ -36,114 +40,128 @@ queue = Queue("vision_pipeline", connection=redis_conn)
 job_manager_url = os.getenv("JOB_MANAGER_URL", "http://job_manager_api:8000")
 
 
-class VisionPipelineWorker(HerokuWorker):
-    """Angepasster Worker für die Vision Pipeline."""
+def build_pipeline() -> VisionPipeline:
+    """Erzeugt die Vision Pipeline aus der Umgebungskonfiguration."""
+    return VisionPipeline(
+        output_dir=os.getenv("OUTPUT_DIR", "data/output"),
+        pose_service_url=os.getenv("POSE_SERVICE_URL"),
+        ocr_service_url=os.getenv("OCR_SERVICE_URL"),
+        nsfw_service_url=os.getenv("NSFW_SERVICE_URL"),
+        batch_size=int(os.getenv("BATCH_SIZE", 4)),
+        frame_sampling_rate=int(os.getenv("FRAME_SAMPLING_RATE", 2)),
+        max_workers=int(os.getenv("MAX_WORKERS", 4)),
+        frame_prefetch=int(os.getenv("FRAME_PREFETCH", 16)),
+        sampling_strategy=os.getenv("FRAME_SAMPLING_STRATEGY", "uniform"),
+        sampling_options=sampling_options_from_env(),
+        near_duplicate_threshold=int(os.getenv("NEAR_DUPLICATE_THRESHOLD", 5)),
+        perceptual_hash_method=os.getenv("PERCEPTUAL_HASH_METHOD", "dhash"),
+        preprocess_workers=int(os.getenv("PREPROCESS_WORKERS", 2)),
+        inference_workers=int(os.getenv("INFERENCE_WORKERS", 8)),
+        stage_queue_size=int(os.getenv("STAGE_QUEUE_SIZE", 8)),
+        result_index_interval=float(os.getenv("RESULT_INDEX_INTERVAL", 1.0)),
+        scheduler_frame_budget=int(os.getenv("SCHEDULER_FRAME_BUDGET", 32)),
+        max_concurrent_jobs=int(os.getenv("MAX_CONCURRENT_JOBS", 4)),
+        scheduling_policy=os.getenv("SCHEDULING_POLICY", "sjf"),
+        checkpoint_interval=int(os.getenv("CHECKPOINT_INTERVAL", 100)),
+        checkpoint_dir=os.getenv("CHECKPOINT_DIR"),
+        nsfw_cascade=cascade_from_env(),
+    )
+
+
+# Pipeline wird einmal pro Worker geladen; das Work-Horse (erneuter Import
+# dieses Moduls) erhält über get_runtime dieselbe Instanz. Mit GPU laufen
+# Jobs im Worker-Prozess, da CUDA im geforkten Work-Horse nicht nutzbar ist.
+runtime = get_runtime(
+    build_pipeline,
+    mode=resolve_worker_mode(os.getenv("WORKER_MODE"), torch.cuda.is_available()),
+    after_fork=lambda pipeline: pipeline.reset_after_fork(),
+)
+
+
+async def _warm_up(pipeline: VisionPipeline, path: str) -> None:
+    """Aufwärm-Job; im Fork-Betrieb endet sein Event-Loop danach."""
+    try:
+        await pipeline.process_media([path], job_prefix="warmup")
+    finally:
+        if runtime.mode == "fork":
+            # HTTP-Session nicht an den beendeten Loop gebunden offen lassen
+            await pipeline.http_pool.close()
+
+
+class PreloadingWorkerMixin:
+    """Lädt die Pipeline beim Worker-Start und misst die Job-Übergabe."""
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.pipeline = VisionPipeline(
-            output_dir=os.getenv("OUTPUT_DIR", "data/output"),
-            pose_service_url=os.getenv("POSE_SERVICE_URL"),
-            ocr_service_url=os.getenv("OCR_SERVICE_URL"),
-            nsfw_service_url=os.getenv("NSFW_SERVICE_URL"),
-            batch_size=int(os.getenv("BATCH_SIZE", 4)),
-            frame_sampling_rate=int(os.getenv("FRAME_SAMPLING_RATE", 2)),
-            max_workers=int(os.getenv("MAX_WORKERS", 4)),
-        )
-        self._current_batch_size = self.pipeline.batch_size
-        self._gpu_memory_threshold = 0.8  # 80% GPU-Speicher-Nutzung
-
-    def _adjust_batch_size(self):
-        """Passt die Batch-Größe basierend auf GPU-Speicher an."""
-        if torch.cuda.is_available():
-            memory_allocated = torch.cuda.memory_allocated()
-            memory_reserved = torch.cuda.memory_reserved()
-            total_memory = torch.cuda.get_device_properties(0).total_memory
-
-            memory_usage = (memory_allocated + memory_reserved) / total_memory
-
-            if memory_usage > self._gpu_memory_threshold:
-                self._current_batch_size = max(1, self._current_batch_size // 2)
-                logger.log_warning(
-                    "Batch-Größe reduziert",
-                    extra={
-                        "new_batch_size": self._current_batch_size,
-                        "memory_usage": memory_usage,
-                    },
-                )
-            elif memory_usage < self._gpu_memory_threshold * 0.5:
-                self._current_batch_size = min(
-                    self.pipeline.batch_size, self._current_batch_size * 2
-                )
-                logger.log_info(
-                    "Batch-Größe erhöht",
-                    extra={
-                        "new_batch_size": self._current_batch_size,
-                        "memory_usage": memory_usage,
-                    },
-                )
+        self.pipeline = runtime.preload()
+
+        warmup_path = os.getenv("WORKER_WARMUP_PATH")
+        if warmup_path:
+            runtime.warm_up(lambda pipeline: _warm_up(pipeline, warmup_path))
+
+        logger.log_info("Worker bereit", extra=runtime.get_statistics())
+
+    def execute_job(self, job, queue):
+        runtime.mark_dispatched()
+        return super().execute_job(job, queue)
+
+
+class VisionPipelineWorker(PreloadingWorkerMixin, HerokuWorker):
+    """Worker, der pro Job ein Work-Horse mit geerbter Pipeline forkt."""
+
+
+class InProcessVisionPipelineWorker(PreloadingWorkerMixin, SimpleWorker):
+    """Worker, der Jobs im eigenen Prozess auf der geladenen Pipeline ausführt."""
 
-    def _cleanup_gpu_memory(self):
-        """Bereinigt GPU-Speicher."""
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-            gc.collect()
-
-
-async def update_job_status(
-    job_id: str,
-    status: str,
-    progress: Optional[float] = None,
-    result: Optional[Dict] = None,
-    error: Optional[str] = None,
-):
-    """Aktualisiert den Job-Status beim Job-Manager."""
-    try:
-        status_data = {"status": status, "updated_at": datetime.now().isoformat()}
-
-        if progress is not None:
-            status_data["progress"] = progress
-
-        if result is not None:
-            status_data["result"] = result
-
-        if error is not None:
-            status_data["error"] = error
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{job_manager_url}/jobs/{job_id}/status", json=status_data
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.log_error(
-                        "Fehler bei der Status-Aktualisierung",
-                        extra={
-                            "job_id": job_id,
-                            "status_code": response.status,
-                            "error": error_text,
-                        },
-                    )
-    except Exception as e:
-        logger.log_error("Fehler bei der Job-Manager-Kommunikation", error=e)
+
+def _cleanup_gpu_memory():
+    """Bereinigt GPU-Speicher."""
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+        gc.collect()
+
+
+# Gleichzeitig verarbeitete Dateien eines Batch-Jobs (1 = nacheinander)
+batch_parallelism = int(os.getenv("BATCH_PARALLELISM", 4))
+
+# Status-Updates werden gebündelt im Hintergrund gesendet
+status_reporter = StatusReporter(
+    job_manager_url,
+    flush_interval=float(os.getenv("STATUS_FLUSH_INTERVAL", 1.0)),
+)
 
 
 def process_video_job(job_id: str, video_path: str) -> Dict:
     """Verarbeitet ein Video-Job."""
     try:
+        pipeline, startup_latency = runtime.start_job(job_id)
         logger.log_info(
-            "Verarbeite Video-Job", extra={"job_id": job_id, "video_path": video_path}
+            "Verarbeite Video-Job",
+            extra={
+                "job_id": job_id,
+                "video_path": video_path,
+                "startup_latency": startup_latency,
+            },
         )
 
         # Status aktualisieren
-        asyncio.run(update_job_status(job_id, "processing", progress=0.0))
-
-        # Video verarbeiten
-        result = worker.pipeline.process_video(video_path)
+        status_reporter.start(job_id)
+
+        # Video verarbeiten; ein Checkpoint derselben Job-ID (z.B. nach
+        # Absturz des Workers) wird fortgesetzt
+        result = runtime.run(
+            pipeline.process_video(
+                video_path,
+                job_id,
+                progress_callback=lambda p: status_reporter.report(
+                    job_id, "processing", progress=p
+                ),
+            )
+        )
 
         # Ergebnis speichern
         output_path = os.path.join(
-            worker.pipeline.output_dir,
+            pipeline.output_dir,
             f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
         )
 
@@ -151,7 +169,7 @@ def process_video_job(job_id: str, video_path: str) -> Dict:
             json.dump(result, f, indent=2)
 
         # Status aktualisieren
-        asyncio.run(update_job_status(job_id, "completed", progress=1.0, result=result))
+        status_reporter.report(job_id, "completed", progress=1.0, result=result)
 
         logger.log_info(
             "Video-Job erfolgreich verarbeitet",
@@ -162,6 +180,7 @@ def process_video_job(job_id: str, video_path: str) -> Dict:
             "status": "success",
             "job_id": job_id,
             "output_path": output_path,
+            "startup_latency": startup_latency,
             "result": result,
         }
 
@@ -172,29 +191,37 @@ def process_video_job(job_id: str, video_path: str) -> Dict:
         )
 
         # Fehler-Status aktualisieren
-        asyncio.run(update_job_status(job_id, "failed", error=error_msg))
+        status_reporter.report(job_id, "failed", error=error_msg)
 
         return {"status": "error", "job_id": job_id, "error": error_msg}
     finally:
-        worker._cleanup_gpu_memory()
+        # Endstatus vor Rückgabe an RQ zustellen (Work-Horse endet danach)
+        status_reporter.flush()
+        _cleanup_gpu_memory()
 
 
 def process_image_job(job_id: str, image_path: str) -> Dict:
     """Verarbeitet ein Bild-Job."""
     try:
+        pipeline, startup_latency = runtime.start_job(job_id)
         logger.log_info(
-            "Verarbeite Bild-Job", extra={"job_id": job_id, "image_path": image_path}
+            "Verarbeite Bild-Job",
+            extra={
+                "job_id": job_id,
+                "image_path": image_path,
+                "startup_latency": startup_latency,
+            },
         )
 
         # Status aktualisieren
-        asyncio.run(update_job_status(job_id, "processing", progress=0.0))
+        status_reporter.start(job_id)
 
         # Bild verarbeiten
-        result = worker.pipeline.process_image(image_path)
+        result = runtime.run(pipeline.process_image(image_path, job_id))
 
         # Ergebnis speichern
         output_path = os.path.join(
-            worker.pipeline.output_dir,
+            pipeline.output_dir,
             f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
         )
 
@@ -202,7 +229,7 @@ def process_image_job(job_id: str, image_path: str) -> Dict:
             json.dump(result, f, indent=2)
 
         # Status aktualisieren
-        asyncio.run(update_job_status(job_id, "completed", progress=1.0, result=result))
+        status_reporter.report(job_id, "completed", progress=1.0, result=result)
 
         logger.log_info(
             "Bild-Job erfolgreich verarbeitet",
@@ -213,6 +240,7 @@ def process_image_job(job_id: str, image_path: str) -> Dict:
             "status": "success",
             "job_id": job_id,
             "output_path": output_path,
+            "startup_latency": startup_latency,
             "result": result,
         }
 
@@ -223,98 +251,70 @@ def process_image_job(job_id: str, image_path: str) -> Dict:
         )
 
         # Fehler-Status aktualisieren
-        asyncio.run(update_job_status(job_id, "failed", error=error_msg))
+        status_reporter.report(job_id, "failed", error=error_msg)
 
         return {"status": "error", "job_id": job_id, "error": error_msg}
     finally:
-        worker._cleanup_gpu_memory()
+        # Endstatus vor Rückgabe an RQ zustellen (Work-Horse endet danach)
+        status_reporter.flush()
+        _cleanup_gpu_memory()
 
 
 def process_batch_job(job_id: str, paths: List[str], job_type: str) -> Dict:
     """Verarbeitet einen Batch-Job."""
     try:
+        pipeline, startup_latency = runtime.start_job(job_id)
         logger.log_info(
             "Verarbeite Batch-Job",
-            extra={"job_id": job_id, "path_count": len(paths), "job_type": job_type},
+            extra={
+                "job_id": job_id,
+                "path_count": len(paths),
+                "job_type": job_type,
+                "startup_latency": startup_latency,
+            },
         )
 
         # Status aktualisieren
-        asyncio.run(update_job_status(job_id, "processing", progress=0.0))
-
-        # Batch verarbeiten
-        if job_type == "video":
-            results = []
-            for i, video_path in enumerate(paths):
-                try:
-                    # Fortschritt berechnen
-                    progress = (i / len(paths)) * 0.9  # 90% für Verarbeitung
-
-                    # Status aktualisieren
-                    asyncio.run(
-                        update_job_status(
-                            job_id,
-                            "processing",
-                            progress=progress,
-                            result={"current_file": video_path},
-                        )
-                    )
-
-                    # Video verarbeiten
-                    result = worker.pipeline.process_video(video_path)
-                    results.append(result)
-
-                    # GPU-Speicher anpassen
-                    worker._adjust_batch_size()
-
-                except Exception as e:
-                    logger.log_error(
-                        "Fehler bei Video-Verarbeitung",
-                        extra={
-                            "job_id": job_id,
-                            "video_path": video_path,
-                            "error": str(e),
-                        },
-                    )
-                    results.append({"error": str(e), "video_path": video_path})
-
-        else:  # Bilder
-            results = []
-            for i, image_path in enumerate(paths):
-                try:
-                    # Fortschritt berechnen
-                    progress = (i / len(paths)) * 0.9  # 90% für Verarbeitung
-
-                    # Status aktualisieren
-                    asyncio.run(
-                        update_job_status(
-                            job_id,
-                            "processing",
-                            progress=progress,
-                            result={"current_file": image_path},
-                        )
-                    )
-
-                    # Bild verarbeiten
-                    result = worker.pipeline.process_image(image_path)
-                    results.append(result)
-
-                    # GPU-Speicher anpassen
-                    worker._adjust_batch_size()
-
-                except Exception as e:
-                    logger.log_error(
-                        "Fehler bei Bild-Verarbeitung",
-                        extra={
-                            "job_id": job_id,
-                            "image_path": image_path,
-                            "error": str(e),
-                        },
-                    )
-                    results.append({"error": str(e), "image_path": image_path})
+        status_reporter.start(job_id)
+
+        # Dateien gleichzeitig verarbeiten (gemeinsames Frame-Budget, Fehler
+        # pro Datei isoliert, Ergebnisse in Eingabereihenfolge)
+        def on_file_done(result: Dict, completed: int, total: int) -> None:
+            if result.get("status") == "failed":
+                logger.log_error(
+                    "Fehler bei Datei-Verarbeitung",
+                    extra={
+                        "job_id": job_id,
+                        "path": result["path"],
+                        "error": result.get("error"),
+                    },
+                )
+            status_reporter.report(
+                job_id,
+                "processing",
+                progress=(completed / total) * 0.9,  # 90% für Verarbeitung
+                result={"completed_files": completed, "last_file": result["path"]},
+            )
+
+            # GPU-Speicher anpassen
+            pipeline._adjust_batch_size()
+
+        batch_start = time.perf_counter()
+        results = runtime.run(
+            pipeline.process_media(
+                paths,
+                kind="video" if job_type == "video" else "image",
+                job_ids=[f"{job_id}_{i}" for i in range(len(paths))],
+                max_concurrent_jobs=batch_parallelism,
+                on_job_done=on_file_done,
+            )
+        )
+        summary = batch_summary(results, time.perf_counter() - batch_start)
+        summary["parallelism"] = batch_parallelism
 
         # Ergebnis speichern
         output_path = os.path.join(
-            worker.pipeline.output_dir,
+            pipeline.output_dir,
             f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
         )
 
@@ -322,9 +322,7 @@ def process_batch_job(job_id: str, paths: List[str], job_type: str) -> Dict:
             json.dump(results, f, indent=2)
 
         # Status aktualisieren
-        asyncio.run(
-            update_job_status(job_id, "completed", progress=1.0, result=results)
-        )
+        status_reporter.report(job_id, "completed", progress=1.0, result=results)
 
         logger.log_info(
             "Batch-Job erfolgreich verarbeitet",
@@ -332,6 +330,9 @@ def process_batch_job(job_id: str, paths: List[str], job_type: str) -> Dict:
                 "job_id": job_id,
                 "output_path": output_path,
                 "result_count": len(results),
+                "failed": summary["failed"],
+                "wall_time": summary["wall_time"],
+                "concurrency": summary["concurrency"],
             },
         )
 
@@ -339,7 +340,9 @@ def process_batch_job(job_id: str, paths: List[str], job_type: str) -> Dict:
             "status": "success",
             "job_id": job_id,
             "output_path": output_path,
+            "startup_latency": startup_latency,
             "result": results,
+            "summary": summary,
         }
 
     except Exception as e:
@@ -349,14 +352,21 @@ def process_batch_job(job_id: str, paths: List[str], job_type: str) -> Dict:
         )
 
         # Fehler-Status aktualisieren
-        asyncio.run(update_job_status(job_id, "failed", error=error_msg))
+        status_reporter.report(job_id, "failed", error=error_msg)
 
         return {"status": "error", "job_id": job_id, "error": error_msg}
     finally:
-        worker._cleanup_gpu_memory()
+        # Endstatus vor Rückgabe an RQ zustellen (Work-Horse endet danach)
+        status_reporter.flush()
+        _cleanup_gpu_memory()
 
 
 if __name__ == "__main__":
-    # Worker starten
-    worker = VisionPipelineWorker([queue], connection=redis_conn)
+    # Worker starten; die Pipeline wird dabei einmal vorab geladen
+    worker_class = (
+        InProcessVisionPipelineWorker
+        if runtime.mode == "inprocess"
+        else VisionPipelineWorker
+    )
+    worker = worker_class([queue], connection=redis_conn)
     worker.work()
@@ -1,15 +1,15 @@
 import asyncio
-import base64
+import contextlib
 import gc
 import hashlib
 import json
 import os
 import pickle
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 import aiohttp
 import cv2
@@ -18,6 +18,17 @@ import redis
 import torch
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from checkpoint import CheckpointStore, VideoCheckpointer
+from frame_envelope import FrameEnvelope
+from frame_source import SampledFrame, VideoFrameSource
+from http_pool import ServiceClientPool
+from nsfw_cascade import NSFWCascade
+from perceptual_cache import PerceptualFrameCache
+from result_store import FrameResultWriter
+from scheduler import FairFrameBudget, MediaJob, MediaScheduler, media_kind
+from stage_executor import Stage, StagedExecutor
+
+from common.frame_sampling import create_frame_sampler
 from common.logging_config import ServiceLogger
 
 # Logger initialisieren
@@ -37,6 +48,24 @@ class VisionPipeline:
         cache_size: int = 1000,
         gpu_memory_threshold: float = 0.8,
         gpu_cleanup_interval: int = 100,
+        frame_prefetch: int = 16,
+        http_pool_limit: int = 100,
+        http_pool_limit_per_host: int = 16,
+        http_timeout: float = 60.0,
+        sampling_strategy: str = "uniform",
+        sampling_options: Optional[Dict[str, Any]] = None,
+        near_duplicate_threshold: int = 5,
+        perceptual_hash_method: str = "dhash",
+        preprocess_workers: int = 2,
+        inference_workers: int = 8,
+        stage_queue_size: int = 8,
+        result_index_interval: float = 1.0,
+        scheduler_frame_budget: int = 32,
+        max_concurrent_jobs: int = 4,
+        scheduling_policy: str = "sjf",
+        checkpoint_interval: int = 100,
+        checkpoint_dir: Optional[str] = None,
+        nsfw_cascade: Optional[NSFWCascade] = None,
     ):
         """
         Initialisiert die Vision Pipeline mit Performance-Optimierungen.
@@ -52,6 +81,30 @@ class VisionPipeline:
             cache_size: Größe des LRU-Caches
             gpu_memory_threshold: GPU-Speicher-Schwellenwert für Batch-Anpassung
             gpu_cleanup_interval: Anzahl der Frames zwischen GPU-Cleanups
+            frame_prefetch: Maximale Anzahl vorab dekodierter Frames pro Video
+            http_pool_limit: Maximale Anzahl gleichzeitiger HTTP-Verbindungen
+            http_pool_limit_per_host: Maximale HTTP-Verbindungen pro Service-Host
+            http_timeout: Gesamt-Timeout pro Service-Anfrage in Sekunden
+            sampling_strategy: "uniform" (jedes n-te Frame) oder "scene_change"
+            sampling_options: Optionen des Szenenwechsel-Samplers (z.B. frame_budget)
+            near_duplicate_threshold: Max. Hamming-Distanz für Near-Duplicate-Treffer
+                (negativ deaktiviert den Cache)
+            perceptual_hash_method: "dhash" oder "phash"
+            preprocess_workers: Worker der Preprocess-Stage (Hashing, Kodierung)
+            inference_workers: Gleichzeitig an die Services gesendete Frames
+            stage_queue_size: Kapazität der Queues zwischen den Stages
+            result_index_interval: Abstand der Einträge im Zeitindex der
+                Ergebnisdatei in Sekunden Videozeit
+            scheduler_frame_budget: Globale Obergrenze gleichzeitig
+                analysierter Frames bei der Verarbeitung mehrerer Medien
+            max_concurrent_jobs: Gleichzeitig verarbeitete Medien
+            scheduling_policy: "sjf", "priority" oder "fifo"
+            checkpoint_interval: Verarbeitete Frames zwischen zwei
+                Checkpoints eines Videos (0 deaktiviert Checkpoints)
+            checkpoint_dir: Verzeichnis der Checkpoints
+                (Standard: <output_dir>/checkpoints)
+            nsfw_cascade: Optionale NSFW-Vorprüfung; eindeutige Frames werden
+                ohne Anfrage an den NSFW-Service entschieden
         """
         try:
             # Service-URLs
@@ -66,12 +119,55 @@ class VisionPipeline:
             self.max_workers = max_workers
             self.gpu_memory_threshold = gpu_memory_threshold
             self.gpu_cleanup_interval = gpu_cleanup_interval
+            self.frame_prefetch = frame_prefetch
+            self.preprocess_workers = preprocess_workers
+            self.inference_workers = inference_workers
+            self.stage_queue_size = stage_queue_size
+            self.result_index_interval = result_index_interval
+            self.checkpoint_interval = checkpoint_interval
+            self.checkpoint_store = (
+                CheckpointStore(
+                    checkpoint_dir or os.path.join(output_dir, "checkpoints")
+                )
+                if checkpoint_interval > 0
+                else None
+            )
+            self.scheduler = MediaScheduler(
+                self,
+                frame_budget=scheduler_frame_budget,
+                max_concurrent_jobs=max_concurrent_jobs,
+                policy=scheduling_policy,
+            )
+            self.last_stage_metrics: Dict[str, Any] = {}
+            self.nsfw_cascade = nsfw_cascade
+            self.sampling_strategy = sampling_strategy
+            self.sampling_options = sampling_options or {}
+            if sampling_strategy != "uniform":
+                # Konfiguration früh validieren (wirft ValueError)
+                create_frame_sampler(sampling_strategy, **self.sampling_options)
             self.frame_counter = 0
             self.last_cleanup_time = datetime.now()
 
+            # Laufzeit-Statistiken
+            self.stats = {
+                "frames_analyzed": 0,
+                "frames_failed": 0,
+                "cache_hits": 0,
+                "jpeg_encodes": 0,
+                "jpeg_encodes_saved": 0,
+                "nsfw_screened": 0,
+            }
+
             # Thread-Pool für parallele Verarbeitung
             self.executor = ThreadPoolExecutor(max_workers=max_workers)
 
+            # Langlebiger HTTP-Pool für alle Service-Aufrufe
+            self.http_pool = ServiceClientPool(
+                limit=http_pool_limit,
+                limit_per_host=http_pool_limit_per_host,
+                total_timeout=http_timeout,
+            )
+
             # Redis für Caching
             self.redis_client = redis.Redis(
                 host=os.getenv("REDIS_HOST", "redis"),
@@ -79,6 +175,16 @@ class VisionPipeline:
                 db=int(os.getenv("REDIS_DB", 0)),
             )
 
+            # Near-Duplicate-Cache für ähnliche Frames innerhalb eines Videos
+            self.perceptual_cache = (
+                PerceptualFrameCache(
+                    max_distance=near_duplicate_threshold,
+                    hash_method=perceptual_hash_method,
+                )
+                if near_duplicate_threshold >= 0
+                else None
+            )
+
             # Cache für Frame-Hashes
             self._frame_cache = lru_cache(maxsize=cache_size)(
                 self._analyze_frame_internal
@@ -108,6 +214,8 @@ class VisionPipeline:
                     "frame_sampling_rate": frame_sampling_rate,
                     "max_workers": max_workers,
                     "cache_size": cache_size,
+                    "frame_prefetch": frame_prefetch,
+                    "sampling_strategy": sampling_strategy,
                     "device": str(self.device),
                 },
             )
@@ -231,51 +339,227 @@ class VisionPipeline:
             logger.log_error("Fehler beim Berechnen des Frame-Hashes", error=e)
             raise
 
-    async def _analyze_frame_internal(self, frame: np.ndarray) -> Dict[str, Any]:
-        """Interne Frame-Analyse mit Caching."""
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt die Laufzeit-Statistiken der Pipeline zurück."""
+        return dict(
+            self.stats,
+            batch_size=self.batch_size,
+            http_pool=self.http_pool.get_statistics(),
+            near_duplicate_cache=(
+                self.perceptual_cache.get_statistics()
+                if self.perceptual_cache
+                else None
+            ),
+            pipeline_stages=self.last_stage_metrics,
+            scheduler=self.scheduler.get_statistics(),
+            nsfw_cascade=(
+                self.nsfw_cascade.get_statistics() if self.nsfw_cascade else None
+            ),
+        )
+
+    async def close(self) -> None:
+        """Gibt langlebige Ressourcen (HTTP-Pool, Thread-Pool) frei."""
+        await self.http_pool.close()
+        self.executor.shutdown(wait=False)
+
+    def reset_after_fork(self) -> None:
+        """
+        Ersetzt prozessgebundene Ressourcen nach einem Fork.
+
+        Threads des Thread-Pools und die HTTP-Session des Elternprozesses
+        existieren im Kindprozess nicht weiter; Modelle, Caches und
+        Konfiguration werden dagegen unverändert weiterverwendet.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.http_pool.reset_after_fork()
+
+    def _prepare_frame(
+        self, frame: np.ndarray, video_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        CPU-Teil der Frame-Analyse: Hashes, Cache-Lookups und JPEG-Kodierung.
+
+        Args:
+            frame: Zu analysierendes Frame
+            video_key: Video-Schlüssel für den Near-Duplicate-Cache (optional)
+
+        Returns:
+            Kontext für _infer_frame; enthält "result" bei einem Cache-Treffer
+            und "pending" bei einem ähnlichen Frame, das noch analysiert wird
+        """
+        context = {
+            "video_key": video_key,
+            "perceptual_hash": None,
+            "frame_hash": None,
+            "envelope": None,
+            "nsfw": None,
+            "result": None,
+            "pending": None,
+            "cache_hit": False,
+        }
+
+        # Near-Duplicate-Lookup unter den letzten und den gerade analysierten
+        # Frames desselben Videos; bei einem Fehltreffer wird das Frame
+        # reserviert, bis sein Ergebnis vorliegt
+        if self.perceptual_cache is not None and video_key is not None:
+            perceptual_hash = self.perceptual_cache.compute_hash(frame)
+            context["result"], context["pending"] = self.perceptual_cache.acquire(
+                video_key, perceptual_hash
+            )
+            if context["result"] is not None or context["pending"] is not None:
+                return context
+            context["perceptual_hash"] = perceptual_hash
+
         try:
-            # Frame-Hash für Cache-Lookup
-            frame_hash = self._compute_frame_hash(frame)
-
-            # Cache prüfen
-            cached_result = self.redis_client.get(f"frame:{frame_hash}")
-            if cached_result:
-                return pickle.loads(cached_result)
-
-            # Asynchrone Analyse aller Services
-            async with aiohttp.ClientSession() as session:
-                tasks = [
-                    self._analyze_pose(session, frame),
-                    self._analyze_ocr(session, frame),
-                    self._analyze_nsfw(session, frame),
-                ]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Ergebnisse zusammenführen
-            result = {
-                "pose": results[0] if not isinstance(results[0], Exception) else None,
-                "ocr": results[1] if not isinstance(results[1], Exception) else None,
-                "nsfw": results[2] if not isinstance(results[2], Exception) else None,
-            }
+            return self._prepare_uncached_frame(frame, context)
+        except Exception as e:
+            self._discard_reservation(context, e)
+            raise
+
+    def _prepare_uncached_frame(
+        self, frame: np.ndarray, context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Redis-Lookup, NSFW-Vorprüfung und JPEG-Kodierung eines Frames."""
+        # Frame-Hash für Cache-Lookup
+        context["frame_hash"] = self._compute_frame_hash(frame)
+
+        # Cache prüfen
+        cached_result = self.redis_client.get(f"frame:{context['frame_hash']}")
+        if cached_result:
+            # Gezählt wird in _infer_frame auf dem Event-Loop
+            context["cache_hit"] = True
+            context["result"] = pickle.loads(cached_result)
+            if context["perceptual_hash"] is not None:
+                self.perceptual_cache.add(
+                    context["video_key"], context["perceptual_hash"], context["result"]
+                )
+            return context
 
-            # Cache speichern
-            self.redis_client.setex(
-                f"frame:{frame_hash}", 3600, pickle.dumps(result)  # 1 Stunde TTL
+        # Eindeutige Frames ohne NSFW-Service entscheiden
+        if self.nsfw_cascade is not None:
+            context["nsfw"] = self.nsfw_cascade.screen(frame)
+
+        # Frame wird höchstens einmal kodiert und von allen Services geteilt
+        envelope = FrameEnvelope(frame)
+        envelope.prepare()
+        context["envelope"] = envelope
+        return context
+
+    async def _infer_frame(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        I/O-Teil der Frame-Analyse: Fan-out an Pose, OCR und NSFW.
+
+        Args:
+            context: Ergebnis von _prepare_frame
+
+        Returns:
+            Zusammengeführte Analyseergebnisse
+        """
+        if context["cache_hit"]:
+            self.stats["cache_hits"] += 1
+        if context["result"] is not None:
+            return context["result"]
+        if context["pending"] is not None:
+            return await self._await_near_duplicate(context["pending"])
+
+        try:
+            return await self._infer_uncached_frame(context)
+        except BaseException as e:
+            self._discard_reservation(
+                context,
+                e if isinstance(e, Exception) else RuntimeError("Analyse abgebrochen"),
+            )
+            raise
+
+    def _discard_reservation(self, context: Dict[str, Any], error: Exception) -> None:
+        """Gibt ähnlichen Frames, die auf dieses Frame warten, den Fehler weiter."""
+        if context["perceptual_hash"] is not None:
+            self.perceptual_cache.discard(
+                context["video_key"], context["perceptual_hash"], error
+            )
+
+    @staticmethod
+    async def _await_near_duplicate(pending: Future) -> Dict[str, Any]:
+        """Wartet auf das Ergebnis eines ähnlichen Frames in Analyse."""
+        return dict(await asyncio.wrap_future(pending))
+
+    async def _infer_uncached_frame(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Fan-out eines nicht im Cache gefundenen Frames an die Services."""
+        envelope = context["envelope"]
+
+        # Asynchrone Analyse aller Services über den gepoolten Client
+        session = await self.http_pool.get_session()
+        if context["nsfw"] is None:
+            nsfw_task = self._analyze_nsfw(session, envelope)
+        else:
+            # Von der Vorprüfung entschieden
+            nsfw_task = asyncio.sleep(0, context["nsfw"])
+            self.stats["nsfw_screened"] += 1
+        tasks = [
+            self._analyze_pose(session, envelope),
+            self._analyze_ocr(session, envelope),
+            nsfw_task,
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.stats["frames_analyzed"] += 1
+        self.stats["jpeg_encodes"] += envelope.encodes_performed
+        self.stats["jpeg_encodes_saved"] += envelope.encodes_saved
+
+        # Ergebnisse zusammenführen
+        result = {
+            "pose": results[0] if not isinstance(results[0], Exception) else None,
+            "ocr": results[1] if not isinstance(results[1], Exception) else None,
+            "nsfw": results[2] if not isinstance(results[2], Exception) else None,
+        }
+
+        # Cache speichern
+        self.redis_client.setex(
+            f"frame:{context['frame_hash']}", 3600, pickle.dumps(result)  # 1 Stunde TTL
+        )
+        if context["perceptual_hash"] is not None:
+            self.perceptual_cache.add(
+                context["video_key"], context["perceptual_hash"], result
             )
 
-            return result
+        return result
+
+    async def _analyze_frame_internal(
+        self, frame: np.ndarray, video_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Interne Frame-Analyse mit Caching.
+
+        Args:
+            frame: Zu analysierendes Frame
+            video_key: Video-Schlüssel für den Near-Duplicate-Cache (optional)
+        """
+        try:
+            return await self._infer_frame(self._prepare_frame(frame, video_key))
 
         except Exception as e:
             logger.log_error("Fehler bei der Frame-Analyse", error=e)
             raise
 
-    async def process_video(self, video_path: str, job_id: str) -> Dict[str, Any]:
+    async def process_video(
+        self,
+        video_path: str,
+        job_id: str,
+        frame_budget: Optional[FairFrameBudget] = None,
+        resume: bool = True,
+        progress_callback: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Verarbeitet ein Video mit optimierter Batch-Verarbeitung.
 
         Args:
             video_path: Pfad zum Video
             job_id: Job-ID für Tracking
+            frame_budget: Mit anderen Jobs geteiltes Frame-Budget (optional)
+            resume: Vorhandenen Checkpoint desselben Jobs fortsetzen statt
+                von vorne zu beginnen
+            progress_callback: Wird pro geschriebenem Frame mit dem
+                Fortschritt (0-1) aufgerufen; darf nicht blockieren
 
         Returns:
             Analyseergebnisse
@@ -289,18 +573,56 @@ class VisionPipeline:
             # Initialisierung und Validierung
             video_metadata = await self._initialize_video_processing(video_path)
 
-            # Frame-Extraktion und Sampling
-            frames_data = await self._extract_and_sample_frames(
-                video_path, video_metadata
+            # Ergebnisse werden pro Frame inkrementell geschrieben und
+            # regelmäßig gesichert; ein vorhandener Checkpoint wird fortgesetzt
+            if not resume and self.checkpoint_store is not None:
+                self.checkpoint_store.delete(job_id)
+            checkpointer = VideoCheckpointer(
+                self.checkpoint_store,
+                job_id,
+                video_path,
+                interval=self.checkpoint_interval,
+            )
+            result_writer = self._open_result_writer(
+                checkpointer, video_path, job_id, video_metadata
             )
+            try:
+                # Frame-Extraktion und Sampling (streamend)
+                frame_source = await self._extract_and_sample_frames(
+                    video_path, video_metadata, start_frame=checkpointer.start_frame
+                )
 
-            # Batch-Verarbeitung mit Memory-Management
-            results = await self._process_frames_in_batches(frames_data)
+                on_frame = None
+                if progress_callback is not None:
+                    frame_count = max(1, video_metadata["frame_count"])
+
+                    def on_frame(frame_number: int) -> None:
+                        progress_callback(min(1.0, (frame_number + 1) / frame_count))
+
+                # Überlappende Stage-Verarbeitung mit Memory-Management
+                await self._process_frame_stream(
+                    frame_source,
+                    result_writer,
+                    job_id,
+                    frame_budget,
+                    checkpointer,
+                    on_frame,
+                )
 
-            # Ergebnisse speichern und finalisieren
-            output_info = await self._finalize_video_processing(
-                video_path, job_id, video_metadata, results
-            )
+                # Footer und Index schreiben
+                output_info = await self._finalize_video_processing(
+                    video_metadata, result_writer, checkpointer
+                )
+                checkpointer.complete()
+            except BaseException:
+                # Fortschritt bis zum letzten geschriebenen Frame sichern
+                checkpointer.save()
+                raise
+            finally:
+                unused_cap = video_metadata.pop("cap", None)
+                if unused_cap is not None:
+                    unused_cap.release()
+                result_writer.close()
 
             logger.log_info(
                 "Video-Verarbeitung abgeschlossen",
@@ -333,143 +655,214 @@ class VisionPipeline:
         return metadata
 
     async def _extract_and_sample_frames(
-        self, video_path: str, metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Extrahiert und sampelt Frames aus dem Video."""
-        cap = metadata["cap"]
-        frames = []
-        frame_numbers = []
-        frame_idx = 0
-
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                if frame_idx % self.frame_sampling_rate == 0:
-                    frames.append(frame)
-                    frame_numbers.append(frame_idx)
+        self, video_path: str, metadata: Dict[str, Any], start_frame: int = 0
+    ) -> VideoFrameSource:
+        """
+        Erstellt eine streamende Frame-Quelle für das Video.
 
-                frame_idx += 1
+        Frames werden erst beim Iterieren dekodiert; höchstens
+        ``frame_prefetch`` Frames liegen gleichzeitig im Speicher. Bei
+        Szenenwechsel-Sampling ist jedes n-te Frame nur Kandidat. Beim
+        Fortsetzen beginnt die Dekodierung bei ``start_frame``.
+        """
+        sampler = None
+        if self.sampling_strategy != "uniform":
+            sampler = create_frame_sampler(
+                self.sampling_strategy, **self.sampling_options
+            )
 
-                # Batch-Größe anpassen basierend auf Memory
-                if len(frames) >= self.batch_size:
-                    self._adjust_batch_size()
+        return VideoFrameSource(
+            video_path,
+            frame_sampling_rate=self.frame_sampling_rate,
+            prefetch=self.frame_prefetch,
+            cap=metadata.pop("cap", None),
+            start_frame=start_frame,
+            sampler=sampler,
+        )
 
-            return {
-                "frames": frames,
-                "frame_numbers": frame_numbers,
-                "total_frames_processed": len(frames),
-            }
-        finally:
-            cap.release()
+    async def _process_frame_stream(
+        self,
+        frame_source: VideoFrameSource,
+        result_writer: FrameResultWriter,
+        job_id: str,
+        frame_budget: Optional[FairFrameBudget] = None,
+        checkpointer: Optional[VideoCheckpointer] = None,
+        on_frame: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Verarbeitet gestreamte Frames in überlappenden Stages.
 
-    async def _process_frames_in_batches(
-        self, frames_data: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Verarbeitet Frames in optimierten Batches."""
-        frames = frames_data["frames"]
-        frame_numbers = frames_data["frame_numbers"]
+        Decode (VideoFrameSource) → Preprocess (Thread-Pool) → Inferenz
+        (Service-Fan-out) → Aggregation (hier). Begrenzte Queues zwischen den
+        Stages sorgen für Backpressure; der Durchsatz wird von der
+        langsamsten Stage bestimmt. Ergebnisse werden in Frame-Reihenfolge
+        direkt in den ``result_writer`` geschrieben. Mit ``frame_budget``
+        belegt jedes Frame bis zur Aggregation einen Platz im globalen Budget.
+        Der ``checkpointer`` sichert den Fortschritt in festen Abständen,
+        ``on_frame`` erhält die Nummer jedes geschriebenen Frames.
 
-        # Frames in Batches aufteilen
-        batches = self._create_frame_batches(frames, frame_numbers)
+        Returns:
+            Anzahl erfolgreich verarbeiteter Frames
+        """
+        video_key = frame_source.video_path
+
+        def preprocess(sampled):
+            context = self._prepare_frame(sampled.frame, video_key)
+            return sampled.frame_number, sampled.timestamp, context
+
+        async def infer(item):
+            frame_number, timestamp, context = item
+            if context["pending"] is not None:
+                # Ergebnis des ähnlichen Frames erst bei der Aggregation
+                # abwarten, damit wartende Frames keine Inferenz-Worker belegen
+                return frame_number, timestamp, context["pending"]
+            return frame_number, timestamp, await self._infer_frame(context)
+
+        stage_executor = StagedExecutor(
+            [
+                Stage(
+                    "preprocess",
+                    preprocess,
+                    workers=self.preprocess_workers,
+                    queue_size=self.stage_queue_size,
+                ),
+                Stage(
+                    "inference",
+                    infer,
+                    workers=self.inference_workers,
+                    queue_size=self.stage_queue_size,
+                ),
+            ],
+            thread_pool=self.executor,
+        )
 
-        # Asynchrone Batch-Verarbeitung mit Memory-Management
-        results = []
-        for batch_idx, batch in enumerate(batches):
-            try:
-                batch_results = await self._process_single_batch(batch)
-                results.extend(batch_results)
+        source = frame_source
+        if frame_budget is not None:
+            source = self._admit_frames(frame_source, frame_budget, job_id)
 
-                # Regelmäßiger GPU-Cleanup
-                if batch_idx % 5 == 0:
+        processed = 0
+        try:
+            async with contextlib.aclosing(
+                stage_executor.run(source, return_exceptions=True)
+            ) as results:
+                async for index, item in results:
+                    if frame_budget is not None:
+                        frame_budget.release(job_id)
+
+                    if isinstance(item, tuple) and isinstance(item[2], Future):
+                        try:
+                            result = await self._await_near_duplicate(item[2])
+                            item = (item[0], item[1], result)
+                        except Exception as e:
+                            item = e
+
+                    if isinstance(item, Exception):
+                        self.stats["frames_failed"] += 1
+                        logger.log_error(f"Fehler bei Frame {index}", error=item)
+                        continue
+
+                    result_writer.write(*item)
+                    if checkpointer is not None:
+                        checkpointer.frame_written(item[0])
+                    if on_frame is not None:
+                        on_frame(item[0])
+                    processed += 1
+                    self.frame_counter += 1
+
+                    # Regelmäßige GPU-Überwachung und -Cleanup
+                    if self.frame_counter % 10 == 0:
+                        self._adjust_batch_size()
                     self._cleanup_gpu_memory()
-
-            except Exception as e:
-                logger.log_error(f"Fehler bei Batch {batch_idx}", error=e)
-                await self._handle_batch_error(batch_idx)
-                continue
-
-        return results
-
-    def _create_frame_batches(
-        self, frames: List[np.ndarray], frame_numbers: List[int]
-    ) -> List[List[tuple]]:
-        """Erstellt optimierte Frame-Batches."""
-        batches = []
-        current_batch = []
-
-        for frame, frame_number in zip(frames, frame_numbers):
-            current_batch.append((frame, frame_number))
-            self.frame_counter += 1
-
-            # Regelmäßige GPU-Überwachung
-            if self.frame_counter % 10 == 0:
-                self._adjust_batch_size()
-
-            if len(current_batch) >= self.batch_size:
-                batches.append(current_batch)
-                current_batch = []
-
-        if current_batch:
-            batches.append(current_batch)
-
-        return batches
-
-    async def _process_single_batch(self, batch: List[tuple]) -> List[Dict[str, Any]]:
-        """Verarbeitet einen einzelnen Batch von Frames."""
-        return await asyncio.gather(
-            *[self._analyze_frame_internal(frame) for frame, _ in batch]
+        finally:
+            # Decoder-Thread samt VideoCapture auch bei Abbruch oder Fehler
+            # beim Schreiben sofort freigeben
+            await frame_source.close()
+            if frame_budget is not None:
+                frame_budget.release_all(job_id)
+            self.last_stage_metrics = stage_executor.get_metrics()
+            if self.perceptual_cache is not None:
+                self.perceptual_cache.drop_video(video_key)
+
+        logger.log_info(
+            "Frame-Stream verarbeitet",
+            extra={
+                **frame_source.get_statistics(),
+                "bottleneck_stage": self.last_stage_metrics["bottleneck"],
+                "stages": self.last_stage_metrics["stages"],
+            },
         )
-
-    async def _handle_batch_error(self, batch_idx: int) -> None:
-        """Behandelt Fehler bei der Batch-Verarbeitung."""
-        self._cleanup_gpu_memory(force=True)
-        self.batch_size = max(1, self.batch_size // 2)
-        logger.log_warning(
-            f"Batch {batch_idx} fehler behandelt",
-            extra={"new_batch_size": self.batch_size},
+        return processed
+
+    @staticmethod
+    async def _admit_frames(
+        frame_source: VideoFrameSource, frame_budget: FairFrameBudget, job_id: str
+    ) -> AsyncIterator[SampledFrame]:
+        """Reicht Frames erst weiter, wenn im globalen Budget Platz ist."""
+        async for sampled in frame_source:
+            await frame_budget.acquire(job_id)
+            yield sampled
+
+    def _open_result_writer(
+        self,
+        checkpointer: VideoCheckpointer,
+        video_path: str,
+        job_id: str,
+        metadata: Dict[str, Any],
+    ) -> FrameResultWriter:
+        """Legt die JSON-Lines-Ergebnisdatei an oder setzt sie fort."""
+        return checkpointer.open_writer(
+            lambda: os.path.join(
+                self.output_dir,
+                f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            ),
+            metadata={
+                "video_path": video_path,
+                "job_id": job_id,
+                "fps": metadata["fps"],
+                "frame_count": metadata["frame_count"],
+                "duration": metadata["duration"],
+            },
+            index_interval=self.result_index_interval,
         )
 
     async def _finalize_video_processing(
         self,
-        video_path: str,
-        job_id: str,
         metadata: Dict[str, Any],
-        results: List[Dict[str, Any]],
+        result_writer: FrameResultWriter,
+        checkpointer: VideoCheckpointer,
     ) -> Dict[str, Any]:
-        """Finalisiert die Video-Verarbeitung und speichert Ergebnisse."""
-        output_path = os.path.join(
-            self.output_dir,
-            f"{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        """Finalisiert die Video-Verarbeitung und schreibt Footer und Index."""
+        result_writer.close(
+            summary={
+                "status": "completed",
+                "processed_frames": result_writer.frames_written,
+                "resumed_from_frame": checkpointer.start_frame,
+                "finished_at": datetime.now().isoformat(),
+            }
         )
 
-        output_data = {
-            "video_path": video_path,
-            "fps": metadata["fps"],
-            "frame_count": metadata["frame_count"],
-            "duration": metadata["duration"],
-            "results": results,
-        }
-
-        with open(output_path, "w") as f:
-            json.dump(output_data, f, indent=2)
-
         return {
             "status": "completed",
-            "output_path": output_path,
+            "output_path": result_writer.path,
+            "index_path": result_writer.index_path,
             "frame_count": metadata["frame_count"],
-            "processed_frames": len(results),
+            "processed_frames": result_writer.frames_written,
+            "resumed_from_frame": checkpointer.start_frame,
         }
 
-    async def process_image(self, image_path: str, job_id: str) -> Dict[str, Any]:
+    async def process_image(
+        self,
+        image_path: str,
+        job_id: str,
+        frame_budget: Optional[FairFrameBudget] = None,
+    ) -> Dict[str, Any]:
         """
         Verarbeitet ein Bild mit optimiertem Caching.
 
         Args:
             image_path: Pfad zum Bild
             job_id: Job-ID für Tracking
+            frame_budget: Mit anderen Jobs geteiltes Frame-Budget (optional)
 
         Returns:
             Analyseergebnisse
@@ -486,7 +879,13 @@ class VisionPipeline:
                 raise ValueError(f"Konnte Bild nicht laden: {image_path}")
 
             # Frame analysieren
-            result = await self._analyze_frame_internal(image)
+            if frame_budget is not None:
+                await frame_budget.acquire(job_id)
+            try:
+                result = await self._analyze_frame_internal(image)
+            finally:
+                if frame_budget is not None:
+                    frame_budget.release(job_id)
 
             # Ergebnisse speichern
             output_path = os.path.join(
@@ -512,14 +911,80 @@ class VisionPipeline:
             logger.log_error("Fehler bei der Bild-Verarbeitung", error=e)
             raise
 
+    async def process_media(
+        self,
+        paths: List[str],
+        priorities: Optional[List[int]] = None,
+        kind: Optional[str] = None,
+        job_prefix: str = "media",
+        job_ids: Optional[List[str]] = None,
+        max_concurrent_jobs: Optional[int] = None,
+        on_job_done: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Verarbeitet mehrere Videos und Bilder gleichzeitig.
+
+        Die Jobs teilen sich ein globales Frame-Budget; die Startreihenfolge
+        bestimmt die Scheduling-Policy (Standard: kürzester Job zuerst).
+
+        Args:
+            paths: Pfade der Videos und Bilder
+            priorities: Priorität pro Pfad (höher = früher, optional)
+            kind: "video" oder "image" für alle Pfade (Standard: nach Endung)
+            job_prefix: Präfix der erzeugten Job-IDs
+            job_ids: Feste Job-ID pro Pfad, z.B. für das Fortsetzen per
+                Checkpoint (optional, ersetzt job_prefix)
+            max_concurrent_jobs: Parallelität für diesen Aufruf (optional)
+            on_job_done: Callback nach jeder fertigen Datei mit Ergebnis,
+                Anzahl fertiger Dateien und Gesamtzahl (optional)
+
+        Returns:
+            Ergebnis pro Pfad in Eingabereihenfolge
+        """
+        if priorities is not None and len(priorities) != len(paths):
+            raise ValueError("priorities muss dieselbe Länge wie paths haben")
+        if job_ids is not None and len(job_ids) != len(paths):
+            raise ValueError("job_ids muss dieselbe Länge wie paths haben")
+
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        jobs = [
+            MediaJob(
+                path=path,
+                kind=kind or media_kind(path),
+                job_id=(
+                    job_ids[index] if job_ids else f"{job_prefix}_{run_id}_{index}"
+                ),
+                priority=priorities[index] if priorities else 0,
+            )
+            for index, path in enumerate(paths)
+        ]
+        return await self.scheduler.run(
+            jobs, max_concurrent_jobs=max_concurrent_jobs, on_job_done=on_job_done
+        )
+
+    async def process_multiple_videos(
+        self, video_paths: List[str], priorities: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Verarbeitet mehrere Videos gleichzeitig (siehe process_media)."""
+        return await self.process_media(
+            video_paths, priorities, kind="video", job_prefix="video"
+        )
+
+    async def process_multiple_images(
+        self, image_paths: List[str], priorities: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Verarbeitet mehrere Bilder gleichzeitig (siehe process_media)."""
+        return await self.process_media(
+            image_paths, priorities, kind="image", job_prefix="image"
+        )
+
     async def _analyze_pose(
-        self, session: aiohttp.ClientSession, frame: np.ndarray
+        self, session: aiohttp.ClientSession, envelope: FrameEnvelope
     ) -> Dict[str, Any]:
         """Analysiert die Pose in einem Frame."""
         try:
-            # Frame in Base64 kodieren
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_base64 = base64.b64encode(buffer).decode("utf-8")
+            # Geteilte Base64-Kodierung des Frames
+            frame_base64 = envelope.base64()
 
             # API-Anfrage
             async with session.post(
@@ -535,13 +1000,12 @@ class VisionPipeline:
             raise
 
     async def _analyze_ocr(
-        self, session: aiohttp.ClientSession, frame: np.ndarray
+        self, session: aiohttp.ClientSession, envelope: FrameEnvelope
     ) -> Dict[str, Any]:
         """Analysiert Text in einem Frame."""
         try:
-            # Frame in Base64 kodieren
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_base64 = base64.b64encode(buffer).decode("utf-8")
+            # Geteilte Base64-Kodierung des Frames
+            frame_base64 = envelope.base64()
 
             # API-Anfrage
             async with session.post(
@@ -557,13 +1021,12 @@ class VisionPipeline:
             raise
 
     async def _analyze_nsfw(
-        self, session: aiohttp.ClientSession, frame: np.ndarray
+        self, session: aiohttp.ClientSession, envelope: FrameEnvelope
     ) -> Dict[str, Any]:
         """Analysiert NSFW-Inhalte in einem Frame."""
         try:
-            # Frame in Base64 kodieren
-            _, buffer = cv2.imencode(".jpg", frame)
-            frame_base64 = base64.b64encode(buffer).decode("utf-8")
+            # Geteilte Base64-Kodierung des Frames
+            frame_base64 = envelope.base64()
 
             # API-Anfrage
             async with session.post(
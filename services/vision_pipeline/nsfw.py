@@ -10,7 +10,7 @@ import sys
 import time
 from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 import cv2
@@ -18,6 +18,9 @@ import numpy as np
 import requests
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detection_table import DetectionTable
+from nsfw_cascade import NSFWCascade
+
 from common.logging_config import ServiceLogger
 
 # Logger initialisieren
@@ -32,6 +35,7 @@ class NSFWDetector:
         max_workers: int = 4,
         cache_size: int = 1000,
         frame_sampling_rate: int = 2,
+        cascade: Optional[NSFWCascade] = None,
     ) -> None:
         """
         Initialisiert den NSFW-Detektor mit optimierter Batch-Verarbeitung.
@@ -42,6 +46,7 @@ class NSFWDetector:
             max_workers: Maximale Anzahl paralleler Worker
             cache_size: Größe des LRU-Caches
             frame_sampling_rate: Jedes n-te Frame wird analysiert
+            cascade: Optionale Vorprüfung; nur unsichere Frames gehen an CLIP
         """
         try:
             self.nsfw_service_url = nsfw_service_url
@@ -53,6 +58,7 @@ class NSFWDetector:
             self.batch_size = batch_size
             self.max_workers = max_workers
             self.frame_sampling_rate = frame_sampling_rate
+            self.cascade = cascade
 
             # Thread-Pool für parallele Verarbeitung
             self.executor = ThreadPoolExecutor(max_workers=max_workers)
@@ -70,6 +76,7 @@ class NSFWDetector:
                     "max_workers": max_workers,
                     "cache_size": cache_size,
                     "frame_sampling_rate": frame_sampling_rate,
+                    "cascade": cascade is not None,
                 },
             )
 
@@ -119,18 +126,28 @@ class NSFWDetector:
         """Verarbeitet einen Batch von Frames asynchron."""
         try:
             # Frames für Batch-Anfrage vorbereiten
-            files = []
+            form = aiohttp.FormData()
             for frame, _ in frames:
                 _, img_encoded = cv2.imencode(".jpg", frame)
-                files.append(
-                    ("files", ("frame.jpg", img_encoded.tobytes(), "image/jpeg"))
+                form.add_field(
+                    "files",
+                    img_encoded.tobytes(),
+                    filename="frame.jpg",
+                    content_type="image/jpeg",
                 )
 
             # Batch-Anfrage senden
-            async with session.post(self.batch_endpoint, data=files) as response:
+            async with session.post(self.batch_endpoint, data=form) as response:
                 if response.status == 200:
                     results = await response.json()
-                    return [
+                    if not isinstance(results, list):
+                        raise ValueError("Ungültige Batch-Antwort")
+                    if len(results) != len(frames):
+                        logger.log_error(
+                            "Batch-Antwort passt nicht zur Anzahl der Frames",
+                            extra={"expected": len(frames), "received": len(results)},
+                        )
+                    processed = [
                         {
                             "frame_number": frame_number,
                             "nsfw_data": result,
@@ -139,6 +156,12 @@ class NSFWDetector:
                         }
                         for (_, frame_number), result in zip(frames, results)
                     ]
+                    # Ein Ergebnis pro Frame, auch bei unvollständiger Antwort
+                    processed.extend(
+                        {"error": "Kein Ergebnis vom NSFW-Service"}
+                        for _ in frames[len(processed) :]
+                    )
+                    return processed
                 else:
                     error_text = await response.text()
                     logger.log_error(
@@ -154,6 +177,17 @@ class NSFWDetector:
             logger.log_error("Fehler bei der Batch-Verarbeitung", error=e)
             return [{"error": str(e)} for _ in frames]
 
+    def _screened_result(
+        self, frame_number: int, nsfw_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Ergebnis für ein von der Vorprüfung entschiedenes Frame."""
+        return {
+            "frame_number": frame_number,
+            "nsfw_data": nsfw_data,
+            "processing_time": 0.0,
+            "timestamp": frame_number / 30.0,
+        }
+
     def analyze_frame(self, frame: np.ndarray) -> Dict[str, Any]:
         """
         Analysiert ein einzelnes Frame mit Caching.
@@ -193,8 +227,20 @@ class NSFWDetector:
             # Frames in Batches aufteilen
             batches = []
             current_batch = []
+            screened = {}
+            order = []
+
+            for index, (frame, frame_number) in enumerate(zip(frames, frame_numbers)):
+                # Eindeutige Frames ohne CLIP entscheiden
+                if self.cascade is not None:
+                    nsfw_data = self.cascade.screen(frame)
+                    if nsfw_data is not None:
+                        screened[index] = self._screened_result(
+                            frame_number, nsfw_data
+                        )
+                        order.append(index)
+                        continue
 
-            for frame, frame_number in zip(frames, frame_numbers):
                 # Frame-Hashing für Caching
                 frame_hash = self._compute_frame_hash(frame)
 
@@ -203,6 +249,7 @@ class NSFWDetector:
                     continue
 
                 current_batch.append((frame, frame_number))
+                order.append(index)
 
                 if len(current_batch) >= self.batch_size:
                     batches.append(current_batch)
@@ -218,12 +265,20 @@ class NSFWDetector:
 
             # Ergebnisse zusammenführen
             final_results = [item for sublist in results for item in sublist]
+            if screened:
+                # Vorgeprüfte und eskalierte Frames in Frame-Reihenfolge
+                escalated = iter(final_results)
+                final_results = [
+                    screened[index] if index in screened else next(escalated)
+                    for index in order
+                ]
 
             logger.log_info(
                 "Video-Sequenz erfolgreich verarbeitet",
                 extra={
                     "processed_frames": len(final_results),
                     "cache_hits": len(frames) - len(final_results),
+                    "screened_frames": len(screened),
                 },
             )
 
@@ -257,7 +312,9 @@ class NSFWDetector:
                 }
 
             start_time = time.time()
-            nsfw_data = self.analyze_frame(frame)
+            nsfw_data = self.cascade.screen(frame) if self.cascade else None
+            if nsfw_data is None:
+                nsfw_data = self.analyze_frame(frame)
             processing_time = time.time() - start_time
 
             return {
@@ -291,20 +348,15 @@ class NSFWDetector:
             min_confidence: Minimaler Konfidenzwert
 
         Returns:
-            Gefilterte Liste von Ergebnissen
+            Gefilterte Liste von Ergebnissen (die Eingabe bleibt unverändert)
         """
         try:
-            filtered_results = []
-            for result in results:
-                if "nsfw_data" in result and "results" in result["nsfw_data"]:
-                    filtered_nsfw = [
-                        nsfw
-                        for nsfw in result["nsfw_data"]["results"]
-                        if nsfw["confidence"] >= min_confidence and nsfw["is_nsfw"]
-                    ]
-                    if filtered_nsfw:
-                        result["nsfw_data"]["results"] = filtered_nsfw
-                        filtered_results.append(result)
+            table = DetectionTable.from_results(
+                results, "nsfw_data", flag_key="is_nsfw"
+            )
+            filtered_results = table.filter(
+                min_confidence=min_confidence, flag=True
+            ).to_results(include_empty=False)
 
             logger.log_info(
                 "NSFW-Ergebnisse gefiltert",
@@ -0,0 +1,404 @@
+"""
+Kaskadierte NSFW-Vorprüfung für die Vision Pipeline
+Günstige Hautton-Heuristik auf verkleinerten Frames entscheidet eindeutige
+Fälle, nur unsichere Frames gehen an das CLIP-NSFW-Modell. Enthält
+Kalibrierung und ein Offline-Evaluationswerkzeug.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Hauttonbereich im YCrCb-Farbraum (Chai & Ngan)
+_CR_RANGE = (133, 173)
+_CB_RANGE = (77, 127)
+# Mittlere Sättigung (HSV, 0-255), unter der Farbe keine Aussage erlaubt
+_MIN_SATURATION = 20.0
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def skin_score(frame: np.ndarray, max_side: int = 96) -> Optional[float]:
+    """
+    Anteil hauttonfarbener Pixel eines verkleinerten Frames.
+
+    Args:
+        frame: NumPy Array des Bildes (BGR Format)
+        max_side: Längste Kante nach dem Verkleinern
+
+    Returns:
+        Wert zwischen 0 und 1, oder None bei (nahezu) farblosen Frames,
+        für die der Farbton nichts aussagt
+    """
+    scale = max_side / max(frame.shape[:2])
+    if scale < 1.0:
+        size = (
+            max(1, round(frame.shape[1] * scale)),
+            max(1, round(frame.shape[0] * scale)),
+        )
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    saturation = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)[:, :, 1]
+    if saturation.mean() < _MIN_SATURATION:
+        return None
+
+    ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+    mask = cv2.inRange(
+        ycrcb, (0, _CR_RANGE[0], _CB_RANGE[0]), (255, _CR_RANGE[1], _CB_RANGE[1])
+    )
+    return float(np.count_nonzero(mask)) / mask.size
+
+
+@dataclass
+class CascadeThresholds:
+    """
+    Schwellwerte der Vorprüfung.
+
+    Frames mit einem Score unter ``safe_below`` gelten ohne CLIP als
+    unbedenklich, Frames über ``nsfw_above`` (falls gesetzt) als NSFW.
+    Alles dazwischen sowie farblose Frames werden an CLIP eskaliert.
+    """
+
+    safe_below: float = 0.02
+    nsfw_above: Optional[float] = None
+
+    def decide(self, score: Optional[float]) -> Optional[bool]:
+        """True/False für eindeutige Fälle, None für Eskalation."""
+        if score is None:
+            return None
+        if score < self.safe_below:
+            return False
+        if self.nsfw_above is not None and score > self.nsfw_above:
+            return True
+        return None
+
+    def save(self, path: str) -> None:
+        """Speichert die Schwellwerte als JSON."""
+        with open(path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "CascadeThresholds":
+        """Lädt kalibrierte Schwellwerte aus einer JSON-Datei."""
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+class NSFWCascade:
+    """
+    Vorprüfung vor dem CLIP-NSFW-Modell.
+
+    ``screen`` liefert für eindeutige Frames ein Ergebnis im Format des
+    NSFW-Services (``is_nsfw``, ``confidence``, ``categories``) mit
+    ``stage: "screen"``; für unsichere Frames ``None``, diese sind an
+    CLIP weiterzugeben.
+    """
+
+    def __init__(
+        self, thresholds: Optional[CascadeThresholds] = None, max_side: int = 96
+    ) -> None:
+        """
+        Initialisiert die Kaskade.
+
+        Args:
+            thresholds: Kalibrierte Schwellwerte (Standard: konservativ)
+            max_side: Längste Kante der Frames für die Heuristik
+        """
+        self.thresholds = thresholds or CascadeThresholds()
+        self.max_side = max_side
+        self.stats = {"screened": 0, "decided_safe": 0, "decided_nsfw": 0}
+        # screen läuft im Thread-Pool der Vorverarbeitung
+        self._lock = threading.Lock()
+
+    def screen(self, frame: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Prüft ein Frame mit der Heuristik.
+
+        Args:
+            frame: NumPy Array des Bildes (BGR Format)
+
+        Returns:
+            NSFW-Ergebnis für eindeutige Frames, sonst None (Eskalation)
+        """
+        score = skin_score(frame, self.max_side)
+        decision = self.thresholds.decide(score)
+        with self._lock:
+            self.stats["screened"] += 1
+            if decision is not None:
+                self.stats["decided_nsfw" if decision else "decided_safe"] += 1
+        if decision is None:
+            return None
+
+        return {
+            "is_nsfw": decision,
+            "confidence": score,
+            "categories": {},
+            "stage": "screen",
+            "screen_score": score,
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt geprüfte, entschiedene und eskalierte Frames zurück."""
+        with self._lock:
+            stats = dict(self.stats)
+        screened = stats["screened"]
+        escalated = screened - stats["decided_safe"] - stats["decided_nsfw"]
+        return dict(
+            stats,
+            escalated=escalated,
+            escalation_rate=escalated / screened if screened else 0.0,
+            thresholds=asdict(self.thresholds),
+        )
+
+
+def cascade_from_env() -> Optional[NSFWCascade]:
+    """
+    Erzeugt die Vorprüfung aus Umgebungsvariablen.
+
+    ``NSFW_CASCADE_THRESHOLDS`` verweist auf kalibrierte Schwellwerte (JSON),
+    ``NSFW_CASCADE=1`` aktiviert die Standardschwellwerte. Ohne beide
+    Variablen bleibt die Vorprüfung deaktiviert.
+    """
+    path = os.getenv("NSFW_CASCADE_THRESHOLDS")
+    if path:
+        return NSFWCascade(CascadeThresholds.load(path))
+    if os.getenv("NSFW_CASCADE", "").lower() in ("1", "true", "yes"):
+        return NSFWCascade()
+    return None
+
+
+def calibrate(
+    scores: Sequence[Optional[float]],
+    labels: Sequence[bool],
+    max_missed_rate: float = 0.01,
+    max_false_alarm_rate: Optional[float] = None,
+) -> CascadeThresholds:
+    """
+    Bestimmt Schwellwerte aus einer gelabelten Stichprobe.
+
+    ``safe_below`` wird so hoch gewählt, dass höchstens ``max_missed_rate``
+    der NSFW-Frames ohne CLIP als unbedenklich gelten. Mit
+    ``max_false_alarm_rate`` wird zusätzlich ``nsfw_above`` so niedrig
+    gewählt, dass höchstens dieser Anteil unbedenklicher Frames ohne CLIP
+    als NSFW gilt.
+
+    Args:
+        scores: Scores der Heuristik (None = farblos, immer eskaliert)
+        labels: True für NSFW-Frames
+        max_missed_rate: Zulässiger Anteil übersehener NSFW-Frames
+        max_false_alarm_rate: Zulässiger Anteil fälschlich als NSFW
+            entschiedener Frames (None = nie ohne CLIP als NSFW entscheiden)
+
+    Returns:
+        Kalibrierte Schwellwerte
+    """
+    known = [(s, label) for s, label in zip(scores, labels) if s is not None]
+    nsfw = np.sort([s for s, label in known if label])
+    safe = np.sort([s for s, label in known if not label])
+
+    if len(nsfw):
+        # Höchstens k NSFW-Scores liegen strikt unter dem k-kleinsten
+        allowed = int(np.floor(max_missed_rate * len(nsfw)))
+        if allowed < len(nsfw):
+            safe_below = float(nsfw[allowed])
+        else:
+            safe_below = float(np.nextafter(nsfw[-1], np.inf))
+    else:
+        safe_below = 1.0
+
+    nsfw_above = None
+    if max_false_alarm_rate is not None and len(safe):
+        allowed = int(np.floor(max_false_alarm_rate * len(safe)))
+        if allowed < len(safe):
+            candidate = float(safe[::-1][allowed])
+            if candidate >= safe_below:
+                nsfw_above = candidate
+
+    return CascadeThresholds(safe_below=safe_below, nsfw_above=nsfw_above)
+
+
+def evaluate(
+    scores: Sequence[Optional[float]],
+    labels: Sequence[bool],
+    thresholds: CascadeThresholds,
+    clip_predictions: Optional[Sequence[bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Bewertet die Kaskade gegenüber CLIP allein.
+
+    Args:
+        scores: Scores der Heuristik
+        labels: True für NSFW-Frames
+        thresholds: Zu bewertende Schwellwerte
+        clip_predictions: CLIP-Entscheidungen pro Frame (ohne Angabe wird
+            CLIP als fehlerfrei angenommen, der Genauigkeitsverlust ist dann
+            der Fehler der Vorprüfung)
+
+    Returns:
+        Eskalationsrate, Genauigkeit mit und ohne Kaskade, Verlust,
+        übersehene NSFW-Frames und Fehlalarme
+    """
+    labels = [bool(label) for label in labels]
+    reference = list(clip_predictions) if clip_predictions is not None else labels
+    escalated = missed = false_alarms = correct = reference_correct = 0
+
+    for score, label, clip in zip(scores, labels, reference):
+        decision = thresholds.decide(score)
+        if decision is None:
+            escalated += 1
+            decision = clip
+        elif decision != label:
+            if label:
+                missed += 1
+            else:
+                false_alarms += 1
+        correct += decision == label
+        reference_correct += clip == label
+
+    total = len(labels)
+    accuracy = correct / total if total else 0.0
+    reference_accuracy = reference_correct / total if total else 0.0
+    return {
+        "frames": total,
+        "escalated": escalated,
+        "escalation_rate": escalated / total if total else 0.0,
+        "accuracy": accuracy,
+        "reference_accuracy": reference_accuracy,
+        "accuracy_loss": reference_accuracy - accuracy,
+        "missed_nsfw": missed,
+        "false_alarms": false_alarms,
+        "thresholds": asdict(thresholds),
+    }
+
+
+def load_sample(directory: str) -> List[tuple]:
+    """
+    Lädt eine gelabelte Stichprobe aus ``<directory>/safe`` und ``<directory>/nsfw``.
+
+    Returns:
+        Liste von (Pfad, Label) mit True für NSFW
+    """
+    sample = []
+    for label, subdir in ((False, "safe"), (True, "nsfw")):
+        path = os.path.join(directory, subdir)
+        if not os.path.isdir(path):
+            continue
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                sample.append((os.path.join(path, name), label))
+    return sample
+
+
+def _clip_predictions(
+    paths: Sequence[str], clip_url: str, threshold: float, batch_size: int = 16
+) -> List[bool]:
+    import requests
+
+    predictions: List[bool] = []
+    for start in range(0, len(paths), batch_size):
+        files = []
+        for path in paths[start : start + batch_size]:
+            with open(path, "rb") as f:
+                files.append(
+                    ("files", (os.path.basename(path), f.read(), "image/jpeg"))
+                )
+        response = requests.post(
+            f"{clip_url.rstrip('/')}/batch_analyze",
+            files=files,
+            data={"threshold": threshold},
+            timeout=300,
+        )
+        response.raise_for_status()
+        predictions.extend(bool(result["is_nsfw"]) for result in response.json())
+    return predictions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Offline-Evaluation und Kalibrierung auf einer lokalen Stichprobe."""
+    parser = argparse.ArgumentParser(
+        description=(
+            "Kalibriert die NSFW-Vorprüfung auf einer gelabelten Stichprobe "
+            "(Unterordner safe/ und nsfw/) und zeigt Eskalationsrate gegen "
+            "Genauigkeitsverlust."
+        )
+    )
+    parser.add_argument("sample_dir", help="Verzeichnis mit safe/ und nsfw/")
+    parser.add_argument(
+        "--max-missed-rate",
+        type=float,
+        default=0.01,
+        help="Zulässiger Anteil übersehener NSFW-Frames (Standard: 0.01)",
+    )
+    parser.add_argument(
+        "--max-false-alarm-rate",
+        type=float,
+        default=None,
+        help="Zulässiger Anteil fälschlich als NSFW entschiedener Frames",
+    )
+    parser.add_argument(
+        "--clip-url",
+        default=None,
+        help="URL des CLIP-NSFW-Services für Referenzentscheidungen (optional)",
+    )
+    parser.add_argument("--clip-threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--output", default=None, help="Pfad für die kalibrierten Schwellwerte (JSON)"
+    )
+    args = parser.parse_args(argv)
+
+    sample = load_sample(args.sample_dir)
+    if not sample:
+        print(f"Keine Bilder in {args.sample_dir}/safe oder /nsfw gefunden")
+        return 1
+
+    paths = [path for path, _ in sample]
+    labels = [label for _, label in sample]
+    scores = []
+    for path in paths:
+        image = cv2.imread(path)
+        scores.append(skin_score(image) if image is not None else None)
+
+    clip = None
+    if args.clip_url:
+        clip = _clip_predictions(paths, args.clip_url, args.clip_threshold)
+
+    print(
+        f"Stichprobe: {len(sample)} Bilder ({sum(labels)} NSFW, "
+        f"{len(labels) - sum(labels)} unbedenklich)"
+    )
+    print(
+        f"{'Verpasst max':>13} {'safe_below':>11} {'Eskalation':>11} "
+        f"{'Genauigkeit':>12} {'Verlust':>8}"
+    )
+    for rate in (0.0, 0.005, 0.01, 0.02, 0.05, 0.1):
+        candidate = calibrate(scores, labels, rate, args.max_false_alarm_rate)
+        report = evaluate(scores, labels, candidate, clip)
+        print(
+            f"{rate:>13.3f} {candidate.safe_below:>11.4f} "
+            f"{report['escalation_rate']:>11.1%} {report['accuracy']:>12.1%} "
+            f"{report['accuracy_loss']:>8.2%}"
+        )
+
+    thresholds = calibrate(
+        scores, labels, args.max_missed_rate, args.max_false_alarm_rate
+    )
+    report = evaluate(scores, labels, thresholds, clip)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        thresholds.save(args.output)
+        print(f"Schwellwerte gespeichert: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,11 +5,12 @@ CPU-optimierter Service für Texterkennung in Bildern
 
 import logging
 import time
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
 import requests
+from frame_source import resolve_timestamps
 
 # Erweiterung: OCR für Wasserzeichen und Titel
 print("Running OCR module...")
@@ -17,11 +18,243 @@ print("Running OCR module...")
 logger = logging.getLogger(__name__)
 
 
+def _bbox_rect(bbox: Sequence[Sequence[float]]) -> Tuple[int, int, int, int]:
+    """Achsenparalleles Rechteck (x0, y0, x1, y1) eines OCR-Polygons."""
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    return int(min(xs)), int(min(ys)), int(np.ceil(max(xs))), int(np.ceil(max(ys)))
+
+
+def _overlaps(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class TemporalOCRCache:
+    """
+    Wiederverwendung von OCR-Ergebnissen über aufeinanderfolgende Frames.
+
+    Untertitel, Wasserzeichen und Schilder bleiben meist über viele Frames
+    unverändert. Jedes Frame wird daher verkleinert in Graustufen mit einem
+    Referenzbild verglichen, gemittelt über Zellen von ``cell_size`` Pixeln.
+    Texte in unveränderten Zellen werden mit ``first_seen``/``last_seen``
+    übernommen; OCR läuft nur für zusammenhängende veränderte Bereiche,
+    erweitert um die Texte, die sie schneiden. Ändert sich mehr als
+    ``full_refresh_ratio`` des Bildes (z.B. Szenenwechsel), wird das ganze
+    Frame neu analysiert.
+
+    Das Referenzbild wird nur in neu analysierten Bereichen aktualisiert,
+    sodass auch langsame Veränderungen irgendwann die Schwelle überschreiten.
+    """
+
+    # Pixel je Zelle im verkleinerten Vergleichsbild
+    _CELL_SAMPLES = 4
+
+    def __init__(
+        self,
+        ocr: Callable[[np.ndarray], Dict],
+        cell_size: int = 32,
+        diff_threshold: float = 8.0,
+        full_refresh_ratio: float = 0.5,
+        padding: int = 8,
+    ) -> None:
+        """
+        Initialisiert den Cache.
+
+        Args:
+            ocr: Analysiert ein Bild (oder einen Ausschnitt), z.B.
+                ``OCRDetector.analyze_frame``
+            cell_size: Kantenlänge einer Vergleichszelle in Pixeln
+            diff_threshold: Mittlere Grauwertdifferenz, ab der eine Zelle
+                als verändert gilt (0-255)
+            full_refresh_ratio: Anteil veränderter Zellen, ab dem das ganze
+                Frame neu analysiert wird
+            padding: Rand um neu zu analysierende Bereiche in Pixeln
+        """
+        self.ocr = ocr
+        self.cell_size = cell_size
+        self.diff_threshold = diff_threshold
+        self.full_refresh_ratio = full_refresh_ratio
+        self.padding = padding
+        self.reset()
+
+    def reset(self) -> None:
+        """Verwirft Referenzbild, Texte und Statistik (z.B. für ein neues Video)."""
+        self._reference: Optional[np.ndarray] = None
+        self._shape: Optional[Tuple[int, int]] = None
+        self._regions: List[Dict[str, Any]] = []
+        self.stats = {
+            "frames": 0,
+            "ocr_calls": 0,
+            "full_frame_calls": 0,
+            "region_calls": 0,
+            "frames_reused": 0,
+            "ocr_pixels": 0,
+            "frame_pixels": 0,
+        }
+
+    def _signature(self, frame: np.ndarray) -> np.ndarray:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        rows = max(1, -(-gray.shape[0] // self.cell_size))
+        cols = max(1, -(-gray.shape[1] // self.cell_size))
+        size = (cols * self._CELL_SAMPLES, rows * self._CELL_SAMPLES)
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def _changed_cells(self, signature: np.ndarray) -> np.ndarray:
+        samples = self._CELL_SAMPLES
+        rows = signature.shape[0] // samples
+        cols = signature.shape[1] // samples
+        diff = np.abs(signature - self._reference)
+        cell_diff = diff.reshape(rows, samples, cols, samples).mean(axis=(1, 3))
+        return cell_diff > self.diff_threshold
+
+    def _cell_rect(self, x0, y0, x1, y1) -> Tuple[int, int, int, int]:
+        height, width = self._shape
+        return (
+            max(0, x0 * self.cell_size - self.padding),
+            max(0, y0 * self.cell_size - self.padding),
+            min(width, x1 * self.cell_size + self.padding),
+            min(height, y1 * self.cell_size + self.padding),
+        )
+
+    def _run_ocr(self, image: np.ndarray) -> Optional[List[Dict[str, Any]]]:
+        self.stats["ocr_calls"] += 1
+        self.stats["ocr_pixels"] += image.shape[0] * image.shape[1]
+        data = self.ocr(image)
+        if "error" in data:
+            return None
+        return list(data.get("results", []))
+
+    def _refresh_full(self, frame, signature, timestamp) -> Optional[Dict]:
+        self.stats["full_frame_calls"] += 1
+        results = self._run_ocr(frame)
+        if results is None:
+            return {"error": "OCR für das Frame fehlgeschlagen"}
+        self._reference = signature
+        self._regions = [
+            dict(result, first_seen=timestamp, last_seen=timestamp)
+            for result in results
+        ]
+        return None
+
+    def _changed_rects(self, changed: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        # Benachbarte veränderte Zellen zu Bereichen zusammenfassen
+        mask = cv2.dilate(changed.astype(np.uint8), np.ones((3, 3), np.uint8))
+        count, labels = cv2.connectedComponents(mask)
+        rects = []
+        for label in range(1, count):
+            ys, xs = np.nonzero((labels == label) & changed)
+            if len(xs):
+                rects.append(
+                    self._cell_rect(xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)
+                )
+        return rects
+
+    def _refresh_region(self, frame, signature, rect, timestamp) -> None:
+        # Bereich um alle geschnittenen Texte erweitern, damit diese
+        # vollständig neu gelesen werden
+        affected = [r for r in self._regions if _overlaps(_bbox_rect(r["bbox"]), rect)]
+        for region in affected:
+            box = _bbox_rect(region["bbox"])
+            rect = (
+                min(rect[0], max(0, box[0])),
+                min(rect[1], max(0, box[1])),
+                max(rect[2], min(self._shape[1], box[2])),
+                max(rect[3], min(self._shape[0], box[3])),
+            )
+        affected = [r for r in self._regions if _overlaps(_bbox_rect(r["bbox"]), rect)]
+
+        x0, y0, x1, y1 = rect
+        self.stats["region_calls"] += 1
+        results = self._run_ocr(frame[y0:y1, x0:x1])
+        if results is None:
+            # Alte Texte behalten, Bereich beim nächsten Frame erneut prüfen
+            return
+
+        # Unveränderte Texte im Bereich behalten ihr first_seen
+        previous = {r["text"]: r["first_seen"] for r in affected}
+        self._regions = [r for r in self._regions if not any(r is a for a in affected)]
+        for result in results:
+            bbox = [[point[0] + x0, point[1] + y0] for point in result["bbox"]]
+            self._regions.append(
+                dict(
+                    result,
+                    bbox=bbox,
+                    first_seen=previous.get(result["text"], timestamp),
+                    last_seen=timestamp,
+                )
+            )
+
+        samples = self._CELL_SAMPLES / self.cell_size
+        sy0, sy1 = int(y0 * samples), int(np.ceil(y1 * samples))
+        sx0, sx1 = int(x0 * samples), int(np.ceil(x1 * samples))
+        self._reference[sy0:sy1, sx0:sx1] = signature[sy0:sy1, sx0:sx1]
+
+    def process(self, frame: np.ndarray, timestamp: Optional[float] = None) -> Dict:
+        """
+        Liefert die Texte eines Frames, mit OCR nur für veränderte Bereiche.
+
+        Args:
+            frame: NumPy Array des Bildes (BGR Format)
+            timestamp: Zeitstempel des Frames in Sekunden
+
+        Returns:
+            Dict mit ``results`` (Texte inkl. ``first_seen``/``last_seen``),
+            ``ocr_calls`` für dieses Frame und ``reused`` (ohne OCR-Aufruf)
+        """
+        calls_before = self.stats["ocr_calls"]
+        self.stats["frames"] += 1
+        self.stats["frame_pixels"] += frame.shape[0] * frame.shape[1]
+        signature = self._signature(frame)
+
+        if self._reference is None or self._shape != frame.shape[:2]:
+            self._shape = frame.shape[:2]
+            error = self._refresh_full(frame, signature, timestamp)
+        else:
+            error = None
+            changed = self._changed_cells(signature)
+            if changed.mean() > self.full_refresh_ratio:
+                error = self._refresh_full(frame, signature, timestamp)
+            elif changed.any():
+                for rect in self._changed_rects(changed):
+                    self._refresh_region(frame, signature, rect, timestamp)
+
+        for region in self._regions:
+            region["last_seen"] = timestamp
+        ocr_calls = self.stats["ocr_calls"] - calls_before
+        if ocr_calls == 0:
+            self.stats["frames_reused"] += 1
+        if error is not None:
+            self._reference = None
+            return dict(error, ocr_calls=ocr_calls, reused=False)
+
+        results = sorted(
+            (dict(region) for region in self._regions),
+            key=lambda r: (_bbox_rect(r["bbox"])[1], _bbox_rect(r["bbox"])[0]),
+        )
+        return {"results": results, "ocr_calls": ocr_calls, "reused": ocr_calls == 0}
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Gibt OCR-Aufrufe, vermiedene Aufrufe und analysierte Bildfläche zurück.
+
+        ``calls_avoided`` zählt vermiedene Vollbild-Aufrufe, also Frames ganz
+        ohne OCR; Aufrufe für veränderte Bereiche stehen in ``region_calls``.
+        """
+        return dict(
+            self.stats,
+            calls_avoided=self.stats["frames_reused"],
+            ocr_area_ratio=self.stats["ocr_pixels"] / self.stats["frame_pixels"]
+            if self.stats["frame_pixels"]
+            else 0.0,
+        )
+
+
 class OCRDetector:
     def __init__(self, ocr_service_url: str = "http://ocr_detection:8000"):
         self.ocr_service_url = ocr_service_url
         self.analyze_endpoint = f"{ocr_service_url}/analyze"
         self.health_endpoint = f"{ocr_service_url}/health"
+        self.last_sequence_statistics: Dict[str, Any] = {}
 
     def check_service_health(self) -> bool:
         """Überprüft, ob der OCR Service verfügbar ist."""
@@ -60,42 +293,101 @@ class OCRDetector:
             logger.error(f"Fehler bei der OCR-Analyse: {str(e)}")
             return {"error": str(e)}
 
-    def process_video_frame(self, frame: np.ndarray, frame_number: int) -> Dict:
+    def process_video_frame(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        timestamp: Optional[float] = None,
+        fps: Optional[float] = None,
+        cache: Optional[TemporalOCRCache] = None,
+    ) -> Dict:
         """
         Verarbeitet ein Video-Frame und fügt Metadaten hinzu.
 
         Args:
             frame: NumPy Array des Bildes
             frame_number: Nummer des Frames
+            timestamp: Zeitstempel des Frames in Sekunden (vom Decoder)
+            fps: Bildrate, falls kein Zeitstempel vorliegt
+            cache: Temporaler Cache, der nur veränderte Bereiche analysiert
 
         Returns:
             Dict mit Frame-Metadaten und OCR-Informationen
         """
+        if timestamp is None and fps:
+            timestamp = frame_number / fps
+
         start_time = time.time()
-        ocr_data = self.analyze_frame(frame)
+        if cache is not None:
+            ocr_data = cache.process(frame, timestamp)
+            ocr_calls = ocr_data.pop("ocr_calls")
+            ocr_data.pop("reused")
+        else:
+            ocr_data = self.analyze_frame(frame)
+            ocr_calls = 1
         processing_time = time.time() - start_time
 
         return {
             "frame_number": frame_number,
             "ocr_data": ocr_data,
+            "ocr_calls": ocr_calls,
             "processing_time": processing_time,
-            "timestamp": frame_number / 30.0,  # Annahme: 30 FPS
+            "timestamp": timestamp,
         }
 
-    def get_ocr_sequence(self, frames: List[np.ndarray]) -> List[Dict]:
+    def get_ocr_sequence(
+        self,
+        frames: Sequence[Any],
+        timestamps: Optional[Sequence[float]] = None,
+        fps: Optional[float] = None,
+        temporal_cache: bool = True,
+    ) -> List[Dict]:
         """
         Verarbeitet eine Sequenz von Frames.
 
+        Mit ``temporal_cache`` werden Texte aus unveränderten Bildbereichen
+        übernommen und OCR nur für veränderte Bereiche ausgeführt. Die
+        Statistik der Sequenz (u.a. ``calls_avoided``) steht anschließend
+        in ``last_sequence_statistics``.
+
         Args:
-            frames: Liste von NumPy Arrays
+            frames: Liste von NumPy Arrays oder ``SampledFrame``-Objekten
+            timestamps: Zeitstempel pro Frame (optional)
+            fps: Bildrate, falls keine Zeitstempel vorliegen (optional)
+            temporal_cache: Texte statischer Bereiche wiederverwenden
 
         Returns:
             Liste von Dictionaries mit OCR-Informationen pro Frame
         """
+        resolved = resolve_timestamps(frames, timestamps, fps)
+        cache = TemporalOCRCache(self.analyze_frame) if temporal_cache else None
+
         results = []
         for i, frame in enumerate(frames):
-            result = self.process_video_frame(frame, i)
+            result = self.process_video_frame(
+                getattr(frame, "frame", frame),
+                getattr(frame, "frame_number", i),
+                timestamp=resolved[i],
+                cache=cache,
+            )
             results.append(result)
+
+        if cache is not None:
+            self.last_sequence_statistics = cache.get_statistics()
+        else:
+            self.last_sequence_statistics = {
+                "frames": len(results),
+                "ocr_calls": len(results),
+                "full_frame_calls": len(results),
+                "region_calls": 0,
+                "calls_avoided": 0,
+            }
+        stats = self.last_sequence_statistics
+        logger.info(
+            f"OCR-Sequenz: {stats['full_frame_calls']} Vollbild- und "
+            f"{stats['region_calls']} Bereichs-Aufrufe für {len(results)} Frames, "
+            f"{stats['calls_avoided']} Vollbild-Aufrufe vermieden"
+        )
         return results
 
     def filter_by_confidence(
@@ -0,0 +1,244 @@
+"""
+Near-Duplicate-Cache für die Vision Pipeline
+Wiederverwendung von Analyseergebnissen ähnlicher Frames per Perceptual Hash
+"""
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _to_gray(frame: np.ndarray) -> np.ndarray:
+    if frame.ndim == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+def dhash(frame: np.ndarray) -> int:
+    """
+    Difference-Hash (64 Bit): Helligkeitsgefälle benachbarter Pixel.
+
+    Args:
+        frame: Bild (BGR oder Graustufen)
+
+    Returns:
+        64-Bit-Hash als int
+    """
+    small = cv2.resize(_to_gray(frame), (9, 8), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(frame: np.ndarray) -> int:
+    """
+    DCT-basierter Perceptual Hash (64 Bit): niederfrequente Bildanteile.
+
+    Args:
+        frame: Bild (BGR oder Graustufen)
+
+    Returns:
+        64-Bit-Hash als int
+    """
+    small = cv2.resize(_to_gray(frame), (32, 32), interpolation=cv2.INTER_AREA)
+    low_freq = cv2.dct(np.float32(small))[:8, :8]
+    return _bits_to_int(low_freq > np.median(low_freq))
+
+
+HASH_FUNCTIONS = {"dhash": dhash, "phash": phash}
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Anzahl unterschiedlicher Bits zweier Hashes."""
+    return bin(a ^ b).count("1")
+
+
+class PerceptualFrameCache:
+    """
+    In-Process-Index der zuletzt analysierten Frames pro Video.
+
+    Pro Video werden die Hashes der letzten ``max_entries_per_video``
+    Frames mit ihrem Analyseergebnis gehalten. Liegt ein neues Frame
+    höchstens ``max_distance`` Bits (Hamming-Distanz) von einem dieser
+    Hashes entfernt, wird dessen Ergebnis wiederverwendet. Mit
+    ``max_distance=0`` greifen nur bitgleiche Hashes.
+
+    Über ``acquire`` reservierte Frames sind schon während ihrer Analyse
+    auffindbar: Ähnliche Frames erhalten ein Future auf deren Ergebnis,
+    statt parallel eine eigene Analyse zu starten.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 5,
+        max_entries_per_video: int = 32,
+        max_videos: int = 64,
+        hash_method: str = "dhash",
+    ) -> None:
+        """
+        Initialisiert den Cache.
+
+        Args:
+            max_distance: Maximale Hamming-Distanz (0-64) für einen Treffer
+            max_entries_per_video: Anzahl der gehaltenen Hashes pro Video
+            max_videos: Anzahl gleichzeitig indizierter Videos (LRU)
+            hash_method: "dhash" oder "phash"
+        """
+        if hash_method not in HASH_FUNCTIONS:
+            raise ValueError(f"Unbekannte Hash-Methode: {hash_method}")
+        if not 0 <= max_distance <= HASH_BITS:
+            raise ValueError("max_distance muss zwischen 0 und 64 liegen")
+
+        self.max_distance = max_distance
+        self.max_entries_per_video = max_entries_per_video
+        self.max_videos = max_videos
+        self.hash_method = hash_method
+        self._hash_fn = HASH_FUNCTIONS[hash_method]
+
+        self._index: "OrderedDict[str, Deque[Tuple[int, Dict[str, Any]]]]" = (
+            OrderedDict()
+        )
+        # Reservierte Frames in Analyse: Video -> Hash -> Future
+        self._pending: Dict[str, Dict[int, Future]] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.distance_sum = 0
+
+    def compute_hash(self, frame: np.ndarray) -> int:
+        """Berechnet den Perceptual Hash eines Frames."""
+        return self._hash_fn(frame)
+
+    def _entries(self, video_key: str) -> Deque[Tuple[int, Dict[str, Any]]]:
+        entries = self._index.get(video_key)
+        if entries is None:
+            entries = deque(maxlen=self.max_entries_per_video)
+            self._index[video_key] = entries
+            while len(self._index) > self.max_videos:
+                self._index.popitem(last=False)
+        else:
+            self._index.move_to_end(video_key)
+        return entries
+
+    def lookup(self, video_key: str, frame_hash: int) -> Optional[Dict[str, Any]]:
+        """
+        Sucht ein Ergebnis für ein ausreichend ähnliches Frame.
+
+        Args:
+            video_key: Schlüssel des Videos (z.B. Pfad)
+            frame_hash: Perceptual Hash des Frames
+
+        Returns:
+            Kopie des Analyseergebnisses oder None
+        """
+        with self._lock:
+            self.lookups += 1
+            best = self._nearest(self._entries(video_key), frame_hash)
+            if best is None:
+                return None
+
+            self._count_hit(best[0])
+            return dict(best[1])
+
+    def acquire(
+        self, video_key: str, frame_hash: int
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Future]]:
+        """
+        Sucht ein Ergebnis wie ``lookup`` und berücksichtigt Frames in Analyse.
+
+        Bei einem Fehltreffer wird das Frame reserviert; der Aufrufer muss
+        die Reservierung mit ``add`` oder ``discard`` auflösen.
+
+        Args:
+            video_key: Schlüssel des Videos (z.B. Pfad)
+            frame_hash: Perceptual Hash des Frames
+
+        Returns:
+            ``(Ergebnis, None)`` bei einem analysierten ähnlichen Frame,
+            ``(None, Future)`` bei einem ähnlichen Frame in Analyse,
+            ``(None, None)`` nach Reservierung des Frames
+        """
+        with self._lock:
+            self.lookups += 1
+            best = self._nearest(self._entries(video_key), frame_hash)
+            if best is not None:
+                self._count_hit(best[0])
+                return dict(best[1]), None
+
+            pending = self._pending.setdefault(video_key, {})
+            in_flight = self._nearest(pending.items(), frame_hash)
+            if in_flight is not None:
+                self._count_hit(in_flight[0])
+                return None, in_flight[1]
+
+            pending[frame_hash] = Future()
+            return None, None
+
+    def _nearest(self, entries, frame_hash: int) -> Optional[Tuple[int, Any]]:
+        best: Optional[Tuple[int, Any]] = None
+        for cached_hash, value in reversed(entries):
+            distance = hamming_distance(frame_hash, cached_hash)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, value)
+                if distance == 0:
+                    break
+        return best
+
+    def _count_hit(self, distance: int) -> None:
+        self.hits += 1
+        self.distance_sum += distance
+
+    def add(self, video_key: str, frame_hash: int, result: Dict[str, Any]) -> None:
+        """
+        Nimmt ein analysiertes Frame in den Index des Videos auf.
+
+        Eine Reservierung des Frames wird mit dem Ergebnis aufgelöst.
+        """
+        with self._lock:
+            self._entries(video_key).append((frame_hash, result))
+            future = self._pending.get(video_key, {}).pop(frame_hash, None)
+        if future is not None:
+            future.set_result(result)
+
+    def discard(self, video_key: str, frame_hash: int, error: Exception) -> None:
+        """Löst die Reservierung eines fehlgeschlagenen Frames mit ``error`` auf."""
+        with self._lock:
+            future = self._pending.get(video_key, {}).pop(frame_hash, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def drop_video(self, video_key: str) -> None:
+        """Entfernt den Index eines abgeschlossenen Videos."""
+        with self._lock:
+            self._index.pop(video_key, None)
+            pending = self._pending.pop(video_key, {})
+        for future in pending.values():
+            future.cancel()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Trefferquote und Konfiguration des Caches zurück."""
+        with self._lock:
+            return {
+                "hash_method": self.hash_method,
+                "max_distance": self.max_distance,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "avg_hit_distance": (
+                    self.distance_sum / self.hits if self.hits else 0.0
+                ),
+                "indexed_videos": len(self._index),
+            }
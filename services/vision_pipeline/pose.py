@@ -1,18 +1,321 @@
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
 
+import aiohttp
 import cv2
 import numpy as np
 import requests
+from frame_source import resolve_timestamps
+from http_pool import ServiceClientPool
 
 logger = logging.getLogger(__name__)
 
 
+class AsyncPoseClient:
+    """
+    Asynchroner Batch-Client für den Pose Estimation Service.
+
+    Frames werden zu Gruppen von ``batch_size`` zusammengefasst und als ein
+    Multipart-Request an ``/analyze/batch`` gesendet; das Ergebnis wird
+    über den Status-Endpunkt des Batches abgeholt. Höchstens
+    ``max_concurrent_batches`` Batches sind gleichzeitig unterwegs, alle
+    über die Verbindungen eines ``ServiceClientPool``. Bietet der Service
+    keinen Batch-Endpunkt, fällt der Client auf einzelne ``/analyze``-
+    Requests mit derselben Parallelitätsgrenze zurück.
+
+    Jedes Ergebnis trägt Frame-Nummer und Zeitstempel des Decoders, die
+    Reihenfolge entspricht der Eingabe.
+    """
+
+    def __init__(
+        self,
+        pose_service_url: str = "http://pose_estimation:8000",
+        http_pool: Optional[ServiceClientPool] = None,
+        batch_size: int = 16,
+        max_concurrent_batches: int = 4,
+        poll_interval: float = 0.05,
+        batch_timeout: float = 120.0,
+        jpeg_quality: int = 90,
+    ) -> None:
+        """
+        Initialisiert den Client.
+
+        Args:
+            pose_service_url: Basis-URL des Pose Estimation Services
+            http_pool: Gemeinsamer HTTP-Pool (Standard: eigener Pool)
+            batch_size: Frames pro Request
+            max_concurrent_batches: Gleichzeitig laufende Batch-Requests
+            poll_interval: Abstand der Status-Abfragen eines Batches in Sekunden
+            batch_timeout: Maximale Wartezeit auf ein Batch-Ergebnis in Sekunden
+            jpeg_quality: JPEG-Qualität der übertragenen Frames
+        """
+        if batch_size < 1 or max_concurrent_batches < 1:
+            raise ValueError("batch_size und max_concurrent_batches müssen >= 1 sein")
+
+        self.pose_service_url = pose_service_url.rstrip("/")
+        self.http_pool = http_pool or ServiceClientPool()
+        self._owns_pool = http_pool is None
+        self.batch_size = batch_size
+        self.max_concurrent_batches = max_concurrent_batches
+        self.poll_interval = poll_interval
+        self.batch_timeout = batch_timeout
+        self.jpeg_quality = jpeg_quality
+        self.batch_supported: Optional[bool] = None
+
+        self.stats = {
+            "frames": 0,
+            "requests": 0,
+            "batches": 0,
+            "failed_frames": 0,
+            "request_time": 0.0,
+        }
+
+    def _encode(self, frame: np.ndarray) -> bytes:
+        success, encoded = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        )
+        if not success:
+            raise ValueError("Frame konnte nicht als JPEG kodiert werden")
+        return encoded.tobytes()
+
+    async def _post_batch(
+        self, session: aiohttp.ClientSession, names: List[str], payloads: List[bytes]
+    ) -> Optional[Dict[str, Any]]:
+        """Sendet einen Batch; None, wenn der Service keinen Batch-Endpunkt hat."""
+        form = aiohttp.FormData()
+        for name, payload in zip(names, payloads):
+            form.add_field("files", payload, filename=name, content_type="image/jpeg")
+
+        self.stats["requests"] += 1
+        async with session.post(
+            f"{self.pose_service_url}/analyze/batch", data=form
+        ) as response:
+            if response.status in (404, 405):
+                return None
+            if response.status != 200:
+                detail = await response.text()
+                raise ValueError(
+                    f"Pose-Batch fehlgeschlagen: {response.status} {detail}"
+                )
+            batch_id = (await response.json())["batch_id"]
+
+        deadline = time.monotonic() + self.batch_timeout
+        status_url = f"{self.pose_service_url}/analyze/batch/{batch_id}/status"
+        while True:
+            self.stats["requests"] += 1
+            async with session.get(status_url) as response:
+                if response.status != 200:
+                    raise ValueError(
+                        f"Pose-Batch-Status fehlgeschlagen: {response.status}"
+                    )
+                status = await response.json()
+            if status["status"] == "completed":
+                return status.get("results") or {}
+            if status["status"] == "failed":
+                raise ValueError(f"Pose-Batch fehlgeschlagen: {status.get('error')}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Pose-Batch {batch_id} nicht rechtzeitig fertig")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _post_single(
+        self, session: aiohttp.ClientSession, name: str, payload: bytes
+    ) -> Dict[str, Any]:
+        form = aiohttp.FormData()
+        form.add_field("file", payload, filename=name, content_type="image/jpeg")
+        self.stats["requests"] += 1
+        url = f"{self.pose_service_url}/analyze"
+        async with session.post(url, data=form) as response:
+            if response.status == 200:
+                return await response.json()
+            return {"error": await response.text()}
+
+    async def _analyze_batch(
+        self, frames: List[Any], timestamps: List[Optional[float]], offset: int
+    ) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        images = [getattr(frame, "frame", frame) for frame in frames]
+        numbers = [
+            getattr(frame, "frame_number", offset + index)
+            for index, frame in enumerate(frames)
+        ]
+        names = [
+            f"frame_{number:08d}_{index}.jpg" for index, number in enumerate(numbers)
+        ]
+        # JPEG-Kodierung gibt den GIL frei und läuft daher im Thread-Pool
+        payloads = await asyncio.gather(
+            *[loop.run_in_executor(None, self._encode, image) for image in images]
+        )
+
+        session = await self.http_pool.get_session()
+        start = time.perf_counter()
+        try:
+            results = None
+            if self.batch_supported is not False:
+                results = await self._post_batch(session, names, payloads)
+                if results is None:
+                    logger.warning(
+                        "Pose-Service ohne Batch-Endpunkt, sende einzelne Frames"
+                    )
+                self.batch_supported = results is not None
+            if results is None:
+                poses = await asyncio.gather(
+                    *[
+                        self._post_single(session, name, payload)
+                        for name, payload in zip(names, payloads)
+                    ]
+                )
+                results = dict(zip(names, poses))
+            else:
+                self.stats["batches"] += 1
+        except Exception as e:
+            logger.error(f"Fehler bei der Pose Estimation: {str(e)}")
+            results = {name: {"error": str(e)} for name in names}
+        finally:
+            self.stats["request_time"] += time.perf_counter() - start
+
+        output = []
+        for name, number, timestamp in zip(names, numbers, timestamps):
+            pose_data = results.get(name, {"error": "Kein Ergebnis für Frame"})
+            if "error" in pose_data:
+                self.stats["failed_frames"] += 1
+            output.append(
+                {"frame_number": number, "timestamp": timestamp, "pose_data": pose_data}
+            )
+        self.stats["frames"] += len(output)
+        return output
+
+    async def analyze_stream(
+        self, frames: AsyncIterator[Any], fps: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analysiert einen Frame-Stream (z.B. ``VideoFrameSource``) batchweise.
+
+        Es werden höchstens ``max_concurrent_batches`` Batches gleichzeitig
+        gepuffert, der Speicherbedarf bleibt unabhängig von der Videolänge.
+
+        Args:
+            frames: Asynchroner Iterator über ``SampledFrame``-Objekte
+            fps: Bildrate für Frames ohne eigenen Zeitstempel (optional)
+
+        Yields:
+            Pro Frame frame_number, timestamp und pose_data in Eingabereihenfolge
+        """
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        pending: "asyncio.Queue[Optional[asyncio.Task]]" = asyncio.Queue()
+        offset = 0
+
+        async def run(batch, start):
+            try:
+                return await self._analyze_batch(
+                    batch, resolve_timestamps(batch, fps=fps), start
+                )
+            finally:
+                slots.release()
+
+        async def produce():
+            nonlocal offset
+            batch: List[Any] = []
+            try:
+                async for frame in frames:
+                    batch.append(frame)
+                    if len(batch) == self.batch_size:
+                        await slots.acquire()
+                        await pending.put(asyncio.ensure_future(run(batch, offset)))
+                        offset += len(batch)
+                        batch = []
+                if batch:
+                    await slots.acquire()
+                    await pending.put(asyncio.ensure_future(run(batch, offset)))
+            finally:
+                await pending.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                task = await pending.get()
+                if task is None:
+                    break
+                for result in await task:
+                    yield result
+            await producer
+        finally:
+            producer.cancel()
+            while not pending.empty():
+                task = pending.get_nowait()
+                if task is not None:
+                    task.cancel()
+
+    async def analyze_frames(
+        self,
+        frames: Sequence[Any],
+        timestamps: Optional[Sequence[float]] = None,
+        fps: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Analysiert eine Frame-Liste batchweise.
+
+        Args:
+            frames: ``SampledFrame``-Objekte oder NumPy-Arrays
+            timestamps: Zeitstempel pro Frame, falls die Frames keine haben
+            fps: Bildrate als letzte Quelle für Zeitstempel (optional)
+
+        Returns:
+            Pro Frame frame_number, timestamp und pose_data in Eingabereihenfolge
+        """
+        frames = list(frames)
+        resolved = resolve_timestamps(frames, timestamps, fps)
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+
+        async def run(start: int) -> List[Dict[str, Any]]:
+            end = start + self.batch_size
+            async with slots:
+                return await self._analyze_batch(
+                    frames[start:end], resolved[start:end], start
+                )
+
+        batches = await asyncio.gather(
+            *[run(start) for start in range(0, len(frames), self.batch_size)]
+        )
+        return [result for batch in batches for result in batch]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Anzahl Frames, Requests und mittlere Request-Zeit pro Frame zurück."""
+        frames = self.stats["frames"]
+        return dict(
+            self.stats,
+            frames_per_request=frames / self.stats["requests"]
+            if self.stats["requests"]
+            else 0.0,
+            request_time_per_frame=self.stats["request_time"] / frames
+            if frames
+            else 0.0,
+        )
+
+    async def close(self) -> None:
+        """Schließt den eigenen HTTP-Pool (nicht einen übergebenen)."""
+        if self._owns_pool:
+            await self.http_pool.close()
+
+
 class PoseEstimator:
-    def __init__(self, pose_service_url: str = "http://pose_estimation:8000"):
+    def __init__(
+        self,
+        pose_service_url: str = "http://pose_estimation:8000",
+        http_pool: Optional[ServiceClientPool] = None,
+        batch_size: int = 16,
+        max_concurrent_batches: int = 4,
+    ):
         self.pose_service_url = pose_service_url
         self.analyze_endpoint = f"{pose_service_url}/analyze"
         self.health_endpoint = f"{pose_service_url}/health"
+        self.client = AsyncPoseClient(
+            pose_service_url,
+            http_pool=http_pool,
+            batch_size=batch_size,
+            max_concurrent_batches=max_concurrent_batches,
+        )
 
     def check_service_health(self) -> bool:
         """Überprüft, ob der Pose Estimation Service verfügbar ist."""
@@ -51,37 +354,82 @@ class PoseEstimator:
             logger.error(f"Fehler bei der Pose Estimation: {str(e)}")
             return {"error": str(e)}
 
-    def process_video_frame(self, frame: np.ndarray, frame_number: int) -> Dict:
+    def process_video_frame(
+        self,
+        frame: np.ndarray,
+        frame_number: int,
+        timestamp: Optional[float] = None,
+        fps: Optional[float] = None,
+    ) -> Dict:
         """
         Verarbeitet ein Video-Frame und fügt Metadaten hinzu.
 
         Args:
             frame: NumPy Array des Bildes
             frame_number: Nummer des Frames
+            timestamp: Zeitstempel des Frames in Sekunden (vom Decoder)
+            fps: Bildrate, falls kein Zeitstempel vorliegt
 
         Returns:
             Dict mit Frame-Metadaten und Pose-Informationen
         """
         pose_data = self.analyze_frame(frame)
 
+        if timestamp is None and fps:
+            timestamp = frame_number / fps
+
         return {
             "frame_number": frame_number,
             "pose_data": pose_data,
-            "timestamp": frame_number / 30.0,  # Annahme: 30 FPS
+            "timestamp": timestamp,
         }
 
-    def get_pose_sequence(self, frames: List[np.ndarray]) -> List[Dict]:
+    def get_pose_sequence(
+        self,
+        frames: Sequence[Any],
+        timestamps: Optional[Sequence[float]] = None,
+        fps: Optional[float] = None,
+    ) -> List[Dict]:
         """
-        Verarbeitet eine Sequenz von Frames.
+        Verarbeitet eine Sequenz von Frames nacheinander (synchron).
+
+        Für Videos ist ``analyze_sequence`` vorzuziehen, das Frames
+        gebündelt und parallel an den Service sendet.
 
         Args:
-            frames: Liste von NumPy Arrays
+            frames: Liste von NumPy Arrays oder ``SampledFrame``-Objekten
+            timestamps: Zeitstempel pro Frame (optional)
+            fps: Bildrate, falls keine Zeitstempel vorliegen (optional)
 
         Returns:
             Liste von Dictionaries mit Pose-Informationen pro Frame
         """
+        resolved = resolve_timestamps(frames, timestamps, fps)
         results = []
         for i, frame in enumerate(frames):
-            result = self.process_video_frame(frame, i)
+            result = self.process_video_frame(
+                getattr(frame, "frame", frame),
+                getattr(frame, "frame_number", i),
+                timestamp=resolved[i],
+            )
             results.append(result)
         return results
+
+    async def analyze_sequence(
+        self,
+        frames: Iterable[Any],
+        timestamps: Optional[Sequence[float]] = None,
+        fps: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Verarbeitet eine Sequenz von Frames gebündelt über ``AsyncPoseClient``.
+
+        Args:
+            frames: ``SampledFrame``-Objekte oder NumPy Arrays
+            timestamps: Zeitstempel pro Frame (optional)
+            fps: Bildrate, falls keine Zeitstempel vorliegen (optional)
+
+        Returns:
+            Liste von Dictionaries mit Pose-Informationen pro Frame
+        """
+        return await self.client.analyze_frames(list(frames), timestamps, fps)
@@ -18,6 +18,8 @@ import numpy as np
 import requests
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detection_table import DetectionTable
+
 from common.logging_config import ServiceLogger
 
 # Logger initialisieren
@@ -302,20 +304,13 @@ class RestraintDetector:
             min_confidence: Minimaler Konfidenzwert
 
         Returns:
-            Gefilterte Liste von Ergebnissen
+            Gefilterte Liste von Ergebnissen (die Eingabe bleibt unverändert)
         """
         try:
-            filtered_results = []
-            for result in results:
-                if "restraint_data" in result and "results" in result["restraint_data"]:
-                    filtered_data = [
-                        item
-                        for item in result["restraint_data"]["results"]
-                        if item["confidence"] >= min_confidence
-                    ]
-                    if filtered_data:
-                        result["restraint_data"]["results"] = filtered_data
-                        filtered_results.append(result)
+            table = DetectionTable.from_results(results, "restraint_data")
+            filtered_results = table.filter(min_confidence=min_confidence).to_results(
+                include_empty=False
+            )
 
             logger.log_info(
                 "Restraint-Ergebnisse gefiltert",
@@ -0,0 +1,329 @@
+"""
+Streaming-Ergebnisspeicher für die Vision Pipeline
+Schreibt Frame-Ergebnisse inkrementell als JSON Lines mit Zeitindex
+"""
+
+import bisect
+import json
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx.json"
+FORMAT_VERSION = 1
+
+_SEPARATORS = (",", ":")
+
+
+def index_path_for(path: str) -> str:
+    """Pfad der Index-Datei zu einer Ergebnisdatei."""
+    return path + INDEX_SUFFIX
+
+
+class FrameResultWriter:
+    """
+    Inkrementeller Writer für Frame-Ergebnisse im JSON-Lines-Format.
+
+    Aufbau der Datei (eine kompakte JSON-Zeile pro Eintrag):
+
+    - ``{"type": "header", ...}``: Metadaten des Videos
+    - ``{"type": "frame", "frame_number", "timestamp", "result"}`` pro Frame
+    - ``{"type": "footer", ...}``: Zusammenfassung, nur bei Abschluss
+
+    Ergebnisse werden sofort geschrieben und nicht im Speicher gehalten.
+    Zusätzlich entsteht eine kleine Index-Datei (``<pfad>.idx.json``) mit
+    Byte-Offsets in Abständen von ``index_interval`` Sekunden Videozeit,
+    über die ``FrameResultReader`` direkt zu einem Zeitbereich springt.
+    Frames müssen in aufsteigender Zeitreihenfolge geschrieben werden.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        index_interval: float = 1.0,
+        resume_state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Initialisiert den Writer und schreibt den Header.
+
+        Args:
+            path: Pfad der Ergebnisdatei (.jsonl)
+            metadata: Metadaten für den Header (z.B. Video-Pfad, FPS)
+            index_interval: Abstand der Index-Einträge in Sekunden Videozeit
+            resume_state: Zustand aus ``checkpoint()``; die bestehende Datei
+                wird auf diesen Stand gekürzt und fortgesetzt
+        """
+        if index_interval <= 0:
+            raise ValueError("index_interval muss größer als 0 sein")
+
+        self.path = path
+        self.index_path = index_path_for(path)
+        self.index_interval = index_interval
+
+        self._offset = 0
+        self._index: List[Tuple[float, int, int]] = []
+        self._next_index_at = float("-inf")
+        self._last_timestamp = float("-inf")
+
+        self.frames_written = 0
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+        self.closed = False
+
+        if resume_state is not None:
+            self._resume(resume_state)
+            return
+
+        self._file = open(path, "wb")
+        self._write_line(
+            {"type": "header", "version": FORMAT_VERSION, **(metadata or {})}
+        )
+
+    def _resume(self, state: Dict[str, Any]) -> None:
+        self._file = open(self.path, "r+b")
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen
+        self._file.truncate(state["offset"])
+        self._file.seek(state["offset"])
+        self._offset = state["offset"]
+        self._index = [tuple(entry) for entry in state["index"]]
+        self.frames_written = state["frames_written"]
+        self.first_timestamp = state["first_timestamp"]
+        self.last_timestamp = state["last_timestamp"]
+        if self.last_timestamp is not None:
+            self._last_timestamp = self.last_timestamp
+        if self._index:
+            self._next_index_at = self._index[-1][0] + self.index_interval
+
+    def _write_line(self, record: Dict[str, Any]) -> int:
+        line = json.dumps(record, separators=_SEPARATORS).encode("utf-8") + b"\n"
+        offset = self._offset
+        self._file.write(line)
+        self._offset += len(line)
+        return offset
+
+    def write(
+        self, frame_number: int, timestamp: float, result: Dict[str, Any]
+    ) -> None:
+        """
+        Hängt das Ergebnis eines Frames an.
+
+        Args:
+            frame_number: Position des Frames im Video
+            timestamp: Zeitpunkt des Frames in Sekunden
+            result: Analyseergebnis des Frames
+        """
+        if self.closed:
+            raise ValueError("Writer ist bereits geschlossen")
+        if timestamp < self._last_timestamp:
+            raise ValueError(
+                f"Frames müssen zeitlich aufsteigend geschrieben werden: {timestamp}"
+            )
+
+        offset = self._write_line(
+            {
+                "type": "frame",
+                "frame_number": frame_number,
+                "timestamp": timestamp,
+                "result": result,
+            }
+        )
+        if timestamp >= self._next_index_at:
+            self._index.append((timestamp, frame_number, offset))
+            self._next_index_at = timestamp + self.index_interval
+
+        self._last_timestamp = timestamp
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+        self.frames_written += 1
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """
+        Schreibt alle gepufferten Zeilen auf die Platte.
+
+        Returns:
+            Zustand, mit dem ein neuer Writer per ``resume_state`` an genau
+            dieser Stelle fortsetzen kann
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {
+            "offset": self._offset,
+            "index": list(self._index),
+            "frames_written": self.frames_written,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+        }
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Schreibt Footer und Index und schließt die Datei.
+
+        Ohne ``summary`` (z.B. nach einem Abbruch) wird nur der bisherige
+        Inhalt gesichert; Footer und Index fehlen dann, der Reader
+        rekonstruiert den Index in diesem Fall per Scan.
+
+        Args:
+            summary: Zusätzliche Felder für den Footer
+
+        Returns:
+            Footer-Daten (leer ohne ``summary``)
+        """
+        if self.closed:
+            return {}
+        self.closed = True
+
+        footer: Dict[str, Any] = {}
+        try:
+            if summary is not None:
+                footer = {
+                    "type": "footer",
+                    "frames": self.frames_written,
+                    "first_timestamp": self.first_timestamp,
+                    "last_timestamp": self.last_timestamp,
+                    **summary,
+                }
+                footer_offset = self._write_line(footer)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._write_index(footer_offset)
+        finally:
+            self._file.close()
+        return footer
+
+    def _write_index(self, footer_offset: int) -> None:
+        index = {
+            "version": FORMAT_VERSION,
+            "index_interval": self.index_interval,
+            "frames": self.frames_written,
+            "footer_offset": footer_offset,
+            "entries": self._index,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, separators=_SEPARATORS)
+        os.replace(tmp_path, self.index_path)
+
+    def __enter__(self) -> "FrameResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class FrameResultReader:
+    """
+    Lesezugriff auf eine Ergebnisdatei von ``FrameResultWriter``.
+
+    Zeitbereiche werden über den Index angesprungen: Es werden nur die
+    Zeilen ab dem letzten Index-Eintrag vor ``start`` bis zum ersten Frame
+    nach ``end`` gelesen und geparst. Fehlt der Index (abgebrochene
+    Verarbeitung), wird er einmalig per Scan aufgebaut.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Öffnet eine Ergebnisdatei.
+
+        Args:
+            path: Pfad der Ergebnisdatei (.jsonl)
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self.header = json.loads(self._file.readline())
+        if self.header.get("type") != "header":
+            self._file.close()
+            raise ValueError(f"Keine Ergebnisdatei der Vision Pipeline: {path}")
+
+        self._data_start = self._file.tell()
+        self.footer: Optional[Dict[str, Any]] = None
+        self._timestamps: List[float] = []
+        self._offsets: List[int] = []
+        self._load_index()
+
+    def _load_index(self) -> None:
+        index_path = index_path_for(self.path)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            for timestamp, _, offset in index["entries"]:
+                self._timestamps.append(timestamp)
+                self._offsets.append(offset)
+            self._file.seek(index["footer_offset"])
+            self.footer = json.loads(self._file.readline())
+            return
+
+        # Kein Index vorhanden: Offsets einmalig per Scan ermitteln
+        self._file.seek(self._data_start)
+        while True:
+            offset = self._file.tell()
+            line = self._file.readline()
+            if not line.endswith(b"\n"):
+                # Leer oder unvollständig geschriebene letzte Zeile
+                break
+            record = json.loads(line)
+            if record.get("type") == "frame":
+                self._timestamps.append(record["timestamp"])
+                self._offsets.append(offset)
+            elif record.get("type") == "footer":
+                self.footer = record
+
+    @property
+    def complete(self) -> bool:
+        """True, wenn die Verarbeitung mit Footer abgeschlossen wurde."""
+        return self.footer is not None
+
+    def _iter_from(self, offset: int) -> Iterator[Dict[str, Any]]:
+        self._file.seek(offset)
+        while True:
+            line = self._file.readline()
+            if not line.endswith(b"\n"):
+                return
+            record = json.loads(line)
+            if record.get("type") != "frame":
+                return
+            yield record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Iteriert über alle Frame-Einträge."""
+        return self._iter_from(self._data_start)
+
+    def read_range(
+        self, start: float, end: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Liefert die Frame-Einträge im Zeitbereich [start, end].
+
+        Args:
+            start: Beginn in Sekunden
+            end: Ende in Sekunden (inklusive, None = bis Dateiende)
+
+        Yields:
+            Frame-Einträge mit frame_number, timestamp und result
+        """
+        # Erster Indexeintrag mit diesem Zeitstempel; er steht vor allen Frames
+        # mit gleichem Zeitstempel. Sonst ab dem letzten Eintrag davor lesen.
+        position = bisect.bisect_left(self._timestamps, start)
+        if position == len(self._timestamps) or self._timestamps[position] != start:
+            position -= 1
+        offset = self._offsets[position] if position >= 0 else self._data_start
+
+        for record in self._iter_from(offset):
+            if record["timestamp"] < start:
+                continue
+            if end is not None and record["timestamp"] > end:
+                return
+            yield record
+
+    def close(self) -> None:
+        """Schließt die Datei."""
+        self._file.close()
+
+    def __enter__(self) -> "FrameResultReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
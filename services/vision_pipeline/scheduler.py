@@ -0,0 +1,392 @@
+"""
+Multi-Media-Scheduler für die Vision Pipeline
+Gleichzeitige Verarbeitung mehrerer Videos und Bilder mit globalem Frame-Budget
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+SCHEDULING_POLICIES = ("sjf", "priority", "fifo")
+
+
+class FairFrameBudget:
+    """
+    Globales Budget für gleichzeitig in Verarbeitung befindliche Frames.
+
+    Ist das Budget ausgeschöpft, warten Frames pro Job in einer eigenen
+    Queue. Frei werdende Plätze werden reihum an die wartenden Jobs vergeben
+    (Round Robin), nicht in Ankunftsreihenfolge: Ein langes Video mit vielen
+    wartenden Frames erhält pro Runde genauso einen Platz wie ein Bild mit
+    einem einzigen Frame und kann kleine Jobs daher nicht aushungern.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initialisiert das Budget.
+
+        Args:
+            capacity: Maximale Anzahl gleichzeitig verarbeiteter Frames
+        """
+        if capacity < 1:
+            raise ValueError("capacity muss mindestens 1 sein")
+
+        self.capacity = capacity
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.grants = 0
+        self.waits = 0
+        self._held: Dict[str, int] = defaultdict(int)
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def _grant(self, job_id: str) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self._held[job_id] += 1
+        self.grants += 1
+
+    async def acquire(self, job_id: str) -> None:
+        """Wartet auf einen freien Platz für ein Frame des Jobs."""
+        if self.in_flight < self.capacity and not self._waiters:
+            self._grant(job_id)
+            return
+
+        self.waits += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(job_id, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Platz wurde bereits vergeben, aber nicht mehr genutzt
+                self.release(job_id)
+            else:
+                self._discard_waiter(job_id, future)
+            raise
+
+    def _discard_waiter(self, job_id: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(job_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[job_id]
+
+    def release(self, job_id: str, count: int = 1) -> None:
+        """Gibt Plätze eines Jobs frei und vergibt sie an wartende Jobs."""
+        count = min(count, self._held.get(job_id, 0))
+        if count <= 0:
+            return
+        self._held[job_id] -= count
+        if not self._held[job_id]:
+            del self._held[job_id]
+        self.in_flight -= count
+        self._wake()
+
+    def release_all(self, job_id: str) -> None:
+        """Gibt alle noch gehaltenen Plätze eines Jobs frei (z.B. nach Abbruch)."""
+        self.release(job_id, self._held.get(job_id, 0))
+
+    def _wake(self) -> None:
+        while self.in_flight < self.capacity and self._waiters:
+            job_id, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                # Nächster Platz geht an den nächsten Job (Round Robin)
+                self._waiters.move_to_end(job_id)
+            else:
+                del self._waiters[job_id]
+            if future.done():
+                continue
+            self._grant(job_id)
+            future.set_result(None)
+
+    def held(self, job_id: str) -> int:
+        """Anzahl der aktuell von einem Job gehaltenen Plätze."""
+        return self._held.get(job_id, 0)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Auslastung und Wartezahlen des Budgets zurück."""
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "grants": self.grants,
+            "waits": self.waits,
+            "waiting_jobs": len(self._waiters),
+        }
+
+
+@dataclass
+class MediaJob:
+    """Ein zu verarbeitendes Video oder Bild."""
+
+    path: str
+    kind: str
+    job_id: str
+    priority: int = 0
+    estimated_frames: Optional[int] = None
+    position: int = 0
+    submitted_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def estimate_frames(path: str, kind: str, frame_sampling_rate: int = 1) -> int:
+    """
+    Schätzt die Anzahl zu analysierender Frames eines Mediums.
+
+    Args:
+        path: Pfad zur Datei
+        kind: "video" oder "image"
+        frame_sampling_rate: Jedes n-te Frame wird analysiert
+
+    Returns:
+        Geschätzte Anzahl Frames (mindestens 1)
+    """
+    if kind != "video":
+        return 1
+    cap = cv2.VideoCapture(path)
+    try:
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    finally:
+        cap.release()
+    return max(1, frame_count // max(1, frame_sampling_rate))
+
+
+class MediaScheduler:
+    """
+    Verarbeitet mehrere Videos und Bilder gleichzeitig.
+
+    Höchstens ``max_concurrent_jobs`` Jobs laufen parallel; welcher
+    wartende Job als nächstes startet, bestimmt die ``policy``:
+
+    - ``sjf``: kürzester Job zuerst (geschätzte Anzahl Frames)
+    - ``priority``: höchste Priorität zuerst, bei Gleichstand ``sjf``
+    - ``fifo``: Reihenfolge der Eingabe
+
+    Alle laufenden Jobs teilen sich ein ``FairFrameBudget``, das die Anzahl
+    gleichzeitig analysierter Frames global begrenzt und reihum vergibt.
+    Fehler eines Jobs werden im Ergebnis vermerkt und brechen die übrigen
+    Jobs nicht ab.
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        frame_budget: int = 32,
+        max_concurrent_jobs: int = 4,
+        policy: str = "sjf",
+    ) -> None:
+        """
+        Initialisiert den Scheduler.
+
+        Args:
+            pipeline: Pipeline mit process_video/process_image, die ein
+                ``frame_budget`` akzeptieren (z.B. VisionPipeline)
+            frame_budget: Maximale Anzahl gleichzeitig verarbeiteter Frames
+            max_concurrent_jobs: Maximale Anzahl gleichzeitig laufender Jobs
+            policy: "sjf", "priority" oder "fifo"
+        """
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unbekannte Scheduling-Policy: {policy}")
+        if max_concurrent_jobs < 1:
+            raise ValueError("max_concurrent_jobs muss mindestens 1 sein")
+
+        self.pipeline = pipeline
+        self.budget = FairFrameBudget(frame_budget)
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.policy = policy
+        self._last_run: Dict[str, Any] = {}
+
+    def _sort_key(self, job: MediaJob):
+        if self.policy == "fifo":
+            return (job.position,)
+        if self.policy == "priority":
+            return (-job.priority, job.estimated_frames, job.position)
+        return (job.estimated_frames, job.position)
+
+    async def _estimate(self, job: MediaJob) -> None:
+        if job.estimated_frames is not None:
+            return
+        sampling_rate = getattr(self.pipeline, "frame_sampling_rate", 1)
+        job.estimated_frames = await asyncio.get_running_loop().run_in_executor(
+            None, estimate_frames, job.path, job.kind, sampling_rate
+        )
+
+    async def _run_job(self, job: MediaJob) -> Dict[str, Any]:
+        job.started_at = time.perf_counter()
+        try:
+            if job.kind == "video":
+                result = await self.pipeline.process_video(
+                    job.path, job.job_id, frame_budget=self.budget
+                )
+            else:
+                result = await self.pipeline.process_image(
+                    job.path, job.job_id, frame_budget=self.budget
+                )
+        except Exception as e:
+            logger.error(f"Job {job.job_id} fehlgeschlagen: {e}")
+            result = {"status": "failed", "error": str(e)}
+        finally:
+            self.budget.release_all(job.job_id)
+            job.finished_at = time.perf_counter()
+
+        return {
+            **result,
+            "job_id": job.job_id,
+            "path": job.path,
+            "kind": job.kind,
+            "wait_time": job.started_at - job.submitted_at,
+            "processing_time": job.finished_at - job.started_at,
+        }
+
+    async def run(
+        self,
+        jobs: List[MediaJob],
+        max_concurrent_jobs: Optional[int] = None,
+        on_job_done: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Verarbeitet alle Jobs und liefert die Ergebnisse in Eingabereihenfolge.
+
+        Args:
+            jobs: Zu verarbeitende Jobs
+            max_concurrent_jobs: Parallelität nur für diesen Durchlauf
+                (Standard: Wert des Schedulers)
+            on_job_done: Wird nach jedem abgeschlossenen Job mit Ergebnis,
+                Anzahl fertiger Jobs und Gesamtzahl aufgerufen (optional)
+
+        Returns:
+            Ergebnis pro Job (inkl. status, wait_time und processing_time)
+        """
+        concurrency = max_concurrent_jobs or self.max_concurrent_jobs
+        if concurrency < 1:
+            raise ValueError("max_concurrent_jobs muss mindestens 1 sein")
+
+        started = time.perf_counter()
+        for position, job in enumerate(jobs):
+            job.position = position
+            job.submitted_at = started
+        await asyncio.gather(*[self._estimate(job) for job in jobs])
+
+        pending = sorted(jobs, key=self._sort_key)
+        results: Dict[int, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, MediaJob] = {}
+
+        try:
+            while pending or running:
+                while pending and len(running) < concurrency:
+                    job = pending.pop(0)
+                    running[asyncio.ensure_future(self._run_job(job))] = job
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    job = running.pop(task)
+                    results[job.position] = task.result()
+                    if on_job_done is not None:
+                        on_job_done(results[job.position], len(results), len(jobs))
+        finally:
+            for task in running:
+                task.cancel()
+
+        ordered = [results[position] for position in range(len(jobs))]
+        self._last_run = self._summarize(ordered, time.perf_counter() - started)
+        logger.info(
+            f"Scheduler-Durchlauf abgeschlossen: {len(jobs)} Jobs in "
+            f"{self._last_run['makespan']:.2f}s "
+            f"({self._last_run['throughput_fps']:.1f} Frames/s)"
+        )
+        return ordered
+
+    def _summarize(
+        self, results: List[Dict[str, Any]], makespan: float
+    ) -> Dict[str, Any]:
+        completed = [r for r in results if r.get("status") == "completed"]
+        frames = sum(
+            r.get("processed_frames", 1 if r["kind"] == "image" else 0)
+            for r in completed
+        )
+        by_kind: Dict[str, List[float]] = defaultdict(list)
+        for r in results:
+            by_kind[r["kind"]].append(r["wait_time"] + r["processing_time"])
+
+        return {
+            "policy": self.policy,
+            "jobs": len(results),
+            "completed": len(completed),
+            "failed": len(results) - len(completed),
+            "makespan": makespan,
+            "frames_processed": frames,
+            "throughput_fps": frames / makespan if makespan > 0 else 0.0,
+            "jobs_per_second": len(results) / makespan if makespan > 0 else 0.0,
+            "concurrency": batch_summary(results, makespan)["concurrency"],
+            "avg_latency": {
+                kind: sum(values) / len(values) for kind, values in by_kind.items()
+            },
+            "frame_budget": self.budget.get_statistics(),
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt die Kennzahlen des letzten Durchlaufs zurück."""
+        return dict(self._last_run)
+
+
+def batch_summary(results: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """
+    Fasst einen Durchlauf von ``MediaScheduler.run`` pro Datei zusammen.
+
+    ``processing_time_total`` ist die Summe der Verarbeitungszeiten aller
+    Dateien, ``concurrency`` ihr Verhältnis zur tatsächlichen Laufzeit: die
+    mittlere Anzahl gleichzeitig verarbeiteter Dateien (1.0 bei Verarbeitung
+    nacheinander). Das ist kein Speedup – unter Last verlängern sich auch
+    die Einzelzeiten; dafür müssen zwei gemessene Laufzeiten verglichen werden.
+
+    Args:
+        results: Ergebnisse in Eingabereihenfolge
+        wall_time: Gesamtlaufzeit des Durchlaufs in Sekunden
+
+    Returns:
+        Latenz pro Datei sowie Laufzeit, Summe der Einzelzeiten und
+        mittlere Parallelität
+    """
+    files = [
+        {
+            "path": r["path"],
+            "status": r.get("status", "completed"),
+            "wait_time": r["wait_time"],
+            "processing_time": r["processing_time"],
+            "latency": r["wait_time"] + r["processing_time"],
+        }
+        for r in results
+    ]
+    processing_time_total = sum(f["processing_time"] for f in files)
+    return {
+        "files": files,
+        "completed": sum(1 for f in files if f["status"] == "completed"),
+        "failed": sum(1 for f in files if f["status"] == "failed"),
+        "wall_time": wall_time,
+        "processing_time_total": processing_time_total,
+        "concurrency": processing_time_total / wall_time if wall_time > 0 else 0.0,
+    }
+
+
+def media_kind(path: str) -> str:
+    """Ordnet eine Datei anhand der Endung als "video" oder "image" ein."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"):
+        return "image"
+    return "video"
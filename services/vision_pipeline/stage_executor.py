@@ -0,0 +1,339 @@
+"""
+Mehrstufiger Pipeline-Executor für die Vision Pipeline
+Überlappende Stages mit begrenzten Queues, eigener Worker-Anzahl und Metriken
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+logger = logging.getLogger(__name__)
+
+# Signalisiert einem Worker das Ende des Streams
+_STOP = object()
+
+
+class _StageFailure:
+    """Transportiert eine Ausnahme durch die nachfolgenden Stages."""
+
+    __slots__ = ("stage", "error")
+
+    def __init__(self, stage: str, error: BaseException) -> None:
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """
+    Definition einer Pipeline-Stage.
+
+    ``func`` erhält das Ergebnis der vorherigen Stage. Coroutine-Funktionen
+    laufen im Event-Loop (für I/O wie Service-Aufrufe), synchrone Funktionen
+    im Thread-Pool (für CPU-Arbeit wie Hashing oder Kodierung).
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = 8
+
+
+@dataclass
+class StageMetrics:
+    """Laufzeit-Kennzahlen einer Stage."""
+
+    workers: int
+    queue_size: int
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    blocked_time: float = 0.0
+    queue_depth_max: int = 0
+    queue_depth_sum: int = 0
+    queue_samples: int = 0
+    busy_workers: int = 0
+
+    def sample_queue(self, depth: int) -> None:
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+        self.queue_depth_sum += depth
+        self.queue_samples += 1
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        capacity = self.workers * elapsed
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "processed": self.processed,
+            "failed": self.failed,
+            "busy_workers": self.busy_workers,
+            "occupancy": self.busy_time / capacity if capacity > 0 else 0.0,
+            "blocked_ratio": self.blocked_time / capacity if capacity > 0 else 0.0,
+            "avg_service_time": (
+                self.busy_time / self.processed if self.processed else 0.0
+            ),
+            "queue_depth_max": self.queue_depth_max,
+            "queue_depth_avg": (
+                self.queue_depth_sum / self.queue_samples if self.queue_samples else 0.0
+            ),
+        }
+
+
+class StagedExecutor:
+    """
+    Führt Items überlappend durch eine Folge von Stages.
+
+    Zwischen den Stages liegen begrenzte Queues: Ist eine Stage langsamer
+    als ihre Vorgänger, füllt sich deren Ausgangs-Queue und blockiert die
+    vorgelagerten Worker (Backpressure). Der Durchsatz wird so von der
+    langsamsten Stage bestimmt statt von der Summe aller Stages.
+
+    Die Metriken weisen pro Stage Auslastung (``occupancy``), Zeit im
+    Backpressure (``blocked_ratio``) und Queue-Tiefe aus; die Stage mit der
+    höchsten Auslastung ist der Engpass.
+    """
+
+    def __init__(
+        self, stages: List[Stage], thread_pool: Optional[Executor] = None
+    ) -> None:
+        """
+        Initialisiert den Executor.
+
+        Args:
+            stages: Stages in Verarbeitungsreihenfolge
+            thread_pool: Thread-Pool für synchrone Stage-Funktionen
+                (Standard: Default-Executor des Event-Loops)
+        """
+        if not stages:
+            raise ValueError("Mindestens eine Stage erforderlich")
+        for stage in stages:
+            if stage.workers < 1 or stage.queue_size < 1:
+                raise ValueError(f"Ungültige Stage-Konfiguration: {stage.name}")
+
+        self.stages = stages
+        self.thread_pool = thread_pool
+        self.metrics: Dict[str, StageMetrics] = {}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    async def _call(self, stage: Stage, item: Any) -> Any:
+        if inspect.iscoroutinefunction(stage.func):
+            return await stage.func(item)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, stage.func, item)
+
+    async def _feed(
+        self,
+        source: Union[AsyncIterable[Any], Iterable[Any]],
+        queue: asyncio.Queue,
+        metrics: StageMetrics,
+    ) -> None:
+        index = 0
+        if hasattr(source, "__aiter__"):
+            iterator = source.__aiter__()
+            try:
+                async for item in iterator:
+                    await queue.put((index, item))
+                    metrics.sample_queue(queue.qsize())
+                    index += 1
+            finally:
+                # Async-Generatoren auch bei Abbruch schließen, damit ihre
+                # Aufräumarbeiten (z.B. Decoder-Thread stoppen) sofort laufen
+                aclose = getattr(iterator, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        else:
+            for item in source:
+                await queue.put((index, item))
+                metrics.sample_queue(queue.qsize())
+                index += 1
+
+    async def _worker(
+        self,
+        stage: Stage,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        metrics: StageMetrics,
+    ) -> None:
+        while True:
+            entry = await inbox.get()
+            if entry is _STOP:
+                return
+
+            index, item = entry
+            if not isinstance(item, _StageFailure):
+                metrics.busy_workers += 1
+                started = time.perf_counter()
+                try:
+                    item = await self._call(stage, item)
+                    metrics.processed += 1
+                except Exception as e:
+                    metrics.failed += 1
+                    item = _StageFailure(stage.name, e)
+                finally:
+                    metrics.busy_time += time.perf_counter() - started
+                    metrics.busy_workers -= 1
+
+            put_started = time.perf_counter()
+            await outbox.put((index, item))
+            metrics.blocked_time += time.perf_counter() - put_started
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        next_workers: int,
+    ) -> None:
+        metrics = self.metrics[stage.name]
+        await asyncio.gather(
+            *[self._worker(stage, inbox, outbox, metrics) for _ in range(stage.workers)]
+        )
+        for _ in range(next_workers):
+            await outbox.put(_STOP)
+
+    async def run(
+        self,
+        source: Union[AsyncIterable[Any], Iterable[Any]],
+        ordered: bool = True,
+        return_exceptions: bool = False,
+    ) -> AsyncIterator[Tuple[int, Any]]:
+        """
+        Verarbeitet alle Items der Quelle und liefert die Ergebnisse.
+
+        Args:
+            source: (Async-)Iterable der Eingabe-Items
+            ordered: Ergebnisse in Eingabereihenfolge liefern
+            return_exceptions: Fehlgeschlagene Items als Ausnahme-Objekt liefern
+                statt die Verarbeitung abzubrechen
+
+        Yields:
+            Tupel aus Eingabe-Index und Ergebnis der letzten Stage
+        """
+        self.metrics = {
+            stage.name: StageMetrics(workers=stage.workers, queue_size=stage.queue_size)
+            for stage in self.stages
+        }
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+
+        queues: List[Any] = [asyncio.Queue(maxsize=self.stages[0].queue_size)]
+        for stage in self.stages[1:]:
+            # Tiefe der Eingangs-Queue beim Einreihen messen
+            queues.append(
+                _SampledQueue(
+                    asyncio.Queue(maxsize=stage.queue_size), self.metrics[stage.name]
+                )
+            )
+        results: asyncio.Queue = asyncio.Queue()
+        queues.append(results)
+
+        async def feed_and_stop():
+            error: Optional[Exception] = None
+            try:
+                await self._feed(source, queues[0], self.metrics[self.stages[0].name])
+            except Exception as e:
+                error = e
+            # Sentinels nur bei regulärem Ende oder Fehler der Quelle senden.
+            # Ein Abbruch (CancelledError) überspringt sie: Die Worker werden
+            # dann ebenfalls abgebrochen, ein Warten auf Platz in der
+            # begrenzten Queue bliebe hängen.
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(_STOP)
+            if error is not None:
+                raise error
+
+        tasks = [asyncio.ensure_future(feed_and_stop())]
+        for position, stage in enumerate(self.stages):
+            is_last = position == len(self.stages) - 1
+            next_workers = 1 if is_last else self.stages[position + 1].workers
+            tasks.append(
+                asyncio.ensure_future(
+                    self._run_stage(
+                        stage, queues[position], queues[position + 1], next_workers
+                    )
+                )
+            )
+
+        pending: Dict[int, Any] = {}
+        next_index = 0
+        try:
+            while True:
+                entry = await results.get()
+                if entry is _STOP:
+                    break
+
+                index, value = entry
+                if isinstance(value, _StageFailure):
+                    if not return_exceptions:
+                        raise value.error
+                    value = value.error
+
+                if not ordered:
+                    yield index, value
+                    continue
+
+                pending[index] = value
+                while next_index in pending:
+                    yield next_index, pending.pop(next_index)
+                    next_index += 1
+
+            # Fehler der Quelle (z.B. Decoder) weiterreichen
+            await tasks[0]
+        finally:
+            self._finished_at = time.perf_counter()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Gibt die Kennzahlen des letzten bzw. laufenden Durchlaufs zurück.
+
+        Returns:
+            Dict mit Laufzeit, Engpass-Stage und Metriken pro Stage
+        """
+        if self._started_at is None:
+            return {"elapsed": 0.0, "bottleneck": None, "stages": {}}
+
+        end = self._finished_at or time.perf_counter()
+        elapsed = end - self._started_at
+        stages = {
+            name: metrics.as_dict(elapsed) for name, metrics in self.metrics.items()
+        }
+        bottleneck = max(stages, key=lambda name: stages[name]["occupancy"])
+        return {"elapsed": elapsed, "bottleneck": bottleneck, "stages": stages}
+
+
+class _SampledQueue:
+    """Queue-Wrapper, der die Tiefe beim Einreihen in die Stage-Metriken schreibt."""
+
+    def __init__(self, queue: asyncio.Queue, metrics: StageMetrics) -> None:
+        self._queue = queue
+        self._metrics = metrics
+
+    async def put(self, entry: Any) -> None:
+        await self._queue.put(entry)
+        if entry is not _STOP:
+            self._metrics.sample_queue(self._queue.qsize())
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
@@ -0,0 +1,299 @@
+"""
+Status-Reporter für den Vision-Pipeline-Worker
+Sendet Job-Status-Updates gebündelt aus einem Hintergrund-Thread an den Job-Manager
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = frozenset({"completed", "failed", "cancelled"})
+
+# Wie lange abgeschlossene Jobs gemerkt werden, um späte Updates zu verwerfen
+TERMINAL_RETENTION = 300.0
+
+
+class StatusReporter:
+    """
+    Nicht blockierender, zusammenfassender Status-Reporter.
+
+    ``report()`` legt ein Update nur unter einem Lock im Speicher ab und
+    kehrt sofort zurück. Ein Hintergrund-Thread mit eigenem Event-Loop und
+    dauerhafter ``ClientSession`` sendet alle ``flush_interval`` Sekunden
+    den jeweils neuesten Stand pro Job; dazwischen eingehende
+    Fortschritts-Updates desselben Jobs werden zusammengefasst. Endzustände
+    (completed, failed, cancelled) lösen sofort einen Flush aus, spätere
+    Nicht-Endzustände desselben Jobs werden verworfen, bis ``start()`` einen
+    neuen Durchlauf des Jobs meldet.
+
+    Nach einem Fork (z.B. RQ-Work-Horse) wird der Thread im Kindprozess
+    beim nächsten Update neu gestartet.
+    """
+
+    def __init__(
+        self,
+        job_manager_url: str,
+        flush_interval: float = 1.0,
+        request_timeout: float = 10.0,
+        max_attempts: int = 3,
+    ) -> None:
+        """
+        Initialisiert den Reporter.
+
+        Args:
+            job_manager_url: Basis-URL des Job-Managers
+            flush_interval: Sekunden zwischen zwei Sendevorgängen
+            request_timeout: Timeout pro Status-Request in Sekunden
+            max_attempts: Sendeversuche pro Update, bevor es verworfen wird
+        """
+        self.job_manager_url = job_manager_url.rstrip("/")
+        self.flush_interval = flush_interval
+        self.request_timeout = request_timeout
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._attempts: Dict[str, int] = {}
+        self._terminal: Dict[str, float] = {}
+
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stopping = False
+        self._ready = threading.Event()
+
+        self.reported = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.flushes = 0
+
+    # ------------------------------------------------------------------
+    # Aufrufer-Seite (Verarbeitungs-Thread)
+    # ------------------------------------------------------------------
+
+    def report(
+        self,
+        job_id: str,
+        status: str,
+        progress: Optional[float] = None,
+        result: Optional[Any] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Übernimmt ein Status-Update, ohne auf das Senden zu warten.
+
+        Args:
+            job_id: Job-ID
+            status: Neuer Status (z.B. processing, completed, failed)
+            progress: Fortschritt zwischen 0 und 1 (optional)
+            result: Ergebnis oder Zwischenstand (optional)
+            error: Fehlermeldung (optional)
+        """
+        self._ensure_started()
+        is_terminal = status in TERMINAL_STATES
+
+        with self._lock:
+            self.reported += 1
+            if job_id in self._terminal and not is_terminal:
+                # Veraltetes Fortschritts-Update nach Abschluss des Jobs
+                self.dropped += 1
+                return
+            if is_terminal:
+                self._terminal[job_id] = time.monotonic()
+
+            update = self._pending.get(job_id)
+            if update is not None:
+                self.coalesced += 1
+            if update is None or is_terminal:
+                # Endzustände übernehmen keine Felder früherer Zwischenstände
+                update = self._pending[job_id] = {}
+
+            update["status"] = status
+            update["updated_at"] = datetime.now().isoformat()
+            for key, value in (
+                ("progress", progress),
+                ("result", result),
+                ("error", error),
+            ):
+                if value is not None:
+                    update[key] = value
+
+        if is_terminal:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self, job_id: str, progress: float = 0.0) -> None:
+        """
+        Meldet den Beginn eines Durchlaufs als ``processing``.
+
+        Ein erneut eingereihter oder wiederholter Job behält seine ID: Der
+        Endzustand eines früheren Durchlaufs wird vergessen, damit die
+        Fortschritts-Updates des neuen Durchlaufs nicht verworfen werden.
+
+        Args:
+            job_id: Job-ID
+            progress: Anfangsfortschritt (z.B. beim Fortsetzen)
+        """
+        with self._lock:
+            self._terminal.pop(job_id, None)
+            # Noch nicht gesendeter Stand des früheren Durchlaufs ist überholt
+            self._pending.pop(job_id, None)
+        self.report(job_id, "processing", progress=progress)
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """
+        Sendet alle ausstehenden Updates und wartet darauf.
+
+        Nur für Job-Ende und Shutdown gedacht, nicht für den Verarbeitungspfad.
+
+        Args:
+            timeout: Maximale Wartezeit in Sekunden
+
+        Returns:
+            True, wenn keine Updates mehr ausstehen
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return not self._pending
+        future = asyncio.run_coroutine_threadsafe(self._flush_pending(), self._loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            logger.warning(f"Status-Flush nicht abgeschlossen: {e}")
+        with self._lock:
+            return not self._pending
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Sendet ausstehende Updates und beendet den Hintergrund-Thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._loop.call_soon_threadsafe(self._wake.set)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Zähler zu empfangenen, zusammengefassten und gesendeten Updates zurück."""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "reported": self.reported,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "pending": pending,
+        }
+
+    # ------------------------------------------------------------------
+    # Hintergrund-Thread
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            self._ready.wait()
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None and self._pid != os.getpid():
+                    # Im Kindprozess: Updates des Elternprozesses sendet dieser selbst
+                    self._pending = {}
+                    self._attempts = {}
+                self._ready = threading.Event()
+                self._pid = os.getpid()
+                self._stopping = False
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    args=(self._ready,),
+                    name="status-reporter",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._ready.wait()
+
+    def _run(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main(ready))
+        finally:
+            self._loop.close()
+
+    async def _main(self, ready: threading.Event) -> None:
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+        )
+        ready.set()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                await self._flush_pending()
+                if self._stopping:
+                    break
+        finally:
+            await self._session.close()
+
+    async def _flush_pending(self) -> None:
+        async with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                expired = time.monotonic() - TERMINAL_RETENTION
+                for job_id, finished_at in list(self._terminal.items()):
+                    if finished_at < expired:
+                        del self._terminal[job_id]
+            if not batch:
+                return
+
+            self.flushes += 1
+            outcomes = await asyncio.gather(
+                *[self._send(job_id, update) for job_id, update in batch.items()]
+            )
+
+            with self._lock:
+                for (job_id, update), ok in zip(batch.items(), outcomes):
+                    if ok:
+                        self._attempts.pop(job_id, None)
+                        continue
+                    attempts = self._attempts.get(job_id, 0) + 1
+                    if attempts >= self.max_attempts or job_id in self._pending:
+                        # Aufgegeben oder durch neueres Update überholt
+                        self._attempts.pop(job_id, None)
+                        continue
+                    self._attempts[job_id] = attempts
+                    self._pending[job_id] = update
+
+    async def _send(self, job_id: str, update: Dict[str, Any]) -> bool:
+        try:
+            async with self._session.post(
+                f"{self.job_manager_url}/jobs/{job_id}/status", json=update
+            ) as response:
+                if response.status == 200:
+                    self.sent += 1
+                    return True
+                error_text = await response.text()
+                logger.error(
+                    f"Fehler bei der Status-Aktualisierung von Job {job_id}: "
+                    f"{response.status} {error_text}"
+                )
+        except Exception as e:
+            logger.error(f"Fehler bei der Job-Manager-Kommunikation: {e}")
+        self.failed += 1
+        return False
@@ -0,0 +1,426 @@
+"""
+Upload-Ablage für die Vision-Pipeline-API
+Chunk-weise, fortsetzbare Uploads mit Content-Hash und Deduplizierung
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+# Blockgröße beim Nachberechnen des Hashes aus einer Teildatei
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadOffsetMismatch(ValueError):
+    """Chunk passt nicht an den aktuellen Stand des Uploads."""
+
+    def __init__(self, expected: int, received: int) -> None:
+        super().__init__(
+            f"Chunk beginnt bei Offset {received}, erwartet wird {expected}"
+        )
+        self.expected = expected
+        self.received = received
+
+
+@dataclass
+class UploadSession:
+    """Metadaten eines laufenden Uploads."""
+
+    upload_id: str
+    filename: str
+    size: int
+    kind: str
+    created_at: str
+    sha256: Optional[str] = None
+
+
+@dataclass
+class StoredMedia:
+    """Abgeschlossener Upload in der inhaltsadressierten Ablage."""
+
+    sha256: str
+    path: str
+    size: int
+    kind: str
+    duplicate: bool
+    job_id: Optional[str] = None
+
+
+def media_kind_for(filename: str) -> str:
+    """Ordnet einen Dateinamen als "video" oder "image" ein."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in VIDEO_EXTENSIONS:
+        return "video"
+    if extension in IMAGE_EXTENSIONS:
+        return "image"
+    raise ValueError(f"Nicht unterstütztes Dateiformat: {filename}")
+
+
+class UploadStore:
+    """
+    Nimmt Medien in Chunks entgegen und legt sie nach Inhalt ab.
+
+    Chunks werden direkt an eine Teildatei angehängt, nie vollständig im
+    Speicher gehalten. Der aktuelle Offset ist die Größe der Teildatei, ein
+    abgebrochener Upload wird daher einfach ab diesem Offset fortgesetzt,
+    auch nach einem Neustart des Services. Der SHA-256 wird beim Schreiben
+    fortlaufend berechnet; nur nach einem Neustart wird die Teildatei dafür
+    einmal gelesen.
+
+    Abgeschlossene Uploads landen unter ``media/<sha256><endung>``. Ein
+    Index ordnet jedem Inhalt den Job zu, der ihn verarbeitet hat, damit
+    identische Medien auf das vorhandene Ergebnis verweisen können. Status
+    und Ergebnis abgeschlossener Jobs stehen ebenfalls im Index, da die
+    RQ-Jobs selbst nach ``result_ttl`` verfallen.
+    """
+
+    def __init__(self, directory: str, max_size: Optional[int] = None) -> None:
+        """
+        Initialisiert die Ablage.
+
+        Args:
+            directory: Basisverzeichnis für Teildateien, Medien und Index
+            max_size: Maximale Größe eines Uploads in Bytes (optional)
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.parts_dir = os.path.join(directory, "parts")
+        self.media_dir = os.path.join(directory, "media")
+        self.index_dir = os.path.join(directory, "index")
+        for path in (self.parts_dir, self.media_dir, self.index_dir):
+            os.makedirs(path, exist_ok=True)
+
+        # Laufende Hash-Berechnung pro Upload: (Hash-Objekt, gehashte Bytes)
+        self._hashers: Dict[str, Tuple[Any, int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        self.bytes_received = 0
+        self.deduplicated = 0
+
+    # ------------------------------------------------------------------
+    # Pfade und Metadaten
+    # ------------------------------------------------------------------
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.parts_dir, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.parts_dir, f"{upload_id}.json")
+
+    def _index_path(self, sha256: str) -> str:
+        return os.path.join(self.index_dir, f"{sha256}.json")
+
+    def _media_path(self, sha256: str, filename: str) -> str:
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.media_dir, f"{sha256}{extension}")
+
+    def _write_json(self, path: str, data: Dict) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    # ------------------------------------------------------------------
+    # Upload-Ablauf
+    # ------------------------------------------------------------------
+
+    def create(
+        self, filename: str, size: int, sha256: Optional[str] = None
+    ) -> UploadSession:
+        """
+        Legt einen neuen Upload an.
+
+        Args:
+            filename: Ursprünglicher Dateiname (bestimmt Medientyp und Endung)
+            size: Erwartete Gesamtgröße in Bytes
+            sha256: Vom Client angegebener Hash (optional, wird geprüft)
+
+        Returns:
+            Metadaten des Uploads
+        """
+        if size <= 0:
+            raise ValueError("Die Dateigröße muss größer als 0 sein")
+        if self.max_size is not None and size > self.max_size:
+            raise ValueError(
+                f"Datei zu groß: {size} Bytes (maximal {self.max_size} Bytes)"
+            )
+
+        session = UploadSession(
+            upload_id=uuid.uuid4().hex,
+            filename=os.path.basename(filename),
+            size=size,
+            kind=media_kind_for(filename),
+            created_at=datetime.now().isoformat(),
+            sha256=sha256.lower() if sha256 else None,
+        )
+        if session.sha256 and not _SHA256.fullmatch(session.sha256):
+            raise ValueError("sha256 muss ein hexadezimaler SHA-256-Hash sein")
+        open(self._part_path(session.upload_id), "wb").close()
+        self._write_json(self._meta_path(session.upload_id), asdict(session))
+        self._hashers[session.upload_id] = (hashlib.sha256(), 0)
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        """Lädt die Metadaten eines Uploads (KeyError falls unbekannt)."""
+        if not _UPLOAD_ID.fullmatch(upload_id):
+            raise KeyError(upload_id)
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                return UploadSession(**json.load(f))
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+
+    def offset(self, upload_id: str) -> int:
+        """Anzahl bereits empfangener Bytes (Offset für den nächsten Chunk)."""
+        self.get(upload_id)
+        return os.path.getsize(self._part_path(upload_id))
+
+    def _hasher_at(self, upload_id: str, offset: int) -> Any:
+        hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hasher is not None and hashed == offset:
+            return hasher
+
+        # Neustart oder verworfene Teil-Schreibvorgänge: Hash aus der Datei
+        hasher = hashlib.sha256()
+        with open(self._part_path(upload_id), "rb") as f:
+            remaining = offset
+            while remaining > 0:
+                block = f.read(min(_HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        self._hashers[upload_id] = (hasher, offset)
+        return hasher
+
+    async def append(
+        self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Hängt einen Chunk an einen Upload an.
+
+        Args:
+            upload_id: ID des Uploads
+            offset: Position, an der der Chunk beginnt
+            chunks: Datenstrom des Chunks (z.B. ``request.stream()``)
+
+        Returns:
+            Neuer Offset nach dem Schreiben
+        """
+        session = self.get(upload_id)
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        if lock.locked():
+            raise UploadOffsetMismatch(self.offset(upload_id), offset)
+
+        async with lock:
+            current = self.offset(upload_id)
+            if offset != current:
+                raise UploadOffsetMismatch(current, offset)
+
+            loop = asyncio.get_running_loop()
+            hasher = self._hasher_at(upload_id, current)
+            written = current
+            with open(self._part_path(upload_id), "ab") as f:
+                async for data in chunks:
+                    if not data:
+                        continue
+                    if written + len(data) > session.size:
+                        raise ValueError(
+                            f"Upload überschreitet die angekündigte Größe von "
+                            f"{session.size} Bytes"
+                        )
+                    await loop.run_in_executor(None, f.write, data)
+                    hasher.update(data)
+                    written += len(data)
+                    self._hashers[upload_id] = (hasher, written)
+            self.bytes_received += written - current
+            return written
+
+    def complete(self, upload_id: str) -> StoredMedia:
+        """
+        Schließt einen vollständigen Upload ab und legt ihn nach Inhalt ab.
+
+        Existiert der Inhalt bereits, wird die Teildatei verworfen und der
+        vorhandene Eintrag (inkl. zugeordneter Job-ID) zurückgegeben.
+
+        Args:
+            upload_id: ID des Uploads
+
+        Returns:
+            Abgelegtes Medium
+        """
+        session = self.get(upload_id)
+        received = self.offset(upload_id)
+        if received != session.size:
+            raise ValueError(
+                f"Upload unvollständig: {received} von {session.size} Bytes"
+            )
+
+        sha256 = self._hasher_at(upload_id, received).hexdigest()
+        if session.sha256 and session.sha256 != sha256:
+            self.abort(upload_id)
+            raise ValueError("Prüfsumme stimmt nicht mit dem Upload überein")
+
+        entry = self.lookup(sha256)
+        if entry is not None and os.path.exists(entry["path"]):
+            os.remove(self._part_path(upload_id))
+            self.deduplicated += 1
+            duplicate = True
+            path = entry["path"]
+        else:
+            path = self._media_path(sha256, session.filename)
+            os.replace(self._part_path(upload_id), path)
+            entry = {"sha256": sha256, "path": path, "kind": session.kind}
+            self._write_json(self._index_path(sha256), entry)
+            duplicate = False
+
+        self._forget(upload_id)
+        return StoredMedia(
+            sha256=sha256,
+            path=path,
+            size=session.size,
+            kind=session.kind,
+            duplicate=duplicate,
+            job_id=entry.get("job_id"),
+        )
+
+    def abort(self, upload_id: str) -> None:
+        """Verwirft einen Upload samt Teildatei."""
+        try:
+            os.remove(self._part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        self._forget(upload_id)
+
+    def _forget(self, upload_id: str) -> None:
+        try:
+            os.remove(self._meta_path(upload_id))
+        except FileNotFoundError:
+            pass
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+    # ------------------------------------------------------------------
+    # Inhaltsindex
+    # ------------------------------------------------------------------
+
+    def lookup(self, sha256: str) -> Optional[Dict]:
+        """Gibt den Indexeintrag eines Inhalts zurück (None falls unbekannt)."""
+        sha256 = sha256.lower()
+        if not _SHA256.fullmatch(sha256):
+            return None
+        try:
+            with open(self._index_path(sha256)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def record_job(self, sha256: str, job_id: str) -> None:
+        """Ordnet einem abgelegten Inhalt den verarbeitenden Job zu."""
+        entry = self.lookup(sha256)
+        if entry is None:
+            raise KeyError(sha256)
+        entry["job_id"] = job_id
+        for key in ("job_status", "result", "finished_at"):
+            entry.pop(key, None)
+        self._write_json(self._index_path(sha256), entry)
+
+    def record_result(
+        self, sha256: str, job_id: str, job_status: str, result: Optional[Any] = None
+    ) -> None:
+        """
+        Legt Endstatus und Ergebnis eines Jobs im Index ab.
+
+        Args:
+            sha256: Hash des verarbeiteten Inhalts
+            job_id: ID des Jobs; ist dem Inhalt inzwischen ein anderer Job
+                zugeordnet, wird nichts geändert
+            job_status: "completed" oder "failed"
+            result: Rückgabewert des Jobs (u.a. mit ``output_path``)
+        """
+        entry = self.lookup(sha256)
+        if entry is None or entry.get("job_id") != job_id:
+            return
+        entry["job_status"] = job_status
+        entry["result"] = result
+        entry["finished_at"] = datetime.now().isoformat()
+        self._write_json(self._index_path(sha256), entry)
+
+    def find_job(
+        self, sha256: str, fetch_job: Callable[[str], Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Sucht den Job, der einen Inhalt verarbeitet hat oder verarbeitet.
+
+        Abgeschlossene Jobs werden aus dem Index beantwortet, laufende über
+        ``fetch_job`` (z.B. ``Queue.fetch_job``) geprüft.
+
+        Args:
+            sha256: Hash des Inhalts
+            fetch_job: Lädt einen RQ-Job per ID (None, falls unbekannt)
+
+        Returns:
+            Dict mit ``job_id`` und ``result`` (None, solange der Job läuft),
+            oder None, wenn der Inhalt (erneut) verarbeitet werden muss
+        """
+        entry = self.lookup(sha256)
+        if entry is None or not entry.get("job_id"):
+            return None
+        if entry.get("job_status") == "completed":
+            return {"job_id": entry["job_id"], "result": entry.get("result")}
+        if entry.get("job_status") == "failed":
+            return None
+
+        job = fetch_job(entry["job_id"])
+        if job is None or job.is_failed:
+            return None
+        return {
+            "job_id": entry["job_id"],
+            "result": job.result if job.is_finished else None,
+        }
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Gibt empfangene Bytes und deduplizierte Uploads zurück."""
+        return {
+            "bytes_received": self.bytes_received,
+            "deduplicated": self.deduplicated,
+        }
+
+
+def record_job_success(job: Any, connection: Any, result: Any, *args, **kwargs) -> None:
+    """
+    RQ-Callback (``on_success``): Übernimmt das Job-Ergebnis in den Index.
+
+    Erwartet ``upload_dir`` und ``sha256`` in ``job.meta``. Jobs, die einen
+    Fehler als Ergebnis melden (``{"status": "error"}``), gelten als
+    fehlgeschlagen.
+    """
+    failed = isinstance(result, dict) and result.get("status") == "error"
+    UploadStore(job.meta["upload_dir"]).record_result(
+        job.meta["sha256"],
+        job.id,
+        "failed" if failed else "completed",
+        None if failed else result,
+    )
+
+
+def record_job_failure(job: Any, connection: Any, *exc_info) -> None:
+    """RQ-Callback (``on_failure``): Vermerkt den fehlgeschlagenen Job im Index."""
+    UploadStore(job.meta["upload_dir"]).record_result(
+        job.meta["sha256"], job.id, "failed"
+    )
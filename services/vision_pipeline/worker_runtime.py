@@ -0,0 +1,269 @@
+"""
+Vorgeladene Laufzeitumgebung für den Vision-Pipeline-Worker
+Pipeline, Clients und Event-Loop werden einmal pro Worker statt pro Job erzeugt
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKER_MODES = ("fork", "inprocess")
+
+
+class PipelineRuntime:
+    """
+    Hält die teure Pipeline-Instanz eines Workers über Jobs hinweg.
+
+    Die Pipeline wird mit ``preload()`` einmal im Worker-Prozess erzeugt,
+    bevor der erste Job angenommen wird. Danach gibt es zwei Betriebsarten:
+
+    - ``fork``: RQ forkt pro Job ein Work-Horse. Das Kind erbt die fertige
+      Pipeline per Copy-on-Write; ``after_fork`` setzt einmal pro Kind
+      prozessgebundene Ressourcen (Thread-Pools, HTTP-Sessions) zurück.
+    - ``inprocess``: Jobs laufen im Worker-Prozess selbst. Coroutinen werden
+      auf einem dauerhaften Event-Loop ausgeführt, sodass HTTP-Sessions und
+      Verbindungen zwischen Jobs erhalten bleiben.
+
+    Die Startlatenz eines Jobs ist die Zeit von der Übergabe durch den
+    Worker (``mark_dispatched``) bis die Pipeline im ausführenden Prozess
+    bereitsteht; im Fork-Betrieb enthält sie also Fork und Modul-Import.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        mode: str = "fork",
+        after_fork: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """
+        Initialisiert die Laufzeitumgebung.
+
+        Args:
+            factory: Erzeugt die Pipeline-Instanz
+            mode: Betriebsart ``fork`` oder ``inprocess``
+            after_fork: Wird im Kindprozess vor der ersten Nutzung der
+                geerbten Pipeline aufgerufen (optional)
+        """
+        if mode not in WORKER_MODES:
+            raise ValueError(
+                f"Unbekannte Worker-Betriebsart: {mode} (erlaubt: {', '.join(WORKER_MODES)})"
+            )
+        self.factory = factory
+        self.mode = mode
+        self.after_fork = after_fork
+
+        self._lock = threading.Lock()
+        self._pipeline: Optional[Any] = None
+        self._pipeline_pid: Optional[int] = None
+        self._dispatched_at: Optional[float] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_pid: Optional[int] = None
+
+        self.preloaded = False
+        self.pipeline_builds = 0
+        self.load_time: Optional[float] = None
+        self.warmup_time: Optional[float] = None
+        self.jobs_started = 0
+        self.startup_latency_total = 0.0
+        self.startup_latency_max = 0.0
+        self.last_startup_latency: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def _build(self) -> Any:
+        start = time.perf_counter()
+        pipeline = self.factory()
+        self.load_time = time.perf_counter() - start
+        self.pipeline_builds += 1
+        self._pipeline = pipeline
+        self._pipeline_pid = os.getpid()
+        logger.info(f"Pipeline in {self.load_time:.3f}s initialisiert")
+        return pipeline
+
+    def preload(self) -> Any:
+        """Erzeugt die Pipeline vorab (im Worker vor Annahme des ersten Jobs)."""
+        with self._lock:
+            if self._pipeline is None:
+                self._build()
+            self.preloaded = True
+            return self._pipeline
+
+    def get_pipeline(self) -> Any:
+        """
+        Gibt die Pipeline des aktuellen Prozesses zurück.
+
+        Ohne vorheriges ``preload()`` wird sie beim ersten Aufruf erzeugt.
+        In einem geforkten Kindprozess wird die geerbte Instanz nach
+        ``after_fork`` wiederverwendet.
+        """
+        if self._pipeline is not None and self._pipeline_pid == os.getpid():
+            return self._pipeline
+        with self._lock:
+            if self._pipeline is None:
+                return self._build()
+            if self._pipeline_pid != os.getpid():
+                if self.after_fork is not None:
+                    self.after_fork(self._pipeline)
+                self._pipeline_pid = os.getpid()
+            return self._pipeline
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def mark_dispatched(self) -> None:
+        """Vermerkt die Übergabe eines Jobs durch den Worker (vor dem Fork)."""
+        self._dispatched_at = time.time()
+
+    def start_job(self, job_id: str) -> Tuple[Any, float]:
+        """
+        Stellt die Pipeline für einen Job bereit und misst die Startlatenz.
+
+        Args:
+            job_id: Job-ID (für das Logging)
+
+        Returns:
+            Tuple aus Pipeline und Startlatenz in Sekunden
+        """
+        entered_at = time.time()
+        pipeline = self.get_pipeline()
+        ready_at = time.time()
+        dispatched_at = self._dispatched_at or entered_at
+        self._dispatched_at = None
+
+        latency = max(0.0, ready_at - dispatched_at)
+        self.jobs_started += 1
+        self.startup_latency_total += latency
+        self.startup_latency_max = max(self.startup_latency_max, latency)
+        self.last_startup_latency = latency
+        logger.info(f"Job {job_id} nach {latency * 1000:.1f} ms Startlatenz bereit")
+        return pipeline, latency
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """
+        Führt eine Coroutine eines Jobs synchron aus.
+
+        Im Fork-Betrieb mit eigenem Loop pro Work-Horse, im
+        ``inprocess``-Betrieb auf dem dauerhaften Event-Loop des Workers.
+        """
+        if self.mode == "fork":
+            return asyncio.run(coroutine)
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def warm_up(self, func: Callable[[Any], Awaitable[Any]]) -> Optional[float]:
+        """
+        Führt einen Aufwärm-Job auf der vorgeladenen Pipeline aus.
+
+        Fehler werden protokolliert, verhindern aber nicht den Worker-Start.
+
+        Args:
+            func: Erhält die Pipeline und liefert die auszuführende Coroutine
+
+        Returns:
+            Dauer des Aufwärmens in Sekunden (None bei Fehler)
+        """
+        pipeline = self.preload()
+        start = time.perf_counter()
+        try:
+            self.run(func(pipeline))
+        except Exception as e:
+            logger.warning(f"Aufwärm-Job fehlgeschlagen: {e}")
+            return None
+        self.warmup_time = time.perf_counter() - start
+        logger.info(f"Aufwärm-Job in {self.warmup_time:.3f}s abgeschlossen")
+        return self.warmup_time
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._loop_pid = os.getpid()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="pipeline-runtime-loop",
+                    daemon=True,
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def close(self) -> None:
+        """Beendet den dauerhaften Event-Loop (nur ``inprocess``)."""
+        if self._loop is None or self._loop_pid != os.getpid():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Gibt Lade-, Aufwärm- und Startlatenz-Kennzahlen zurück."""
+        return {
+            "mode": self.mode,
+            "preloaded": self.preloaded,
+            "pipeline_builds": self.pipeline_builds,
+            "load_time": self.load_time,
+            "warmup_time": self.warmup_time,
+            "jobs_started": self.jobs_started,
+            "avg_startup_latency": (
+                self.startup_latency_total / self.jobs_started
+                if self.jobs_started
+                else None
+            ),
+            "max_startup_latency": self.startup_latency_max,
+            "last_startup_latency": self.last_startup_latency,
+        }
+
+
+def resolve_worker_mode(requested: Optional[str], cuda_available: bool) -> str:
+    """
+    Wählt die Worker-Betriebsart.
+
+    Ein CUDA-Kontext übersteht keinen Fork: Die Pipeline initialisiert CUDA
+    bereits beim Vorladen im Worker, und jedes geforkte Work-Horse scheitert
+    beim ersten CUDA-Aufruf. Mit verfügbarer GPU wird daher immer
+    ``inprocess`` verwendet, ohne GPU standardmäßig ``fork``.
+
+    Args:
+        requested: Konfigurierte Betriebsart (None für den Standard)
+        cuda_available: Ob CUDA im Worker-Prozess verfügbar ist
+    """
+    if not cuda_available:
+        return requested or "fork"
+    if requested == "fork":
+        logger.warning(
+            "WORKER_MODE=fork ist mit CUDA nicht nutzbar, verwende inprocess"
+        )
+    return "inprocess"
+
+
+_runtime: Optional[PipelineRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime(
+    factory: Callable[[], Any],
+    mode: str = "fork",
+    after_fork: Optional[Callable[[Any], None]] = None,
+) -> PipelineRuntime:
+    """
+    Gibt die prozessweite Laufzeitumgebung zurück und legt sie bei Bedarf an.
+
+    RQ importiert das Job-Modul im Work-Horse erneut (das Startskript läuft
+    als ``__main__``); über diese Funktion teilen sich beide Modul-Instanzen
+    dieselbe vorgeladene Pipeline.
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = PipelineRuntime(factory, mode=mode, after_fork=after_fork)
+        return _runtime
@@ -4,6 +4,7 @@ Zentrale Test-Konfiguration mit gemeinsamen Fixtures und Utilities.
 
 import asyncio
 import os
+import sys
 from typing import Any, Dict, Generator
 from unittest.mock import AsyncMock, Mock
 
@@ -11,6 +12,18 @@ import pytest
 import requests
 from fastapi.testclient import TestClient
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Service-Verzeichnisse wie im Container auf den Suchpfad legen: Die Module
+# der Services importieren ihre Nachbarmodule ohne Paketpräfix.
+SERVICE_DIRS = [
+    os.path.join(REPO_ROOT, "services", "vision_pipeline"),
+    os.path.join(REPO_ROOT, "services", "restraint_detection"),
+]
+for service_dir in SERVICE_DIRS:
+    if service_dir not in sys.path:
+        sys.path.append(service_dir)
+
 # Test-Umgebungs-Konfiguration
 os.environ["TESTING"] = "true"
 os.environ["LOG_LEVEL"] = "WARNING"
@@ -181,6 +194,125 @@ def generate_test_images(count: int = 5, width: int = 224, height: int = 224):
     ]
 
 
+def generate_test_video(
+    path: str,
+    frame_count: int = 60,
+    width: int = 160,
+    height: int = 120,
+    fps: float = 25.0,
+) -> str:
+    """Generiert ein synthetisches MJPG-Video mit fortlaufender Frame-Nummer."""
+    import cv2
+    import numpy as np
+
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height)
+    )
+    for i in range(frame_count):
+        frame = np.full((height, width, 3), (i * 7) % 255, dtype=np.uint8)
+        cv2.putText(
+            frame, str(i), (5, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,) * 3
+        )
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def generate_scene_frames(
+    segments, width: int = 160, height: int = 90, noise: int = 3, seed: int = 0
+):
+    """
+    Generiert eine synthetische Szenenfolge.
+
+    ``segments`` ist eine Liste von (Frame-Anzahl, Szenen-Typ) mit den Typen
+    "static" (unverändertes Motiv mit Kompressionsrauschen, z.B. Talking Head)
+    und "cuts" (harter Schnitt auf ein neues Motiv alle 3 Frames).
+
+    Returns:
+        Tuple aus Frame-Liste und Liste der Frame-Nummern echter Schnitte
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    frames, cut_frames = [], []
+
+    def new_scene():
+        base = np.zeros((height, width, 3), dtype=np.uint8)
+        base[:] = rng.integers(0, 255, 3)
+        x, y = rng.integers(0, width // 2), rng.integers(0, height // 2)
+        base[y : y + height // 2, x : x + width // 2] = rng.integers(0, 255, 3)
+        return base
+
+    for frame_count, kind in segments:
+        scene = new_scene()
+        cut_frames.append(len(frames))
+        for i in range(frame_count):
+            if kind == "cuts" and i > 0 and i % 3 == 0:
+                scene = new_scene()
+                cut_frames.append(len(frames))
+            jitter = rng.integers(-noise, noise + 1, scene.shape)
+            frames.append(np.clip(scene.astype(int) + jitter, 0, 255).astype(np.uint8))
+    return frames, cut_frames
+
+
+class SimulatedMediaPipeline:
+    """
+    Pipeline-Attrappe für Scheduler-Tests: simuliert Frame-Analysen per Sleep.
+
+    Jedes Frame belegt einen Platz im übergebenen Frame-Budget; pro Job
+    laufen höchstens ``per_job_parallelism`` Frames gleichzeitig (wie die
+    Inferenz-Stage eines einzelnen Videos).
+    """
+
+    frame_sampling_rate = 1
+
+    def __init__(
+        self,
+        frames_per_path: Dict[str, int],
+        frame_time: float = 0.002,
+        per_job_parallelism: int = 4,
+        failing_paths: tuple = (),
+    ):
+        self.frames_per_path = frames_per_path
+        self.frame_time = frame_time
+        self.per_job_parallelism = per_job_parallelism
+        self.failing_paths = set(failing_paths)
+        self.started = []
+
+    async def _process(self, path, job_id, frame_budget):
+        self.started.append(path)
+        if path in self.failing_paths:
+            raise ValueError(f"Konnte Datei nicht laden: {path}")
+
+        frames = self.frames_per_path.get(path, 1)
+        parallelism = asyncio.Semaphore(self.per_job_parallelism)
+
+        async def analyze_frame():
+            async with parallelism:
+                if frame_budget is not None:
+                    await frame_budget.acquire(job_id)
+                try:
+                    await asyncio.sleep(self.frame_time)
+                finally:
+                    if frame_budget is not None:
+                        frame_budget.release(job_id)
+
+        await asyncio.gather(*[analyze_frame() for _ in range(frames)])
+        return {"status": "completed", "processed_frames": frames}
+
+    async def process_video(self, video_path, job_id, frame_budget=None):
+        return await self._process(video_path, job_id, frame_budget)
+
+    async def process_image(self, image_path, job_id, frame_budget=None):
+        return await self._process(image_path, job_id, frame_budget)
+
+
+@pytest.fixture
+def synthetic_video(test_files_dir) -> str:
+    """Kurzes synthetisches Test-Video (60 Frames, 25 FPS)."""
+    return generate_test_video(os.path.join(test_files_dir, "synthetic.avi"))
+
+
 # Custom Pytest Markers
 def pytest_configure(config):
     """Registriert Custom Markers."""
@@ -0,0 +1,3 @@
+"""
+Performance Tests und Benchmarks für AI Media Analysis System
+"""
@@ -0,0 +1,64 @@
+"""
+Benchmark: Batch-Job mit nacheinander vs. gleichzeitig verarbeiteten Dateien.
+
+Simuliert einen Bild-Batch, dessen Analyse von entfernten Services
+dominiert wird (feste Latenz pro Frame), inklusive einzelner defekter
+Dateien, und vergleicht Laufzeit und Speedup für verschiedene
+Parallelitätsstufen.
+"""
+
+import os
+import time
+
+import pytest
+
+from services.vision_pipeline.scheduler import MediaJob, MediaScheduler, batch_summary
+from tests.conftest import SimulatedMediaPipeline
+
+SERVICE_LATENCY = float(os.getenv("BENCH_SERVICE_LATENCY", 0.02))
+PATHS = [f"image_{i}.jpg" for i in range(24)]
+FAILING = ("image_5.jpg", "image_17.jpg")
+
+
+async def _run_batch(parallelism: int):
+    pipeline = SimulatedMediaPipeline(
+        {}, frame_time=SERVICE_LATENCY, failing_paths=FAILING
+    )
+    scheduler = MediaScheduler(pipeline, frame_budget=32, policy="fifo")
+    jobs = [
+        MediaJob(path=path, kind="image", job_id=f"batch_{i}")
+        for i, path in enumerate(PATHS)
+    ]
+    start = time.perf_counter()
+    results = await scheduler.run(jobs, max_concurrent_jobs=parallelism)
+    return results, batch_summary(results, time.perf_counter() - start)
+
+
+@pytest.mark.performance
+async def test_parallel_batch_speedup():
+    """Gleichzeitige Verarbeitung verkürzt die Laufzeit, Ergebnisse bleiben gleich."""
+    sequential_results, sequential = await _run_batch(1)
+    parallel = {}
+    for parallelism in (4, 8):
+        results, parallel[parallelism] = await _run_batch(parallelism)
+        assert [r["path"] for r in results] == PATHS
+        assert [r["status"] for r in results] == [
+            r["status"] for r in sequential_results
+        ]
+
+    speedup = {p: sequential["wall_time"] / s["wall_time"] for p, s in parallel.items()}
+    print(
+        f"\nBatch-Benchmark ({len(PATHS)} Bilder, {SERVICE_LATENCY * 1000:.0f} ms "
+        f"pro Analyse): sequentiell={sequential['wall_time']:.3f}s "
+        + " ".join(
+            f"parallel_{p}={s['wall_time']:.3f}s (x{speedup[p]:.1f})"
+            for p, s in parallel.items()
+        )
+    )
+
+    assert sequential["failed"] == parallel[8]["failed"] == len(FAILING)
+    assert sequential["concurrency"] == pytest.approx(1.0, abs=0.2)
+    # Speedup aus zwei gemessenen Laufzeiten, nicht aus der Summe der Einzelzeiten
+    assert speedup[8] > 3
+    assert parallel[8]["concurrency"] > 3
+    assert all(f["latency"] > 0 for f in parallel[8]["files"])
@@ -0,0 +1,90 @@
+"""
+Benchmark: CLIP NSFW Einzelbild-Inferenz vs. gebündelte Forward-Passes.
+
+Die bisherige Verarbeitung tokenisiert und kodiert die Kategorie-Prompts
+für jedes Bild neu und führt pro Bild einen Forward-Pass aus. Verglichen
+wird mit ``CLIPNSFWService.analyze_batch`` bei mehreren Batchgrößen, in
+Bildern pro Sekunde. Benötigt torch, transformers und das vortrainierte
+CLIP-Modell (lokal oder per Download), sonst wird der Test übersprungen.
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("dotenv")
+
+IMAGE_COUNT = int(os.getenv("BENCH_NSFW_IMAGES", 64))
+BATCH_SIZES = (1, 8, 32)
+
+
+@pytest.fixture(scope="module")
+def service():
+    try:
+        from services.clip_nsfw import main
+    except OSError as e:
+        pytest.skip(f"CLIP-Modell nicht verfügbar: {e}")
+    return main.nsfw_service
+
+
+def _images():
+    rng = np.random.default_rng(0)
+    frames = [
+        rng.integers(0, 255, (360, 640, 3), dtype=np.uint8) for _ in range(IMAGE_COUNT)
+    ]
+    return [cv2.imencode(".jpg", frame)[1].tobytes() for frame in frames]
+
+
+def _legacy_probabilities(service, image_data):
+    """Bisheriger Pfad: Prompts und Bild pro Aufruf gemeinsam verarbeiten."""
+    from PIL import Image
+
+    from services.clip_nsfw.batching import decode_rgb
+
+    inputs = service.processor(
+        images=Image.fromarray(decode_rgb(image_data)),
+        text=[f"a photo of {category}" for category in service.categories],
+        return_tensors="pt",
+        padding=True,
+    )
+    inputs = {k: v.to(service.device) for k, v in inputs.items()}
+    with torch.no_grad():
+        return service.model(**inputs).logits_per_image.softmax(dim=1).cpu().numpy()[0]
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_batched_inference_throughput(service):
+    """Gebündelte Inferenz liefert dieselben Scores bei höherem Durchsatz."""
+    images = _images()
+
+    start = time.perf_counter()
+    legacy = [_legacy_probabilities(service, image) for image in images]
+    legacy_ips = IMAGE_COUNT / (time.perf_counter() - start)
+
+    throughput = {}
+    for batch_size in BATCH_SIZES:
+        start = time.perf_counter()
+        results = service.analyze_batch(images, batch_size=batch_size)
+        throughput[batch_size] = IMAGE_COUNT / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    service.analyze_batch(images)
+    adaptive_ips = IMAGE_COUNT / (time.perf_counter() - start)
+
+    print(
+        f"\nCLIP-NSFW-Benchmark ({IMAGE_COUNT} Bilder, {service.device}): "
+        f"legacy={legacy_ips:.1f} img/s "
+        + " ".join(f"batch{size}={ips:.1f} img/s" for size, ips in throughput.items())
+        + f" adaptive(batch={service.last_batch_size})={adaptive_ips:.1f} img/s"
+    )
+
+    for result, probs in zip(results, legacy):
+        scores = [result.categories[category] for category in service.categories]
+        assert np.allclose(scores, probs, atol=1e-4)
+    assert max(throughput.values()) > legacy_ips
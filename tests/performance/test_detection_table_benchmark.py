@@ -0,0 +1,124 @@
+"""
+Benchmark: Filtern und Aggregieren mit Dict-Schleifen vs. DetectionTable.
+
+Über viele Frames werden mehrere typische Abfragen ausgeführt
+(Konfidenzfilter, Top-k, Kennzahlen pro Label, Zeitfenster). Die Tabelle
+wird einmal aufgebaut; die Aufbauzeit zählt zur gemessenen Zeit. Der
+Speicher-Peak (tracemalloc) wird getrennt auf einem Ausschnitt gemessen,
+da tracemalloc die Laufzeit verfälscht.
+"""
+
+import copy
+import os
+import random
+import time
+import tracemalloc
+
+import pytest
+
+from services.vision_pipeline.detection_table import DetectionTable
+
+FRAME_COUNT = int(os.getenv("BENCH_DETECTION_FRAMES", 20000))
+MEMORY_FRAMES = 5000
+CATEGORIES = ["rope", "cuffs", "tape", "chains", "straps"]
+THRESHOLDS = (0.3, 0.5, 0.7, 0.9)
+
+
+def _results():
+    rng = random.Random(1)
+    return [
+        {
+            "frame_number": i,
+            "timestamp": i / 25.0,
+            "restraint_data": {
+                "results": [
+                    {
+                        "category": rng.choice(CATEGORIES),
+                        "confidence": rng.random(),
+                        "bbox": [rng.random() * 600, rng.random() * 300, 40.0, 60.0],
+                    }
+                    for _ in range(rng.randint(0, 4))
+                ]
+            },
+        }
+        for i in range(FRAME_COUNT)
+    ]
+
+
+def _with_loops(results):
+    answers = []
+    for threshold in THRESHOLDS:
+        filtered = []
+        for result in copy.deepcopy(results):
+            items = [
+                item
+                for item in result["restraint_data"]["results"]
+                if item["confidence"] >= threshold
+            ]
+            if items:
+                result["restraint_data"]["results"] = items
+                filtered.append(result)
+        answers.append(sum(len(r["restraint_data"]["results"]) for r in filtered))
+
+    flat = [
+        (result["timestamp"], item)
+        for result in results
+        for item in result["restraint_data"]["results"]
+    ]
+    answers.append(sorted((item["confidence"] for _, item in flat), reverse=True)[:10])
+    per_label = {}
+    for _, item in flat:
+        stats = per_label.setdefault(item["category"], [0, 0.0])
+        stats[0] += 1
+        stats[1] = max(stats[1], item["confidence"])
+    answers.append(per_label)
+    answers.append(sum(1 for ts, _ in flat if 60.0 <= ts < 120.0))
+    return answers
+
+
+def _with_table(results):
+    table = DetectionTable.from_results(results, "restraint_data")
+    answers = [len(table.filter(min_confidence=t)) for t in THRESHOLDS]
+    answers.append(table.top_k(10).scores.tolist())
+    answers.append(
+        {
+            label: [stats["count"], stats["max_confidence"]]
+            for label, stats in table.aggregate_by_label().items()
+        }
+    )
+    answers.append(len(table.in_window(60.0, 120.0)))
+    return answers
+
+
+def _measure(func, results):
+    start = time.perf_counter()
+    answers = func(results)
+    duration = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(results[:MEMORY_FRAMES])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return answers, duration, peak
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_columnar_queries_are_faster():
+    """DetectionTable beantwortet dieselben Abfragen schneller und sparsamer."""
+    results = _results()
+
+    loop_answers, loop_time, loop_peak = _measure(_with_loops, results)
+    table_answers, table_time, table_peak = _measure(_with_table, results)
+
+    print(
+        f"\nDetectionTable-Benchmark ({FRAME_COUNT} Frames): "
+        f"loops={loop_time:.2f}s table={table_time:.2f}s "
+        f"peak({MEMORY_FRAMES} Frames): loops={loop_peak / 1e6:.1f} MB "
+        f"table={table_peak / 1e6:.1f} MB "
+        f"speedup={loop_time / table_time:.1f}x"
+    )
+
+    assert table_answers == loop_answers
+    assert table_time < loop_time
+    assert table_peak < loop_peak
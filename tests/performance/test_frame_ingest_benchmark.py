@@ -0,0 +1,68 @@
+"""
+Benchmark: JSON-Zahlenlisten vs. binäre Frame-Annahme.
+
+Ein Batch JPEG-Frames wird wie bisher als JSON-Array von Ganzzahlen
+übertragen (``json.loads`` und ``bytes(list)``) bzw. als längenpräfixierter
+Container (``split_frames``). Gemessen werden Body-Größe und Parse-Zeit bis
+zu den Bildbytes; die Dekodierzeit ist für beide Transporte gleich.
+"""
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from services.restraint_detection.frame_ingest import (
+    decode_frame,
+    encode_frames,
+    split_frames,
+)
+
+FRAME_COUNT = int(os.getenv("BENCH_INGEST_FRAMES", 16))
+FRAME_SIDE = int(os.getenv("BENCH_INGEST_FRAME_SIDE", 640))
+
+
+def _jpeg_frames(count, side):
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        image = rng.integers(0, 255, (side, side, 3), dtype=np.uint8)
+        image = cv2.GaussianBlur(image, (5, 5), 0)
+        frames.append(cv2.imencode(".jpg", image)[1].tobytes())
+    return frames
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_binary_ingest_beats_json_int_arrays():
+    frames = _jpeg_frames(FRAME_COUNT, FRAME_SIDE)
+    json_body = json.dumps({"frames": [list(frame) for frame in frames]}).encode()
+    container_body = encode_frames(frames)
+
+    start = time.perf_counter()
+    payloads = [bytes(values) for values in json.loads(json_body)["frames"]]
+    json_parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parts = split_frames(container_body)
+    container_parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    images = [decode_frame(part) for part in parts]
+    decode = time.perf_counter() - start
+
+    assert payloads == [bytes(part) for part in parts]
+    assert len(images) == FRAME_COUNT
+
+    frame_kb = sum(map(len, frames)) / len(frames) / 1024
+    print(
+        f"\n{FRAME_COUNT} Frames à {frame_kb:.0f} KB: "
+        f"JSON {len(json_body) / 1e6:.1f} MB / {json_parse * 1000:.1f} ms, "
+        f"Container {len(container_body) / 1e6:.1f} MB / "
+        f"{container_parse * 1000:.3f} ms, Dekodierung {decode * 1000:.1f} ms"
+    )
+    assert len(container_body) * 3 < len(json_body)
+    assert container_parse * 10 < json_parse
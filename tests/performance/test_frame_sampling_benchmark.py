@@ -0,0 +1,56 @@
+"""
+Benchmark: analysierte Frames bei Szenenwechsel- vs. uniformem Sampling.
+
+Synthetische Testvideos bilden typische Inhalte nach (Talking Head,
+schnelle Schnitte, gemischt). Ausgegeben wird die Reduktion der an die
+Analyzer weitergereichten Frames gegenüber dem bisherigen Sampling
+(jedes 2. Frame).
+"""
+
+import time
+
+import pytest
+
+from services.common.frame_sampling import SceneChangeSampler, UniformSampler
+from tests.conftest import generate_scene_frames
+
+FPS = 25.0
+TEST_SET = {
+    "talking_head": [(750, "static")],
+    "fast_cuts": [(300, "cuts")],
+    "mixed": [(300, "static"), (90, "cuts"), (300, "static"), (60, "cuts")],
+}
+
+
+def _count(sampler, frames):
+    sampler.reset(FPS, len(frames))
+    return sum(sampler.select(i, frame) for i, frame in enumerate(frames))
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+@pytest.mark.parametrize("method", ["histogram", "diff"])
+def test_scene_change_sampling_reduction(method):
+    """Szenenwechsel-Sampling reduziert analysierte Frames auf allen Testvideos."""
+    report = {}
+    for name, segments in TEST_SET.items():
+        frames, cuts = generate_scene_frames(segments)
+
+        uniform = _count(UniformSampler(interval=2), frames)
+        start = time.perf_counter()
+        scene = _count(SceneChangeSampler(method=method), frames)
+        overhead_ms = (time.perf_counter() - start) / len(frames) * 1000
+
+        report[name] = {
+            "uniform": uniform,
+            "scene_change": scene,
+            "cuts": len(cuts),
+            "reduction": round(1 - scene / uniform, 3),
+            "overhead_ms_per_frame": round(overhead_ms, 3),
+        }
+
+    print(f"\nSampling-Reduktion ({method}): {report}")
+
+    assert report["talking_head"]["reduction"] > 0.9
+    assert report["mixed"]["reduction"] > 0.5
+    assert all(r["scene_change"] < r["uniform"] for r in report.values())
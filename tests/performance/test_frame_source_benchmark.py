@@ -0,0 +1,128 @@
+"""
+Benchmark: eager Frame-Extraktion vs. streamende VideoFrameSource.
+
+Misst den Speicher-Peak (tracemalloc und RSS) sowie die Latenz bis zum
+ersten analysierten Frame bei simulierter Analyse-Dauer.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import tracemalloc
+
+import cv2
+import pytest
+
+from services.vision_pipeline.frame_source import VideoFrameSource
+from tests.conftest import generate_test_video
+
+FRAME_COUNT = int(os.getenv("BENCH_FRAME_COUNT", 240))
+ANALYSIS_DELAY = 0.001
+
+
+def _current_rss() -> int:
+    """Liest den aktuellen RSS-Wert in Bytes aus /proc (0 falls nicht verfügbar)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class _RSSSampler:
+    """Sampelt den RSS periodisch in einem Hintergrund-Thread."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = _current_rss()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _current_rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def delta_mb(self) -> float:
+        return (self.peak - self.baseline) / 1024 / 1024
+
+
+async def _run_eager(video_path: str):
+    """Bisheriges Verhalten: alle Frames lesen, dann analysieren."""
+    start = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+
+    first_result = None
+    for _ in frames:
+        await asyncio.sleep(ANALYSIS_DELAY)
+        if first_result is None:
+            first_result = time.perf_counter() - start
+    return first_result
+
+
+async def _run_streaming(video_path: str):
+    """Streamende Verarbeitung mit begrenztem Prefetch."""
+    start = time.perf_counter()
+    first_result = None
+    async for _ in VideoFrameSource(video_path, prefetch=8):
+        await asyncio.sleep(ANALYSIS_DELAY)
+        if first_result is None:
+            first_result = time.perf_counter() - start
+    return first_result
+
+
+async def _measure(runner, video_path: str):
+    tracemalloc.start()
+    with _RSSSampler() as rss:
+        first_result = await runner(video_path)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "first_result_s": first_result,
+        "traced_peak_mb": traced_peak / 1024 / 1024,
+        "rss_delta_mb": rss.delta_mb,
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+async def test_streaming_frame_source_memory_ceiling(test_files_dir):
+    """Streaming hält den Speicher konstant und liefert erste Ergebnisse früher."""
+    video_path = generate_test_video(
+        os.path.join(test_files_dir, "bench.avi"),
+        frame_count=FRAME_COUNT,
+        width=640,
+        height=360,
+    )
+
+    eager = await _measure(_run_eager, video_path)
+    streaming = await _measure(_run_streaming, video_path)
+
+    print(
+        f"\nFrame-Source-Benchmark ({FRAME_COUNT} Frames 640x360): "
+        f"eager={eager} streaming={streaming}"
+    )
+
+    frame_mb = 640 * 360 * 3 / 1024 / 1024
+    assert streaming["traced_peak_mb"] < eager["traced_peak_mb"]
+    # Prefetch-Puffer + in Bearbeitung befindliches Frame + Decoder-Puffer
+    assert streaming["traced_peak_mb"] < frame_mb * 12
+    assert streaming["first_result_s"] < eager["first_result_s"]
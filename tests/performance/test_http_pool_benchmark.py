@@ -0,0 +1,83 @@
+"""
+Benchmark: neue ClientSession pro Aufruf vs. gepoolter ServiceClientPool.
+
+Ein lokaler aiohttp-Stub-Server ersetzt die Analyse-Services; gemessen
+werden Anfragen pro Sekunde bei gleicher Parallelität.
+"""
+
+import asyncio
+import os
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.http_pool import ServiceClientPool
+
+REQUEST_COUNT = int(os.getenv("BENCH_REQUEST_COUNT", 600))
+CONCURRENCY = 12
+
+
+async def _start_stub_server():
+    async def analyze(request):
+        await request.read()
+        return web.json_response({"keypoints": [], "confidence": 0.0})
+
+    app = web.Application()
+    app.router.add_post("/analyze", analyze)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/analyze"
+
+
+async def _run(url: str, call) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bounded():
+        async with semaphore:
+            await call(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[bounded() for _ in range(REQUEST_COUNT)])
+    return REQUEST_COUNT / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+async def test_pooled_client_throughput():
+    """Gepoolter Client erreicht mehr Anfragen pro Sekunde als Session-pro-Aufruf."""
+    runner, url = await _start_stub_server()
+    payload = {"image_data": "x" * 4096}
+
+    async def session_per_call(target):
+        async with aiohttp.ClientSession() as session:
+            async with session.post(target, json=payload) as response:
+                await response.json()
+
+    pool = ServiceClientPool(limit_per_host=CONCURRENCY)
+
+    async def pooled_call(target):
+        session = await pool.get_session()
+        async with session.post(target, json=payload) as response:
+            await response.json()
+
+    try:
+        baseline_rps = await _run(url, session_per_call)
+        pooled_rps = await _run(url, pooled_call)
+        stats = pool.get_statistics()
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+    print(
+        f"\nHTTP-Pool-Benchmark ({REQUEST_COUNT} Anfragen, Parallelität {CONCURRENCY}): "
+        f"session_per_call={baseline_rps:.0f} req/s pooled={pooled_rps:.0f} req/s "
+        f"connections_created={stats['connections_created']}"
+    )
+
+    assert stats["connections_created"] <= CONCURRENCY
+    assert pooled_rps > baseline_rps
@@ -0,0 +1,99 @@
+"""
+Benchmark: Indikator-Zuordnung mit Schleifen vs. kompiliertem Automaten.
+
+Pro Frame werden alle Kategorien als relevant gewertet und wie bisher
+einzeln gegen die Risikolisten und die Indikatorlisten geprüft. Verglichen
+wird mit ``IndicatorMatcher`` und der vorberechneten Risikostufen-Tabelle.
+"""
+
+import os
+import time
+
+import pytest
+
+from services.restraint_detection.indicators import (
+    CATEGORIES,
+    INDICATOR_GROUPS,
+    SAFETY_RULES,
+    IndicatorMatcher,
+    risk_levels,
+)
+
+FRAME_COUNT = int(os.getenv("BENCH_INDICATOR_FRAMES", 200))
+
+
+def _assess_with_loops(categories):
+    risk_factors, indicators = [], []
+    for category in categories:
+        if category in SAFETY_RULES["high_risk_factors"]:
+            risk_factors.append(("high", category))
+        elif category in SAFETY_RULES["medium_risk_factors"]:
+            risk_factors.append(("medium", category))
+        elif category in SAFETY_RULES["low_risk_factors"]:
+            risk_factors.append(("low", category))
+
+        for first, second in (
+            ("consent", "non_consent"),
+            ("supervision", "abandonment"),
+        ):
+            if any(indicator in category for indicator in INDICATOR_GROUPS[first]):
+                indicators.append((first, category))
+            elif any(indicator in category for indicator in INDICATOR_GROUPS[second]):
+                indicators.append((second, category))
+    return risk_factors, indicators
+
+
+def _assess_with_matcher(categories, matcher, levels):
+    risk_factors, indicators = [], []
+    for category in categories:
+        level = levels.get(category)
+        if level is not None:
+            risk_factors.append((level, category))
+
+        groups = matcher.groups(category)
+        for first, second in (
+            ("consent", "non_consent"),
+            ("supervision", "abandonment"),
+        ):
+            if first in groups:
+                indicators.append((first, category))
+            elif second in groups:
+                indicators.append((second, category))
+    return risk_factors, indicators
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_compiled_matcher_is_faster():
+    """Der Automat liefert dieselben Zuordnungen in kürzerer Zeit."""
+    start = time.perf_counter()
+    matcher = IndicatorMatcher(INDICATOR_GROUPS, vocabulary=CATEGORIES)
+    levels = risk_levels(SAFETY_RULES)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(FRAME_COUNT):
+        loop_result = _assess_with_loops(CATEGORIES)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(FRAME_COUNT):
+        matcher_result = _assess_with_matcher(CATEGORIES, matcher, levels)
+    matcher_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for category in CATEGORIES * 10:
+        matcher._scan_groups(category)
+    scan_time = (time.perf_counter() - start) / (len(CATEGORIES) * 10)
+
+    print(
+        f"\nIndikator-Benchmark ({FRAME_COUNT} Frames x {len(CATEGORIES)} "
+        f"Kategorien): loops={loop_time * 1000:.1f} ms "
+        f"matcher={matcher_time * 1000:.1f} ms "
+        f"speedup={loop_time / matcher_time:.1f}x "
+        f"compile={compile_time * 1000:.2f} ms "
+        f"scan={scan_time * 1e6:.2f} us/Text"
+    )
+
+    assert matcher_result == loop_result
+    assert matcher_time < loop_time
@@ -0,0 +1,105 @@
+"""
+Benchmark: ein Request pro Frame vs. gebündelte Pose-Requests.
+
+Ein lokaler aiohttp-Stub ersetzt den Pose Estimation Service und simuliert
+eine feste Round-Trip-Zeit pro Request; gemessen wird der Durchsatz in
+Frames pro Sekunde.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+
+import numpy as np
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.frame_source import SampledFrame
+from services.vision_pipeline.http_pool import ServiceClientPool
+from services.vision_pipeline.pose import AsyncPoseClient
+
+FRAME_COUNT = int(os.getenv("BENCH_POSE_FRAMES", 240))
+ROUND_TRIP = 0.02
+BATCH_SIZE = 16
+
+
+async def _start_stub_server():
+    batches = {}
+
+    async def analyze(request):
+        await request.read()
+        await asyncio.sleep(ROUND_TRIP)
+        return web.json_response({"keypoints": [], "scores": [], "num_people": 0})
+
+    async def analyze_batch(request):
+        reader = await request.multipart()
+        names = []
+        async for part in reader:
+            await part.read()
+            names.append(part.filename)
+        await asyncio.sleep(ROUND_TRIP)
+        batch_id = uuid.uuid4().hex
+        batches[batch_id] = {
+            name: {"keypoints": [], "scores": [], "num_people": 0} for name in names
+        }
+        return web.json_response({"batch_id": batch_id})
+
+    async def status(request):
+        results = batches.pop(request.match_info["batch_id"])
+        return web.json_response({"status": "completed", "results": results})
+
+    app = web.Application()
+    app.router.add_post("/analyze", analyze)
+    app.router.add_post("/analyze/batch", analyze_batch)
+    app.router.add_get("/analyze/batch/{batch_id}/status", status)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+async def test_batched_pose_requests_throughput():
+    """Gebündelte Requests erreichen mehr Frames pro Sekunde als Einzel-Requests."""
+    runner, url = await _start_stub_server()
+    image = np.random.randint(0, 255, (240, 320, 3), dtype=np.uint8)
+    frames = [SampledFrame(image, i, i / 25.0) for i in range(FRAME_COUNT)]
+    pool = ServiceClientPool()
+
+    async def per_frame():
+        session = await pool.get_session()
+        client = AsyncPoseClient(url, http_pool=pool)
+        for frame in frames:
+            payload = client._encode(frame.frame)
+            await client._post_single(session, "frame.jpg", payload)
+
+    batched_client = AsyncPoseClient(
+        url, http_pool=pool, batch_size=BATCH_SIZE, poll_interval=0.005
+    )
+
+    try:
+        start = time.perf_counter()
+        await per_frame()
+        per_frame_fps = FRAME_COUNT / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = await batched_client.analyze_frames(frames)
+        batched_fps = FRAME_COUNT / (time.perf_counter() - start)
+        stats = batched_client.get_statistics()
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+    print(
+        f"\nPose-Client-Benchmark ({FRAME_COUNT} Frames, RTT {ROUND_TRIP * 1000:.0f} ms): "
+        f"per_frame={per_frame_fps:.0f} fps batched={batched_fps:.0f} fps "
+        f"frames_per_request={stats['frames_per_request']:.1f}"
+    )
+
+    assert len(results) == FRAME_COUNT
+    assert stats["failed_frames"] == 0
+    assert batched_fps > 2 * per_frame_fps
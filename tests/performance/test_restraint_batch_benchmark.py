@@ -0,0 +1,89 @@
+"""
+Benchmark: Restraint-CLIP-Bewertung pro Frame vs. gestapelte Forward-Passes.
+
+Die bisherige Verarbeitung führt für jedes Frame Processor und Modell
+einzeln aus. Verglichen wird mit der ``BatchedScoringEngine`` des
+Detektors bei mehreren Batchgrößen auf der CPU, in Frames pro Sekunde.
+Benötigt torch, transformers, librosa und die vortrainierten Modelle
+(lokal oder per Download), sonst wird der Test übersprungen.
+"""
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("librosa")
+
+FRAME_COUNT = int(os.getenv("BENCH_RESTRAINT_FRAMES", 64))
+BATCH_SIZES = (1, 4, 16, 32)
+
+
+@pytest.fixture(scope="module")
+def detector():
+    try:
+        from services.restraint_detection import main
+    except OSError as e:
+        pytest.skip(f"CLIP-Modell nicht verfügbar: {e}")
+    return main.detector
+
+
+def _frames():
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(0, 255, (360, 640, 3), dtype=np.uint8) for _ in range(FRAME_COUNT)
+    ]
+
+
+def _legacy_similarity(detector, frame):
+    """Bisheriger Pfad: Processor und Forward-Pass pro Frame."""
+    image = detector.processor(images=frame, return_tensors="pt").to(detector.device)
+    with torch.no_grad():
+        image_features = detector.model.get_image_features(**image)
+        image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+    similarity = (100.0 * image_features @ detector.category_embeddings.T).softmax(
+        dim=-1
+    )
+    return similarity[0].cpu().numpy()
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_batched_scoring_throughput(detector):
+    """Gestapelte Bewertung liefert dieselben Scores bei höherem Durchsatz."""
+    from services.restraint_detection.batch_engine import BatchedScoringEngine
+
+    frames = _frames()
+
+    start = time.perf_counter()
+    legacy = [_legacy_similarity(detector, frame) for frame in frames]
+    legacy_fps = FRAME_COUNT / (time.perf_counter() - start)
+
+    throughput = {}
+    for batch_size in BATCH_SIZES:
+        engine = BatchedScoringEngine(
+            detector._score_images,
+            preprocess=detector._preprocess_for_clip,
+            max_batch_size=batch_size,
+        )
+        start = time.perf_counter()
+        rows = asyncio.run(engine.score_many(frames))
+        throughput[batch_size] = FRAME_COUNT / (time.perf_counter() - start)
+        engine.close()
+
+        for row, expected in zip(rows, legacy):
+            assert np.allclose(row, expected, atol=1e-5)
+            # Dieselben Kategorien über der Relevanzschwelle
+            assert ((row > 0.1) == (expected > 0.1)).all()
+
+    print(
+        f"\nRestraint-CLIP-Benchmark ({FRAME_COUNT} Frames, {detector.device}): "
+        f"legacy={legacy_fps:.1f} fps "
+        + " ".join(f"batch{size}={fps:.1f} fps" for size, fps in throughput.items())
+    )
+
+    assert max(throughput.values()) > legacy_fps
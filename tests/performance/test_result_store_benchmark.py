@@ -0,0 +1,86 @@
+"""
+Benchmark: json.dump(indent=2) aller Ergebnisse vs. streamender JSONL-Writer.
+
+Misst Schreibzeit, Speicher-Peak (tracemalloc) und Dateigröße für ein
+langes Video sowie die Zeit für das Lesen eines kurzen Zeitbereichs.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from services.vision_pipeline.result_store import FrameResultReader, FrameResultWriter
+
+FRAME_COUNT = int(os.getenv("BENCH_RESULT_FRAMES", 5000))
+FPS = 15.0
+
+
+def _frame_result(i: int) -> dict:
+    return {
+        "pose": {
+            "keypoints": [[i % 640, (i * 7) % 360, 0.9] for _ in range(17)],
+            "confidence": 0.95,
+        },
+        "ocr": {"results": [{"text": f"Frame {i}", "confidence": 0.8}]},
+        "nsfw": {"results": [{"category": "neutral", "confidence": 0.99}]},
+    }
+
+
+def _run_pretty_dump(path: str) -> None:
+    """Bisheriges Verhalten: alle Ergebnisse sammeln, dann einrücken."""
+    results = [_frame_result(i) for i in range(FRAME_COUNT)]
+    with open(path, "w") as f:
+        json.dump({"video_path": "video.mp4", "results": results}, f, indent=2)
+
+
+def _run_streaming(path: str) -> None:
+    writer = FrameResultWriter(path, metadata={"video_path": "video.mp4"})
+    for i in range(FRAME_COUNT):
+        writer.write(i, i / FPS, _frame_result(i))
+    writer.close(summary={"status": "completed"})
+
+
+def _measure(runner, path: str) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    runner(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "write_s": round(elapsed, 3),
+        "traced_peak_mb": round(peak / 1024 / 1024, 2),
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_streaming_writer_memory_and_size(tmp_path):
+    """Streaming schreibt kleinere Dateien mit konstantem Speicherbedarf."""
+    pretty = _measure(_run_pretty_dump, str(tmp_path / "pretty.json"))
+    streaming = _measure(_run_streaming, str(tmp_path / "stream.jsonl"))
+
+    start = time.perf_counter()
+    with FrameResultReader(str(tmp_path / "stream.jsonl")) as reader:
+        window = list(reader.read_range(150.0, 160.0))
+    seek_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with open(tmp_path / "pretty.json") as f:
+        full = json.load(f)["results"][2250:2400]
+    full_parse_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"\nErgebnis-Writer-Benchmark ({FRAME_COUNT} Frames): "
+        f"pretty={pretty} streaming={streaming} "
+        f"range_read_ms={seek_ms:.1f} full_parse_ms={full_parse_ms:.1f}"
+    )
+
+    assert len(window) == len(full) + 1
+    assert streaming["traced_peak_mb"] < pretty["traced_peak_mb"] / 10
+    assert streaming["file_mb"] < pretty["file_mb"]
+    assert seek_ms < full_parse_ms
@@ -0,0 +1,90 @@
+"""
+Benchmark: sequentielle Verarbeitung vs. MediaScheduler auf gemischter Last.
+
+Simuliert Videos unterschiedlicher Länge und Einzelbilder mit fester
+Analysezeit pro Frame und misst Gesamtdurchsatz (Frames/s) sowie die
+mittlere Latenz der Bilder.
+"""
+
+import os
+import time
+
+import pytest
+
+from services.vision_pipeline.scheduler import MediaJob, MediaScheduler
+from tests.conftest import SimulatedMediaPipeline
+
+FRAME_TIME = float(os.getenv("BENCH_FRAME_TIME", 0.002))
+
+WORKLOAD = (
+    [("long.mp4", "video", 300), ("medium.mp4", "video", 200)]
+    + [(f"short_{i}.mp4", "video", 40) for i in range(4)]
+    + [(f"image_{i}.jpg", "image", 1) for i in range(16)]
+)
+
+
+def _pipeline() -> SimulatedMediaPipeline:
+    return SimulatedMediaPipeline(
+        {path: frames for path, _, frames in WORKLOAD},
+        frame_time=FRAME_TIME,
+        per_job_parallelism=2,
+    )
+
+
+async def _run_sequential():
+    """Bisheriges Verhalten: eine Datei nach der anderen."""
+    pipeline = _pipeline()
+    start = time.perf_counter()
+    image_latencies = []
+    for index, (path, kind, _) in enumerate(WORKLOAD):
+        if kind == "video":
+            await pipeline.process_video(path, f"job_{index}")
+        else:
+            await pipeline.process_image(path, f"job_{index}")
+            image_latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    frames = sum(frames for _, _, frames in WORKLOAD)
+    return {
+        "throughput_fps": frames / elapsed,
+        "avg_image_latency": sum(image_latencies) / len(image_latencies),
+    }
+
+
+async def _run_scheduled(policy: str):
+    scheduler = MediaScheduler(
+        _pipeline(), frame_budget=32, max_concurrent_jobs=8, policy=policy
+    )
+    jobs = [
+        MediaJob(path=path, kind=kind, job_id=f"job_{index}", estimated_frames=frames)
+        for index, (path, kind, frames) in enumerate(WORKLOAD)
+    ]
+    results = await scheduler.run(jobs)
+    stats = scheduler.get_statistics()
+    image_latencies = [
+        r["wait_time"] + r["processing_time"] for r in results if r["kind"] == "image"
+    ]
+    return {
+        "throughput_fps": stats["throughput_fps"],
+        "avg_image_latency": sum(image_latencies) / len(image_latencies),
+        "max_in_flight": stats["frame_budget"]["max_in_flight"],
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+async def test_scheduler_throughput_on_mixed_workload():
+    """Parallele Verarbeitung steigert den Durchsatz, Bilder warten kürzer."""
+    sequential = await _run_sequential()
+    fifo = await _run_scheduled("fifo")
+    sjf = await _run_scheduled("sjf")
+
+    print(
+        f"\nScheduler-Benchmark ({len(WORKLOAD)} Medien, "
+        f"{sum(f for _, _, f in WORKLOAD)} Frames): "
+        f"sequential={sequential} fifo={fifo} sjf={sjf}"
+    )
+
+    assert sjf["max_in_flight"] <= 32
+    assert sjf["throughput_fps"] > sequential["throughput_fps"] * 1.5
+    assert sjf["avg_image_latency"] < sequential["avg_image_latency"]
+    assert sjf["avg_image_latency"] <= fifo["avg_image_latency"]
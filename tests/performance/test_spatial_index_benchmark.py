@@ -0,0 +1,75 @@
+"""
+Benchmark: Nachbarsuche mit paarweisem Vergleich vs. räumlichem Index.
+
+Für synthetische Szenen mit 10 bis 10.000 kleinen Erkennungen werden für
+jede Erkennung die Nachbarn gesucht (wie in der Validierungsphase). Die
+Dichte bleibt konstant (1.000 Erkennungen pro 4K-Fläche), damit die Zahl
+der Nachbarn pro Abfrage nicht mit der Szenengröße wächst. Der paarweise
+Vergleich wächst quadratisch und wird daher nur bis
+``BENCH_SPATIAL_LEGACY_MAX`` Erkennungen gemessen.
+"""
+
+import math
+import os
+import time
+
+import pytest
+
+from services.restraint_detection.spatial_index import SpatialIndex, find_neighbors
+from tests.unit.test_spatial_index import _detections, _legacy_neighbors
+
+COUNTS = (10, 100, 1000, 10000)
+AREA_PER_DETECTION = 3840 * 2160 / 1000
+LEGACY_MAX = int(os.getenv("BENCH_SPATIAL_LEGACY_MAX", 1000))
+
+
+def _all_targets(detections):
+    return [target for items in detections.values() for target in items]
+
+
+def _with_index(detections):
+    index = SpatialIndex.from_detections(detections)
+    return [find_neighbors(index, target) for target in _all_targets(detections)]
+
+
+def _with_pairs(detections):
+    targets = _all_targets(detections)
+    return [_legacy_neighbors(target, detections) for target in targets]
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+def test_spatial_index_scales_near_linearly():
+    """Der Index liefert dieselben Nachbarn und wächst annähernd linear."""
+    index_times, legacy_times = {}, {}
+    for count in COUNTS:
+        side = math.sqrt(count * AREA_PER_DETECTION)
+        detections = _detections(count, seed=count, width=side, height=side)
+
+        start = time.perf_counter()
+        result = _with_index(detections)
+        index_times[count] = time.perf_counter() - start
+
+        if count <= LEGACY_MAX:
+            start = time.perf_counter()
+            expected = _with_pairs(detections)
+            legacy_times[count] = time.perf_counter() - start
+            assert result == expected
+
+    print(
+        "\nNachbarsuche-Benchmark: "
+        + " ".join(
+            f"n={count}: index={index_times[count] * 1000:.1f} ms"
+            + (
+                f" pairs={legacy_times[count] * 1000:.1f} ms"
+                if count in legacy_times
+                else ""
+            )
+            for count in COUNTS
+        )
+    )
+
+    largest_legacy = max(legacy_times)
+    assert index_times[largest_legacy] < legacy_times[largest_legacy]
+    # Linear wäre Faktor 10, quadratisch Faktor 100
+    assert index_times[10000] / index_times[1000] < 30
@@ -0,0 +1,261 @@
+"""
+Unit Tests für Checkpoint und Fortsetzen der Video-Verarbeitung.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from services.vision_pipeline.checkpoint import (
+    CheckpointStore,
+    VideoCheckpoint,
+    VideoCheckpointer,
+)
+from services.vision_pipeline.frame_source import VideoFrameSource
+from services.vision_pipeline.result_store import FrameResultReader, FrameResultWriter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SERVICE_DIR = os.path.join(REPO_ROOT, "services", "vision_pipeline")
+
+# Verarbeitet das Video mit VisionPipeline.process_video gegen lokale
+# Service-Stubs; Redis wird durch einen Cache ohne Treffer ersetzt.
+WORKER_SCRIPT = textwrap.dedent(
+    """
+    import asyncio
+    import json
+    import sys
+
+    from aiohttp import web
+
+    from services.vision_pipeline.main import VisionPipeline
+
+    video_path, output_dir, interval, delay = sys.argv[1:5]
+
+
+    class NullRedis:
+        def get(self, key):
+            return None
+
+        def setex(self, key, ttl, value):
+            pass
+
+
+    async def analyze(request):
+        await asyncio.sleep(float(delay))
+        return web.json_response({"ok": True})
+
+
+    async def main():
+        app = web.Application()
+        app.router.add_post("/analyze", analyze)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = "http://127.0.0.1:%d" % site._server.sockets[0].getsockname()[1]
+
+        pipeline = VisionPipeline(
+            output_dir=output_dir,
+            pose_service_url=url,
+            ocr_service_url=url,
+            nsfw_service_url=url,
+            frame_sampling_rate=1,
+            near_duplicate_threshold=-1,
+            inference_workers=2,
+            checkpoint_interval=int(interval),
+        )
+        pipeline.redis_client = NullRedis()
+        try:
+            info = await pipeline.process_video(video_path, "job")
+        finally:
+            await pipeline.close()
+            await runner.cleanup()
+        print(json.dumps(info), flush=True)
+
+
+    asyncio.run(main())
+    """
+)
+
+
+def _run_worker(tmp_path, video_path, delay):
+    script = tmp_path / "worker.py"
+    script.write_text(WORKER_SCRIPT)
+    return subprocess.Popen(
+        [sys.executable, str(script), video_path, str(tmp_path), "10", str(delay)],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join([REPO_ROOT, SERVICE_DIR])},
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+
+
+@pytest.mark.unit
+class TestResultWriterResume:
+    """Test Suite für das Fortsetzen des FrameResultWriter."""
+
+    def test_resume_discards_lines_after_checkpoint(self, tmp_path):
+        """Test, dass nach dem Checkpoint geschriebene Zeilen verworfen werden."""
+        path = str(tmp_path / "result.jsonl")
+        writer = FrameResultWriter(path, metadata={"video_path": "v.mp4"})
+        for i in range(10):
+            writer.write(i, i / 10, {"n": i})
+        state = json.loads(json.dumps(writer.checkpoint()))
+        for i in range(10, 15):
+            writer.write(i, i / 10, {"n": i})
+        writer._file.flush()  # Absturz ohne close()
+
+        resumed = FrameResultWriter(path, resume_state=state)
+        for i in range(10, 20):
+            resumed.write(i, i / 10, {"n": i})
+        resumed.close(summary={"status": "completed"})
+
+        with FrameResultReader(path) as reader:
+            frames = [entry["frame_number"] for entry in reader]
+            assert reader.footer["frames"] == 20
+            assert reader.header["video_path"] == "v.mp4"
+            assert [e["frame_number"] for e in reader.read_range(1.5, 1.7)] == [
+                15,
+                16,
+                17,
+            ]
+
+        assert frames == list(range(20))
+
+
+@pytest.mark.unit
+class TestCheckpointStore:
+    """Test Suite für CheckpointStore."""
+
+    def test_roundtrip_and_delete(self, tmp_path):
+        """Test von Speichern, Laden und Löschen."""
+        store = CheckpointStore(str(tmp_path))
+        checkpoint = VideoCheckpoint(
+            job_id="job",
+            video_path="v.mp4",
+            output_path="out.jsonl",
+            next_frame=42,
+            writer_state={"offset": 10},
+            video_size=1,
+            video_mtime=2.0,
+            updated_at="2024-01-01T00:00:00",
+        )
+
+        store.save(checkpoint)
+        assert store.load("job") == checkpoint
+
+        store.delete("job")
+        assert store.load("job") is None
+
+    def test_corrupt_checkpoint_is_ignored(self, tmp_path):
+        """Test, dass defekte Checkpoints zu einem Neustart führen."""
+        store = CheckpointStore(str(tmp_path))
+        with open(store.path_for("job"), "w") as f:
+            f.write("{kaputt")
+
+        assert store.load("job") is None
+
+
+@pytest.mark.unit
+class TestVideoCheckpointer:
+    """Test Suite für VideoCheckpointer."""
+
+    def test_checkpoints_at_interval(self, tmp_path, synthetic_video):
+        """Test des Checkpoint-Intervalls."""
+        store = CheckpointStore(str(tmp_path / "checkpoints"))
+        checkpointer = VideoCheckpointer(store, "job", synthetic_video, interval=10)
+        writer = checkpointer.open_writer(lambda: str(tmp_path / "r.jsonl"), {})
+
+        for i in range(25):
+            writer.write(i, i / 25, {})
+            checkpointer.frame_written(i)
+
+        assert checkpointer.checkpoints_written == 2
+        assert store.load("job").next_frame == 20
+        writer.close()
+
+    def test_changed_video_starts_over(self, tmp_path, synthetic_video):
+        """Test, dass ein Checkpoint für ein geändertes Video verworfen wird."""
+        store = CheckpointStore(str(tmp_path / "checkpoints"))
+        checkpointer = VideoCheckpointer(store, "job", synthetic_video, interval=5)
+        writer = checkpointer.open_writer(lambda: str(tmp_path / "r.jsonl"), {})
+        for i in range(5):
+            writer.write(i, i / 25, {})
+            checkpointer.frame_written(i)
+        writer.close()
+
+        stat = os.stat(synthetic_video)
+        os.utime(synthetic_video, (stat.st_atime, stat.st_mtime + 10))
+
+        restarted = VideoCheckpointer(store, "job", synthetic_video, interval=5)
+        restarted.open_writer(lambda: str(tmp_path / "new.jsonl"), {}).close()
+
+        assert restarted.start_frame == 0
+        assert not restarted.resumed
+
+    def test_disabled_without_store(self, tmp_path, synthetic_video):
+        """Test ohne Checkpoint-Ablage."""
+        checkpointer = VideoCheckpointer(None, "job", synthetic_video, interval=1)
+        writer = checkpointer.open_writer(lambda: str(tmp_path / "r.jsonl"), {})
+        writer.write(0, 0.0, {})
+        checkpointer.frame_written(0)
+        writer.close()
+
+        assert checkpointer.checkpoints_written == 0
+
+    @pytest.mark.slow
+    def test_resume_after_killed_worker(self, tmp_path, synthetic_video):
+        """Test: Worker wird mitten im Video beendet und danach fortgesetzt."""
+        pytest.importorskip("torch")
+        checkpoint_path = CheckpointStore(str(tmp_path / "checkpoints")).path_for("job")
+
+        worker = _run_worker(tmp_path, synthetic_video, delay=0.02)
+
+        # Warten, bis mindestens zwei Checkpoints geschrieben wurden
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if os.path.exists(checkpoint_path):
+                with open(checkpoint_path) as f:
+                    if json.load(f)["next_frame"] >= 20:
+                        break
+            time.sleep(0.01)
+        worker.send_signal(signal.SIGKILL)
+        worker.wait(timeout=10)
+        worker.stdout.close()
+
+        with open(checkpoint_path) as f:
+            killed_at = json.load(f)["next_frame"]
+        assert 20 <= killed_at < 60
+
+        resumed = _run_worker(tmp_path, synthetic_video, delay=0)
+        output = resumed.stdout.read()
+        assert resumed.wait(timeout=60) == 0
+        resumed.stdout.close()
+        info = json.loads(output.strip().splitlines()[-1])
+
+        assert info["resumed_from_frame"] >= killed_at
+        assert info["processed_frames"] == 60
+        assert not os.path.exists(checkpoint_path)
+        with FrameResultReader(info["output_path"]) as reader:
+            frames = [entry["frame_number"] for entry in reader]
+            assert reader.complete
+            assert reader.footer["frames"] == 60
+
+        # Jedes Frame genau einmal, in Reihenfolge
+        assert frames == list(range(60))
+
+    async def test_frame_source_starts_at_checkpoint(self, synthetic_video):
+        """Test, dass die Frame-Quelle ab dem Checkpoint-Frame dekodiert."""
+        source = VideoFrameSource(
+            synthetic_video, frame_sampling_rate=2, start_frame=41
+        )
+
+        frames = [sampled.frame_number async for sampled in source]
+
+        assert frames == list(range(42, 60, 2))
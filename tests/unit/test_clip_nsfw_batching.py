@@ -0,0 +1,50 @@
+"""
+Unit Tests für die Batch-Hilfsfunktionen des CLIP NSFW Services.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from services.clip_nsfw.batching import adaptive_batch_size, decode_images
+
+MB = 1024 * 1024
+
+
+def _png(value):
+    image = np.full((8, 8, 3), value, dtype=np.uint8)
+    image[0, 0] = (255, 0, 0)  # BGR: blau
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+@pytest.mark.unit
+class TestCLIPNSFWBatching:
+    """Test Suite für Batchgröße und paralleles Dekodieren."""
+
+    def test_batch_size_follows_free_memory(self):
+        """Test der speicherabhängigen Batchgröße mit Unter- und Obergrenze."""
+        assert adaptive_batch_size(1024 * MB, 48 * MB, 0.5, 64) == 10
+        assert adaptive_batch_size(64 * 1024 * MB, 48 * MB, 0.5, 64) == 64
+        assert adaptive_batch_size(10 * MB, 48 * MB, 0.5, 64) == 1
+        assert adaptive_batch_size(0, 48 * MB, 0.5, 64) == 1
+
+    def test_parallel_decode_keeps_order_and_errors(self):
+        """Test, dass paralleles Dekodieren Reihenfolge und Fehler erhält."""
+        images = [_png(value) for value in range(0, 200, 10)]
+        images.insert(3, b"kein Bild")
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            decoded, errors = decode_images(images, executor)
+        sequential, _ = decode_images(images)
+
+        assert decoded[3] is None and errors[3]
+        assert sum(error is not None for error in errors) == 1
+        for parallel, single in zip(decoded, sequential):
+            assert (parallel is None and single is None) or np.array_equal(
+                parallel, single
+            )
+        # RGB-Reihenfolge für CLIP
+        assert decoded[0][0, 0].tolist() == [0, 0, 255]
+        assert decoded[4][1, 1].tolist() == [30, 30, 30]
@@ -0,0 +1,239 @@
+"""
+Unit Tests für die spaltenorientierten Detektionsergebnisse.
+"""
+
+import copy
+import random
+
+import numpy as np
+import pytest
+
+from services.vision_pipeline.detection_table import DetectionTable
+from services.vision_pipeline.nsfw import NSFWDetector
+from services.vision_pipeline.restraint_detector import RestraintDetector
+
+CATEGORIES = ["rope", "cuffs", "tape"]
+
+
+def _restraint_results(frame_count, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for frame_number in range(frame_count):
+        detections = [
+            {
+                "category": rng.choice(CATEGORIES),
+                "confidence": rng.random(),
+                "bbox": [rng.random() * 100, rng.random() * 100, 20.0, 30.0],
+                "material": "leather",
+            }
+            for _ in range(rng.randint(0, 3))
+        ]
+        results.append(
+            {
+                "frame_number": frame_number,
+                "restraint_data": {"results": detections, "model": "clip"},
+                "processing_time": 0.01,
+                "timestamp": frame_number / 25.0,
+            }
+        )
+    return results
+
+
+def _legacy_filter(results, min_confidence):
+    filtered = []
+    for result in copy.deepcopy(results):
+        if "restraint_data" in result and "results" in result["restraint_data"]:
+            items = [
+                item
+                for item in result["restraint_data"]["results"]
+                if item["confidence"] >= min_confidence
+            ]
+            if items:
+                result["restraint_data"]["results"] = items
+                filtered.append(result)
+    return filtered
+
+
+@pytest.mark.unit
+class TestDetectionTable:
+    """Test Suite für DetectionTable."""
+
+    def test_round_trip_is_lossless(self):
+        """Test, dass auch ungewöhnliche Werte exakt erhalten bleiben."""
+        results = _restraint_results(20) + [
+            {"frame_number": 20, "restraint_data": {"skipped": True}, "timestamp": 0.8},
+            {"frame_number": 21, "error": "Timeout", "timestamp": None},
+            {"frame_number": 22, "restraint_data": None},
+            {
+                "frame_number": 23,
+                "timestamp": 0.92,
+                "restraint_data": {
+                    "results": [
+                        {"category": "rope", "confidence": 1, "bbox": (1, 2, 3, 4)},
+                        {"category": None, "confidence": float("nan")},
+                        {"confidence": np.float32(0.5), "bbox": "unbekannt"},
+                        {"category": "tape", "confidence": True, "bbox": [1.0, 2.0]},
+                        {},
+                    ]
+                },
+            },
+        ]
+        original = copy.deepcopy(results)
+
+        table = DetectionTable.from_results(results, "restraint_data")
+        restored = table.to_results()
+
+        assert results == original
+        # Der letzte Frame enthält NaN (ungleich zu sich selbst)
+        assert restored[:-1] == original[:-1]
+        assert restored[-1].keys() == original[-1].keys()
+        last = restored[-1]["restraint_data"]["results"]
+        assert type(last[0]["confidence"]) is int
+        assert last[0]["bbox"] == (1, 2, 3, 4)
+        assert np.isnan(last[1]["confidence"]) and last[1]["category"] is None
+        assert type(last[2]["confidence"]) is np.float32
+        assert last[3]["confidence"] is True and last[4] == {}
+
+    def test_columns(self):
+        """Test der Spalten und Frame-Zuordnung."""
+        results = _restraint_results(50)
+        table = DetectionTable.from_results(results, "restraint_data")
+        flat = [
+            (result["frame_number"], result["timestamp"], item)
+            for result in results
+            for item in result["restraint_data"]["results"]
+        ]
+
+        assert len(table) == len(flat)
+        assert table.scores.tolist() == [item["confidence"] for _, _, item in flat]
+        assert table.labels.tolist() == [item["category"] for _, _, item in flat]
+        assert table.frame_numbers.tolist() == [number for number, _, _ in flat]
+        assert table.timestamps.tolist() == [timestamp for _, timestamp, _ in flat]
+        assert table.boxes.shape == (len(flat), 4)
+
+    def test_filter_matches_legacy_loop(self):
+        """Test, dass der vektorisierte Filter dasselbe liefert wie die Schleife."""
+        results = _restraint_results(500, seed=3)
+        table = DetectionTable.from_results(results, "restraint_data")
+
+        for threshold in (0.0, 0.3, 0.9, 1.1):
+            filtered = table.filter(min_confidence=threshold)
+            assert filtered.to_results(include_empty=False) == _legacy_filter(
+                results, threshold
+            )
+
+    def test_label_time_and_top_k_queries(self):
+        """Test von Label-Filter, Zeitfenster und Top-k."""
+        results = _restraint_results(300, seed=5)
+        table = DetectionTable.from_results(results, "restraint_data")
+
+        ropes = table.filter(labels=["rope", "unbekannt"], min_confidence=0.5)
+        window = table.in_window(2.0, 4.0)
+        top = table.top_k(5)
+
+        assert set(ropes.labels.tolist()) <= {"rope"}
+        assert (ropes.scores >= 0.5).all()
+        assert ((window.timestamps >= 2.0) & (window.timestamps < 4.0)).all()
+        assert len(window) == int(
+            ((table.timestamps >= 2.0) & (table.timestamps < 4.0)).sum()
+        )
+        assert top.scores.tolist() == sorted(table.scores.tolist(), reverse=True)[:5]
+        assert len(table.top_k(10**6)) == len(table)
+        assert len(table.top_k(0)) == 0
+
+    def test_aggregate_by_label(self):
+        """Test der Kennzahlen pro Label gegen eine direkte Berechnung."""
+        results = _restraint_results(200, seed=7)
+        table = DetectionTable.from_results(results, "restraint_data")
+
+        summary = table.aggregate_by_label()
+
+        for category in CATEGORIES:
+            rows = [
+                (result["frame_number"], result["timestamp"], item["confidence"])
+                for result in results
+                for item in result["restraint_data"]["results"]
+                if item["category"] == category
+            ]
+            stats = summary[category]
+            assert stats["count"] == len(rows)
+            assert stats["frames"] == len({number for number, _, _ in rows})
+            assert stats["max_confidence"] == max(score for _, _, score in rows)
+            assert stats["mean_confidence"] == pytest.approx(
+                sum(score for _, _, score in rows) / len(rows)
+            )
+            assert stats["first_seen"] == min(ts for _, ts, _ in rows)
+            assert stats["last_seen"] == max(ts for _, ts, _ in rows)
+
+    def test_window_summary(self):
+        """Test der Zusammenfassung pro Zeitfenster."""
+        results = _restraint_results(250, seed=9)
+        table = DetectionTable.from_results(results, "restraint_data")
+
+        windows = table.window_summary(2.0)
+
+        assert sum(window["count"] for window in windows) == len(table)
+        first = table.in_window(0.0, 2.0)
+        assert windows[0]["start"] == 0.0
+        assert windows[0]["count"] == len(first)
+        assert windows[0]["max_confidence"] == first.scores.max()
+
+    def test_empty_table(self):
+        """Test einer Tabelle ohne Detektionen."""
+        table = DetectionTable.from_results(
+            [{"frame_number": 0, "restraint_data": {"results": []}}], "restraint_data"
+        )
+
+        assert len(table) == 0
+        assert table.aggregate_by_label() == {}
+        assert table.window_summary(1.0) == []
+        assert table.filter(min_confidence=0.5).to_results(include_empty=False) == []
+
+
+@pytest.mark.unit
+class TestDetectorFilters:
+    """Test Suite für filter_by_confidence der Detektoren."""
+
+    def test_restraint_filter(self):
+        """Test des Restraint-Filters gegen die bisherige Schleife."""
+        detector = RestraintDetector.__new__(RestraintDetector)
+        results = _restraint_results(100)
+
+        filtered = detector.filter_by_confidence(results, 0.6)
+
+        assert filtered == _legacy_filter(results, 0.6)
+
+    def test_nsfw_filter_requires_flag(self):
+        """Test, dass nur als NSFW markierte Detektionen übrig bleiben."""
+        detector = NSFWDetector.__new__(NSFWDetector)
+        results = [
+            {
+                "frame_number": 0,
+                "nsfw_data": {
+                    "results": [
+                        {"is_nsfw": True, "confidence": 0.9, "label": "explicit"},
+                        {"is_nsfw": False, "confidence": 0.95},
+                        {"is_nsfw": True, "confidence": 0.2},
+                    ]
+                },
+            },
+            {
+                "frame_number": 1,
+                "nsfw_data": {"results": [{"is_nsfw": False, "confidence": 0.9}]},
+            },
+            {"frame_number": 2, "nsfw_data": {"skipped": True}},
+        ]
+
+        filtered = detector.filter_by_confidence(results, 0.5)
+
+        assert filtered == [
+            {
+                "frame_number": 0,
+                "nsfw_data": {
+                    "results": [
+                        {"is_nsfw": True, "confidence": 0.9, "label": "explicit"}
+                    ]
+                },
+            }
+        ]
+        assert len(results[0]["nsfw_data"]["results"]) == 3
@@ -0,0 +1,88 @@
+"""
+Unit Tests für die FrameEnvelope der Vision Pipeline.
+"""
+
+import base64
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+from services.vision_pipeline.frame_envelope import FrameEnvelope
+
+
+@pytest.mark.unit
+class TestFrameEnvelope:
+    """Test Suite für FrameEnvelope."""
+
+    def test_jpeg_encoded_once_for_all_consumers(self, sample_image_data):
+        """Test der einmaligen Kodierung bei mehreren Analyzern."""
+        envelope = FrameEnvelope(sample_image_data)
+
+        with patch(
+            "services.vision_pipeline.frame_envelope.cv2.imencode",
+            wraps=cv2.imencode,
+        ) as imencode:
+            payloads = [envelope.base64() for _ in range(3)]
+
+        assert imencode.call_count == 1
+        assert len(set(payloads)) == 1
+        assert envelope.encodes_performed == 1
+        assert envelope.encodes_saved == 2
+
+    def test_base64_matches_jpeg_bytes(self, sample_image_data):
+        """Test der Konsistenz zwischen JPEG- und Base64-Darstellung."""
+        envelope = FrameEnvelope(sample_image_data)
+
+        assert base64.b64decode(envelope.base64()) == envelope.jpeg()
+
+    def test_separate_encode_per_quality(self, sample_image_data):
+        """Test der getrennten Kodierung je Qualitätsstufe."""
+        envelope = FrameEnvelope(sample_image_data)
+
+        low = envelope.jpeg(quality=30)
+        high = envelope.jpeg(quality=95)
+        envelope.jpeg(quality=30)
+
+        assert len(low) < len(high)
+        assert envelope.encodes_performed == 2
+        assert envelope.encodes_saved == 1
+
+    def test_prepare_is_not_counted_as_saved(self, sample_image_data):
+        """Test, dass die Vorab-Kodierung keine Einsparung vortäuscht."""
+        envelope = FrameEnvelope(sample_image_data)
+
+        envelope.prepare()
+        assert envelope.encodes_performed == 1
+        assert envelope.encodes_saved == 0
+
+        with patch(
+            "services.vision_pipeline.frame_envelope.cv2.imencode",
+            wraps=cv2.imencode,
+        ) as imencode:
+            envelope.base64()
+            envelope.jpeg()
+
+        assert imencode.call_count == 0
+        assert envelope.encode_requests == 2
+        assert envelope.encodes_saved == 1
+
+    def test_raw_array_is_not_copied(self, sample_image_data):
+        """Test des Zugriffs auf das Roh-Array."""
+        envelope = FrameEnvelope(sample_image_data)
+
+        assert envelope.array is sample_image_data
+        assert envelope.shape == (224, 224, 3)
+        assert envelope.encode_requests == 0
+
+    def test_decoded_jpeg_matches_frame_shape(self):
+        """Test der Dekodierbarkeit der JPEG-Bytes."""
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        envelope = FrameEnvelope(frame)
+
+        decoded = cv2.imdecode(
+            np.frombuffer(envelope.jpeg(), dtype=np.uint8), cv2.IMREAD_COLOR
+        )
+
+        assert decoded.shape == frame.shape
@@ -0,0 +1,159 @@
+"""
+Unit Tests für die binäre Frame-Annahme des Restraint Detection Services.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from services.ocr_detection.batching import encode_container
+from services.restraint_detection.frame_ingest import (
+    CONTAINER_MAGIC,
+    IngestStats,
+    Stopwatch,
+    decode_frame,
+    decode_frames,
+    encode_frames,
+    server_timing,
+    split_frames,
+)
+
+
+def _png(value, size=16):
+    image = np.full((size, size, 3), value, dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+@pytest.mark.unit
+class TestFrameContainer:
+    """Test Suite für den längenpräfixierten Frame-Container."""
+
+    def test_roundtrip_without_copies(self):
+        """Test, dass Frames als Ausschnitte des Bodys zurückkommen."""
+        frames = [_png(10), b"", _png(200, size=32)]
+        body = encode_frames(frames)
+
+        parts = split_frames(body)
+
+        assert [bytes(part) for part in parts] == frames
+        assert all(isinstance(part, memoryview) for part in parts)
+        assert all(part.obj is body for part in parts)
+
+    def test_empty_container(self):
+        """Test eines Containers ohne Frames."""
+        assert split_frames(encode_frames([])) == []
+
+    @pytest.mark.parametrize(
+        "body, message",
+        [
+            (b"IMB", "zu kurz"),
+            (b"XXXX" + encode_frames([])[4:], "Ungültiger"),
+            (encode_frames([b"abc"])[:-1], "Frame 0: abgeschnitten"),
+            (encode_frames([b"abc"])[:10], "Frame 0: Längenangabe fehlt"),
+            (encode_frames([b"abc"]) + b"x", "Überzählige"),
+        ],
+    )
+    def test_malformed_containers(self, body, message):
+        """Test, dass fehlerhafte Container abgelehnt werden."""
+        with pytest.raises(ValueError, match=message):
+            split_frames(body)
+
+    def test_frame_limit(self):
+        """Test der maximalen Anzahl Frames."""
+        body = encode_frames([b"a"] * 3)
+
+        assert len(split_frames(body, max_frames=3)) == 3
+        with pytest.raises(ValueError, match="Zu viele Frames: 3 \\(maximal 2\\)"):
+            split_frames(body, max_frames=2)
+
+    def test_shares_ocr_container_format(self):
+        """Test, dass Container des OCR Services gelesen werden."""
+        frames = [_png(10), _png(20)]
+
+        assert encode_frames(frames) == encode_container(frames)
+        assert [
+            bytes(part) for part in split_frames(encode_container(frames))
+        ] == frames
+
+    def test_missing_length(self):
+        """Test eines Headers mit mehr Frames als vorhanden."""
+        body = CONTAINER_MAGIC + (2).to_bytes(4, "big") + encode_frames([b"a"])[8:]
+
+        with pytest.raises(ValueError, match="Frame 1: Längenangabe fehlt"):
+            split_frames(body)
+
+
+@pytest.mark.unit
+class TestDecodeFrames:
+    """Test Suite für das Dekodieren in NumPy-Arrays."""
+
+    def test_decode_frame_from_memoryview(self):
+        """Test des Dekodierens direkt aus dem Container-Puffer."""
+        (part,) = split_frames(encode_frames([_png(42)]))
+
+        image = decode_frame(part)
+
+        assert image.shape == (16, 16, 3)
+        assert image.dtype == np.uint8
+        assert (image == 42).all()
+
+    @pytest.mark.parametrize("data", [b"", b"kein bild"])
+    def test_decode_frame_rejects_invalid(self, data):
+        """Test, dass leere und ungültige Bilder abgelehnt werden."""
+        with pytest.raises(ValueError, match="Ungültiges Bildformat"):
+            decode_frame(data)
+
+    async def test_decode_frames_keeps_order(self):
+        """Test der parallelen Dekodierung in Eingabereihenfolge."""
+        payloads = [_png(value) for value in (0, 50, 100, 150)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            images = await decode_frames(payloads, executor)
+
+        assert [int(image[0, 0, 0]) for image in images] == [0, 50, 100, 150]
+
+    async def test_decode_frames_reports_invalid_index(self):
+        """Test, dass der Index des ungültigen Bildes gemeldet wird."""
+        with pytest.raises(ValueError, match="Frame 1: Ungültiges Bildformat"):
+            await decode_frames([_png(0), b"kaputt", _png(0)])
+
+
+@pytest.mark.unit
+class TestIngestStats:
+    """Test Suite für die Zeiterfassung je Transport."""
+
+    def test_record_and_statistics(self):
+        """Test der Summen und Mittelwerte je Transport."""
+        stats = IngestStats()
+
+        timing = stats.record("raw", 1, 1000, 0.002, 0.004)
+        stats.record("raw", 1, 3000, 0.004, 0.006)
+        stats.record("container", 8, 16000, 0.001, 0.020)
+
+        assert timing == {
+            "transport": "raw",
+            "frames": 1,
+            "bytes": 1000,
+            "parse_ms": 2.0,
+            "decode_ms": 4.0,
+        }
+        result = stats.get_statistics()
+        assert result["raw"]["requests"] == 2
+        assert result["raw"]["bytes"] == 4000
+        assert result["raw"]["mean_parse_ms"] == pytest.approx(3.0)
+        assert result["raw"]["mean_decode_ms"] == pytest.approx(5.0)
+        assert result["container"]["frames"] == 8
+
+    def test_server_timing_header(self):
+        """Test des Server-Timing-Headers in Millisekunden."""
+        assert server_timing(0.0015, 0.25) == "parse;dur=1.500, decode;dur=250.000"
+
+    def test_stopwatch_laps(self):
+        """Test, dass Runden aufeinanderfolgende Abschnitte messen."""
+        stopwatch = Stopwatch()
+
+        first, second = stopwatch.lap(), stopwatch.lap()
+
+        assert first >= 0 and second >= 0
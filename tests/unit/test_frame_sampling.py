@@ -0,0 +1,124 @@
+"""
+Unit Tests für die Frame-Sampling-Strategien (uniform / Szenenwechsel).
+"""
+
+import os
+
+import pytest
+
+from services.common.frame_sampling import (
+    SceneChangeSampler,
+    UniformSampler,
+    create_frame_sampler,
+    sampling_options_from_env,
+)
+from services.vision_pipeline.frame_source import VideoFrameSource
+from tests.conftest import generate_scene_frames
+
+FPS = 25.0
+
+
+def _run(sampler, frames):
+    sampler.reset(FPS, len(frames))
+    return [i for i, frame in enumerate(frames) if sampler.select(i, frame)]
+
+
+@pytest.mark.unit
+class TestSceneChangeSampler:
+    """Test Suite für SceneChangeSampler."""
+
+    @pytest.mark.parametrize("method", ["histogram", "diff"])
+    def test_detects_hard_cut(self, method):
+        """Test der Erkennung eines harten Schnitts."""
+        frames, cuts = generate_scene_frames([(40, "static"), (40, "static")])
+
+        selected = _run(SceneChangeSampler(method=method), frames)
+
+        assert selected == cuts == [0, 40]
+
+    def test_static_segment_uses_max_gap(self):
+        """Test der erzwungenen Frames in statischen Passagen."""
+        frames, _ = generate_scene_frames([(250, "static")])
+
+        selected = _run(SceneChangeSampler(max_gap_seconds=2.0), frames)
+
+        assert selected == [0, 50, 100, 150, 200]
+
+    def test_min_gap_limits_fast_cuts(self):
+        """Test des Mindestabstands bei schnellen Schnitten."""
+        frames, cuts = generate_scene_frames([(60, "cuts")])
+
+        sampler = SceneChangeSampler(min_gap_seconds=0.2)
+        selected = _run(sampler, frames)
+
+        gaps = [b - a for a, b in zip(selected, selected[1:])]
+        assert min(gaps) >= 5
+        assert len(selected) >= 60 // 6
+
+    def test_frame_budget_is_enforced_and_spread(self):
+        """Test des Frame-Budgets pro Video."""
+        frames, _ = generate_scene_frames([(90, "cuts"), (210, "static")])
+
+        sampler = SceneChangeSampler(
+            min_gap_seconds=0.0, max_gap_seconds=2.0, frame_budget=10
+        )
+        selected = _run(sampler, frames)
+
+        assert len(selected) <= 10
+        assert selected[-1] >= 150
+        assert sampler.budget_skips > 0
+
+    def test_reduction_against_uniform_sampling(self):
+        """Test der Reduktion analysierter Frames gegenüber uniformem Sampling."""
+        frames, cuts = generate_scene_frames(
+            [(200, "static"), (30, "cuts"), (200, "static")]
+        )
+
+        uniform = _run(UniformSampler(interval=2), frames)
+        scene = SceneChangeSampler(max_gap_seconds=4.0)
+        selected = _run(scene, frames)
+
+        assert len(selected) < len(uniform) * 0.2
+        assert scene.get_statistics()["reduction"] > 0.9
+        # Jeder Szenenwechsel liegt höchstens min_gap vom nächsten Keyframe entfernt
+        for cut in cuts:
+            assert min(abs(cut - s) for s in selected) <= 5
+
+    def test_invalid_configuration(self):
+        """Test der Parameter-Validierung."""
+        with pytest.raises(ValueError):
+            SceneChangeSampler(method="unknown")
+        with pytest.raises(ValueError):
+            SceneChangeSampler(min_gap_seconds=5, max_gap_seconds=1)
+        with pytest.raises(ValueError):
+            create_frame_sampler("random")
+
+
+@pytest.mark.unit
+class TestSamplingIntegration:
+    """Test Suite für Sampler in Frame-Quelle und Konfiguration."""
+
+    async def test_frame_source_uses_sampler(self, synthetic_video):
+        """Test der Kandidaten-Auswahl durch den Sampler in VideoFrameSource."""
+        sampler = SceneChangeSampler(method="diff", max_gap_seconds=1.0)
+        source = VideoFrameSource(synthetic_video, frame_sampling_rate=2, sampler=sampler)
+
+        numbers = [sampled.frame_number async for sampled in source]
+
+        stats = source.get_statistics()["sampling"]
+        assert numbers[0] == 0
+        assert all(n % 2 == 0 for n in numbers)
+        assert stats["candidates"] == 30
+        assert stats["selected"] == len(numbers) < 30
+
+    def test_options_from_env(self, monkeypatch):
+        """Test der Konfiguration über Umgebungsvariablen."""
+        monkeypatch.setenv("SCENE_CHANGE_METHOD", "diff")
+        monkeypatch.setenv("FRAME_BUDGET", "50")
+        monkeypatch.delenv("SCENE_CHANGE_THRESHOLD", raising=False)
+
+        options = sampling_options_from_env()
+        sampler = create_frame_sampler("scene_change", **options)
+
+        assert options == {"method": "diff", "frame_budget": 50}
+        assert sampler.threshold == SceneChangeSampler.DEFAULT_THRESHOLDS["diff"]
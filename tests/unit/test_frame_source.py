@@ -0,0 +1,59 @@
+"""
+Unit Tests für die streamende Frame-Quelle der Vision Pipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from services.vision_pipeline.frame_source import VideoFrameSource
+
+
+@pytest.mark.unit
+class TestVideoFrameSource:
+    """Test Suite für VideoFrameSource."""
+
+    async def test_yields_sampled_frames_in_order(self, synthetic_video):
+        """Test der Frame-Reihenfolge und des Samplings."""
+        source = VideoFrameSource(synthetic_video, frame_sampling_rate=3)
+
+        frames = [sampled async for sampled in source]
+
+        assert [f.frame_number for f in frames] == list(range(0, 60, 3))
+        assert frames[1].timestamp == pytest.approx(3 / 25.0)
+        assert source.get_statistics()["frames_yielded"] == 20
+
+    async def test_buffer_is_bounded_by_prefetch(self, synthetic_video):
+        """Test der Backpressure bei langsamem Konsumenten."""
+        source = VideoFrameSource(synthetic_video, prefetch=4)
+
+        async for _ in source:
+            await asyncio.sleep(0.002)
+
+        assert source.frames_yielded == 60
+        assert source.max_buffered <= 4
+
+    async def test_early_exit_stops_decoder(self, synthetic_video):
+        """Test des Abbruchs vor dem Video-Ende."""
+        source = VideoFrameSource(synthetic_video, prefetch=2)
+
+        async for sampled in source:
+            if sampled.frame_number == 5:
+                break
+        await source.close()
+
+        assert not source._thread.is_alive()
+        assert source.frames_decoded < 60
+
+    async def test_invalid_video_raises(self, test_files_dir):
+        """Test mit nicht lesbarer Video-Datei."""
+        source = VideoFrameSource(f"{test_files_dir}/missing.avi")
+
+        with pytest.raises(ValueError, match="Konnte Video nicht öffnen"):
+            async for _ in source:
+                pass
+
+    def test_invalid_sampling_rate(self):
+        """Test der Parameter-Validierung."""
+        with pytest.raises(ValueError):
+            VideoFrameSource("video.mp4", frame_sampling_rate=0)
@@ -0,0 +1,131 @@
+"""
+Unit Tests für die Stage-Verarbeitung gestreamter Frames der Vision Pipeline.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from services.vision_pipeline.frame_source import SampledFrame  # noqa: E402
+from services.vision_pipeline.main import VisionPipeline  # noqa: E402
+
+
+class NullRedis:
+    """Redis-Ersatz ohne Treffer."""
+
+    def get(self, key):
+        return None
+
+    def setex(self, key, ttl, value):
+        pass
+
+
+class StubFrameSource:
+    """Frame-Quelle aus vorgegebenen Frames, die ihr Schließen protokolliert."""
+
+    video_path = "video.mp4"
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.closed = False
+
+    async def __aiter__(self):
+        for number, frame in enumerate(self.frames):
+            yield SampledFrame(frame, number, number / 25.0)
+
+    async def close(self):
+        self.closed = True
+
+    def get_statistics(self):
+        return {}
+
+
+class ListWriter:
+    """Ergebnis-Writer, der optional beim n-ten Frame fehlschlägt."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.frames = []
+
+    def write(self, frame_number, timestamp, result):
+        if frame_number == self.fail_at:
+            raise OSError("Datenträger voll")
+        self.frames.append((frame_number, result))
+
+
+@pytest.fixture
+async def pipeline(tmp_path):
+    pipeline = VisionPipeline(
+        output_dir=str(tmp_path),
+        checkpoint_interval=0,
+        inference_workers=4,
+        stage_queue_size=2,
+    )
+    pipeline.redis_client = NullRedis()
+    pipeline.service_calls = 0
+    pipeline.service_delay = 0.02
+
+    async def analyze(session, envelope):
+        pipeline.service_calls += 1
+        await asyncio.sleep(pipeline.service_delay)
+        return {"ok": True}
+
+    pipeline._analyze_pose = analyze
+    pipeline._analyze_ocr = analyze
+    pipeline._analyze_nsfw = analyze
+    yield pipeline
+    await pipeline.close()
+
+
+def _static_frames(count):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    return [frame.copy() for _ in range(count)]
+
+
+@pytest.mark.unit
+class TestFrameStream:
+    """Test Suite für VisionPipeline._process_frame_stream."""
+
+    async def test_in_flight_near_duplicates_share_one_analysis(self, pipeline):
+        """Test, dass gleichzeitig analysierte Near-Duplicates geteilt werden."""
+        source = StubFrameSource(_static_frames(12))
+        writer = ListWriter()
+
+        processed = await pipeline._process_frame_stream(source, writer, "job")
+
+        assert processed == 12
+        assert [number for number, _ in writer.frames] == list(range(12))
+        assert all(result["pose"] == {"ok": True} for _, result in writer.frames)
+        # Ein Frame analysiert, drei Service-Aufrufe
+        assert pipeline.service_calls == 3
+        assert pipeline.perceptual_cache.get_statistics()["hits"] == 11
+
+    async def test_consumer_error_closes_source(self, pipeline):
+        """Test, dass ein Fehler beim Schreiben die Frame-Quelle schließt."""
+        source = StubFrameSource(_static_frames(50))
+
+        with pytest.raises(OSError, match="Datenträger voll"):
+            await pipeline._process_frame_stream(source, ListWriter(fail_at=3), "job")
+
+        assert source.closed
+
+    async def test_cancel_closes_source(self, pipeline):
+        """Test, dass ein Abbruch nicht hängen bleibt und die Quelle schließt."""
+        rng = np.random.default_rng(1)
+        frames = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(50)]
+        source = StubFrameSource(frames)
+        pipeline.service_delay = 10
+
+        task = asyncio.ensure_future(
+            pipeline._process_frame_stream(source, ListWriter(), "job")
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=5)
+        assert source.closed
@@ -0,0 +1,129 @@
+"""
+Unit Tests für den gepoolten HTTP-Client der Vision Pipeline.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.http_pool import ServiceClientPool
+
+
+@pytest.fixture
+async def stub_server():
+    """Lokaler Stub-Service mit /analyze-Endpunkt."""
+
+    async def analyze(request):
+        await asyncio.sleep(0.01)
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_post("/analyze", analyze)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}"
+    await runner.cleanup()
+
+
+@pytest.mark.unit
+class TestServiceClientPool:
+    """Test Suite für ServiceClientPool."""
+
+    async def test_session_is_reused(self):
+        """Test der Wiederverwendung der Session im selben Event-Loop."""
+        pool = ServiceClientPool()
+
+        first = await pool.get_session()
+        second = await pool.get_session()
+
+        assert first is second
+        assert pool.get_statistics()["sessions_created"] == 1
+        await pool.close()
+
+    async def test_connections_are_kept_alive(self, stub_server):
+        """Test der Keep-Alive-Wiederverwendung von Verbindungen."""
+        pool = ServiceClientPool(limit_per_host=2)
+        session = await pool.get_session()
+
+        for _ in range(5):
+            async with session.post(f"{stub_server}/analyze", json={}) as response:
+                assert response.status == 200
+
+        stats = pool.get_statistics()
+        assert stats["requests"] == 5
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 4
+        assert stats["idle"] == 1
+        await pool.close()
+
+    async def test_per_host_limit_queues_requests(self, stub_server):
+        """Test des Verbindungslimits pro Host."""
+        pool = ServiceClientPool(limit_per_host=2)
+        session = await pool.get_session()
+
+        async def call():
+            async with session.post(f"{stub_server}/analyze", json={}) as response:
+                return response.status
+
+        statuses = await asyncio.gather(*[call() for _ in range(6)])
+
+        stats = pool.get_statistics()
+        assert statuses == [200] * 6
+        assert stats["connections_created"] == 2
+        assert stats["waited_total"] >= 4
+        assert stats["waiting"] == 0
+        await pool.close()
+
+    def test_new_session_after_loop_change(self):
+        """Test der Neuerstellung bei wechselndem Event-Loop (asyncio.run pro Job)."""
+        pool = ServiceClientPool()
+
+        first = asyncio.run(pool.get_session())
+        second = asyncio.run(pool.get_session())
+
+        assert pool.get_statistics()["sessions_created"] == 2
+        # Beim Ende von asyncio.run wird die Session des Jobs geschlossen
+        assert first.closed and second.closed
+
+    def test_session_of_running_loop_is_closed_on_switch(self):
+        """Test, dass die Session eines weiterlaufenden Loops geschlossen wird."""
+        pool = ServiceClientPool()
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            first = asyncio.run_coroutine_threadsafe(pool.get_session(), loop).result()
+            asyncio.run(pool.get_session())
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.01), loop).result()
+
+            assert first.closed
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def test_statistics_without_session(self):
+        """Test der Statistiken vor der ersten Anfrage."""
+        stats = ServiceClientPool(limit=10).get_statistics()
+
+        assert stats["open"] == 0
+        assert stats["limit"] == 10
+
+    async def test_reset_after_fork_drops_inherited_session(self):
+        """Test, dass nach einem Fork eine eigene Session aufgebaut wird."""
+        pool = ServiceClientPool()
+        inherited = await pool.get_session()
+
+        pool.reset_after_fork()
+        session = await pool.get_session()
+
+        assert session is not inherited
+        assert not inherited.closed
+        assert pool.get_statistics()["sessions_created"] == 2
+        await inherited.close()
+        await pool.close()
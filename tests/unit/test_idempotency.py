@@ -0,0 +1,166 @@
+"""
+Unit Tests für Job-IDs und Idempotency-Keys der Vision-Pipeline-API.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.vision_pipeline.idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    UlidGenerator,
+    new_job_id,
+    request_fingerprint,
+)
+
+
+class FakeQueue:
+    """Zählt eingereihte Jobs (wie ``queue.enqueue`` in der API)."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.jobs = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_type: str) -> str:
+        job_id = new_job_id(job_type)
+        time.sleep(self.delay)
+        with self._lock:
+            self.jobs.append(job_id)
+        return job_id
+
+
+@pytest.mark.unit
+class TestJobIds:
+    """Test Suite für ULID-basierte Job-IDs."""
+
+    def test_ids_are_unique_and_monotonic_across_threads(self):
+        """Test auf Kollisionen und Sortierung bei parallelem Erzeugen."""
+        generator = UlidGenerator()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            batches = list(
+                executor.map(lambda _: [generator.new() for _ in range(2000)], range(8))
+            )
+
+        ids = [ulid for batch in batches for ulid in batch]
+        assert len(set(ids)) == len(ids)
+        for batch in batches:
+            assert batch == sorted(batch)
+        assert all(len(ulid) == 26 for ulid in ids)
+
+    def test_same_millisecond_and_clock_skew(self):
+        """Test der Monotonie bei stehender oder zurückspringender Uhr."""
+        times = iter([1.0, 1.0, 1.0, 0.5, 2.0])
+        generator = UlidGenerator(clock=lambda: next(times))
+
+        ids = [generator.new() for _ in range(5)]
+
+        assert ids == sorted(ids)
+        assert len(set(ids)) == 5
+        assert ids[0][:10] == ids[3][:10]
+
+    def test_job_id_prefix(self):
+        """Test des Typ-Präfixes der Job-ID."""
+        job_id = new_job_id("video")
+
+        assert job_id.startswith("video_")
+        assert len(job_id) == len("video_") + 26
+
+
+@pytest.mark.unit
+class TestIdempotencyStore:
+    """Test Suite für IdempotencyStore."""
+
+    def test_retry_returns_original_job(self):
+        """Test, dass ein Retry keinen neuen Job einreiht."""
+        store = IdempotencyStore()
+        queue = FakeQueue()
+        fingerprint = request_fingerprint("video", ["/a.mp4"], 1)
+
+        first, created = store.get_or_create(
+            "key", fingerprint, lambda: queue.enqueue("video")
+        )
+        second, replayed = store.get_or_create(
+            "key", fingerprint, lambda: queue.enqueue("video")
+        )
+
+        assert created and not replayed
+        assert first == second
+        assert queue.jobs == [first]
+
+    def test_key_reuse_with_other_request_is_rejected(self):
+        """Test, dass ein Key nicht für andere Parameter gilt."""
+        store = IdempotencyStore()
+        store.get_or_create("key", request_fingerprint("video", ["/a.mp4"]), lambda: 1)
+
+        with pytest.raises(IdempotencyConflict):
+            store.get_or_create(
+                "key", request_fingerprint("video", ["/b.mp4"]), lambda: 2
+            )
+        assert store.get_statistics()["conflicts"] == 1
+
+    def test_keys_expire_after_ttl(self):
+        """Test der TTL."""
+        now = [0.0]
+        store = IdempotencyStore(ttl=60, clock=lambda: now[0])
+        store.get_or_create("key", "fp", lambda: "job_1")
+
+        now[0] = 61.0
+        job, created = store.get_or_create("key", "fp", lambda: "job_2")
+
+        assert created
+        assert job == "job_2"
+
+    def test_failed_creation_can_be_retried(self):
+        """Test, dass ein fehlgeschlagenes Einreihen nicht gespeichert wird."""
+        store = IdempotencyStore()
+
+        def failing():
+            raise ConnectionError("Redis nicht erreichbar")
+
+        with pytest.raises(ConnectionError):
+            store.get_or_create("key", "fp", failing)
+        job, created = store.get_or_create("key", "fp", lambda: "job_1")
+
+        assert created
+        assert job == "job_1"
+
+    def test_max_entries(self):
+        """Test der Obergrenze gespeicherter Keys."""
+        store = IdempotencyStore(max_entries=3)
+        for i in range(5):
+            store.get_or_create(f"key_{i}", "fp", lambda: i)
+
+        assert store.get_statistics()["keys"] == 3
+
+    def test_parallel_retries_create_no_duplicates(self):
+        """Test: viele gleichzeitige Retries je Key ergeben genau einen Job."""
+        store = IdempotencyStore()
+        queue = FakeQueue(delay=0.01)
+        keys = [f"client-{i}" for i in range(20)]
+        start = threading.Barrier(len(keys) * 8)
+
+        def submit(key):
+            start.wait()
+            job, _ = store.get_or_create(
+                key, request_fingerprint("image", [key]), lambda: queue.enqueue("image")
+            )
+            return key, job
+
+        with ThreadPoolExecutor(max_workers=len(keys) * 8) as executor:
+            results = list(executor.map(submit, keys * 8))
+
+        jobs_by_key = {}
+        for key, job in results:
+            jobs_by_key.setdefault(key, set()).add(job)
+
+        assert len(queue.jobs) == len(keys)
+        assert len(set(queue.jobs)) == len(keys)
+        assert all(len(jobs) == 1 for jobs in jobs_by_key.values())
+        stats = store.get_statistics()
+        assert stats["created"] == len(keys)
+        assert stats["replayed"] == len(keys) * 7
@@ -0,0 +1,89 @@
+"""
+Unit Tests für den Indikator-Automaten des Restraint Detection Services.
+"""
+
+import random
+
+import pytest
+
+from services.restraint_detection.indicators import (
+    CATEGORIES,
+    INDICATOR_GROUPS,
+    SAFETY_RULES,
+    IndicatorMatcher,
+    risk_levels,
+)
+
+
+def _brute_force(groups, text):
+    return {
+        name
+        for name, patterns in groups.items()
+        if any(pattern in text for pattern in patterns)
+    }
+
+
+@pytest.mark.unit
+class TestIndicatorMatcher:
+    """Test Suite für IndicatorMatcher."""
+
+    def test_groups_match_substring_checks_for_all_categories(self):
+        """Test gegen die Teilzeichenketten-Prüfung für alle Kategorien."""
+        matcher = IndicatorMatcher(INDICATOR_GROUPS, vocabulary=CATEGORIES)
+        unprimed = IndicatorMatcher(INDICATOR_GROUPS)
+
+        for category in CATEGORIES:
+            expected = _brute_force(INDICATOR_GROUPS, category)
+            assert matcher.groups(category) == expected
+            assert unprimed.groups(category) == expected
+
+    def test_overlapping_patterns(self):
+        """Test, dass überlappende und verschachtelte Muster alle gefunden werden."""
+        matcher = IndicatorMatcher(INDICATOR_GROUPS)
+
+        found = matcher.find("non-consensual, no supervision")
+
+        assert found == [
+            ("non_consent", "non-consensual"),
+            ("consent", "consensual"),
+            ("abandonment", "no supervision"),
+            ("supervision", "supervision"),
+        ]
+        assert matcher.find("rope") == []
+        assert matcher.groups("") == frozenset()
+
+    def test_random_texts(self):
+        """Test mit zufälligen Texten und Mustern mit gemeinsamen Präfixen."""
+        groups = {"a": ["ab", "abc", "bca"], "b": ["c", "cab"], "c": ["aaa"]}
+        matcher = IndicatorMatcher(groups)
+        rng = random.Random(0)
+
+        for _ in range(500):
+            text = "".join(rng.choice("abc ") for _ in range(rng.randint(0, 12)))
+            assert matcher.groups(text) == _brute_force(groups, text)
+            expected = sorted(
+                (name, pattern)
+                for name, patterns in groups.items()
+                for pattern in patterns
+                for start in range(len(text))
+                if text.startswith(pattern, start)
+            )
+            assert sorted(matcher.find(text)) == expected
+
+    def test_risk_levels_prefer_highest(self):
+        """Test der Risikostufen mit Vorrang der höchsten Stufe."""
+        levels = risk_levels(
+            {
+                "high_risk_factors": ["threat", "panic"],
+                "medium_risk_factors": ["panic", "anxiety"],
+                "low_risk_factors": ["anxiety", "trust present"],
+            }
+        )
+
+        assert levels == {
+            "threat": "high",
+            "panic": "high",
+            "anxiety": "medium",
+            "trust present": "low",
+        }
+        assert risk_levels(SAFETY_RULES)["no supervision"] == "high"
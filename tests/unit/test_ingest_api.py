@@ -0,0 +1,162 @@
+"""
+Unit Tests für die Endpunkte der binären Frame-Annahme.
+"""
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.restraint_detection.frame_ingest import (
+    CONTAINER_CONTENT_TYPE,
+    MAX_BATCH_FRAMES,
+    encode_frames,
+)
+
+pytest.importorskip("multipart")
+
+from services.restraint_detection.ingest_api import (  # noqa: E402
+    FrameIngest,
+    create_ingest_router,
+)
+
+
+def _png(value, size=16):
+    image = np.full((size, size, 3), value, dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class StubDetector:
+    """Detector-Ersatz, der die empfangenen Frames zurückmeldet."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def analyze_frame(self, frame):
+        if self.fail:
+            raise RuntimeError("Modell nicht verfügbar")
+        return {"shape": list(frame.shape), "value": int(frame[0, 0, 0])}
+
+    async def process_batch(self, frames):
+        return [await self.analyze_frame(frame) for frame in frames]
+
+
+def _client(detector):
+    ingest = FrameIngest()
+    app = FastAPI()
+    app.include_router(
+        create_ingest_router(detector.analyze_frame, detector.process_batch, ingest)
+    )
+    return TestClient(app), ingest
+
+
+@pytest.mark.unit
+class TestIngestAPI:
+    """Test Suite für die binären Analyse-Endpunkte."""
+
+    def test_raw_frame(self):
+        """Test der Analyse eines Frames aus dem rohen Body."""
+        client, ingest = _client(StubDetector())
+
+        response = client.post(
+            "/analyze/frame/raw",
+            content=_png(42),
+            headers={"Content-Type": "image/png"},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["shape"] == [16, 16, 3] and body["value"] == 42
+        assert body["ingest"]["transport"] == "raw"
+        assert body["ingest"]["bytes"] == len(_png(42))
+        assert response.headers["Server-Timing"].startswith("parse;dur=")
+        assert ingest.stats.get_statistics()["raw"]["requests"] == 1
+
+    def test_multipart_frame(self):
+        """Test der Analyse eines per Multipart hochgeladenen Frames."""
+        client, _ = _client(StubDetector())
+
+        response = client.post(
+            "/analyze/frame/multipart",
+            files={"file": ("frame.png", _png(7), "image/png")},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["value"] == 7
+        assert response.json()["ingest"]["transport"] == "multipart"
+
+    def test_multipart_batch(self):
+        """Test der Batch-Analyse mehrerer hochgeladener Frames."""
+        client, _ = _client(StubDetector())
+
+        response = client.post(
+            "/analyze/batch/multipart",
+            files=[
+                ("files", (f"{value}.png", _png(value), "image/png"))
+                for value in (1, 2, 3)
+            ],
+        )
+
+        assert response.status_code == 200
+        assert [item["value"] for item in response.json()] == [1, 2, 3]
+
+    def test_container_batch(self):
+        """Test der Batch-Analyse aus einem Frame-Container."""
+        client, ingest = _client(StubDetector())
+
+        response = client.post(
+            "/analyze/batch/container",
+            content=encode_frames([_png(10), _png(20)]),
+            headers={"Content-Type": CONTAINER_CONTENT_TYPE},
+        )
+
+        assert response.status_code == 200
+        assert [item["value"] for item in response.json()] == [10, 20]
+        assert ingest.stats.get_statistics()["container"]["frames"] == 2
+
+    @pytest.mark.parametrize(
+        "path, content, detail",
+        [
+            ("/analyze/frame/raw", b"kein bild", "Frame 0"),
+            ("/analyze/batch/container", b"IMB", "zu kurz"),
+            (
+                "/analyze/batch/container",
+                encode_frames([_png(0), b"kaputt"]),
+                "Frame 1",
+            ),
+            (
+                "/analyze/batch/container",
+                encode_frames([b""] * (MAX_BATCH_FRAMES + 1)),
+                "Zu viele Frames",
+            ),
+        ],
+        ids=["raw-image", "container-header", "container-frame", "container-limit"],
+    )
+    def test_invalid_payloads_return_400(self, path, content, detail):
+        """Test, dass ungültige Bilder und Container 400 liefern."""
+        client, _ = _client(StubDetector())
+
+        response = client.post(path, content=content)
+
+        assert response.status_code == 400
+        assert detail in response.json()["detail"]
+
+    def test_multipart_batch_limit(self):
+        """Test, dass zu große Multipart-Batches 400 liefern."""
+        client, _ = _client(StubDetector())
+        files = [("files", ("frame.png", b"", "image/png"))] * (MAX_BATCH_FRAMES + 1)
+
+        response = client.post("/analyze/batch/multipart", files=files)
+
+        assert response.status_code == 400
+        assert "Zu viele Frames" in response.json()["detail"]
+
+    def test_analysis_errors_return_500(self):
+        """Test, dass Fehler der Analyse 500 liefern."""
+        client, _ = _client(StubDetector(fail=True))
+
+        response = client.post("/analyze/frame/raw", content=_png(0))
+
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Modell nicht verfügbar"
@@ -0,0 +1,257 @@
+"""
+Unit Tests für die kaskadierte NSFW-Vorprüfung.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.nsfw import NSFWDetector
+from services.vision_pipeline.nsfw_cascade import (
+    CascadeThresholds,
+    NSFWCascade,
+    calibrate,
+    cascade_from_env,
+    evaluate,
+    load_sample,
+    main,
+    skin_score,
+)
+
+SKIN = (120, 160, 220)
+SKY = (230, 150, 60)
+
+
+def _frame(color, size=(240, 320)):
+    frame = np.zeros(size + (3,), dtype=np.uint8)
+    frame[:] = color
+    return frame
+
+
+def _gray(value=128):
+    return np.full((240, 320, 3), value, dtype=np.uint8)
+
+
+class NSFWServiceStub:
+    """Stub des CLIP NSFW Services mit Batch-Endpunkt."""
+
+    def __init__(self, drop=0):
+        self.received = 0
+        # Anzahl der am Ende jeder Antwort weggelassenen Ergebnisse
+        self.drop = drop
+
+    async def batch_analyze(self, request):
+        reader = await request.multipart()
+        results = []
+        async for part in reader:
+            assert part.name == "files"
+            data = await part.read()
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            # Mittlerer Rotkanal identifiziert das Frame in der Antwort
+            results.append(
+                {
+                    "is_nsfw": True,
+                    "confidence": 0.9,
+                    "categories": {},
+                    "red": float(image[:, :, 2].mean()),
+                }
+            )
+        self.received += len(results)
+        return web.json_response(results[: len(results) - self.drop])
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/batch_analyze", self.batch_analyze)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@pytest.mark.unit
+class TestSkinScore:
+    """Test Suite für die Hautton-Heuristik."""
+
+    def test_skin_and_background(self):
+        """Test, dass Hauttöne erkannt und Himmel ignoriert werden."""
+        mixed = _frame(SKY)
+        mixed[:, :160] = SKIN
+
+        assert skin_score(_frame(SKIN)) == pytest.approx(1.0)
+        assert skin_score(_frame(SKY)) == 0.0
+        assert skin_score(mixed) == pytest.approx(0.5, abs=0.02)
+
+    def test_colorless_frames_are_undecided(self):
+        """Test, dass Graustufen-Frames keinen Score erhalten."""
+        assert skin_score(_gray()) is None
+        assert skin_score(_gray(10)) is None
+
+
+@pytest.mark.unit
+class TestThresholds:
+    """Test Suite für Schwellwerte und Kalibrierung."""
+
+    def test_decide(self):
+        """Test der Entscheidung für sichere, unsichere und NSFW-Scores."""
+        thresholds = CascadeThresholds(safe_below=0.1, nsfw_above=0.8)
+
+        assert thresholds.decide(0.05) is False
+        assert thresholds.decide(0.5) is None
+        assert thresholds.decide(0.9) is True
+        assert thresholds.decide(None) is None
+        assert CascadeThresholds(safe_below=0.1).decide(1.0) is None
+
+    def test_save_and_load(self, tmp_path, monkeypatch):
+        """Test der JSON-Persistenz und der Konfiguration per Umgebung."""
+        path = tmp_path / "thresholds.json"
+        CascadeThresholds(safe_below=0.07, nsfw_above=0.6).save(str(path))
+
+        monkeypatch.setenv("NSFW_CASCADE_THRESHOLDS", str(path))
+        cascade = cascade_from_env()
+
+        assert cascade.thresholds == CascadeThresholds(0.07, 0.6)
+        monkeypatch.delenv("NSFW_CASCADE_THRESHOLDS")
+        assert cascade_from_env() is None
+        monkeypatch.setenv("NSFW_CASCADE", "1")
+        assert cascade_from_env().thresholds == CascadeThresholds()
+
+    def test_calibrate_respects_missed_rate(self):
+        """Test, dass höchstens der erlaubte Anteil NSFW-Frames durchrutscht."""
+        rng = np.random.default_rng(0)
+        nsfw = rng.uniform(0.05, 0.9, 200).tolist()
+        safe = rng.uniform(0.0, 0.3, 300).tolist()
+        scores = nsfw + safe + [None]
+        labels = [True] * 200 + [False] * 300 + [True]
+
+        for rate in (0.0, 0.01, 0.05):
+            thresholds = calibrate(scores, labels, max_missed_rate=rate)
+            missed = sum(score < thresholds.safe_below for score in nsfw)
+            assert missed <= rate * len(nsfw)
+            assert thresholds.nsfw_above is None
+
+        thresholds = calibrate(scores, labels, 0.01, max_false_alarm_rate=0.0)
+        assert thresholds.nsfw_above == pytest.approx(max(safe))
+
+    def test_evaluate(self):
+        """Test der Kennzahlen gegenüber CLIP allein."""
+        scores = [0.0, 0.01, 0.5, None, 0.9, 0.01]
+        labels = [False, False, True, True, True, True]
+        clip = [False, True, True, True, True, True]
+
+        report = evaluate(scores, labels, CascadeThresholds(0.02, 0.8), clip)
+
+        assert report["escalated"] == 2
+        assert report["escalation_rate"] == pytest.approx(2 / 6)
+        assert report["missed_nsfw"] == 1
+        assert report["false_alarms"] == 0
+        # Kaskade: letztes Frame übersehen, Frame 1 korrekt statt CLIP-Fehler
+        assert report["accuracy"] == pytest.approx(5 / 6)
+        assert report["reference_accuracy"] == pytest.approx(5 / 6)
+        assert report["accuracy_loss"] == pytest.approx(0.0)
+
+    def test_cli(self, tmp_path, capsys):
+        """Test des Offline-Werkzeugs auf einer kleinen Stichprobe."""
+        for label, color in (("safe", SKY), ("nsfw", SKIN)):
+            (tmp_path / label).mkdir()
+            for i in range(3):
+                cv2.imwrite(str(tmp_path / label / f"{i}.png"), _frame(color))
+        output = tmp_path / "thresholds.json"
+
+        assert len(load_sample(str(tmp_path))) == 6
+        assert main([str(tmp_path), "--output", str(output)]) == 0
+
+        thresholds = CascadeThresholds.load(str(output))
+        assert thresholds.decide(0.0) is False
+        assert thresholds.decide(1.0) is None
+        assert '"escalation_rate": 0.5' in capsys.readouterr().out
+
+
+@pytest.mark.unit
+class TestNSFWCascade:
+    """Test Suite für die Vorprüfung im NSFW-Detektor."""
+
+    def test_screen_statistics(self):
+        """Test der Zähler und des Ergebnisformats."""
+        cascade = NSFWCascade(CascadeThresholds(safe_below=0.02, nsfw_above=0.95))
+
+        safe = cascade.screen(_frame(SKY))
+        nsfw = cascade.screen(_frame(SKIN))
+        undecided = cascade.screen(_gray())
+        stats = cascade.get_statistics()
+
+        assert safe["is_nsfw"] is False and safe["stage"] == "screen"
+        assert nsfw["is_nsfw"] is True
+        assert undecided is None
+        assert stats["screened"] == 3
+        assert stats["decided_safe"] == 1 and stats["decided_nsfw"] == 1
+        assert stats["escalated"] == 1
+        assert stats["escalation_rate"] == pytest.approx(1 / 3)
+
+    async def test_only_uncertain_frames_reach_clip(self):
+        """Test, dass nur unsichere Frames an CLIP gehen, in Frame-Reihenfolge."""
+        stub = NSFWServiceStub()
+        url = await stub.start()
+        try:
+            detector = NSFWDetector(url, batch_size=2, cascade=NSFWCascade())
+            reds = [200, 210, 220, 230]
+            frames = [
+                _frame((120, 160, reds[0])),
+                _frame(SKY),
+                _frame((120, 160, reds[1])),
+                _frame(SKY),
+                _frame(SKY),
+                _frame((120, 160, reds[2])),
+                _frame((120, 160, reds[3])),
+            ]
+
+            results = await detector.process_video_sequence(
+                frames, list(range(10, 17))
+            )
+        finally:
+            await stub.stop()
+
+        assert stub.received == 4
+        assert [r["frame_number"] for r in results] == list(range(10, 17))
+        assert [r["nsfw_data"].get("stage") for r in results] == [
+            None, "screen", None, "screen", "screen", None, None,
+        ]
+        escalated = [r["nsfw_data"]["red"] for r in results if "red" in r["nsfw_data"]]
+        assert escalated == pytest.approx(reds, abs=2)
+        assert detector.cascade.get_statistics()["escalated"] == 4
+
+    async def test_short_clip_response_is_padded(self):
+        """Test, dass fehlende CLIP-Ergebnisse die Zusammenführung nicht abbrechen."""
+        stub = NSFWServiceStub(drop=1)
+        url = await stub.start()
+        try:
+            detector = NSFWDetector(url, batch_size=2, cascade=NSFWCascade())
+            frames = [_frame((120, 160, 200)), _frame(SKY), _frame((120, 160, 220))]
+
+            results = await detector.process_video_sequence(frames, [0, 1, 2])
+        finally:
+            await stub.stop()
+
+        assert len(results) == 3
+        assert "red" in results[0]["nsfw_data"]
+        assert results[1]["nsfw_data"]["stage"] == "screen"
+        assert results[2] == {"error": "Kein Ergebnis vom NSFW-Service"}
+
+    def test_screen_counts_are_thread_safe(self):
+        """Test der Zähler bei gleichzeitigem Aufruf aus dem Thread-Pool."""
+        cascade = NSFWCascade()
+        frames = [_frame(SKY), _gray()] * 200
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(cascade.screen, frames))
+
+        stats = cascade.get_statistics()
+        assert stats["screened"] == 400
+        assert stats["decided_safe"] == 200 and stats["escalated"] == 200
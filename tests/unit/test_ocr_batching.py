@@ -0,0 +1,99 @@
+"""
+Unit Tests für die Batch-Hilfsfunktionen des OCR Detection Services.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from services.ocr_detection.batching import (
+    batch_plan,
+    decode_container,
+    decode_image,
+    downscale,
+    encode_container,
+    format_results,
+)
+
+
+def _jpeg(width, height):
+    image = np.full((height, width, 3), 128, dtype=np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+@pytest.mark.unit
+class TestImageContainer:
+    """Test Suite für den Binärcontainer."""
+
+    def test_round_trip(self):
+        """Test, dass Bilder unverändert aus dem Container kommen."""
+        images = [_jpeg(64, 32), b"", _jpeg(16, 16)]
+
+        assert decode_container(encode_container(images)) == images
+        assert decode_container(encode_container([])) == []
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b"IMB",
+            b"XXXX" + encode_container([b"abc"])[4:],
+            encode_container([b"abc"])[:-1],
+            encode_container([b"abc"]) + b"x",
+            encode_container([b"abc", b"def"])[:15],
+        ],
+    )
+    def test_malformed_container_is_rejected(self, body):
+        """Test der Validierung abgeschnittener oder fremder Daten."""
+        with pytest.raises(ValueError):
+            decode_container(body)
+
+    def test_image_limit(self):
+        """Test der maximalen Anzahl Bilder."""
+        with pytest.raises(ValueError):
+            decode_container(encode_container([b"a"] * 3), max_images=2)
+
+
+@pytest.mark.unit
+class TestBatchPreparation:
+    """Test Suite für Verkleinerung, Gruppierung und Ergebnisformat."""
+
+    def test_downscale_policy(self):
+        """Test, dass nur zu große Bilder seitenverhältnistreu verkleinert werden."""
+        large = decode_image(_jpeg(3200, 1800))
+        small = decode_image(_jpeg(640, 360))
+
+        resized, scale = downscale(large, 1600)
+        unchanged, unchanged_scale = downscale(small, 1600)
+        disabled, disabled_scale = downscale(large, 0)
+
+        assert resized.shape[:2] == (900, 1600)
+        assert scale == pytest.approx(0.5)
+        assert unchanged is small and unchanged_scale == 1.0
+        assert disabled is large and disabled_scale == 1.0
+
+    def test_bboxes_refer_to_original_image(self):
+        """Test der Rückrechnung der Bounding Boxes."""
+        raw = [([[10, 20], [110, 20], [110, 40], [10, 40]], "Titel", np.float64(0.8))]
+
+        result = format_results(raw, scale=0.5)[0]
+
+        assert result["bbox"][0] == [20.0, 40.0]
+        assert result["bbox"][2] == [220.0, 80.0]
+        assert result["confidence"] == pytest.approx(0.8)
+        assert result["language"] == "de"
+        assert format_results([([[0, 0]] * 4, "2024", 0.9)])[0]["language"] == "unknown"
+
+    def test_batch_plan_groups_equal_sizes(self):
+        """Test der Aufteilung in Aufrufe gleich großer Bilder."""
+        a = np.zeros((360, 640, 3), dtype=np.uint8)
+        b = np.zeros((720, 1280, 3), dtype=np.uint8)
+        images = [a, a, b, None, a, a, a, b]
+
+        plan = batch_plan(images, batch_size=3)
+
+        assert plan == [[0, 1, 4], [5, 6], [2, 7]]
+
+    def test_invalid_image(self):
+        """Test ungültiger Bilddaten."""
+        with pytest.raises(ValueError):
+            decode_image(b"kein Bild")
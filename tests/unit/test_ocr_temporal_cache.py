@@ -0,0 +1,198 @@
+"""
+Unit Tests für die temporale Wiederverwendung von OCR-Ergebnissen.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from services.vision_pipeline.frame_source import SampledFrame
+from services.vision_pipeline.ocr import OCRDetector, TemporalOCRCache
+
+WIDTH, HEIGHT = 640, 360
+CAPTION = (120, 300, 520, 340)
+WATERMARK = (540, 10, 630, 40)
+
+
+class FakeOCR:
+    """Liest gefüllte Rechtecke; der Grauwert dient als erkannter Text."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, image):
+        self.calls.append(image.shape[:2])
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        count, labels, boxes, _ = cv2.connectedComponentsWithStats(
+            (gray > 0).astype(np.uint8)
+        )
+        results = []
+        for label in range(1, count):
+            x, y, w, h, _ = boxes[label]
+            value = int(np.median(gray[labels == label]))
+            results.append(
+                {
+                    "text": f"text_{value}",
+                    "confidence": 0.9,
+                    "bbox": [[x, y], [x + w, y], [x + w, y + h], [x, y + h]],
+                    "language": "de",
+                }
+            )
+        return {"results": results}
+
+
+def _frame(texts):
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for (x0, y0, x1, y1), value in texts:
+        frame[y0:y1, x0:x1] = value
+    return frame
+
+
+def _texts(result):
+    return sorted(r["text"] for r in result["results"])
+
+
+@pytest.mark.unit
+class TestTemporalOCRCache:
+    """Test Suite für TemporalOCRCache."""
+
+    def test_static_text_is_carried_forward(self):
+        """Test, dass unveränderter Text nur einmal gelesen wird."""
+        ocr = FakeOCR()
+        cache = TemporalOCRCache(ocr)
+        frame = _frame([(CAPTION, 200), (WATERMARK, 150)])
+
+        results = [cache.process(frame.copy(), i * 0.5) for i in range(20)]
+
+        assert len(ocr.calls) == 1
+        assert all(r["reused"] for r in results[1:])
+        assert _texts(results[-1]) == ["text_150", "text_200"]
+        assert all(r["first_seen"] == 0.0 for r in results[-1]["results"])
+        assert all(r["last_seen"] == 9.5 for r in results[-1]["results"])
+        assert results[3]["results"][0]["last_seen"] == 1.5
+        stats = cache.get_statistics()
+        assert stats["calls_avoided"] == 19
+        assert stats["frames_reused"] == 19
+
+    def test_only_changed_region_is_reread(self):
+        """Test, dass bei Untertitelwechsel nur dieser Bereich analysiert wird."""
+        ocr = FakeOCR()
+        cache = TemporalOCRCache(ocr)
+        cache.process(_frame([(CAPTION, 200), (WATERMARK, 150)]), 0.0)
+
+        result = cache.process(_frame([(CAPTION, 100), (WATERMARK, 150)]), 1.0)
+
+        assert _texts(result) == ["text_100", "text_150"]
+        assert result["ocr_calls"] == 1
+        height, width = ocr.calls[-1]
+        assert height * width < 0.2 * WIDTH * HEIGHT
+        by_text = {r["text"]: r for r in result["results"]}
+        assert by_text["text_100"]["first_seen"] == 1.0
+        assert by_text["text_150"]["first_seen"] == 0.0
+        assert by_text["text_100"]["bbox"][0] == [CAPTION[0], CAPTION[1]]
+
+    def test_region_calls_do_not_offset_avoided_calls(self):
+        """Test, dass Bereichs-Aufrufe getrennt von vermiedenen Aufrufen zählen."""
+        cache = TemporalOCRCache(FakeOCR())
+        cache.process(_frame([(CAPTION, 200), (WATERMARK, 150)]), 0.0)
+        for i in range(3):
+            cache.process(_frame([(CAPTION, 200), (WATERMARK, 150)]), 1.0 + i)
+        result = cache.process(_frame([(CAPTION, 100), (WATERMARK, 90)]), 5.0)
+
+        stats = cache.get_statistics()
+        assert result["ocr_calls"] == 2
+        assert stats["region_calls"] == 2
+        assert stats["full_frame_calls"] == 1
+        assert stats["calls_avoided"] == 3
+
+    def test_new_and_removed_text_is_detected(self):
+        """Test neu erscheinender und verschwindender Texte."""
+        cache = TemporalOCRCache(FakeOCR())
+        cache.process(_frame([(WATERMARK, 150)]), 0.0)
+
+        appeared = cache.process(_frame([(WATERMARK, 150), (CAPTION, 200)]), 1.0)
+        removed = cache.process(_frame([(CAPTION, 200)]), 2.0)
+
+        assert _texts(appeared) == ["text_150", "text_200"]
+        assert _texts(removed) == ["text_200"]
+
+    def test_scene_cut_triggers_full_refresh(self):
+        """Test, dass großflächige Änderungen das ganze Frame neu lesen."""
+        cache = TemporalOCRCache(FakeOCR())
+        cache.process(_frame([(CAPTION, 200)]), 0.0)
+
+        cut = _frame([(CAPTION, 90)])
+        cut[:250] = 60
+        cache.process(cut, 1.0)
+
+        assert cache.get_statistics()["full_frame_calls"] == 2
+
+    def test_matches_full_ocr_on_every_frame(self):
+        """Test, dass der Cache dieselben Texte liefert wie OCR pro Frame."""
+        ocr = FakeOCR()
+        cache = TemporalOCRCache(ocr)
+        sequence = []
+        for i in range(60):
+            texts = [(WATERMARK, 150), (CAPTION, 100 + 20 * (i // 15))]
+            if 20 <= i < 40:
+                texts.append(((40, 60, 200, 90), 230))
+            sequence.append(_frame(texts))
+
+        for i, frame in enumerate(sequence):
+            assert _texts(cache.process(frame, i / 25.0)) == _texts(FakeOCR()(frame))
+
+        stats = cache.get_statistics()
+        assert stats["ocr_calls"] < 10
+        assert stats["calls_avoided"] > 50
+        assert stats["ocr_area_ratio"] < 0.1
+
+    def test_failed_ocr_is_retried(self):
+        """Test, dass ein OCR-Fehler gemeldet und beim nächsten Frame wiederholt wird."""
+        ocr = FakeOCR()
+        responses = [{"error": "Service nicht erreichbar"}]
+
+        def flaky(image):
+            return responses.pop() if responses else ocr(image)
+
+        cache = TemporalOCRCache(flaky)
+        frame = _frame([(CAPTION, 200)])
+
+        failed = cache.process(frame, 0.0)
+        recovered = cache.process(frame, 1.0)
+
+        assert "error" in failed
+        assert _texts(recovered) == ["text_200"]
+
+
+@pytest.mark.unit
+class TestOCRDetectorSequence:
+    """Test Suite für OCRDetector.get_ocr_sequence."""
+
+    def test_sequence_reports_avoided_calls_and_timestamps(self, monkeypatch):
+        """Test der Zeitstempel und der Statistik pro Video."""
+        detector = OCRDetector("http://127.0.0.1:1")
+        ocr = FakeOCR()
+        monkeypatch.setattr(detector, "analyze_frame", ocr)
+        frame = _frame([(CAPTION, 200)])
+        frames = [SampledFrame(frame, i * 6, i * 6 / 24.0) for i in range(8)]
+
+        results = detector.get_ocr_sequence(frames)
+
+        assert [r["frame_number"] for r in results] == [i * 6 for i in range(8)]
+        assert results[1]["timestamp"] == pytest.approx(0.25)
+        assert [r["ocr_calls"] for r in results] == [1] + [0] * 7
+        assert detector.last_sequence_statistics["calls_avoided"] == 7
+        assert len(ocr.calls) == 1
+
+    def test_cache_can_be_disabled(self, monkeypatch):
+        """Test der Verarbeitung ohne Cache."""
+        detector = OCRDetector("http://127.0.0.1:1")
+        ocr = FakeOCR()
+        monkeypatch.setattr(detector, "analyze_frame", ocr)
+        frames = [_frame([(CAPTION, 200)])] * 4
+
+        results = detector.get_ocr_sequence(frames, fps=25.0, temporal_cache=False)
+
+        assert len(ocr.calls) == 4
+        assert results[2]["timestamp"] == pytest.approx(0.08)
+        assert detector.last_sequence_statistics["calls_avoided"] == 0
@@ -0,0 +1,155 @@
+"""
+Unit Tests für den Perceptual-Hash Near-Duplicate-Cache.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from services.vision_pipeline.perceptual_cache import (
+    PerceptualFrameCache,
+    dhash,
+    hamming_distance,
+    phash,
+)
+from tests.conftest import generate_scene_frames
+
+
+@pytest.fixture
+def textured_frame():
+    """Frame mit Struktur (Gradienten und Rechtecke) statt reinem Rauschen."""
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+    frame[:] = np.linspace(0, 255, 320, dtype=np.uint8)[None, :, None]
+    cv2.rectangle(frame, (40, 30), (140, 150), (20, 200, 90), -1)
+    cv2.circle(frame, (240, 90), 50, (250, 30, 30), -1)
+    return frame
+
+
+def _jpeg_roundtrip(frame, quality=60):
+    _, buffer = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+@pytest.mark.unit
+class TestPerceptualHashes:
+    """Test Suite für dHash und pHash."""
+
+    @pytest.mark.parametrize("hash_fn", [dhash, phash])
+    def test_robust_to_compression_and_shift(self, textured_frame, hash_fn):
+        """Test der Robustheit gegen Kompressionsrauschen und 1-Pixel-Versatz."""
+        reference = hash_fn(textured_frame)
+        compressed = hash_fn(_jpeg_roundtrip(textured_frame))
+        shifted = hash_fn(np.roll(textured_frame, 1, axis=1))
+
+        assert hamming_distance(reference, compressed) <= 5
+        assert hamming_distance(reference, shifted) <= 5
+
+    @pytest.mark.parametrize("hash_fn", [dhash, phash])
+    def test_different_scenes_are_far_apart(self, hash_fn):
+        """Test der Unterscheidung verschiedener Szenen."""
+        frames, _ = generate_scene_frames([(1, "static"), (1, "static")])
+
+        assert hamming_distance(hash_fn(frames[0]), hash_fn(frames[1])) > 10
+
+
+@pytest.mark.unit
+class TestPerceptualFrameCache:
+    """Test Suite für PerceptualFrameCache."""
+
+    def test_near_duplicate_hit(self, textured_frame):
+        """Test der Wiederverwendung bei ähnlichem Frame."""
+        cache = PerceptualFrameCache(max_distance=5)
+        cache.add("video.mp4", cache.compute_hash(textured_frame), {"nsfw": 0.1})
+
+        noisy = _jpeg_roundtrip(textured_frame)
+        result = cache.lookup("video.mp4", cache.compute_hash(noisy))
+
+        assert result == {"nsfw": 0.1}
+        assert cache.get_statistics()["hit_rate"] == 1.0
+
+    def test_returned_result_is_a_copy(self, textured_frame):
+        """Test, dass Treffer den Index nicht verändern."""
+        cache = PerceptualFrameCache()
+        frame_hash = cache.compute_hash(textured_frame)
+        cache.add("video.mp4", frame_hash, {"ocr": None})
+
+        cache.lookup("video.mp4", frame_hash)["ocr"] = "mutated"
+
+        assert cache.lookup("video.mp4", frame_hash) == {"ocr": None}
+
+    def test_threshold_controls_tolerance(self):
+        """Test der konfigurierbaren Ähnlichkeitstoleranz."""
+        strict = PerceptualFrameCache(max_distance=0)
+        tolerant = PerceptualFrameCache(max_distance=3)
+        for cache in (strict, tolerant):
+            cache.add("v", 0b1111, {"id": 1})
+
+        assert strict.lookup("v", 0b0111) is None
+        assert tolerant.lookup("v", 0b0111) == {"id": 1}
+
+    def test_index_is_per_video_and_bounded(self):
+        """Test der Trennung pro Video und der Index-Größe."""
+        cache = PerceptualFrameCache(max_distance=0, max_entries_per_video=2)
+        cache.add("a", 1, {"id": 1})
+        cache.add("a", 2, {"id": 2})
+        cache.add("a", 3, {"id": 3})
+
+        assert cache.lookup("b", 3) is None
+        assert cache.lookup("a", 1) is None
+        assert cache.lookup("a", 3) == {"id": 3}
+
+        cache.drop_video("a")
+        assert cache.lookup("a", 3) is None
+
+    def test_hit_rate_on_static_sequence(self, textured_frame):
+        """Test der Trefferquote auf einer statischen Sequenz mit Schnitt."""
+        second_scene = cv2.flip(textured_frame, 1)
+        frames = [
+            _jpeg_roundtrip(scene, quality=50 + i)
+            for scene in (textured_frame, second_scene)
+            for i in range(30)
+        ]
+        cache = PerceptualFrameCache()
+
+        for frame in frames:
+            frame_hash = cache.compute_hash(frame)
+            if cache.lookup("video.mp4", frame_hash) is None:
+                cache.add("video.mp4", frame_hash, {})
+
+        stats = cache.get_statistics()
+        assert stats["misses"] == 2
+        assert stats["hit_rate"] == pytest.approx(58 / 60)
+
+    def test_acquire_reserves_and_shares_in_flight_frames(self):
+        """Test der Reservierung: Ähnliche Frames warten auf das erste Ergebnis."""
+        cache = PerceptualFrameCache(max_distance=1)
+
+        assert cache.acquire("v", 0b1111) == (None, None)
+        result, pending = cache.acquire("v", 0b0111)
+        assert result is None and not pending.done()
+
+        cache.add("v", 0b1111, {"id": 1})
+
+        assert pending.result() == {"id": 1}
+        assert cache.acquire("v", 0b0111) == ({"id": 1}, None)
+        assert cache.get_statistics()["hits"] == 2
+
+    def test_discard_passes_error_to_waiting_frames(self):
+        """Test, dass ein Fehler der Analyse an wartende Frames geht."""
+        cache = PerceptualFrameCache(max_distance=0)
+        cache.acquire("v", 7)
+        _, pending = cache.acquire("v", 7)
+
+        cache.discard("v", 7, RuntimeError("Service nicht erreichbar"))
+
+        with pytest.raises(RuntimeError, match="nicht erreichbar"):
+            pending.result()
+        # Reservierung aufgehoben: das nächste Frame wird neu analysiert
+        assert cache.acquire("v", 7) == (None, None)
+
+    def test_invalid_configuration(self):
+        """Test der Parameter-Validierung."""
+        with pytest.raises(ValueError):
+            PerceptualFrameCache(hash_method="ahash")
+        with pytest.raises(ValueError):
+            PerceptualFrameCache(max_distance=65)
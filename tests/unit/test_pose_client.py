@@ -0,0 +1,233 @@
+"""
+Unit Tests für den asynchronen Batch-Client des Pose Estimation Services.
+"""
+
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.frame_source import SampledFrame
+from services.vision_pipeline.pose import AsyncPoseClient, PoseEstimator
+
+
+class PoseServiceStub:
+    """Stub mit Batch-Vertrag des Pose-Services (Upload + Status-Abfrage)."""
+
+    def __init__(self, batch_endpoint=True, latency=0.02, failing=()):
+        self.batch_endpoint = batch_endpoint
+        self.latency = latency
+        self.failing = set(failing)
+        self.batch_sizes = []
+        self.single_requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.batches = {}
+
+    def _pose(self, filename):
+        if filename in self.failing:
+            return {"error": "Fehler beim Dekodieren"}
+        return {"keypoints": [], "scores": [], "num_people": 0, "source": filename}
+
+    async def analyze_batch(self, request):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            reader = await request.multipart()
+            names = []
+            async for part in reader:
+                assert part.name == "files"
+                await part.read()
+                names.append(part.filename)
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        self.batch_sizes.append(len(names))
+        batch_id = uuid.uuid4().hex
+        self.batches[batch_id] = {name: self._pose(name) for name in names}
+        return web.json_response({"batch_id": batch_id})
+
+    async def batch_status(self, request):
+        results = self.batches[request.match_info["batch_id"]]
+        return web.json_response({"status": "completed", "results": results})
+
+    async def analyze(self, request):
+        self.single_requests += 1
+        reader = await request.multipart()
+        part = await reader.next()
+        await part.read()
+        await asyncio.sleep(self.latency)
+        pose = self._pose(part.filename)
+        if "error" in pose:
+            return web.Response(status=500, text=pose["error"])
+        return web.json_response(pose)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/analyze", self.analyze)
+        if self.batch_endpoint:
+            app.router.add_post("/analyze/batch", self.analyze_batch)
+            app.router.add_get(
+                "/analyze/batch/{batch_id}/status", self.batch_status
+            )
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+
+def _frames(count, fps=24.0, step=1):
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    return [
+        SampledFrame(image, number * step, number * step / fps)
+        for number in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestAsyncPoseClient:
+    """Test Suite für AsyncPoseClient."""
+
+    async def test_frames_are_sent_in_batches(self):
+        """Test der Bündelung von 50 Frames in Batches zu 16."""
+        stub = PoseServiceStub()
+        url = await stub.start()
+        client = AsyncPoseClient(url, batch_size=16, poll_interval=0.01)
+
+        results = await client.analyze_frames(_frames(50))
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert sorted(stub.batch_sizes) == [2, 16, 16, 16]
+        assert stub.single_requests == 0
+        assert len(results) == 50
+        stats = client.get_statistics()
+        assert stats["batches"] == 4
+        assert stats["frames_per_request"] > 1
+
+    async def test_results_keep_order_and_decoder_timestamps(self):
+        """Test, dass Reihenfolge und echte Zeitstempel erhalten bleiben."""
+        stub = PoseServiceStub()
+        url = await stub.start()
+        client = AsyncPoseClient(url, batch_size=4, poll_interval=0.01)
+        frames = _frames(10, fps=24.0, step=3)
+
+        results = await client.analyze_frames(frames)
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert [r["frame_number"] for r in results] == [f.frame_number for f in frames]
+        assert [r["timestamp"] for r in results] == [f.timestamp for f in frames]
+        assert results[1]["timestamp"] == pytest.approx(3 / 24.0)
+        for result, frame in zip(results, frames):
+            assert result["pose_data"]["source"].startswith(
+                f"frame_{frame.frame_number:08d}_"
+            )
+
+    async def test_concurrent_batches_are_bounded(self):
+        """Test der Obergrenze gleichzeitig laufender Batches."""
+        stub = PoseServiceStub(latency=0.05)
+        url = await stub.start()
+        client = AsyncPoseClient(
+            url, batch_size=2, max_concurrent_batches=3, poll_interval=0.01
+        )
+
+        await client.analyze_frames(_frames(20))
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert len(stub.batch_sizes) == 10
+        assert 1 < stub.max_active <= 3
+
+    async def test_stream_yields_in_order(self):
+        """Test der Stream-Verarbeitung aus einer Frame-Quelle."""
+        stub = PoseServiceStub()
+        url = await stub.start()
+        client = AsyncPoseClient(url, batch_size=4, poll_interval=0.01)
+
+        async def source():
+            for frame in _frames(11):
+                yield frame
+
+        results = [result async for result in client.analyze_stream(source())]
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert [r["frame_number"] for r in results] == list(range(11))
+        assert sorted(stub.batch_sizes) == [3, 4, 4]
+
+    async def test_fallback_without_batch_endpoint(self):
+        """Test des Rückfalls auf Einzel-Requests ohne Batch-Endpunkt."""
+        stub = PoseServiceStub(batch_endpoint=False)
+        url = await stub.start()
+        client = AsyncPoseClient(url, batch_size=4, poll_interval=0.01)
+
+        results = await client.analyze_frames(_frames(9))
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert client.batch_supported is False
+        assert stub.single_requests == 9
+        assert all("error" not in r["pose_data"] for r in results)
+
+    async def test_failed_frames_are_reported_per_frame(self):
+        """Test, dass Fehler einzelner Frames die übrigen nicht betreffen."""
+        stub = PoseServiceStub(failing={"frame_00000002_2.jpg"})
+        url = await stub.start()
+        client = AsyncPoseClient(url, batch_size=8, poll_interval=0.01)
+
+        results = await client.analyze_frames(_frames(5))
+        await client.close()
+        await stub.runner.cleanup()
+
+        assert "error" in results[2]["pose_data"]
+        assert sum("error" in r["pose_data"] for r in results) == 1
+        assert client.get_statistics()["failed_frames"] == 1
+
+    async def test_unreachable_service_marks_frames_failed(self):
+        """Test eines nicht erreichbaren Services."""
+        client = AsyncPoseClient("http://127.0.0.1:1", batch_size=4)
+
+        results = await client.analyze_frames(_frames(6))
+        await client.close()
+
+        assert len(results) == 6
+        assert all("error" in r["pose_data"] for r in results)
+
+
+@pytest.mark.unit
+class TestPoseEstimatorTimestamps:
+    """Test Suite für die Zeitstempel des synchronen PoseEstimator."""
+
+    def _estimator(self, monkeypatch):
+        estimator = PoseEstimator("http://127.0.0.1:1")
+        monkeypatch.setattr(estimator, "analyze_frame", lambda frame: {})
+        return estimator
+
+    def test_sampled_frame_timestamps_are_used(self, monkeypatch):
+        """Test, dass Decoder-Zeitstempel statt 30 FPS verwendet werden."""
+        estimator = self._estimator(monkeypatch)
+
+        results = estimator.get_pose_sequence(_frames(3, fps=25.0, step=5))
+
+        assert [r["frame_number"] for r in results] == [0, 5, 10]
+        assert [r["timestamp"] for r in results] == [0.0, 0.2, 0.4]
+
+    def test_fps_and_explicit_timestamps(self, monkeypatch):
+        """Test expliziter Zeitstempel und der fps-Angabe."""
+        estimator = self._estimator(monkeypatch)
+        images = [np.zeros((8, 8, 3), dtype=np.uint8)] * 3
+
+        by_fps = estimator.get_pose_sequence(images, fps=24.0)
+        explicit = estimator.get_pose_sequence(images, timestamps=[0.0, 0.5, 1.5])
+        unknown = estimator.get_pose_sequence(images)
+
+        assert by_fps[1]["timestamp"] == pytest.approx(1 / 24.0)
+        assert [r["timestamp"] for r in explicit] == [0.0, 0.5, 1.5]
+        assert all(r["timestamp"] is None for r in unknown)
+        with pytest.raises(ValueError):
+            estimator.get_pose_sequence(images, timestamps=[0.0])
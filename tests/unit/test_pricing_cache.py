@@ -0,0 +1,140 @@
+"""
+Unit Tests für den Preis-Cache des Restraint Detection Services.
+"""
+
+import asyncio
+
+import pytest
+
+from services.restraint_detection.pricing_cache import FakePriceProvider, PricingCache
+
+
+def _prices(price):
+    return {
+        "vast_ai": {
+            "RTX 4090": {
+                "on_demand": {"global": price},
+                "spot": {},
+                "specs": {"models": ["clip"], "gpu_memory": 24},
+            }
+        }
+    }
+
+
+class FakeClock:
+    """Manuell fortgeschaltete Zeitquelle."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestPricingCache:
+    """Test Suite für PricingCache."""
+
+    async def test_refresh_replaces_snapshot(self):
+        """Test, dass ein erfolgreicher Abruf den Snapshot ersetzt."""
+        provider = FakePriceProvider(_prices(0.5))
+        cache = PricingCache(provider.fetch_prices)
+
+        assert cache.prices == {} and cache.age() is None and cache.is_stale()
+        assert await cache.refresh() is True
+
+        assert cache.prices == _prices(0.5)
+        assert cache.version == 1
+        assert not cache.is_stale()
+        assert provider.calls == 1
+
+    async def test_failures_keep_last_known_good(self):
+        """Test, dass Fehler und leere Antworten den Snapshot nicht ersetzen."""
+        provider = FakePriceProvider(_prices(0.5))
+        cache = PricingCache(provider.fetch_prices)
+        await cache.refresh()
+
+        provider.fail = True
+        assert await cache.refresh() is False
+        provider.fail, provider.prices = False, {}
+        assert await cache.refresh() is False
+
+        stats = cache.get_statistics()
+        assert cache.prices == _prices(0.5)
+        assert stats["failed_refreshes"] == 2
+        assert stats["last_error"] == "Keine Preise erhalten"
+        assert stats["version"] == 1
+
+    async def test_staleness(self):
+        """Test des Snapshot-Alters und der Veraltungsgrenze."""
+        clock = FakeClock()
+        cache = PricingCache(
+            FakePriceProvider(_prices(0.5)).fetch_prices,
+            max_staleness=60.0,
+            clock=clock,
+        )
+        await cache.refresh()
+
+        clock.now += 30.0
+        assert cache.age() == 30.0 and not cache.is_stale()
+        clock.now += 31.0
+        stats = cache.get_statistics()
+
+        assert cache.is_stale()
+        assert stats["age_seconds"] == 61.0 and stats["stale"] is True
+        # Veraltete Preise werden weiter ausgeliefert
+        assert cache.prices == _prices(0.5)
+
+    async def test_memoize_until_next_refresh(self):
+        """Test, dass abgeleitete Werte pro Snapshot einmal berechnet werden."""
+        provider = FakePriceProvider(_prices(0.5))
+        cache = PricingCache(provider.fetch_prices)
+        await cache.refresh()
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return cache.prices["vast_ai"]["RTX 4090"]["on_demand"]["global"]
+
+        assert cache.memoize("cost", compute) == 0.5
+        assert cache.memoize("cost", compute) == 0.5
+        provider.prices = _prices(0.7)
+        await cache.refresh()
+
+        assert cache.memoize("cost", compute) == 0.7
+        assert len(computed) == 2
+
+    async def test_background_refresh(self):
+        """Test der periodischen Aktualisierung und des Wiederholungsintervalls."""
+        provider = FakePriceProvider(_prices(0.5), fail=True)
+        cache = PricingCache(
+            provider.fetch_prices, refresh_interval=0.05, retry_interval=0.01
+        )
+
+        cache.start()
+        assert cache.start() is cache.start()
+        await asyncio.sleep(0.05)
+        failed_calls = provider.calls
+        provider.fail = False
+        await asyncio.sleep(0.12)
+        assert cache.get_statistics()["running"] is True
+        await cache.stop()
+
+        assert failed_calls >= 2
+        assert cache.get_statistics()["refreshes"] >= 2
+        assert cache.get_statistics()["running"] is False
+        assert cache.prices == _prices(0.5)
+
+    async def test_reads_do_not_wait_for_slow_provider(self):
+        """Test, dass Lesezugriffe während eines langsamen Abrufs sofort antworten."""
+        provider = FakePriceProvider(_prices(0.5))
+        cache = PricingCache(provider.fetch_prices)
+        await cache.refresh()
+
+        provider.prices, provider.latency = _prices(0.9), 0.5
+        cache.start()
+        await asyncio.sleep(0.01)
+
+        assert cache.prices == _prices(0.5)
+        await cache.stop()
+        assert cache.prices == _prices(0.5)
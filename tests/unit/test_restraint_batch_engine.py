@@ -0,0 +1,178 @@
+"""
+Unit Tests für die Batch-Engine des Restraint Detection Services.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from services.restraint_detection.batch_engine import BatchedScoringEngine
+
+WEIGHTS = np.random.default_rng(0).normal(size=(3, 5))
+
+
+def _preprocess(frame):
+    return frame.reshape(-1, 3).mean(axis=0)
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class Scorer:
+    """Zeichnet die Batchgrößen der Forward-Passes auf."""
+
+    def __init__(self, fail=False):
+        self.batch_sizes = []
+        self.fail = fail
+
+    def __call__(self, inputs):
+        self.batch_sizes.append(len(inputs))
+        if self.fail:
+            raise RuntimeError("CUDA out of memory")
+        return _softmax(np.stack(inputs) @ WEIGHTS)
+
+
+def _frames(count):
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 255, (8, 8, 3)).astype(np.float32) for _ in range(count)]
+
+
+def _expected(frame):
+    return _softmax(_preprocess(frame)[None] @ WEIGHTS)[0]
+
+
+@pytest.mark.unit
+class TestBatchedScoringEngine:
+    """Test Suite für BatchedScoringEngine."""
+
+    async def test_score_many_matches_single_frames(self):
+        """Test, dass gestapelte Ergebnisse den Einzelergebnissen entsprechen."""
+        scorer = Scorer()
+        engine = BatchedScoringEngine(scorer, _preprocess, max_batch_size=4)
+        frames = _frames(10)
+
+        rows = await engine.score_many(frames)
+
+        assert scorer.batch_sizes == [4, 4, 2]
+        for frame, row in zip(frames, rows):
+            np.testing.assert_allclose(row, _expected(frame))
+        stats = engine.get_statistics()
+        assert stats["frames"] == 10 and stats["batches"] == 3
+        assert stats["max_batch_size_seen"] == 4
+        engine.close()
+
+    async def test_concurrent_requests_share_a_batch(self):
+        """Test, dass gleichzeitige Anfragen im Zeitfenster gebündelt werden."""
+        scorer = Scorer()
+        engine = BatchedScoringEngine(
+            scorer, _preprocess, max_batch_size=16, batch_window=0.05
+        )
+        frames = _frames(6)
+
+        rows = await asyncio.gather(*(engine.score(frame) for frame in frames))
+
+        assert scorer.batch_sizes == [6]
+        for frame, row in zip(frames, rows):
+            np.testing.assert_allclose(row, _expected(frame))
+        engine.close()
+
+    async def test_full_batch_starts_without_waiting(self):
+        """Test, dass ein voller Batch nicht auf das Zeitfenster wartet."""
+        scorer = Scorer()
+        engine = BatchedScoringEngine(scorer, max_batch_size=2, batch_window=10.0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(engine.score(np.ones(3)) for _ in range(2)))
+
+        assert time.perf_counter() - start < 1.0
+        assert scorer.batch_sizes == [2]
+        engine.close()
+
+    async def test_score_many_takes_waiting_frames(self):
+        """Test, dass eine Batch-Anfrage wartende Einzelframes mitnimmt."""
+        scorer = Scorer()
+        engine = BatchedScoringEngine(
+            scorer, _preprocess, max_batch_size=16, batch_window=10.0
+        )
+        frames = _frames(5)
+
+        single = asyncio.ensure_future(engine.score(frames[0]))
+        await asyncio.sleep(0)
+        rows = await engine.score_many(frames[1:])
+
+        assert scorer.batch_sizes == [5]
+        np.testing.assert_allclose(await single, _expected(frames[0]))
+        assert len(rows) == 4
+        engine.close()
+
+    async def test_errors_reach_all_frames_of_the_batch(self):
+        """Test, dass ein fehlgeschlagener Forward-Pass alle Frames betrifft."""
+        engine = BatchedScoringEngine(Scorer(fail=True), max_batch_size=8)
+
+        with pytest.raises(RuntimeError, match="out of memory"):
+            await engine.score_many([np.ones(3)] * 3)
+        assert engine.get_statistics()["batches"] == 0
+        engine.close()
+
+    async def test_invalid_frame_fails_only_its_own_request(self):
+        """Test, dass ein nicht vorbereitbares Frame den Batch nicht abbricht."""
+        scorer = Scorer()
+        engine = BatchedScoringEngine(
+            scorer, _preprocess, max_batch_size=8, batch_window=0.05
+        )
+        frames = _frames(3)
+
+        results = await asyncio.gather(
+            engine.score(frames[0]),
+            engine.score(np.ones(4)),
+            engine.score(frames[2]),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[1], ValueError)
+        np.testing.assert_allclose(results[0], _expected(frames[0]))
+        np.testing.assert_allclose(results[2], _expected(frames[2]))
+        assert scorer.batch_sizes == [2]
+        engine.close()
+
+    async def test_missing_rows_fail_the_remaining_frames(self):
+        """Test, dass fehlende Zeilen von score_batch nicht hängen bleiben."""
+        engine = BatchedScoringEngine(
+            lambda inputs: np.ones((len(inputs) - 1, 2)), max_batch_size=8
+        )
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *(engine.score(np.ones(3)) for _ in range(3)), return_exceptions=True
+            ),
+            timeout=5,
+        )
+
+        assert [isinstance(r, RuntimeError) for r in results] == [False, False, True]
+        assert "2 Zeilen für 3 Frames" in str(results[2])
+        engine.close()
+
+    async def test_preprocessing_runs_in_parallel(self):
+        """Test, dass die Vorbereitung der Frames parallel läuft."""
+
+        def slow_preprocess(frame):
+            time.sleep(0.05)
+            return _preprocess(frame)
+
+        engine = BatchedScoringEngine(
+            Scorer(),
+            slow_preprocess,
+            max_batch_size=8,
+            preprocess_executor=ThreadPoolExecutor(max_workers=8),
+        )
+
+        start = time.perf_counter()
+        await engine.score_many(_frames(8))
+
+        assert time.perf_counter() - start < 0.3
+        engine.close()
@@ -0,0 +1,147 @@
+"""
+Unit Tests für den Streaming-Ergebnisspeicher der Vision Pipeline.
+"""
+
+import json
+import os
+
+import pytest
+
+from services.vision_pipeline.result_store import (
+    FrameResultReader,
+    FrameResultWriter,
+    index_path_for,
+)
+
+
+def _write_frames(path, count=100, fps=10.0, summary=True, **kwargs):
+    writer = FrameResultWriter(path, metadata={"video_path": "video.mp4"}, **kwargs)
+    for i in range(count):
+        writer.write(i, i / fps, {"nsfw": {"score": i / count}})
+    writer.close(summary={"status": "completed"} if summary else None)
+    return writer
+
+
+@pytest.mark.unit
+class TestFrameResultStore:
+    """Test Suite für FrameResultWriter und FrameResultReader."""
+
+    def test_writes_one_compact_line_per_frame(self, tmp_path):
+        """Test des Dateiformats: Header, Frames, Footer."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=5)
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        assert len(lines) == 7
+        assert json.loads(lines[0])["type"] == "header"
+        assert json.loads(lines[0])["video_path"] == "video.mp4"
+        assert all(json.loads(line)["type"] == "frame" for line in lines[1:-1])
+        assert json.loads(lines[-1])["type"] == "footer"
+        assert ": " not in lines[1]
+
+    def test_roundtrip(self, tmp_path):
+        """Test des verlustfreien Lesens aller Frames."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=20)
+
+        with FrameResultReader(path) as reader:
+            entries = list(reader)
+            assert reader.complete
+            assert reader.footer["frames"] == 20
+            assert reader.footer["status"] == "completed"
+
+        assert [e["frame_number"] for e in entries] == list(range(20))
+        assert entries[7]["result"] == {"nsfw": {"score": 7 / 20}}
+
+    def test_index_is_sparse(self, tmp_path):
+        """Test, dass der Index nur einen Eintrag pro Intervall enthält."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=100, fps=10.0, index_interval=2.0)
+
+        with open(index_path_for(path)) as f:
+            index = json.load(f)
+
+        assert len(index["entries"]) == 5
+        assert [entry[0] for entry in index["entries"]] == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+    @pytest.mark.parametrize("summary", [True, False])
+    def test_read_range(self, tmp_path, summary):
+        """Test des Zeitbereichs mit und ohne Index-Datei."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=100, fps=10.0, summary=summary)
+
+        with FrameResultReader(path) as reader:
+            entries = list(reader.read_range(3.05, 4.0))
+            tail = list(reader.read_range(9.5))
+            assert reader.complete is summary
+
+        assert [e["frame_number"] for e in entries] == list(range(31, 41))
+        assert [e["frame_number"] for e in tail] == list(range(95, 100))
+
+    @pytest.mark.parametrize("summary", [True, False])
+    def test_read_range_includes_all_frames_at_start(self, tmp_path, summary):
+        """Test, dass Frames mit gleichem Zeitstempel am Bereichsanfang fehlen nicht."""
+        path = str(tmp_path / "result.jsonl")
+        writer = FrameResultWriter(path, index_interval=0.1)
+        for frame_number, timestamp in enumerate([0.0, 1.0, 1.0, 1.0, 2.0]):
+            writer.write(frame_number, timestamp, {})
+        writer.close(summary={"status": "completed"} if summary else None)
+
+        with FrameResultReader(path) as reader:
+            entries = list(reader.read_range(1.0, 1.0))
+
+        assert [e["frame_number"] for e in entries] == [1, 2, 3]
+
+    def test_read_range_parses_only_requested_lines(self, tmp_path, monkeypatch):
+        """Test, dass der Reader vor dem Zeitbereich nicht parst."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=1000, fps=10.0)
+
+        reader = FrameResultReader(path)
+        parsed = []
+        original_loads = json.loads
+
+        def counting_loads(data, *args, **kwargs):
+            parsed.append(data)
+            return original_loads(data, *args, **kwargs)
+
+        monkeypatch.setattr(
+            "services.vision_pipeline.result_store.json.loads", counting_loads
+        )
+        entries = list(reader.read_range(50.0, 50.5))
+        reader.close()
+
+        assert len(entries) == 6
+        # Ab Index-Eintrag 50.0 bis zum ersten Frame nach 50.5
+        assert len(parsed) == 7
+
+    def test_truncated_file_without_footer(self, tmp_path):
+        """Test einer abgebrochenen Datei mit halb geschriebener Zeile."""
+        path = str(tmp_path / "result.jsonl")
+        _write_frames(path, count=10, summary=False)
+        with open(path, "ab") as f:
+            f.write(b'{"type":"frame","frame_nu')
+
+        with FrameResultReader(path) as reader:
+            assert not reader.complete
+            assert len(list(reader)) == 10
+        assert not os.path.exists(index_path_for(path))
+
+    def test_rejects_out_of_order_frames(self, tmp_path):
+        """Test der Validierung der Zeitreihenfolge."""
+        writer = FrameResultWriter(str(tmp_path / "result.jsonl"))
+        writer.write(10, 1.0, {})
+
+        with pytest.raises(ValueError):
+            writer.write(5, 0.5, {})
+        writer.close()
+
+    def test_rejects_foreign_files(self, tmp_path):
+        """Test mit einer Datei ohne Header."""
+        path = tmp_path / "other.jsonl"
+        path.write_text('{"foo": 1}\n')
+
+        with pytest.raises(ValueError):
+            FrameResultReader(str(path))
@@ -0,0 +1,256 @@
+"""
+Unit Tests für den Multi-Media-Scheduler der Vision Pipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from services.vision_pipeline.scheduler import (
+    FairFrameBudget,
+    MediaJob,
+    MediaScheduler,
+    batch_summary,
+    estimate_frames,
+    media_kind,
+)
+from tests.conftest import SimulatedMediaPipeline
+
+
+def _jobs(spec):
+    return [
+        MediaJob(
+            path=path,
+            kind=kind,
+            job_id=f"job_{index}",
+            priority=priority,
+            estimated_frames=frames,
+        )
+        for index, (path, kind, frames, priority) in enumerate(spec)
+    ]
+
+
+@pytest.mark.unit
+class TestFairFrameBudget:
+    """Test Suite für FairFrameBudget."""
+
+    async def test_grants_up_to_capacity(self):
+        """Test der globalen Obergrenze."""
+        budget = FairFrameBudget(2)
+        await budget.acquire("a")
+        await budget.acquire("a")
+
+        waiter = asyncio.ensure_future(budget.acquire("b"))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        budget.release("a")
+        await asyncio.wait_for(waiter, 1)
+        assert budget.in_flight == 2
+        assert budget.held("b") == 1
+
+    async def test_round_robin_between_jobs(self):
+        """Test, dass freie Plätze reihum statt FIFO vergeben werden."""
+        budget = FairFrameBudget(1)
+        await budget.acquire("big")
+        order = []
+
+        async def acquire(job_id):
+            await budget.acquire(job_id)
+            order.append(job_id)
+
+        waiters = [asyncio.ensure_future(acquire("big")) for _ in range(3)]
+        waiters.append(asyncio.ensure_future(acquire("small")))
+        await asyncio.sleep(0)
+
+        for _ in range(4):
+            budget.release(order[-1] if order else "big")
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*waiters)
+        assert order[:2] == ["big", "small"]
+
+    async def test_cancelled_waiter_does_not_leak(self):
+        """Test, dass abgebrochene Wartende keinen Platz belegen."""
+        budget = FairFrameBudget(1)
+        await budget.acquire("a")
+        waiter = asyncio.ensure_future(budget.acquire("b"))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        budget.release("a")
+
+        assert budget.in_flight == 0
+        assert budget.get_statistics()["waiting_jobs"] == 0
+
+    async def test_release_all(self):
+        """Test der Freigabe aller Plätze eines Jobs."""
+        budget = FairFrameBudget(4)
+        for _ in range(3):
+            await budget.acquire("a")
+
+        budget.release_all("a")
+        budget.release("a")
+
+        assert budget.in_flight == 0
+        assert budget.max_in_flight == 3
+
+
+@pytest.mark.unit
+class TestMediaScheduler:
+    """Test Suite für MediaScheduler."""
+
+    @pytest.mark.parametrize(
+        "policy,expected",
+        [
+            ("sjf", ["img.jpg", "short.mp4", "long.mp4"]),
+            ("priority", ["long.mp4", "img.jpg", "short.mp4"]),
+            ("fifo", ["long.mp4", "short.mp4", "img.jpg"]),
+        ],
+    )
+    async def test_start_order_follows_policy(self, policy, expected):
+        """Test der Startreihenfolge je Policy."""
+        pipeline = SimulatedMediaPipeline({}, frame_time=0)
+        scheduler = MediaScheduler(pipeline, max_concurrent_jobs=1, policy=policy)
+
+        await scheduler.run(
+            _jobs(
+                [
+                    ("long.mp4", "video", 500, 5),
+                    ("short.mp4", "video", 20, 0),
+                    ("img.jpg", "image", 1, 0),
+                ]
+            )
+        )
+
+        assert pipeline.started == expected
+
+    async def test_results_in_input_order_with_failures(self):
+        """Test der Ergebnisreihenfolge und Fehlerisolation."""
+        pipeline = SimulatedMediaPipeline(
+            {"a.mp4": 10, "c.mp4": 5}, failing_paths=("b.jpg",)
+        )
+        scheduler = MediaScheduler(pipeline)
+
+        results = await scheduler.run(
+            _jobs(
+                [
+                    ("a.mp4", "video", 10, 0),
+                    ("b.jpg", "image", 1, 0),
+                    ("c.mp4", "video", 5, 0),
+                ]
+            )
+        )
+
+        assert [r["path"] for r in results] == ["a.mp4", "b.jpg", "c.mp4"]
+        assert [r["status"] for r in results] == ["completed", "failed", "completed"]
+        assert "Konnte Datei nicht laden" in results[1]["error"]
+        stats = scheduler.get_statistics()
+        assert stats["completed"] == 2
+        assert stats["failed"] == 1
+        assert stats["frames_processed"] == 15
+
+    async def test_frame_budget_is_global(self):
+        """Test, dass das Budget über alle Jobs eingehalten wird."""
+        pipeline = SimulatedMediaPipeline(
+            {f"v{i}.mp4": 30 for i in range(4)}, per_job_parallelism=8
+        )
+        scheduler = MediaScheduler(pipeline, frame_budget=6, max_concurrent_jobs=4)
+
+        await scheduler.run(
+            _jobs([(f"v{i}.mp4", "video", 30, 0) for i in range(4)])
+        )
+
+        budget = scheduler.get_statistics()["frame_budget"]
+        assert budget["max_in_flight"] == 6
+        assert budget["in_flight"] == 0
+
+    async def test_small_jobs_are_not_starved(self):
+        """Test der Fairness: Bilder warten nicht auf ein großes Video."""
+        pipeline = SimulatedMediaPipeline(
+            {"big.mp4": 400}, frame_time=0.005, per_job_parallelism=8
+        )
+        scheduler = MediaScheduler(
+            pipeline, frame_budget=8, max_concurrent_jobs=4, policy="fifo"
+        )
+
+        results = await scheduler.run(
+            _jobs(
+                [("big.mp4", "video", 400, 0)]
+                + [(f"i{i}.jpg", "image", 1, 0) for i in range(3)]
+            )
+        )
+
+        # Bilder sind fertig, lange bevor das Video das Budget freigibt
+        big_end = results[0]["wait_time"] + results[0]["processing_time"]
+        assert all(
+            r["wait_time"] + r["processing_time"] < big_end / 2 for r in results[1:]
+        )
+
+    async def test_concurrency_override_and_progress_callback(self):
+        """Test der Parallelität pro Durchlauf und des Fortschritts-Callbacks."""
+        pipeline = SimulatedMediaPipeline({}, frame_time=0.01)
+        scheduler = MediaScheduler(pipeline, max_concurrent_jobs=8, policy="fifo")
+        running = []
+        peak = []
+        progress = []
+
+        original = pipeline.process_image
+
+        async def tracked(path, job_id, frame_budget=None):
+            running.append(1)
+            peak.append(len(running))
+            try:
+                return await original(path, job_id, frame_budget=frame_budget)
+            finally:
+                running.pop()
+
+        pipeline.process_image = tracked
+
+        results = await scheduler.run(
+            _jobs([(f"i{i}.jpg", "image", 1, 0) for i in range(6)]),
+            max_concurrent_jobs=2,
+            on_job_done=lambda result, done, total: progress.append((done, total)),
+        )
+
+        assert max(peak) == 2
+        assert progress == [(i, 6) for i in range(1, 7)]
+        assert [r["path"] for r in results] == [f"i{i}.jpg" for i in range(6)]
+
+    def test_batch_summary(self):
+        """Test der Zusammenfassung mit Latenz pro Datei und Parallelität."""
+        results = [
+            {
+                "path": "a.jpg",
+                "status": "completed",
+                "wait_time": 0.0,
+                "processing_time": 1.0,
+            },
+            {
+                "path": "b.jpg",
+                "status": "failed",
+                "wait_time": 0.5,
+                "processing_time": 1.0,
+            },
+        ]
+
+        summary = batch_summary(results, wall_time=1.5)
+
+        assert [f["latency"] for f in summary["files"]] == [1.0, 1.5]
+        assert summary["completed"] == 1
+        assert summary["failed"] == 1
+        assert summary["processing_time_total"] == 2.0
+        assert summary["concurrency"] == pytest.approx(2.0 / 1.5)
+
+    def test_invalid_policy(self):
+        """Test der Validierung der Policy."""
+        with pytest.raises(ValueError):
+            MediaScheduler(SimulatedMediaPipeline({}), policy="random")
+
+    def test_estimate_frames(self, synthetic_video):
+        """Test der Aufwandsschätzung per Frame-Anzahl."""
+        assert estimate_frames(synthetic_video, "video", frame_sampling_rate=3) == 20
+        assert estimate_frames("bild.jpg", "image") == 1
+        assert media_kind("bild.JPG") == "image"
+        assert media_kind("clip.mp4") == "video"
@@ -0,0 +1,150 @@
+"""
+Unit Tests für den räumlichen Index des Restraint Detection Services.
+"""
+
+import math
+import random
+
+import pytest
+
+from services.restraint_detection.spatial_index import SpatialIndex, find_neighbors
+
+
+def _proximity(bbox1, bbox2):
+    """Bisherige Distanzberechnung (RestraintDetector._calculate_proximity)."""
+    if len(bbox1) != 4 or len(bbox2) != 4:
+        return float("inf")
+    x1_center = bbox1[0] + bbox1[2] / 2
+    y1_center = bbox1[1] + bbox1[3] / 2
+    x2_center = bbox2[0] + bbox2[2] / 2
+    y2_center = bbox2[1] + bbox2[3] / 2
+    return math.sqrt((x1_center - x2_center) ** 2 + (y1_center - y2_center) ** 2)
+
+
+def _legacy_neighbors(target, all_detections):
+    """Bisheriger paarweiser Vergleich aus _find_neighboring_detections."""
+    neighbors = []
+    target_bbox = target.get("bbox", [])
+    if len(target_bbox) != 4:
+        return neighbors
+    for detections in all_detections.values():
+        for detection in detections:
+            if detection == target:
+                continue
+            if _proximity(target_bbox, detection.get("bbox", [])) < 100:
+                neighbors.append(
+                    {
+                        "type": detection.get("type"),
+                        "confidence": detection.get("confidence"),
+                        "distance": _proximity(target_bbox, detection.get("bbox", [])),
+                    }
+                )
+    return sorted(neighbors, key=lambda x: x["distance"])[:5]
+
+
+def _detections(count, seed=0, width=1920, height=1080):
+    rng = random.Random(seed)
+    detections = {"restraints": [], "body_parts": [], "poses": []}
+    for i in range(count):
+        bbox = [
+            rng.uniform(0, width),
+            rng.uniform(0, height),
+            rng.uniform(5, 80),
+            rng.uniform(5, 80),
+        ]
+        detections[rng.choice(list(detections))].append(
+            {
+                "type": rng.choice(["rope", "chain", "pose"]),
+                "confidence": i,
+                "bbox": bbox,
+            }
+        )
+    return detections
+
+
+@pytest.mark.unit
+class TestSpatialIndex:
+    """Test Suite für SpatialIndex."""
+
+    def test_neighbors_match_pairwise_comparison(self):
+        """Test, dass der Index dieselben Nachbarn liefert wie alle Paarvergleiche."""
+        detections = _detections(400, width=800, height=600)
+        # Sonderfälle: ungültige Boxen, Duplikate, gleiche Distanzen
+        detections["restraints"] += [
+            {"type": "rope", "confidence": 0.9, "bbox": [10, 10, 20]},
+            {"type": "rope", "confidence": 0.9},
+            {"type": "rope", "confidence": 0.9, "bbox": [float("nan"), 0, 10, 10]},
+            {"type": "rope", "confidence": 0.8, "bbox": [100, 100, 20, 20]},
+            {"type": "rope", "confidence": 0.8, "bbox": [100, 100, 20, 20]},
+            {"type": "chain", "confidence": 0.7, "bbox": [150, 100, 20, 20]},
+            {"type": "pose", "confidence": 0.6, "bbox": [50, 100, 20, 20]},
+        ]
+        index = SpatialIndex.from_detections(detections)
+
+        for items in detections.values():
+            for target in items:
+                assert find_neighbors(index, target) == _legacy_neighbors(
+                    target, detections
+                )
+
+    def test_radius_query(self):
+        """Test der Radiusabfrage gegen eine direkte Berechnung."""
+        rng = random.Random(1)
+        boxes = [
+            [rng.uniform(-500, 500), rng.uniform(-500, 500), 10, 10]
+            for _ in range(300)
+        ]
+        index = SpatialIndex(boxes, cell_size=37.0)
+
+        for radius in (1.0, 50.0, 250.0, math.inf):
+            x, y = rng.uniform(-400, 400), rng.uniform(-400, 400)
+            expected = sorted(
+                (math.sqrt((x - bx - 5) ** 2 + (y - by - 5) ** 2), i)
+                for i, (bx, by, _, _) in enumerate(boxes)
+                if math.sqrt((x - bx - 5) ** 2 + (y - by - 5) ** 2) < radius
+            )
+            result = index.query_radius(x, y, radius)
+            assert [i for _, i in result] == [i for _, i in expected]
+            assert [d for d, _ in result] == pytest.approx([d for d, _ in expected])
+
+        assert index.query_radius(float("nan"), 0.0, 10.0) == []
+
+    def test_overlap_query(self):
+        """Test der Überlappungsabfrage auch für Boxen über mehrere Zellen."""
+        rng = random.Random(2)
+        boxes = [
+            [
+                rng.uniform(0, 1000),
+                rng.uniform(0, 1000),
+                rng.uniform(1, 300),
+                rng.uniform(1, 300),
+            ]
+            for _ in range(300)
+        ] + [[0, 0, 5]]
+        index = SpatialIndex(boxes, cell_size=50.0)
+
+        for _ in range(50):
+            x, y, w, h = (
+                rng.uniform(0, 1000),
+                rng.uniform(0, 1000),
+                rng.uniform(1, 200),
+                rng.uniform(1, 200),
+            )
+            expected = [
+                i
+                for i, box in enumerate(boxes)
+                if len(box) == 4
+                and x < box[0] + box[2]
+                and box[0] < x + w
+                and y < box[1] + box[3]
+                and box[1] < y + h
+            ]
+            assert index.query_overlap([x, y, w, h]) == expected
+
+        # Angrenzende Boxen überschneiden sich nicht
+        assert SpatialIndex([[0, 0, 10, 10]]).query_overlap([10, 0, 10, 10]) == []
+
+    def test_invalid_cell_size(self):
+        """Test, dass eine nicht positive Zellgröße abgelehnt wird."""
+        with pytest.raises(ValueError):
+            SpatialIndex([], cell_size=0)
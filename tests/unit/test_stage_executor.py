@@ -0,0 +1,245 @@
+"""
+Unit Tests für den mehrstufigen Pipeline-Executor der Vision Pipeline.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+from services.vision_pipeline.stage_executor import Stage, StagedExecutor
+
+
+async def _collect(executor, source, **kwargs):
+    return [item async for item in executor.run(source, **kwargs)]
+
+
+@pytest.mark.unit
+class TestStagedExecutor:
+    """Test Suite für StagedExecutor."""
+
+    async def test_results_keep_input_order(self):
+        """Test der Reihenfolge trotz unterschiedlicher Laufzeiten."""
+
+        async def jitter(x):
+            await asyncio.sleep(random.uniform(0, 0.005))
+            return x * 2
+
+        executor = StagedExecutor(
+            [Stage("double", jitter, workers=8), Stage("inc", lambda x: x + 1)]
+        )
+
+        results = await _collect(executor, range(50))
+
+        assert results == [(i, i * 2 + 1) for i in range(50)]
+
+    async def test_unordered_yields_all_results(self):
+        """Test der ungeordneten Ausgabe."""
+
+        async def jitter(x):
+            await asyncio.sleep(random.uniform(0, 0.005))
+            return x
+
+        executor = StagedExecutor([Stage("jitter", jitter, workers=4)])
+
+        results = await _collect(executor, range(20), ordered=False)
+
+        assert sorted(value for _, value in results) == list(range(20))
+
+    async def test_async_source_is_consumed(self):
+        """Test mit asynchroner Quelle."""
+
+        async def source():
+            for i in range(5):
+                yield i
+
+        executor = StagedExecutor([Stage("identity", lambda x: x)])
+
+        results = await _collect(executor, source())
+
+        assert [value for _, value in results] == list(range(5))
+
+    async def test_queues_are_bounded(self):
+        """Test der Backpressure vor einer langsamen Stage."""
+
+        async def slow(x):
+            await asyncio.sleep(0.002)
+            return x
+
+        executor = StagedExecutor(
+            [
+                Stage("fast", lambda x: x, workers=4, queue_size=3),
+                Stage("slow", slow, workers=1, queue_size=3),
+            ]
+        )
+
+        await _collect(executor, range(40))
+        metrics = executor.get_metrics()
+
+        assert metrics["stages"]["slow"]["queue_depth_max"] <= 3
+        assert metrics["stages"]["fast"]["queue_depth_max"] <= 3
+        assert metrics["stages"]["fast"]["blocked_ratio"] > 0
+
+    async def test_stages_overlap(self):
+        """Test der Überlappung: Laufzeit ~ langsamste Stage statt Summe."""
+
+        def decode(x):
+            time.sleep(0.01)
+            return x
+
+        async def infer(x):
+            await asyncio.sleep(0.01)
+            return x
+
+        executor = StagedExecutor([Stage("decode", decode), Stage("infer", infer)])
+
+        started = time.perf_counter()
+        await _collect(executor, range(20))
+        elapsed = time.perf_counter() - started
+
+        sequential = 20 * 0.02
+        assert elapsed < sequential * 0.8
+
+    async def test_bottleneck_is_reported(self):
+        """Test der Engpass-Erkennung über die Auslastung."""
+
+        async def cheap(x):
+            return x
+
+        async def expensive(x):
+            await asyncio.sleep(0.005)
+            return x
+
+        executor = StagedExecutor(
+            [Stage("cheap", cheap, workers=2), Stage("expensive", expensive)]
+        )
+
+        await _collect(executor, range(20))
+        metrics = executor.get_metrics()
+
+        assert metrics["bottleneck"] == "expensive"
+        assert metrics["stages"]["expensive"]["occupancy"] > 0.5
+        assert metrics["stages"]["expensive"]["processed"] == 20
+
+    async def test_sync_functions_run_in_thread_pool(self):
+        """Test, dass synchrone Stages den Event-Loop nicht blockieren."""
+        main_thread = threading.get_ident()
+        threads = set()
+
+        def record(x):
+            threads.add(threading.get_ident())
+            return x
+
+        executor = StagedExecutor([Stage("record", record, workers=2)])
+
+        await _collect(executor, range(5))
+
+        assert threads and main_thread not in threads
+
+    async def test_failure_raises_by_default(self):
+        """Test des Abbruchs bei Stage-Fehlern."""
+
+        def fail_on_three(x):
+            if x == 3:
+                raise ValueError("kaputt")
+            return x
+
+        executor = StagedExecutor([Stage("check", fail_on_three)])
+
+        with pytest.raises(ValueError, match="kaputt"):
+            await _collect(executor, range(10))
+
+    async def test_failure_is_isolated_with_return_exceptions(self):
+        """Test, dass ein fehlerhaftes Item folgende Stages überspringt."""
+        seen = []
+
+        def fail_on_three(x):
+            if x == 3:
+                raise ValueError("kaputt")
+            return x
+
+        def record(x):
+            seen.append(x)
+            return x
+
+        executor = StagedExecutor(
+            [Stage("check", fail_on_three), Stage("record", record)]
+        )
+
+        results = await _collect(executor, range(6), return_exceptions=True)
+
+        assert isinstance(results[3][1], ValueError)
+        assert [v for _, v in results if not isinstance(v, Exception)] == [
+            0,
+            1,
+            2,
+            4,
+            5,
+        ]
+        assert 3 not in seen
+        assert executor.get_metrics()["stages"]["check"]["failed"] == 1
+
+    async def test_source_errors_propagate(self):
+        """Test der Weitergabe von Fehlern der Quelle."""
+
+        async def source():
+            yield 1
+            raise RuntimeError("Decoder-Fehler")
+
+        executor = StagedExecutor([Stage("identity", lambda x: x)])
+
+        with pytest.raises(RuntimeError, match="Decoder-Fehler"):
+            await _collect(executor, source())
+
+    async def test_cancel_with_full_queues_does_not_hang(self):
+        """Test des Abbruchs, während Quelle und Queues blockiert sind."""
+        started = asyncio.Event()
+
+        async def stuck(x):
+            started.set()
+            await asyncio.Event().wait()
+
+        async def consume():
+            async for _ in executor.run(itertools.count()):
+                pass
+
+        executor = StagedExecutor([Stage("stuck", stuck, queue_size=2)])
+        task = asyncio.ensure_future(consume())
+        await started.wait()
+        await asyncio.sleep(0.01)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=2)
+
+    async def test_consumer_error_closes_source(self):
+        """Test, dass ein Fehler des Verbrauchers Quelle und Stages beendet."""
+        closed = asyncio.Event()
+
+        async def source():
+            try:
+                for value in itertools.count():
+                    yield value
+            finally:
+                closed.set()
+
+        executor = StagedExecutor([Stage("identity", lambda x: x, queue_size=2)])
+
+        with pytest.raises(RuntimeError, match="Schreibfehler"):
+            async with contextlib.aclosing(executor.run(source())) as results:
+                async for index, _ in results:
+                    if index == 3:
+                        raise RuntimeError("Schreibfehler")
+
+        assert closed.is_set()
+
+    def test_invalid_configuration(self):
+        """Test der Validierung der Stage-Konfiguration."""
+        with pytest.raises(ValueError):
+            StagedExecutor([])
+        with pytest.raises(ValueError):
+            StagedExecutor([Stage("broken", lambda x: x, workers=0)])
@@ -0,0 +1,186 @@
+"""
+Unit Tests für den zusammenfassenden Status-Reporter der Vision Pipeline.
+"""
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from services.vision_pipeline.status_reporter import StatusReporter
+
+
+class JobManagerStub:
+    """Lokaler Job-Manager, der empfangene Status-Updates aufzeichnet."""
+
+    def __init__(self) -> None:
+        self.updates = []
+        self.delay = 0.0
+        self.failures = 0
+        self.url = ""
+        self._runner = None
+
+    async def _status(self, request):
+        await asyncio.sleep(self.delay)
+        if self.failures > 0:
+            self.failures -= 1
+            return web.Response(status=503, text="nicht verfügbar")
+        self.updates.append((request.match_info["job_id"], await request.json()))
+        return web.json_response({"ok": True})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/jobs/{job_id}/status", self._status)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    def for_job(self, job_id):
+        return [update for jid, update in self.updates if jid == job_id]
+
+
+@pytest.fixture
+async def job_manager():
+    stub = JobManagerStub()
+    await stub.start()
+    yield stub
+    await stub.stop()
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Bedingung nicht rechtzeitig erfüllt")
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.unit
+class TestStatusReporter:
+    """Test Suite für StatusReporter."""
+
+    async def test_progress_updates_are_coalesced(self, job_manager):
+        """Test, dass viele Fortschritts-Updates zu einem Request werden."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        for i in range(100):
+            reporter.report("job", "processing", progress=i / 100)
+        assert await asyncio.to_thread(reporter.flush)
+
+        updates = job_manager.for_job("job")
+        assert len(updates) == 1
+        assert updates[0]["status"] == "processing"
+        assert updates[0]["progress"] == 0.99
+        stats = reporter.get_statistics()
+        assert stats["reported"] == 100
+        assert stats["coalesced"] == 99
+        assert stats["sent"] == 1
+        await asyncio.to_thread(reporter.close)
+
+    async def test_terminal_state_is_sent_immediately(self, job_manager):
+        """Test, dass Endzustände nicht auf das Flush-Intervall warten."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        reporter.report("job", "processing", progress=0.5)
+        reporter.report("job", "completed", progress=1.0, result={"frames": 3})
+        await _wait_for(lambda: job_manager.for_job("job"))
+
+        assert job_manager.for_job("job") == [
+            {
+                "status": "completed",
+                "progress": 1.0,
+                "result": {"frames": 3},
+                "updated_at": job_manager.for_job("job")[0]["updated_at"],
+            }
+        ]
+        await asyncio.to_thread(reporter.close)
+
+    async def test_terminal_state_drops_intermediate_fields(self, job_manager):
+        """Test, dass ein Endzustand keine Zwischenergebnisse mitsendet."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        reporter.report("job", "processing", progress=0.4, result={"partial": 1})
+        reporter.report("job", "failed", error="kaputt")
+        await asyncio.to_thread(reporter.flush)
+
+        (update,) = job_manager.for_job("job")
+        assert update["status"] == "failed" and update["error"] == "kaputt"
+        assert "result" not in update and "progress" not in update
+        assert reporter.get_statistics()["coalesced"] == 1
+        await asyncio.to_thread(reporter.close)
+
+    async def test_late_progress_after_terminal_state_is_dropped(self, job_manager):
+        """Test, dass veraltete Updates einen Endzustand nicht überschreiben."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        reporter.report("job", "failed", error="kaputt")
+        reporter.report("job", "processing", progress=0.8)
+        await asyncio.to_thread(reporter.flush)
+
+        assert [u["status"] for u in job_manager.for_job("job")] == ["failed"]
+        assert reporter.get_statistics()["dropped"] == 1
+        await asyncio.to_thread(reporter.close)
+
+    async def test_restarted_job_reports_progress_again(self, job_manager):
+        """Test, dass ein erneut gestarteter Job wieder Fortschritt meldet."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        reporter.report("job", "failed", error="kaputt")
+        await asyncio.to_thread(reporter.flush)
+        reporter.start("job")
+        reporter.report("job", "processing", progress=0.5)
+        await asyncio.to_thread(reporter.flush)
+
+        updates = job_manager.for_job("job")
+        assert [u["status"] for u in updates] == ["failed", "processing"]
+        assert updates[1]["progress"] == 0.5 and "error" not in updates[1]
+        assert reporter.get_statistics()["dropped"] == 0
+        await asyncio.to_thread(reporter.close)
+
+    async def test_report_does_not_wait_for_slow_job_manager(self, job_manager):
+        """Test, dass report() auch bei langsamem Job-Manager sofort zurückkehrt."""
+        job_manager.delay = 0.2
+        reporter = StatusReporter(job_manager.url, flush_interval=0.01)
+        reporter.report("warmup", "processing", progress=0.0)
+
+        start = time.perf_counter()
+        for i in range(1000):
+            reporter.report("job", "processing", progress=i / 1000)
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.2
+        await asyncio.to_thread(reporter.close)
+        assert job_manager.for_job("job")[-1]["progress"] == 0.999
+
+    async def test_failed_updates_are_retried(self, job_manager):
+        """Test der Wiederholung fehlgeschlagener Updates."""
+        job_manager.failures = 2
+        reporter = StatusReporter(job_manager.url, flush_interval=60, max_attempts=3)
+
+        reporter.report("job", "completed", progress=1.0)
+        for _ in range(3):
+            await asyncio.to_thread(reporter.flush)
+
+        assert [u["status"] for u in job_manager.for_job("job")] == ["completed"]
+        stats = reporter.get_statistics()
+        assert stats["failed"] == 2
+        assert stats["pending"] == 0
+        await asyncio.to_thread(reporter.close)
+
+    async def test_close_sends_pending_updates(self, job_manager):
+        """Test, dass close() ausstehende Updates noch sendet."""
+        reporter = StatusReporter(job_manager.url, flush_interval=60)
+
+        reporter.report("a", "processing", progress=0.3)
+        reporter.report("b", "processing", progress=0.6)
+        await asyncio.to_thread(reporter.close)
+
+        assert job_manager.for_job("a")[0]["progress"] == 0.3
+        assert job_manager.for_job("b")[0]["progress"] == 0.6
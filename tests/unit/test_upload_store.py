@@ -0,0 +1,204 @@
+"""
+Unit Tests für die Upload-Ablage der Vision-Pipeline-API.
+"""
+
+import hashlib
+import os
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from services.vision_pipeline.upload_store import (
+    UploadOffsetMismatch,
+    UploadStore,
+    media_kind_for,
+    record_job_failure,
+    record_job_success,
+)
+
+CONTENT = os.urandom(300_000)
+
+
+async def _stream(data, chunk_size=64 * 1024):
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+def _rq_job(store, media, job_id, finished=False, failed=False, result=None):
+    return SimpleNamespace(
+        id=job_id,
+        meta={"upload_dir": store.directory, "sha256": media.sha256},
+        is_finished=finished,
+        is_failed=failed,
+        result=result,
+    )
+
+
+async def _upload(store, data, filename="clip.mp4", chunk_size=100_000):
+    session = store.create(filename, len(data))
+    offset = 0
+    while offset < len(data):
+        offset = await store.append(
+            session.upload_id, offset, _stream(data[offset : offset + chunk_size])
+        )
+    return store.complete(session.upload_id)
+
+
+@pytest.mark.unit
+class TestUploadStore:
+    """Test Suite für UploadStore."""
+
+    async def test_chunked_upload_is_hashed_while_streaming(self, tmp_path):
+        """Test von Chunk-Upload, Content-Hash und inhaltsadressierter Ablage."""
+        store = UploadStore(str(tmp_path))
+
+        media = await _upload(store, CONTENT)
+
+        assert media.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        assert media.kind == "video"
+        assert not media.duplicate
+        assert media.path.endswith(f"{media.sha256}.mp4")
+        with open(media.path, "rb") as f:
+            assert f.read() == CONTENT
+        assert os.listdir(store.parts_dir) == []
+
+    async def test_resume_after_restart(self, tmp_path):
+        """Test der Fortsetzung per Offset mit neuer Store-Instanz."""
+        store = UploadStore(str(tmp_path))
+        session = store.create("clip.mp4", len(CONTENT))
+        await store.append(session.upload_id, 0, _stream(CONTENT[:120_000]))
+
+        restarted = UploadStore(str(tmp_path))
+        offset = restarted.offset(session.upload_id)
+        await restarted.append(session.upload_id, offset, _stream(CONTENT[offset:]))
+        media = restarted.complete(session.upload_id)
+
+        assert offset == 120_000
+        assert media.sha256 == hashlib.sha256(CONTENT).hexdigest()
+
+    async def test_offset_mismatch_is_rejected(self, tmp_path):
+        """Test, dass doppelte oder lückenhafte Chunks abgewiesen werden."""
+        store = UploadStore(str(tmp_path))
+        session = store.create("clip.mp4", len(CONTENT))
+        await store.append(session.upload_id, 0, _stream(CONTENT[:1000]))
+
+        with pytest.raises(UploadOffsetMismatch) as error:
+            await store.append(session.upload_id, 0, _stream(CONTENT[:1000]))
+
+        assert error.value.expected == 1000
+        assert store.offset(session.upload_id) == 1000
+
+    async def test_oversized_and_incomplete_uploads(self, tmp_path):
+        """Test der Größenprüfung beim Schreiben und Abschließen."""
+        store = UploadStore(str(tmp_path), max_size=len(CONTENT))
+        session = store.create("bild.jpg", 1000)
+
+        with pytest.raises(ValueError):
+            await store.append(session.upload_id, 0, _stream(CONTENT[:2000], 1500))
+        with pytest.raises(ValueError):
+            store.complete(session.upload_id)
+        with pytest.raises(ValueError):
+            store.create("clip.mp4", len(CONTENT) + 1)
+
+    async def test_identical_content_is_deduplicated(self, tmp_path):
+        """Test, dass identische Inhalte auf den vorhandenen Job verweisen."""
+        store = UploadStore(str(tmp_path))
+        first = await _upload(store, CONTENT, filename="a.mp4")
+        store.record_job(first.sha256, "video_1")
+
+        second = await _upload(store, CONTENT, filename="b.mp4")
+
+        assert second.duplicate
+        assert second.path == first.path
+        assert second.job_id == "video_1"
+        assert store.lookup(first.sha256.upper())["job_id"] == "video_1"
+        assert store.get_statistics()["deduplicated"] == 1
+        assert len(os.listdir(store.media_dir)) == 1
+
+    async def test_result_outlives_expired_rq_job(self, tmp_path):
+        """Test, dass ein abgeschlossener Job nach Ablauf in RQ gefunden wird."""
+        store = UploadStore(str(tmp_path))
+        media = await _upload(store, CONTENT)
+        store.record_job(media.sha256, "video_1")
+        job = _rq_job(store, media, "video_1")
+        result = {"status": "success", "output_path": "/out/video_1.json"}
+
+        # Laufender Job: Ergebnis noch offen
+        assert store.find_job(media.sha256, {"video_1": job}.get) == {
+            "job_id": "video_1",
+            "result": None,
+        }
+
+        record_job_success(job, None, result)
+
+        # RQ-Job nach result_ttl verfallen
+        assert store.find_job(media.sha256, lambda job_id: None) == {
+            "job_id": "video_1",
+            "result": result,
+        }
+        assert store.lookup(media.sha256)["job_status"] == "completed"
+
+    async def test_failed_or_unknown_jobs_are_reprocessed(self, tmp_path):
+        """Test, dass fehlgeschlagene oder verlorene Jobs neu verarbeitet werden."""
+        store = UploadStore(str(tmp_path))
+        media = await _upload(store, CONTENT)
+        store.record_job(media.sha256, "video_1")
+
+        # Verfallen ohne gespeichertes Ergebnis
+        assert store.find_job(media.sha256, lambda job_id: None) is None
+
+        record_job_success(
+            _rq_job(store, media, "video_1"), None, {"status": "error", "error": "x"}
+        )
+        assert store.find_job(media.sha256, lambda job_id: None) is None
+
+        store.record_job(media.sha256, "video_2")
+        assert "job_status" not in store.lookup(media.sha256)
+        record_job_failure(_rq_job(store, media, "video_2"), None, RuntimeError)
+        assert store.lookup(media.sha256)["job_status"] == "failed"
+
+        # Spätes Ergebnis eines abgelösten Jobs ändert nichts
+        store.record_job(media.sha256, "video_3")
+        record_job_success(_rq_job(store, media, "video_2"), None, {})
+        assert "job_status" not in store.lookup(media.sha256)
+
+    async def test_checksum_mismatch(self, tmp_path):
+        """Test, dass ein falscher Client-Hash den Upload verwirft."""
+        store = UploadStore(str(tmp_path))
+        session = store.create("clip.mp4", 10, sha256="0" * 64)
+        await store.append(session.upload_id, 0, _stream(CONTENT[:10]))
+
+        with pytest.raises(ValueError):
+            store.complete(session.upload_id)
+        with pytest.raises(KeyError):
+            store.get(session.upload_id)
+
+    async def test_chunks_are_not_buffered_in_memory(self, tmp_path):
+        """Test, dass große Uploads nur chunkweise im Speicher liegen."""
+        store = UploadStore(str(tmp_path))
+        size = 16 * 1024 * 1024
+        session = store.create("gross.mp4", size)
+        block = os.urandom(64 * 1024)
+
+        async def generate():
+            for _ in range(size // len(block)):
+                yield block
+
+        tracemalloc.start()
+        await store.append(session.upload_id, 0, generate())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert store.offset(session.upload_id) == size
+        assert peak < 2 * 1024 * 1024
+
+    def test_unknown_and_invalid_ids(self, tmp_path):
+        """Test ungültiger Upload-IDs und Dateiformate."""
+        store = UploadStore(str(tmp_path))
+
+        with pytest.raises(KeyError):
+            store.get("../../etc/passwd")
+        assert store.lookup("nicht-hex") is None
+        with pytest.raises(ValueError):
+            media_kind_for("dokument.pdf")
@@ -0,0 +1,176 @@
+"""
+Unit Tests für die vorgeladene Laufzeitumgebung des Vision-Pipeline-Workers.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from services.vision_pipeline.worker_runtime import PipelineRuntime, resolve_worker_mode
+
+LOAD_TIME = 0.2
+
+
+class FakePipeline:
+    """Pipeline mit teurer Initialisierung und prozessgebundenem Zustand."""
+
+    instances = 0
+
+    def __init__(self) -> None:
+        time.sleep(LOAD_TIME)
+        FakePipeline.instances += 1
+        self.created_in = os.getpid()
+        self.reset_in = None
+        self.loops = []
+
+    def reset_after_fork(self) -> None:
+        self.reset_in = os.getpid()
+
+    async def process(self, value):
+        self.loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(0)
+        return value * 2
+
+
+def _forked_job(runtime, connection):
+    runtime.mark_dispatched()
+    pipeline, latency = runtime.start_job("job")
+    result = runtime.run(pipeline.process(21))
+    connection.send(
+        {
+            "builds": runtime.pipeline_builds,
+            "created_in": pipeline.created_in,
+            "reset_in": pipeline.reset_in,
+            "pid": os.getpid(),
+            "latency": latency,
+            "result": result,
+        }
+    )
+    connection.close()
+
+
+@pytest.mark.unit
+class TestPipelineRuntime:
+    """Test Suite für PipelineRuntime."""
+
+    def test_pipeline_is_built_once_for_all_jobs(self):
+        """Test, dass Jobs die vorgeladene Pipeline wiederverwenden."""
+        runtime = PipelineRuntime(FakePipeline, mode="inprocess")
+        preloaded = runtime.preload()
+
+        latencies = []
+        for i in range(3):
+            runtime.mark_dispatched()
+            pipeline, latency = runtime.start_job(f"job_{i}")
+            assert pipeline is preloaded
+            latencies.append(latency)
+
+        stats = runtime.get_statistics()
+        assert stats["pipeline_builds"] == 1
+        assert stats["jobs_started"] == 3
+        assert stats["load_time"] >= LOAD_TIME
+        assert max(latencies) < LOAD_TIME / 10
+        runtime.close()
+
+    def test_lazy_build_is_part_of_startup_latency(self):
+        """Test der Startlatenz ohne Vorladen."""
+        runtime = PipelineRuntime(FakePipeline, mode="inprocess")
+
+        runtime.mark_dispatched()
+        _, latency = runtime.start_job("job")
+
+        assert latency >= LOAD_TIME
+        assert not runtime.get_statistics()["preloaded"]
+
+    def test_inprocess_jobs_share_one_event_loop(self):
+        """Test, dass Jobs im inprocess-Betrieb denselben Loop verwenden."""
+        runtime = PipelineRuntime(FakePipeline, mode="inprocess")
+        pipeline = runtime.preload()
+
+        assert runtime.run(pipeline.process(1)) == 2
+        assert runtime.run(pipeline.process(2)) == 4
+
+        assert pipeline.loops[0] is pipeline.loops[1]
+        runtime.close()
+
+    def test_fork_mode_uses_fresh_loop_per_job(self):
+        """Test, dass im Fork-Betrieb kein Loop über Jobs hinweg lebt."""
+        runtime = PipelineRuntime(FakePipeline, mode="fork")
+        pipeline = runtime.preload()
+
+        runtime.run(pipeline.process(1))
+        runtime.run(pipeline.process(2))
+
+        assert pipeline.loops[0] is not pipeline.loops[1]
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(),
+        reason="fork nicht verfügbar",
+    )
+    def test_forked_job_reuses_preloaded_pipeline(self):
+        """Test, dass ein Work-Horse die Pipeline des Elternprozesses erbt."""
+        runtime = PipelineRuntime(
+            FakePipeline,
+            mode="fork",
+            after_fork=lambda pipeline: pipeline.reset_after_fork(),
+        )
+        runtime.preload()
+
+        context = multiprocessing.get_context("fork")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=_forked_job, args=(runtime, sender))
+        process.start()
+        report = receiver.recv()
+        process.join(timeout=10)
+
+        assert process.exitcode == 0
+        assert report["result"] == 42
+        assert report["builds"] == 1
+        assert report["created_in"] == os.getpid()
+        assert report["reset_in"] == report["pid"] != os.getpid()
+        assert report["latency"] < LOAD_TIME
+
+    def test_warm_up_runs_on_preloaded_pipeline(self):
+        """Test des Aufwärm-Jobs beim Worker-Start."""
+        runtime = PipelineRuntime(FakePipeline, mode="fork")
+
+        duration = runtime.warm_up(lambda pipeline: pipeline.process(1))
+
+        stats = runtime.get_statistics()
+        assert stats["preloaded"]
+        assert stats["warmup_time"] == duration
+        assert stats["jobs_started"] == 0
+
+    def test_failed_warm_up_does_not_stop_worker(self):
+        """Test, dass ein fehlgeschlagener Aufwärm-Job nur protokolliert wird."""
+
+        async def failing(pipeline):
+            raise RuntimeError("Service nicht erreichbar")
+
+        runtime = PipelineRuntime(FakePipeline, mode="fork")
+
+        assert runtime.warm_up(failing) is None
+        assert runtime.get_statistics()["warmup_time"] is None
+
+    def test_unknown_mode_is_rejected(self):
+        """Test der Validierung der Betriebsart."""
+        with pytest.raises(ValueError):
+            PipelineRuntime(FakePipeline, mode="threads")
+
+
+@pytest.mark.unit
+class TestResolveWorkerMode:
+    """Test Suite für die Wahl der Betriebsart."""
+
+    def test_fork_is_default_without_cuda(self):
+        """Test des Fork-Betriebs ohne GPU."""
+        assert resolve_worker_mode(None, cuda_available=False) == "fork"
+        assert resolve_worker_mode("inprocess", cuda_available=False) == "inprocess"
+
+    @pytest.mark.parametrize("requested", [None, "fork", "inprocess"])
+    def test_cuda_forces_inprocess(self, requested):
+        """Test, dass mit CUDA nie im geforkten Work-Horse gearbeitet wird."""
+        assert resolve_worker_mode(requested, cuda_available=True) == "inprocess"